@@ -1,7 +1,10 @@
-import json
+import asyncio
 from typing import Optional, Dict, Any
 
 from domain.interfaces.llm_provider_interface import ILLMProvider
+from tools.empacotamento_prompt import empacotar_dados
+from tools.orcamento_tokens import POLITICA_FRAGMENTAR, POLITICA_TRUNCAR
+from tools.progresso_llm import CallbackProgresso
 
 class AgenteProcessador:
     """
@@ -53,7 +56,11 @@ class AgenteProcessador:
         instrucoes_extras: str = "",
         usar_rag: bool = False,
         model_name: Optional[str] = None,
-        max_token_out: int = 15000
+        max_token_out: int = 15000,
+        formato_prompt: Optional[str] = None,
+        politica_orcamento: Optional[str] = None,
+        ao_progredir: Optional[CallbackProgresso] = None,
+        saida_estruturada: bool = False
     ) -> Dict[str, Any]:
         """
         Processa dados estruturados através do provedor de LLM configurado.
@@ -80,6 +87,16 @@ class AgenteProcessador:
                 Se None, usa o modelo padrão do provedor. Defaults to None
             max_token_out (int, optional): Limite máximo de tokens na resposta.
                 Defaults to 15000
+            formato_prompt (Optional[str], optional): Formato de serialização dos
+                dados (ver tools/empacotamento_prompt.py). Defaults to None ('json')
+            politica_orcamento (Optional[str], optional): 'rejeitar' ou 'truncar' se os
+                dados não couberem na janela de contexto do modelo. Dados estruturados
+                não são fragmentados: 'fragmentar' é tratado como 'truncar'.
+                Defaults to None ('rejeitar')
+            ao_progredir (Optional[CallbackProgresso], optional): Recebe o progresso da
+                geração em streaming. Defaults to None
+            saida_estruturada (bool, optional): Se a resposta do modelo deve seguir o
+                esquema JSON do tipo de análise. Defaults to False
         
         Returns:
             Dict[str, Any]: Dicionário estruturado contendo:
@@ -93,20 +110,15 @@ class AgenteProcessador:
         
         Note:
             - Os parâmetros repositorio e nome_branch são ignorados intencionalmente
-            - O código de entrada é serializado em JSON com formatação legível
+            - O código de entrada é serializado em JSON com formatação legível, ou
+              no formato_prompt da etapa
             - Instruções extras são passadas diretamente ao provedor de LLM
         """
-        # Serializa os dados de entrada em formato JSON legível para o LLM
-        codigo_str = json.dumps(codigo, indent=2, ensure_ascii=False)
-
-        # Delega o processamento para o provedor de LLM injetado
         resultado_da_ia = self.llm_provider.executar_prompt(
-            tipo_tarefa=tipo_analise,
-            prompt_principal=codigo_str,
-            instrucoes_extras=instrucoes_extras,
-            usar_rag=usar_rag,
-            model_name=model_name,
-            max_token_out=max_token_out
+            **self._montar_requisicao(
+                tipo_analise, codigo, instrucoes_extras, usar_rag, model_name, max_token_out,
+                formato_prompt, politica_orcamento, ao_progredir, saida_estruturada
+            )
         )
 
         # Retorna resultado em formato padronizado esperado pelo sistema
@@ -114,4 +126,70 @@ class AgenteProcessador:
             "resultado": {
                 "reposta_final": resultado_da_ia
             }
-        }
\ No newline at end of file
+        }
+
+    async def main_async(
+        self,
+        tipo_analise: str,
+        codigo: Dict[str, Any],
+        repositorio: Optional[str] = None,  # Será ignorado
+        nome_branch: Optional[str] = None,  # Será ignorado
+        instrucoes_extras: str = "",
+        usar_rag: bool = False,
+        model_name: Optional[str] = None,
+        max_token_out: int = 15000,
+        formato_prompt: Optional[str] = None,
+        politica_orcamento: Optional[str] = None,
+        ao_progredir: Optional[CallbackProgresso] = None,
+        saida_estruturada: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Versão assíncrona de main, com os mesmos argumentos, retorno e exceções.
+
+        A serialização dos dados roda em uma thread e a chamada ao LLM usa
+        llm_provider.executar_prompt_async.
+        """
+        requisicao = await asyncio.to_thread(
+            self._montar_requisicao,
+            tipo_analise, codigo, instrucoes_extras, usar_rag, model_name, max_token_out,
+            formato_prompt, politica_orcamento, ao_progredir, saida_estruturada
+        )
+        resultado_da_ia = await self.llm_provider.executar_prompt_async(**requisicao)
+        return {
+            "resultado": {
+                "reposta_final": resultado_da_ia
+            }
+        }
+
+    @staticmethod
+    def _montar_requisicao(
+        tipo_analise: str,
+        codigo: Dict[str, Any],
+        instrucoes_extras: str,
+        usar_rag: bool,
+        model_name: Optional[str],
+        max_token_out: int,
+        formato_prompt: Optional[str],
+        politica_orcamento: Optional[str],
+        ao_progredir: Optional[CallbackProgresso],
+        saida_estruturada: bool
+    ) -> Dict[str, Any]:
+        """Argumentos de executar_prompt, com os dados serializados no formato da etapa."""
+        # Serializa os dados de entrada no formato da etapa (JSON legível por padrão)
+        codigo_str = empacotar_dados(codigo, formato_prompt)
+
+        if (politica_orcamento or '').lower() == POLITICA_FRAGMENTAR:
+            print("AVISO: O AgenteProcessador não fragmenta dados estruturados. Usando a política 'truncar'.")
+            politica_orcamento = POLITICA_TRUNCAR
+
+        return dict(
+            tipo_tarefa=tipo_analise,
+            prompt_principal=codigo_str,
+            instrucoes_extras=instrucoes_extras,
+            usar_rag=usar_rag,
+            model_name=model_name,
+            max_token_out=max_token_out,
+            politica_orcamento=politica_orcamento,
+            ao_progredir=ao_progredir,
+            saida_estruturada=saida_estruturada
+        )
@@ -1,7 +1,30 @@
+import asyncio
 import json
-from typing import Optional, Dict, Any
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, Iterable, Iterator, List, Tuple
 from domain.interfaces.repository_reader_interface import IRepositoryReader
 from domain.interfaces.llm_provider_interface import ILLMProvider
+from tools.empacotamento_prompt import empacotar_codigo
+from tools.deduplicacao import DeduplicadorDeArquivos
+from tools.snapshot_repositorio import ArmazemDeSnapshots
+from tools.aplicacao_patch import (
+    FORMATO_MUDANCAS_COMPLETO, FORMATO_MUDANCAS_PATCH, FORMATOS_MUDANCAS, MODELO_INSTRUCAO_CONTEUDO_COMPLETO,
+    SUFIXO_PROMPT_PATCH, materializar_mudancas
+)
+from tools.indice_lexico import resumir_omitidos, selecionar_por_relevancia
+from tools.fragmentacao_codigo import (
+    MAX_FRAGMENTOS_PARALELOS, MODELO_INSTRUCAO_FRAGMENTO, descrever_fragmento, mesclar_respostas, planejar_fragmentos, resumir_orcamentos
+)
+from tools.orcamento_tokens import FragmentacaoNecessaria, POLITICA_FRAGMENTAR, POLITICA_TRUNCAR, obter_tokenizador
+from tools.progresso_llm import CallbackProgresso
+from tools.saida_estruturada import ReparadorDeJson, RespostaJsonInvalida, extrair_json
+
+# Estado de uma análise depois da leitura do repositório e antes da chamada ao LLM
+PreparacaoDaAnalise = namedtuple(
+    'PreparacaoDaAnalise',
+    ['arquivos', 'originais', 'commit_sha', 'duplicatas', 'snapshot_id', 'politica_orcamento', 'parametros_llm']
+)
 
 class AgenteRevisor:
     """
@@ -20,6 +43,8 @@ class AgenteRevisor:
     Attributes:
         repository_reader (IRepositoryReader): Interface para leitura de repositórios
         llm_provider (ILLMProvider): Provedor de LLM para análise do código
+        armazem_snapshots (Optional[ArmazemDeSnapshots]): Snapshots reaproveitados
+            entre as etapas de um job
     
     Example:
         >>> from tools.github_reader import GitHubRepositoryReader
@@ -37,7 +62,8 @@ class AgenteRevisor:
     def __init__(
         self,
         repository_reader: IRepositoryReader,
-        llm_provider: ILLMProvider
+        llm_provider: ILLMProvider,
+        armazem_snapshots: Optional[ArmazemDeSnapshots] = None
     ):
         """
         Inicializa o agente com as dependências necessárias.
@@ -47,24 +73,31 @@ class AgenteRevisor:
                 que será usado para obter o código-fonte
             llm_provider (ILLMProvider): Implementação de provedor de LLM que será
                 usado para análise do código obtido
+            armazem_snapshots (Optional[ArmazemDeSnapshots]): Se informado, cada leitura
+                é registrada como snapshot e main(snapshot_id=...) a reaproveita sem
+                consultar o provedor. Defaults to None
         
         Raises:
             TypeError: Se as dependências não implementarem as interfaces esperadas
         """
         self.repository_reader = repository_reader
         self.llm_provider = llm_provider
+        self.armazem_snapshots = armazem_snapshots
 
     def _get_code(
         self,
         repositorio: str,
         nome_branch: Optional[str],
-        tipo_analise: str
-    ) -> Dict[str, str]:
+        tipo_analise: str,
+        commit_base: Optional[str] = None
+    ) -> Iterator[Tuple[str, int, str]]:
         """
         Obtém código-fonte de um repositório usando a interface injetada.
         
         Este método privado encapsula a lógica de leitura de repositório,
         fornecendo tratamento de erro consistente e logging para debugging.
+        Os arquivos são entregues sob demanda via iter_repository, sem
+        materializar o repositório inteiro em um dicionário.
         
         Args:
             repositorio (str): Nome do repositório no formato 'org/repo'
@@ -72,10 +105,11 @@ class AgenteRevisor:
                 usa a branch padrão do repositório
             tipo_analise (str): Tipo de análise que determina quais arquivos
                 serão filtrados durante a leitura
+            commit_base (Optional[str]): SHA de uma análise anterior. Se informado,
+                faz leitura incremental ("delta desde o SHA"); se None, leitura completa
         
-        Returns:
-            Dict[str, str]: Dicionário mapeando caminhos de arquivo para seu conteúdo.
-                Formato: {"caminho/arquivo.py": "conteúdo do arquivo"}
+        Yields:
+            Tuple[str, int, str]: (caminho, tamanho em bytes, conteúdo) de cada arquivo
         
         Raises:
             RuntimeError: Se houver falha na leitura do repositório, encapsulando
@@ -84,23 +118,361 @@ class AgenteRevisor:
         Note:
             - O tipo_analise é usado pelo repository_reader para filtrar arquivos relevantes
             - Logging é feito para facilitar debugging de problemas de conectividade
+            - Como é um gerador, erros de leitura surgem durante a iteração
         """
         try:
             print(f"Iniciando a leitura do repositório: {repositorio}, branch: {nome_branch}")
             
             # Delega a leitura para a implementação injetada
-            codigo_para_analise = self.repository_reader.read_repository(
+            yield from self.repository_reader.iter_repository(
                 nome_repo=repositorio,
                 tipo_analise=tipo_analise,
-                nome_branch=nome_branch
+                nome_branch=nome_branch,
+                commit_base=commit_base
             )
             
-            return codigo_para_analise
-            
         except Exception as e:
             # Encapsula exceções com contexto adicional para debugging
             raise RuntimeError(f"Falha ao ler o repositório: {e}") from e
 
+    @staticmethod
+    def _guardar_originais(arquivos: Iterable[Tuple[str, int, str]], originais: Dict[str, str]) -> Iterator[Tuple[str, int, str]]:
+        """Repassa os arquivos lidos, guardando o conteúdo original para a aplicação de patches."""
+        for caminho, tamanho, conteudo in arquivos:
+            originais[caminho] = conteudo
+            yield caminho, tamanho, conteudo
+
+    @staticmethod
+    def _serializar_codigo(arquivos: Iterable[Tuple[str, int, str]], formato_prompt: Optional[str] = None) -> Optional[str]:
+        """
+        Empacota os arquivos no texto enviado ao LLM, no formato escolhido pela etapa.
+        
+        O formato padrão ('json') produz exatamente o mesmo texto que
+        json.dumps(dict, indent=2, ensure_ascii=False), mas arquivo a arquivo: o
+        conteúdo original de cada arquivo pode ser liberado assim que é codificado.
+        Os formatos disponíveis estão em tools/empacotamento_prompt.py.
+        
+        Returns:
+            Optional[str]: Texto do prompt, ou None se nenhum arquivo for recebido
+        """
+        return empacotar_codigo(arquivos, formato_prompt)
+
+    def _contador_de_tokens_por_arquivo(self, model_name: Optional[str], formato_prompt: Optional[str]):
+        """Conta os tokens de um arquivo já empacotado no formato da etapa."""
+        tokenizador = obter_tokenizador(model_name)
+        return lambda arquivo: tokenizador.contar(self._serializar_codigo(iter([arquivo]), formato_prompt))
+
+    def _selecionar_relevantes(
+        self,
+        arquivos: List[Tuple[str, int, str]],
+        tipo_analise: str,
+        instrucoes_extras: str,
+        max_tokens: int,
+        formato_prompt: Optional[str],
+        model_name: Optional[str]
+    ) -> Tuple[List[Tuple[str, int, str]], List[Tuple[str, int, str]]]:
+        """
+        Ranqueia os arquivos por BM25 contra as instruções e o tipo de análise e
+        mantém os mais relevantes que cabem em max_tokens.
+
+        Returns:
+            Tuple[List, List]: Arquivos selecionados e omitidos
+        """
+        if not instrucoes_extras.strip():
+            print("AVISO: Seleção por relevância ignorada: a etapa não tem instruções para ranquear os arquivos.")
+            return arquivos, []
+        return selecionar_por_relevancia(
+            arquivos,
+            f"{tipo_analise.replace('_', ' ')}\n{instrucoes_extras}",
+            max_tokens,
+            self._contador_de_tokens_por_arquivo(model_name, formato_prompt)
+        )
+
+    def _requisicao_do_fragmento(
+        self,
+        fragmento: List[Tuple[str, int, str]],
+        numero: int,
+        total: int,
+        formato_prompt: Optional[str],
+        instrucoes_extras: str,
+        parametros_llm: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Argumentos de executar_prompt para um fragmento, com a instrução que o situa no repositório."""
+        instrucao_fragmento = MODELO_INSTRUCAO_FRAGMENTO.format(
+            numero=numero, total=total, diretorios=descrever_fragmento(fragmento)
+        )
+        parametros_llm = dict(parametros_llm)
+        ao_progredir = parametros_llm.pop('ao_progredir', None)
+        if ao_progredir is not None:
+            parametros_llm['ao_progredir'] = lambda progresso: ao_progredir(dict(progresso, fragmento=numero, total_fragmentos=total))
+        return dict(
+            prompt_principal=self._serializar_codigo(iter(fragmento), formato_prompt),
+            instrucoes_extras=f"{instrucoes_extras}\n\n{instrucao_fragmento}" if instrucoes_extras else instrucao_fragmento,
+            politica_orcamento=POLITICA_TRUNCAR,
+            **parametros_llm
+        )
+
+    def _analisar_fragmento(
+        self,
+        fragmento: List[Tuple[str, int, str]],
+        numero: int,
+        total: int,
+        formato_prompt: Optional[str],
+        instrucoes_extras: str,
+        **parametros_llm
+    ) -> Tuple[Any, Dict[str, Any]]:
+        """Etapa de mapeamento: analisa um fragmento com o mesmo prompt do tipo de análise."""
+        print(f"Analisando fragmento {numero}/{total} ({len(fragmento)} arquivos)...")
+        requisicao = self._requisicao_do_fragmento(fragmento, numero, total, formato_prompt, instrucoes_extras, parametros_llm)
+        # Uma resposta que não puder ser corrigida refaz apenas este fragmento, uma vez
+        for tentativa in range(2):
+            resultado = self.llm_provider.executar_prompt(**requisicao)
+            try:
+                resposta = ReparadorDeJson(self.llm_provider).carregar(
+                    resultado.get('reposta_final', ''), parametros_llm.get('model_name')
+                )
+                break
+            except RespostaJsonInvalida as e:
+                self._avisar_fragmento_invalido(e, numero, total, tentativa)
+        return resposta, resultado
+
+    async def _analisar_fragmento_async(
+        self,
+        fragmento: List[Tuple[str, int, str]],
+        numero: int,
+        total: int,
+        formato_prompt: Optional[str],
+        instrucoes_extras: str,
+        limite: asyncio.Semaphore,
+        **parametros_llm
+    ) -> Tuple[Any, Dict[str, Any]]:
+        """Versão de _analisar_fragmento para main_async; limite restringe os fragmentos em andamento."""
+        async with limite:
+            print(f"Analisando fragmento {numero}/{total} ({len(fragmento)} arquivos)...")
+            requisicao = await asyncio.to_thread(
+                self._requisicao_do_fragmento, fragmento, numero, total, formato_prompt, instrucoes_extras, parametros_llm
+            )
+            for tentativa in range(2):
+                resultado = await self.llm_provider.executar_prompt_async(**requisicao)
+                try:
+                    resposta = await ReparadorDeJson(self.llm_provider).carregar_async(
+                        resultado.get('reposta_final', ''), parametros_llm.get('model_name')
+                    )
+                    break
+                except RespostaJsonInvalida as e:
+                    self._avisar_fragmento_invalido(e, numero, total, tentativa)
+        return resposta, resultado
+
+    @staticmethod
+    def _avisar_fragmento_invalido(erro: RespostaJsonInvalida, numero: int, total: int, tentativa: int):
+        if tentativa:
+            raise ValueError(f"Resposta do fragmento {numero}/{total} não é um JSON válido: {erro}") from erro
+        print(f"AVISO: Resposta do fragmento {numero}/{total} inválida. Refazendo apenas este fragmento.")
+
+    def _planejar_fragmentos(
+        self,
+        arquivos: List[Tuple[str, int, str]],
+        tokens_por_fragmento: int,
+        formato_prompt: Optional[str],
+        model_name: Optional[str]
+    ) -> List[List[Tuple[str, int, str]]]:
+        # Reserva os tokens da instrução acrescentada a cada fragmento
+        reserva_instrucao = obter_tokenizador(model_name).contar(MODELO_INSTRUCAO_FRAGMENTO) + 64
+        fragmentos = planejar_fragmentos(
+            arquivos,
+            max(tokens_por_fragmento - reserva_instrucao, 1),
+            self._contador_de_tokens_por_arquivo(model_name, formato_prompt)
+        )
+        print(f"Código excede o orçamento de tokens. Analisando {len(fragmentos)} fragmentos em paralelo.")
+        return fragmentos
+
+    @staticmethod
+    def _combinar_fragmentos(parciais: List[Tuple[Any, Dict[str, Any]]]) -> Dict[str, Any]:
+        """Etapa de redução: respostas combinadas na ordem dos fragmentos."""
+        respostas = [resposta for resposta, _ in parciais]
+        resultados = [resultado for _, resultado in parciais]
+        return {
+            'reposta_final': json.dumps(mesclar_respostas(respostas), ensure_ascii=False),
+            'tokens_entrada': sum(r.get('tokens_entrada', 0) for r in resultados),
+            'tokens_saida': sum(r.get('tokens_saida', 0) for r in resultados),
+            'tokens_cache_leitura': sum(r.get('tokens_cache_leitura', 0) for r in resultados),
+            'tokens_cache_escrita': sum(r.get('tokens_cache_escrita', 0) for r in resultados),
+            'cache_hit': all(r.get('cache_hit', False) for r in resultados),
+            'orcamento_tokens': resumir_orcamentos([r.get('orcamento_tokens') for r in resultados])
+        }
+
+    def _analisar_em_fragmentos(
+        self,
+        arquivos: List[Tuple[str, int, str]],
+        tokens_por_fragmento: int,
+        formato_prompt: Optional[str],
+        instrucoes_extras: str,
+        **parametros_llm
+    ) -> Dict[str, Any]:
+        """
+        Analisa um repositório maior que a janela de contexto em map-reduce.
+
+        O repositório é dividido em fragmentos limitados pelo orçamento de tokens,
+        mantendo os arquivos de um mesmo diretório juntos. Os fragmentos são
+        analisados em paralelo (até MAX_FRAGMENTOS_PARALELOS ao mesmo tempo) e as
+        respostas parciais são combinadas no esquema de uma resposta única.
+
+        Returns:
+            Dict[str, Any]: Resposta no formato do provedor de LLM, com a resposta
+                combinada, os tokens somados e a contagem do orçamento de cada fragmento
+        """
+        fragmentos = self._planejar_fragmentos(arquivos, tokens_por_fragmento, formato_prompt, parametros_llm.get('model_name'))
+        total = len(fragmentos)
+
+        with ThreadPoolExecutor(max_workers=max(1, min(total, MAX_FRAGMENTOS_PARALELOS))) as executor:
+            futuros = [
+                executor.submit(
+                    self._analisar_fragmento, fragmento, numero, total, formato_prompt, instrucoes_extras, **parametros_llm
+                )
+                for numero, fragmento in enumerate(fragmentos, start=1)
+            ]
+            parciais = [futuro.result() for futuro in futuros]
+        return self._combinar_fragmentos(parciais)
+
+    async def _analisar_em_fragmentos_async(
+        self,
+        arquivos: List[Tuple[str, int, str]],
+        tokens_por_fragmento: int,
+        formato_prompt: Optional[str],
+        instrucoes_extras: str,
+        **parametros_llm
+    ) -> Dict[str, Any]:
+        """Versão de _analisar_em_fragmentos em que os fragmentos são tarefas do event loop, não threads."""
+        fragmentos = await asyncio.to_thread(
+            self._planejar_fragmentos, arquivos, tokens_por_fragmento, formato_prompt, parametros_llm.get('model_name')
+        )
+        total = len(fragmentos)
+        limite = asyncio.Semaphore(MAX_FRAGMENTOS_PARALELOS)
+        parciais = await asyncio.gather(*(
+            self._analisar_fragmento_async(fragmento, numero, total, formato_prompt, instrucoes_extras, limite, **parametros_llm)
+            for numero, fragmento in enumerate(fragmentos, start=1)
+        ))
+        return self._combinar_fragmentos(parciais)
+
+    def _aplicar_patches(
+        self,
+        resultado_da_ia: Dict[str, Any],
+        originais: Dict[str, str],
+        formato_prompt: Optional[str],
+        instrucoes_extras: str,
+        **parametros_llm
+    ) -> Dict[str, Any]:
+        """
+        Converte a resposta no formato patch para o formato completo esperado pelas etapas seguintes.
+
+        Os patches são aplicados ao conteúdo original dos arquivos analisados. Os
+        arquivos cujo patch não corresponde ao original são pedidos novamente ao
+        modelo, em uma única chamada com o prompt de conteúdo completo e apenas
+        esses arquivos.
+
+        Returns:
+            Dict[str, Any]: Resposta no formato do provedor de LLM, com 'conteudo'
+                completo em cada mudança e os tokens da nova chamada somados
+        """
+        materializado = self._materializar_patches(resultado_da_ia, originais)
+        if materializado is None:
+            return resultado_da_ia
+        resposta, falhas = materializado
+        resultado_da_ia = dict(resultado_da_ia)
+        if falhas:
+            complemento = self.llm_provider.executar_prompt(
+                **self._requisicao_de_complemento(falhas, originais, formato_prompt, instrucoes_extras, parametros_llm)
+            )
+            completas = ReparadorDeJson(self.llm_provider).carregar(
+                complemento.get('reposta_final', ''), parametros_llm.get('model_name')
+            )
+            self._incorporar_complemento(resultado_da_ia, resposta, falhas, completas, complemento)
+
+        resultado_da_ia['reposta_final'] = json.dumps(resposta, ensure_ascii=False)
+        return resultado_da_ia
+
+    async def _aplicar_patches_async(
+        self,
+        resultado_da_ia: Dict[str, Any],
+        originais: Dict[str, str],
+        formato_prompt: Optional[str],
+        instrucoes_extras: str,
+        **parametros_llm
+    ) -> Dict[str, Any]:
+        """Versão de _aplicar_patches para main_async."""
+        materializado = await asyncio.to_thread(self._materializar_patches, resultado_da_ia, originais)
+        if materializado is None:
+            return resultado_da_ia
+        resposta, falhas = materializado
+        resultado_da_ia = dict(resultado_da_ia)
+        if falhas:
+            complemento = await self.llm_provider.executar_prompt_async(
+                **self._requisicao_de_complemento(falhas, originais, formato_prompt, instrucoes_extras, parametros_llm)
+            )
+            completas = await ReparadorDeJson(self.llm_provider).carregar_async(
+                complemento.get('reposta_final', ''), parametros_llm.get('model_name')
+            )
+            self._incorporar_complemento(resultado_da_ia, resposta, falhas, completas, complemento)
+
+        resultado_da_ia['reposta_final'] = json.dumps(resposta, ensure_ascii=False)
+        return resultado_da_ia
+
+    @staticmethod
+    def _materializar_patches(resultado_da_ia: Dict[str, Any], originais: Dict[str, str]) -> Optional[Tuple[Dict[str, Any], List[str]]]:
+        """Aplica os patches da resposta; None se ela não for um objeto JSON (é repassada sem alterações)."""
+        try:
+            resposta = extrair_json(resultado_da_ia.get('reposta_final', ''))
+        except RespostaJsonInvalida:
+            return None
+        if not isinstance(resposta, dict):
+            return None
+        return materializar_mudancas(resposta, originais)
+
+    def _requisicao_de_complemento(
+        self,
+        falhas: List[str],
+        originais: Dict[str, str],
+        formato_prompt: Optional[str],
+        instrucoes_extras: str,
+        parametros_llm: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Argumentos de executar_prompt que pedem o conteúdo completo dos arquivos com patch inválido."""
+        print(f"Pedindo o conteúdo completo de {len(falhas)} arquivos com patch inválido: {', '.join(falhas)}")
+        instrucao = MODELO_INSTRUCAO_CONTEUDO_COMPLETO.format(arquivos="\n".join(falhas))
+        return dict(
+            prompt_principal=self._serializar_codigo(
+                ((caminho, len(originais[caminho].encode('utf-8')), originais[caminho]) for caminho in falhas if caminho in originais),
+                formato_prompt
+            ) or "",
+            instrucoes_extras=f"{instrucoes_extras}\n\n{instrucao}" if instrucoes_extras else instrucao,
+            politica_orcamento=POLITICA_TRUNCAR,
+            **parametros_llm
+        )
+
+    @staticmethod
+    def _incorporar_complemento(
+        resultado_da_ia: Dict[str, Any],
+        resposta: Dict[str, Any],
+        falhas: List[str],
+        completas: Any,
+        complemento: Dict[str, Any]
+    ):
+        """Acrescenta à resposta os arquivos recebidos com o conteúdo completo e soma os tokens da nova chamada."""
+        recebidos = set()
+        for mudanca in (completas or {}).get('conjunto_de_mudancas') or []:
+            caminho = mudanca.get('caminho_do_arquivo') if isinstance(mudanca, dict) else None
+            if caminho in falhas and (mudanca.get('conteudo') is not None or mudanca.get('status') == "REMOVIDO"):
+                resposta['conjunto_de_mudancas'].append(mudanca)
+                recebidos.add(caminho)
+        for caminho in falhas:
+            if caminho not in recebidos:
+                print(f"AVISO: '{caminho}' ignorado: o conteúdo completo não foi retornado pelo modelo.")
+        for chave in ('tokens_entrada', 'tokens_saida', 'tokens_cache_leitura', 'tokens_cache_escrita'):
+            if chave in resultado_da_ia or chave in complemento:
+                resultado_da_ia[chave] = resultado_da_ia.get(chave, 0) + complemento.get(chave, 0)
+        if resultado_da_ia.get('cache_hit'):
+            resultado_da_ia['cache_hit'] = bool(complemento.get('cache_hit'))
+
     def main(
         self,
         tipo_analise: str,
@@ -109,7 +481,16 @@ class AgenteRevisor:
         instrucoes_extras: str = "",
         usar_rag: bool = False,
         model_name: Optional[str] = None,
-        max_token_out: int = 15000
+        max_token_out: int = 15000,
+        commit_base: Optional[str] = None,
+        formato_prompt: Optional[str] = None,
+        politica_orcamento: Optional[str] = None,
+        orcamento_relevancia_tokens: Optional[int] = None,
+        deduplicacao: Optional[str] = None,
+        snapshot_id: Optional[str] = None,
+        formato_mudancas: Optional[str] = None,
+        ao_progredir: Optional[CallbackProgresso] = None,
+        saida_estruturada: bool = False
     ) -> Dict[str, Any]:
         """
         Orquestra a obtenção de código de repositório e análise via IA.
@@ -118,7 +499,8 @@ class AgenteRevisor:
         1. Obtém código do repositório através do repository_reader
         2. Valida se código foi encontrado
         3. Serializa código em formato JSON
-        4. Envia para análise via llm_provider
+        4. Envia para análise via llm_provider (em fragmentos paralelos, se o
+           código não couber na janela de contexto do modelo)
         5. Retorna resultado estruturado
         
         Args:
@@ -135,51 +517,249 @@ class AgenteRevisor:
                 Se None, usa o modelo padrão do provedor. Defaults to None
             max_token_out (int, optional): Limite máximo de tokens na resposta
                 do LLM. Defaults to 15000
+            commit_base (Optional[str], optional): SHA do commit de uma análise
+                anterior. Se informado, lê apenas o delta desde esse commit e o mescla
+                ao snapshot anterior. Defaults to None (leitura completa)
+            formato_prompt (Optional[str], optional): Formato de empacotamento do
+                código ('json', 'json_compacto', 'arquivos', 'arquivos_numerados').
+                Defaults to None ('json')
+            politica_orcamento (Optional[str], optional): O que fazer se o código não
+                couber na janela de contexto do modelo: 'rejeitar', 'truncar' ou
+                'fragmentar' (analisa o repositório em fragmentos paralelos e combina
+                as respostas). Defaults to None ('fragmentar')
+            orcamento_relevancia_tokens (Optional[int], optional): Se informado e o
+                código exceder esse número de tokens, envia apenas os arquivos mais
+                relevantes para as instruções (ranqueados por BM25) que cabem nele;
+                os demais são listados só pelo caminho. Defaults to None (todos os arquivos)
+            deduplicacao (Optional[str], optional): 'exata' envia uma única vez cada
+                conteúdo repetido, trocando as cópias por uma referência; 'aproximada'
+                também troca arquivos quase idênticos pelas diferenças; 'desligada'
+                envia todos. Defaults to None ('exata')
+            snapshot_id (Optional[str], optional): Snapshot registrado por uma etapa
+                anterior do job. Se ainda estiver no armazém, os arquivos são lidos dele,
+                sem consultar o provedor; caso contrário, o repositório é lido
+                normalmente. Defaults to None
+            formato_mudancas (Optional[str], optional): 'patch' pede ao modelo apenas
+                as alterações de cada arquivo (diff unificado ou blocos de busca/substituição,
+                com o prompt '<tipo_analise>_patch'), que são aplicadas localmente ao
+                snapshot; arquivos cujo patch falha são pedidos de novo com o conteúdo
+                completo. Defaults to None ('completo')
+            ao_progredir (Optional[CallbackProgresso], optional): Recebe o progresso das
+                gerações em streaming (com o número do fragmento, na análise
+                fragmentada). Defaults to None
+            saida_estruturada (bool, optional): Se a resposta do modelo deve seguir o
+                esquema JSON do tipo de análise (ver tools/saida_estruturada.py).
+                Defaults to False
         
         Returns:
             Dict[str, Any]: Resultado estruturado da análise contendo:
                 - resultado (Dict): Contém 'reposta_final' com a análise do LLM
+                - commit_sha (Optional[str]): SHA do commit efetivamente analisado
+                - duplicatas (Dict[str, str]): Cópias substituídas por referência -> arquivo
+                  com o mesmo conteúdo, para expandir as mudanças a todas as cópias
+                - snapshot_id (Optional[str]): Snapshot dos arquivos analisados, se houver
+                  armazém de snapshots
                 - Se nenhum código for encontrado, retorna estrutura vazia
-                - Formato: {"resultado": {"reposta_final": <analise_do_llm>}}
+                - Formato: {"resultado": {"reposta_final": <analise_do_llm>}, "commit_sha": <sha>, "duplicatas": {...}}
         
         Raises:
             RuntimeError: Se houver falha na leitura do repositório
-            ValueError: Se tipo_analise for inválido ou repositorio mal formatado
+            ValueError: Se tipo_analise for inválido, repositorio mal formatado,
+                formato_prompt ou formato_mudancas desconhecido
+            OrcamentoDeTokensExcedido: Se o código não couber no modelo com a
+                política 'rejeitar'
             Exception: Erros de comunicação com o provedor de LLM são propagados
         
         Note:
             - Se nenhum código for encontrado, retorna resultado vazio sem erro
-            - O código é serializado em JSON com formatação legível
+            - O código é lido sob demanda e empacotado no formato da etapa (JSON
+              legível por padrão); com as políticas 'rejeitar' e 'truncar', sem manter
+              uma cópia intermediária do repositório
             - Avisos são impressos para facilitar debugging
         """
-        # Etapa 1: Obter código do repositório
-        codigo_para_analise = self._get_code(
-            repositorio=repositorio,
-            nome_branch=nome_branch,
-            tipo_analise=tipo_analise
+        preparacao, codigo_str = self._preparar_analise(
+            tipo_analise, repositorio, nome_branch, instrucoes_extras, usar_rag, model_name, max_token_out,
+            commit_base, formato_prompt, politica_orcamento, orcamento_relevancia_tokens, deduplicacao,
+            snapshot_id, formato_mudancas, ao_progredir, saida_estruturada
+        )
+        if codigo_str is None:
+            return self._montar_retorno(preparacao, {})
+
+        # Etapa 4: Enviar para análise via provedor de LLM. O orçamento de tokens
+        # é verificado pelo provedor antes da chamada à API.
+        try:
+            resultado_da_ia = self.llm_provider.executar_prompt(
+                prompt_principal=codigo_str,
+                instrucoes_extras=instrucoes_extras,
+                politica_orcamento=preparacao.politica_orcamento,
+                **preparacao.parametros_llm
+            )
+        except FragmentacaoNecessaria as e:
+            del codigo_str
+            resultado_da_ia = self._analisar_em_fragmentos(
+                preparacao.arquivos, e.tokens_disponiveis_codigo, formato_prompt, instrucoes_extras, **preparacao.parametros_llm
+            )
+        if preparacao.originais is not None:
+            resultado_da_ia = self._aplicar_patches(
+                resultado_da_ia, preparacao.originais, formato_prompt, instrucoes_extras,
+                **dict(preparacao.parametros_llm, tipo_tarefa=tipo_analise)
+            )
+
+        # Etapa 5: Retornar resultado em formato padronizado
+        return self._montar_retorno(preparacao, resultado_da_ia)
+
+    async def main_async(
+        self,
+        tipo_analise: str,
+        repositorio: str,
+        nome_branch: Optional[str] = None,
+        instrucoes_extras: str = "",
+        usar_rag: bool = False,
+        model_name: Optional[str] = None,
+        max_token_out: int = 15000,
+        commit_base: Optional[str] = None,
+        formato_prompt: Optional[str] = None,
+        politica_orcamento: Optional[str] = None,
+        orcamento_relevancia_tokens: Optional[int] = None,
+        deduplicacao: Optional[str] = None,
+        snapshot_id: Optional[str] = None,
+        formato_mudancas: Optional[str] = None,
+        ao_progredir: Optional[CallbackProgresso] = None,
+        saida_estruturada: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Versão assíncrona de main, com os mesmos argumentos, retorno e exceções.
+
+        A leitura do repositório e o empacotamento do código rodam em uma thread;
+        as chamadas ao LLM usam llm_provider.executar_prompt_async. Na análise
+        fragmentada, cada fragmento é uma tarefa do event loop (até
+        MAX_FRAGMENTOS_PARALELOS em andamento), em vez de uma thread.
+        """
+        preparacao, codigo_str = await asyncio.to_thread(
+            self._preparar_analise,
+            tipo_analise, repositorio, nome_branch, instrucoes_extras, usar_rag, model_name, max_token_out,
+            commit_base, formato_prompt, politica_orcamento, orcamento_relevancia_tokens, deduplicacao,
+            snapshot_id, formato_mudancas, ao_progredir, saida_estruturada
         )
+        if codigo_str is None:
+            return self._montar_retorno(preparacao, {})
+
+        try:
+            resultado_da_ia = await self.llm_provider.executar_prompt_async(
+                prompt_principal=codigo_str,
+                instrucoes_extras=instrucoes_extras,
+                politica_orcamento=preparacao.politica_orcamento,
+                **preparacao.parametros_llm
+            )
+        except FragmentacaoNecessaria as e:
+            del codigo_str
+            resultado_da_ia = await self._analisar_em_fragmentos_async(
+                preparacao.arquivos, e.tokens_disponiveis_codigo, formato_prompt, instrucoes_extras, **preparacao.parametros_llm
+            )
+        if preparacao.originais is not None:
+            resultado_da_ia = await self._aplicar_patches_async(
+                resultado_da_ia, preparacao.originais, formato_prompt, instrucoes_extras,
+                **dict(preparacao.parametros_llm, tipo_tarefa=tipo_analise)
+            )
+        return self._montar_retorno(preparacao, resultado_da_ia)
+
+    def _preparar_analise(
+        self,
+        tipo_analise: str,
+        repositorio: str,
+        nome_branch: Optional[str],
+        instrucoes_extras: str,
+        usar_rag: bool,
+        model_name: Optional[str],
+        max_token_out: int,
+        commit_base: Optional[str],
+        formato_prompt: Optional[str],
+        politica_orcamento: Optional[str],
+        orcamento_relevancia_tokens: Optional[int],
+        deduplicacao: Optional[str],
+        snapshot_id: Optional[str],
+        formato_mudancas: Optional[str],
+        ao_progredir: Optional[CallbackProgresso],
+        saida_estruturada: bool
+    ) -> Tuple[PreparacaoDaAnalise, Optional[str]]:
+        """
+        Lê o repositório (ou o snapshot) e empacota o código a enviar ao LLM.
+
+        Returns:
+            Tuple[PreparacaoDaAnalise, Optional[str]]: Estado da análise e o código
+                empacotado, ou None se nenhum código for encontrado
+        """
+        # Etapas 1 e 3: Obter o código do repositório e empacotá-lo no formato
+        # da etapa à medida que os arquivos são lidos. Com a política 'fragmentar'
+        # (padrão) os arquivos são mantidos, para poderem ser redistribuídos em
+        # fragmentos se o repositório não couber em uma requisição.
+        deduplicador = DeduplicadorDeArquivos(deduplicacao)
+        formato_mudancas = (formato_mudancas or FORMATO_MUDANCAS_COMPLETO).lower()
+        if formato_mudancas not in FORMATOS_MUDANCAS:
+            raise ValueError(f"formato_mudancas '{formato_mudancas}' inválido. Valores aceitos: {', '.join(repr(f) for f in FORMATOS_MUDANCAS)}.")
+        # Etapas posteriores do job reaproveitam os arquivos da primeira leitura
+        snapshot, gravacao = None, None
+        if snapshot_id and self.armazem_snapshots is not None:
+            snapshot = self.armazem_snapshots.carregar(snapshot_id)
+        if snapshot is not None:
+            lidos = iter(snapshot.arquivos)
+        else:
+            lidos = self._get_code(
+                repositorio=repositorio,
+                nome_branch=nome_branch,
+                tipo_analise=tipo_analise,
+                commit_base=commit_base
+            )
+            if self.armazem_snapshots is not None:
+                gravacao = self.armazem_snapshots.iniciar_gravacao()
+                lidos = gravacao.registrar(lidos)
+        # No modo patch, as alterações são aplicadas ao conteúdo original (sem deduplicação)
+        originais = None
+        if formato_mudancas == FORMATO_MUDANCAS_PATCH:
+            originais = {}
+            lidos = self._guardar_originais(lidos, originais)
+        arquivos = deduplicador.filtrar(lidos)
+        politica_orcamento = politica_orcamento or POLITICA_FRAGMENTAR
+        if politica_orcamento.lower() == POLITICA_FRAGMENTAR or orcamento_relevancia_tokens:
+            arquivos = list(arquivos)
+        omitidos = []
+        if orcamento_relevancia_tokens:
+            arquivos, omitidos = self._selecionar_relevantes(
+                arquivos, tipo_analise, instrucoes_extras, orcamento_relevancia_tokens, formato_prompt, model_name
+            )
+        codigo_str = self._serializar_codigo(iter(arquivos), formato_prompt)
+        if omitidos:
+            codigo_str = ((codigo_str or "") + resumir_omitidos(omitidos)).lstrip()
+        if snapshot is not None:
+            commit_sha = snapshot.commit_sha
+        else:
+            commit_sha = self.repository_reader.ultimo_commit_sha
+            snapshot_id = gravacao.concluir(commit_sha) if gravacao is not None else None
 
         # Etapa 2: Validar se código foi encontrado
-        if not codigo_para_analise:
+        if codigo_str is None:
             print(f"AVISO: Nenhum código encontrado no repositório para a análise '{tipo_analise}'.")
-            return {"resultado": {"reposta_final": {}}}
-
-        # Etapa 3: Serializar código em formato JSON legível
-        codigo_str = json.dumps(codigo_para_analise, indent=2, ensure_ascii=False)
-
-        # Etapa 4: Enviar para análise via provedor de LLM
-        resultado_da_ia = self.llm_provider.executar_prompt(
-            tipo_tarefa=tipo_analise,
-            prompt_principal=codigo_str,
-            instrucoes_extras=instrucoes_extras,
-            usar_rag=usar_rag,
-            model_name=model_name,
-            max_token_out=max_token_out
+
+        parametros_llm = {
+            'tipo_tarefa': tipo_analise + SUFIXO_PROMPT_PATCH if originais is not None else tipo_analise,
+            'usar_rag': usar_rag,
+            'model_name': model_name,
+            'max_token_out': max_token_out,
+            'ao_progredir': ao_progredir,
+            'saida_estruturada': saida_estruturada
+        }
+        preparacao = PreparacaoDaAnalise(
+            arquivos, originais, commit_sha, deduplicador.duplicatas, snapshot_id, politica_orcamento, parametros_llm
         )
+        return preparacao, codigo_str
 
-        # Etapa 5: Retornar resultado em formato padronizado
+    @staticmethod
+    def _montar_retorno(preparacao: PreparacaoDaAnalise, resultado_da_ia: Any) -> Dict[str, Any]:
         return {
             "resultado": {
                 "reposta_final": resultado_da_ia
-            }
-        }
\ No newline at end of file
+            },
+            "commit_sha": preparacao.commit_sha,
+            "duplicatas": preparacao.duplicatas,
+            "snapshot_id": preparacao.snapshot_id
+        }
@@ -0,0 +1,52 @@
+import pytest
+import tools.blob_cache
+import tools.workflow_registry
+import tools.pool_clientes_llm
+import tools.cache_respostas_llm
+import tools.limitador_cotas_llm
+
+@pytest.fixture(autouse=True)
+def cache_de_blobs_isolado(monkeypatch):
+    """
+    Garante um cache de blobs vazio por teste.
+
+    O cache compartilhado do processo é indexado por SHA; como os testes usam
+    SHAs fictícios repetidos, um cache persistente entre testes mascararia
+    chamadas à API simuladas.
+    """
+    monkeypatch.setattr(tools.blob_cache, '_cache_padrao', None)
+
+@pytest.fixture(autouse=True)
+def registry_de_workflows_isolado(monkeypatch):
+    """
+    Garante que cada teste compile os workflows que simula.
+
+    Os testes substituem yaml.safe_load para declarar seus próprios workflows;
+    o registro compartilhado do processo é recriado no primeiro uso do teste.
+    """
+    monkeypatch.setattr(tools.workflow_registry, '_registry_padrao', None)
+
+@pytest.fixture(autouse=True)
+def pool_de_clientes_llm_isolado(monkeypatch):
+    """
+    Garante que nenhum teste reaproveite clientes de LLM criados por outro.
+    """
+    monkeypatch.setattr(tools.pool_clientes_llm, '_pool_padrao', None)
+
+@pytest.fixture(autouse=True)
+def cache_de_respostas_llm_desligado(monkeypatch):
+    """
+    Garante que o cache de respostas do LLM só seja usado quando o teste o injeta.
+    """
+    monkeypatch.delenv("LLM_CACHE_RESPOSTAS", raising=False)
+    monkeypatch.setattr(tools.cache_respostas_llm, '_cache_padrao', None)
+    monkeypatch.setattr(tools.cache_respostas_llm, '_cache_padrao_configurado', False)
+
+@pytest.fixture(autouse=True)
+def limitador_de_cotas_llm_desligado(monkeypatch):
+    """
+    Garante que as chamadas simuladas ao LLM só esperem por cota quando o teste injeta um limitador.
+    """
+    monkeypatch.delenv("LLM_COTAS", raising=False)
+    monkeypatch.setattr(tools.limitador_cotas_llm, '_limitador_padrao', None)
+    monkeypatch.setattr(tools.limitador_cotas_llm, '_limitador_padrao_configurado', False)
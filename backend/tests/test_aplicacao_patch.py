@@ -0,0 +1,78 @@
+import difflib
+import json
+import pytest
+from unittest.mock import MagicMock
+from tools.aplicacao_patch import FalhaAoAplicarPatch, aplicar_diff_unificado, aplicar_substituicoes, materializar_mudancas
+from agents.agente_revisor import AgenteRevisor
+
+ORIGINAL = "".join(f"linha {n}\n" for n in range(1, 2001))
+CORRIGIDO = ORIGINAL.replace("linha 1500\n", "linha 1500 corrigida\n")
+
+def _diff(antes, depois):
+    return "".join(difflib.unified_diff(antes.splitlines(True), depois.splitlines(True), "a/app.py", "b/app.py"))
+
+class TestAplicacaoPatch:
+    """
+    Testes do motor de patches e do modo patch da etapa aplicacao_de_mudancas.
+    """
+
+    def test_diff_unificado_tolera_numeros_de_linha_errados(self):
+        diff = _diff(ORIGINAL, CORRIGIDO)
+        assert aplicar_diff_unificado(ORIGINAL, diff) == CORRIGIDO
+        assert aplicar_diff_unificado(ORIGINAL, diff.replace("@@ -1497", "@@ -1400")) == CORRIGIDO
+        assert aplicar_diff_unificado("", _diff("", "novo\n")) == "novo\n"
+
+        with pytest.raises(FalhaAoAplicarPatch, match="hunk 1"):
+            aplicar_diff_unificado(ORIGINAL.replace("linha 1499\n", "outra\n"), diff)
+
+    def test_substituicoes_exigem_trecho_unico(self):
+        assert aplicar_substituicoes(ORIGINAL, [{"buscar": "linha 1500\n", "substituir": "linha 1500 corrigida\n"}]) == CORRIGIDO
+
+        with pytest.raises(FalhaAoAplicarPatch, match="ambíguo"):
+            aplicar_substituicoes(ORIGINAL, [{"buscar": "linha 150", "substituir": "x"}])
+        with pytest.raises(FalhaAoAplicarPatch, match="não foi encontrado"):
+            aplicar_substituicoes(ORIGINAL, [{"buscar": "inexistente", "substituir": "x"}])
+
+    def test_materializar_separa_as_falhas(self):
+        resposta = {"resumo_geral": "ok", "conjunto_de_mudancas": [
+            {"caminho_do_arquivo": "app.py", "status": "MODIFICADO", "diff": _diff(ORIGINAL, CORRIGIDO)},
+            {"caminho_do_arquivo": "util.py", "status": "MODIFICADO", "substituicoes": [{"buscar": "y", "substituir": "z"}]},
+            {"caminho_do_arquivo": "velho.py", "status": "REMOVIDO"},
+        ]}
+
+        completa, falhas = materializar_mudancas(resposta, {"app.py": ORIGINAL, "util.py": "x = 1\n"})
+
+        assert falhas == ["util.py"]
+        assert completa["conjunto_de_mudancas"][0] == {"caminho_do_arquivo": "app.py", "status": "MODIFICADO", "conteudo": CORRIGIDO}
+        assert completa["conjunto_de_mudancas"][1] == {"caminho_do_arquivo": "velho.py", "status": "REMOVIDO"}
+
+    def test_agente_pede_conteudo_completo_so_dos_arquivos_com_falha(self):
+        reader = MagicMock()
+        reader.iter_repository.return_value = iter([("app.py", len(ORIGINAL), ORIGINAL), ("util.py", 6, "x = 1\n")])
+        reader.ultimo_commit_sha = "a" * 40
+        llm = MagicMock()
+        llm.executar_prompt.side_effect = [
+            {"reposta_final": json.dumps({"resumo_geral": "ok", "conjunto_de_mudancas": [
+                {"caminho_do_arquivo": "app.py", "status": "MODIFICADO",
+                 "substituicoes": [{"buscar": "linha 1500\n", "substituir": "linha 1500 corrigida\n"}]},
+                {"caminho_do_arquivo": "util.py", "status": "MODIFICADO", "diff": "@@ -1 +1 @@\n-y = 1\n+y = 2\n"},
+            ]}), "tokens_entrada": 100, "tokens_saida": 10},
+            {"reposta_final": json.dumps({"conjunto_de_mudancas": [
+                {"caminho_do_arquivo": "util.py", "status": "MODIFICADO", "conteudo": "x = 2\n"},
+            ]}), "tokens_entrada": 5, "tokens_saida": 5},
+        ]
+
+        resultado = AgenteRevisor(reader, llm).main(
+            "aplicacao_de_mudancas", "org/repo", instrucoes_extras="plano", formato_mudancas="patch"
+        )["resultado"]["reposta_final"]
+
+        primeira, segunda = llm.executar_prompt.call_args_list
+        assert primeira.kwargs["tipo_tarefa"] == "aplicacao_de_mudancas_patch"
+        assert segunda.kwargs["tipo_tarefa"] == "aplicacao_de_mudancas"
+        assert "util.py" in segunda.kwargs["prompt_principal"] and "app.py" not in segunda.kwargs["prompt_principal"]
+        mudancas = {m["caminho_do_arquivo"]: m["conteudo"] for m in json.loads(resultado["reposta_final"])["conjunto_de_mudancas"]}
+        assert mudancas == {"app.py": CORRIGIDO, "util.py": "x = 2\n"}
+        assert (resultado["tokens_entrada"], resultado["tokens_saida"]) == (105, 15)
+
+        with pytest.raises(ValueError, match="formato_mudancas"):
+            AgenteRevisor(reader, llm).main("aplicacao_de_mudancas", "org/repo", formato_mudancas="diff")
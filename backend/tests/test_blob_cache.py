@@ -0,0 +1,75 @@
+import os
+from unittest.mock import Mock, patch
+from tools.blob_cache import LRUMemoryCache, DiskBlobStore, TwoTierBlobCache
+from tools.github_reader import GitHubRepositoryReader
+from tools.github_repository_provider import GitHubRepositoryProvider
+
+class TestTwoTierBlobCache:
+    """
+    Testes do cache de objetos Git endereçado por SHA.
+    """
+
+    def test_lru_em_memoria_despeja_menos_recente(self):
+        """Ao exceder o limite de bytes, a entrada menos recentemente usada é removida."""
+        cache = LRUMemoryCache(limite_bytes=10)
+        cache.set('a', b'1234')
+        cache.set('b', b'1234')
+        cache.get('a')
+        cache.set('c', b'1234')
+
+        assert cache.get('a') == b'1234'
+        assert cache.get('b') is None
+        assert cache.get('c') == b'1234'
+        assert cache.bytes_armazenados == 8
+
+    def test_disco_promove_para_memoria_e_conta_hits(self, tmp_path):
+        """Um hit em disco é promovido para a memória e contabilizado separadamente."""
+        diretorio = str(tmp_path / 'cache')
+        TwoTierBlobCache(diretorio_disco=diretorio).set('blob:abc', b'conteudo')
+
+        cache = TwoTierBlobCache(diretorio_disco=diretorio)
+        assert cache.get('blob:abc') == b'conteudo'
+        assert cache.get('blob:abc') == b'conteudo'
+        assert cache.get('blob:inexistente') is None
+
+        estatisticas = cache.estatisticas()
+        assert estatisticas['hits_disco'] == 1
+        assert estatisticas['hits_memoria'] == 1
+        assert estatisticas['misses'] == 1
+
+    def test_disco_despeja_por_tamanho(self, tmp_path):
+        """O armazenamento em disco remove os arquivos mais antigos ao exceder o limite."""
+        store = DiskBlobStore(str(tmp_path), limite_bytes=25)
+        for i in range(5):
+            store.set(f'blob:{i}', b'0123456789')
+            caminho = store._caminho(f'blob:{i}')
+            os.utime(caminho, (i, i))
+
+        assert store.bytes_armazenados <= 25
+        assert store.get('blob:0') is None
+        assert store.get('blob:4') == b'0123456789'
+
+    @patch('tools.github_reader.GitHubConnector')
+    @patch('tools.workflow_registry.yaml.safe_load')
+    @patch('builtins.open')
+    def test_segunda_leitura_nao_acessa_a_rede(self, mock_open, mock_yaml, mock_connector):
+        """Reler o mesmo commit usa apenas o cache: nenhuma chamada de árvore ou blob."""
+        mock_yaml.return_value = {'refatoracao': {'extensions': ['.py']}}
+
+        elemento = Mock(type='blob', path='app.py', sha='blob1', size=8)
+        elemento.path = 'app.py'
+        mock_repo = Mock()
+        mock_repo.get_git_ref.return_value.object.sha = 'commit1'
+        mock_repo.get_git_tree.return_value = Mock(tree=[elemento], truncated=False)
+        mock_repo.get_git_blob.return_value = Mock(content='cHJpbnQoMSk=')
+        mock_connector.return_value.connection.return_value = mock_repo
+
+        cache = TwoTierBlobCache()
+        reader = GitHubRepositoryReader(repository_provider=GitHubRepositoryProvider(), cache=cache)
+        primeira = reader.read_repository(nome_repo="org/repo", tipo_analise="refatoracao", nome_branch="main")
+        segunda = reader.read_repository(nome_repo="org/repo", tipo_analise="refatoracao", nome_branch="main")
+
+        assert primeira == segunda == {'app.py': 'print(1)'}
+        assert mock_repo.get_git_tree.call_count == 1
+        assert mock_repo.get_git_blob.call_count == 1
+        assert cache.estatisticas()['hits_memoria'] == 2
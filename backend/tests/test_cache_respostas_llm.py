@@ -0,0 +1,154 @@
+import itertools
+import pytest
+from unittest.mock import MagicMock
+import tools.orcamento_tokens
+import tools.progresso_llm
+import tools.cache_respostas_llm
+import tools.saida_estruturada
+from tools.cache_respostas_llm import (
+    ArmazenamentoEmDiscoDeRespostas, ArmazenamentoRedisDeRespostas, CacheDeRespostasLLM, obter_cache_respostas_padrao
+)
+from tools.orcamento_tokens import Tokenizador
+from tools.requisicao_claude import AnthropicClaudeProvider
+from agents.agente_revisor import AgenteRevisor
+from backend.tests.test_requisicao_claude import _StreamFalso
+
+class _RedisFalso:
+    """Subconjunto do cliente redis usado pelo armazenamento: strings com TTL e um sorted set."""
+
+    def __init__(self):
+        self.valores, self.ttls, self.indice = {}, {}, {}
+
+    def get(self, chave):
+        return self.valores.get(chave)
+
+    def set(self, chave, valor, ex=None):
+        self.valores[chave], self.ttls[chave] = valor, ex
+
+    def zadd(self, nome, membros):
+        self.indice.update(membros)
+
+    def zcard(self, nome):
+        return len(self.indice)
+
+    def zpopmin(self, nome, quantidade):
+        antigos = sorted(self.indice.items(), key=lambda item: item[1])[:quantidade]
+        for membro, _ in antigos:
+            del self.indice[membro]
+        return antigos
+
+    def zrem(self, nome, membro):
+        self.indice.pop(membro, None)
+
+    def delete(self, *chaves):
+        for chave in chaves:
+            self.valores.pop(chave, None)
+
+    def pipeline(self):
+        cliente, resultados = self, []
+
+        class _Pipeline:
+            def __getattr__(self, nome):
+                return lambda *args, **kwargs: resultados.append(getattr(cliente, nome)(*args, **kwargs))
+
+            def execute(self):
+                return resultados
+
+        return _Pipeline()
+
+RESULTADO = {'reposta_final': '{"relatorio": "ok"}', 'tokens_entrada': 100, 'tokens_saida': 20, 'orcamento_tokens': {}}
+
+class TestCacheDeRespostasLLM:
+    """
+    Testes do cache de respostas do LLM e dos armazenamentos em disco e Redis.
+    """
+
+    def test_chave_muda_com_qualquer_parte_da_requisicao(self):
+        base = dict(provedor="anthropic", modelo="claude-sonnet-4", sistema="s", mensagens=[{"role": "user", "content": "c"}], temperatura=0.3, max_tokens=100)
+        chave = CacheDeRespostasLLM.chave(**base)
+        assert CacheDeRespostasLLM.chave(**dict(reversed(list(base.items())))) == chave
+        for parte, valor in (("sistema", "s + rag"), ("modelo", "claude-opus-4"), ("max_tokens", 200), ("temperatura", 0.0)):
+            assert CacheDeRespostasLLM.chave(**dict(base, **{parte: valor})) != chave
+
+    def test_disco_devolve_uso_original_e_expira(self, tmp_path):
+        cache = CacheDeRespostasLLM(ArmazenamentoEmDiscoDeRespostas(str(tmp_path)), ttl_s=60)
+        cache.gravar("abc", RESULTADO)
+
+        resposta = cache.obter("abc")
+        assert resposta == {'reposta_final': '{"relatorio": "ok"}', 'tokens_entrada': 100, 'tokens_saida': 20, 'cache_hit': True}
+
+        cache.ttl_s = -1
+        cache.gravar("expirada", RESULTADO)
+        assert cache.obter("expirada") is None
+        # A resposta expirada foi removida e pode ser gravada de novo
+        cache.ttl_s = 60
+        cache.gravar("expirada", RESULTADO)
+        assert cache.obter("expirada")['cache_hit'] is True
+
+    def test_redis_grava_com_ttl_e_despeja_as_mais_antigas(self, monkeypatch):
+        redis_falso = _RedisFalso()
+        cache = CacheDeRespostasLLM(ArmazenamentoRedisDeRespostas(redis_falso, max_entradas=2), ttl_s=3600)
+        instantes = itertools.count(1)
+        monkeypatch.setattr(tools.cache_respostas_llm.time, 'time', lambda: float(next(instantes)))
+
+        for chave in ("a", "b", "c"):
+            cache.gravar(chave, RESULTADO)
+
+        assert redis_falso.ttls["mcp_llm_resposta:c"] == 3600
+        assert "mcp_llm_resposta:a" not in redis_falso.valores
+        assert set(redis_falso.indice) == {"b", "c"}
+
+    def test_desabilitado_sem_configuracao(self):
+        assert obter_cache_respostas_padrao() is None
+
+    def test_provedor_reutiliza_resposta_da_mesma_requisicao(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(tools.orcamento_tokens, 'obter_tokenizador', lambda model_name: Tokenizador("estimativa"))
+        monkeypatch.setattr(tools.progresso_llm, 'obter_tokenizador', lambda model_name: Tokenizador("estimativa"))
+        secret_manager = MagicMock()
+        secret_manager.get_secret.return_value = "chave-teste"
+        provedor = AnthropicClaudeProvider(
+            secret_manager=secret_manager,
+            cache_respostas=CacheDeRespostasLLM(ArmazenamentoEmDiscoDeRespostas(str(tmp_path)))
+        )
+        provedor.anthropic_client = MagicMock()
+        provedor.anthropic_client.messages.stream.side_effect = lambda **kwargs: _StreamFalso()
+
+        primeira = provedor.executar_prompt("relatorio_sast", "print('ola')")
+        segunda = provedor.executar_prompt("relatorio_sast", "print('ola')")
+        outra = provedor.executar_prompt("relatorio_sast", "print('ola')", instrucoes_extras="foco em SQL")
+
+        assert provedor.anthropic_client.messages.stream.call_count == 2
+        assert 'cache_hit' not in primeira and 'cache_hit' not in outra
+        assert segunda['cache_hit'] is True
+        assert segunda['reposta_final'] == primeira['reposta_final']
+        assert (segunda['tokens_entrada'], segunda['tokens_saida']) == (100, 20)
+        assert segunda['orcamento_tokens'] == primeira['orcamento_tokens']
+
+    def test_fragmento_refeito_nao_recebe_a_resposta_invalida_do_cache(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(tools.orcamento_tokens, 'obter_tokenizador', lambda model_name: Tokenizador("estimativa"))
+        monkeypatch.setattr(tools.progresso_llm, 'obter_tokenizador', lambda model_name: Tokenizador("estimativa"))
+        monkeypatch.setattr(tools.saida_estruturada, 'MAX_REPAROS_JSON', 0)
+        secret_manager = MagicMock()
+        secret_manager.get_secret.return_value = "chave-teste"
+        provedor = AnthropicClaudeProvider(
+            secret_manager=secret_manager,
+            cache_respostas=CacheDeRespostasLLM(ArmazenamentoEmDiscoDeRespostas(str(tmp_path)))
+        )
+        provedor.anthropic_client = MagicMock()
+        provedor.anthropic_client.messages.stream.side_effect = [
+            _StreamFalso(textos=['{"relatorio": "ok"']), _StreamFalso(), _StreamFalso()
+        ]
+        fragmento = [("src/a.py", 5, "a = 1")]
+
+        resposta, resultado = AgenteRevisor(MagicMock(), provedor)._analisar_fragmento(
+            fragmento, 1, 2, None, "", tipo_tarefa="relatorio_sast", model_name="claude-sonnet-4"
+        )
+        repetida, resultado_repetido = AgenteRevisor(MagicMock(), provedor)._analisar_fragmento(
+            fragmento, 1, 2, None, "", tipo_tarefa="relatorio_sast", model_name="claude-sonnet-4"
+        )
+
+        # A resposta inválida não foi gravada: a nova tentativa chamou a API
+        assert resposta == repetida == {"relatorio": "ok"}
+        assert 'cache_hit' not in resultado
+        assert resultado_repetido['cache_hit'] is True
+        assert provedor.anthropic_client.messages.stream.call_count == 2
@@ -0,0 +1,93 @@
+import pytest
+from unittest.mock import MagicMock
+from tools.deduplicacao import DeduplicadorDeArquivos, agrupar_duplicatas
+from tools.preenchimento import ChangesetFiller
+from agents.agente_revisor import AgenteRevisor
+
+MODULO = "\n".join(f'variable "entrada_{n}" {{\n  type = string\n  default = "valor_{n}"\n}}' for n in range(40))
+MODULO_VARIANTE = MODULO.replace('default = "valor_7"', 'default = "outro"')
+
+class TestDeduplicacao:
+    """
+    Testes da substituição de arquivos repetidos por referências e da replicação das mudanças.
+    """
+
+    def test_copias_exatas_viram_referencia(self):
+        deduplicador = DeduplicadorDeArquivos()
+        arquivos = list(deduplicador.filtrar([
+            ("modulos/a/main.tf", 0, MODULO), ("modulos/b/main.tf", 0, MODULO),
+            ("pkg/__init__.py", 0, ""), ("lib/__init__.py", 0, ""),
+        ]))
+
+        assert arquivos[0][2] == MODULO
+        assert arquivos[1][2] == "[Conteúdo idêntico ao do arquivo 'modulos/a/main.tf'.]"
+        # Arquivos menores que a referência são enviados como estão
+        assert arquivos[3][2] == ""
+        assert deduplicador.duplicatas == {"modulos/b/main.tf": "modulos/a/main.tf"}
+
+    def test_modo_aproximado_envia_apenas_as_diferencas(self):
+        deduplicador = DeduplicadorDeArquivos("aproximada")
+        arquivos = list(deduplicador.filtrar([("a/main.tf", 0, MODULO), ("b/main.tf", 0, MODULO_VARIANTE)]))
+
+        assert arquivos[1][2].startswith("[Conteúdo quase idêntico ao do arquivo 'a/main.tf'")
+        assert '+  default = "outro"' in arquivos[1][2]
+        assert deduplicador.semelhantes == {"b/main.tf": "a/main.tf"}
+        assert deduplicador.duplicatas == {}
+
+        assert list(DeduplicadorDeArquivos("exata").filtrar([("a", 0, MODULO), ("b", 0, MODULO_VARIANTE)]))[1][2] == MODULO_VARIANTE
+        with pytest.raises(ValueError, match="deduplicacao"):
+            DeduplicadorDeArquivos("hash")
+
+    def test_preenchimento_replica_mudanca_para_as_copias(self):
+        duplicatas = {"b/main.tf": "a/main.tf", "c/main.tf": "a/main.tf"}
+        assert agrupar_duplicatas(duplicatas) == {"a/main.tf": ["b/main.tf", "c/main.tf"]}
+
+        json_inicial = {"conjunto_de_mudancas": [
+            {"caminho_do_arquivo": "a/main.tf", "status": "MODIFICADO", "conteudo": "novo", "justificativa": "Tipagem"},
+            {"caminho_do_arquivo": "c/main.tf", "status": "MODIFICADO", "conteudo": "proprio", "justificativa": "Outra"},
+        ]}
+        json_agrupado = {"grupo": {"conjunto_de_mudancas": [{"caminho_do_arquivo": "a/main.tf"}]}}
+
+        resultado = ChangesetFiller().main(json_agrupado, json_inicial, duplicatas=duplicatas)
+
+        mudancas = {m["caminho_do_arquivo"]: m for m in resultado["grupo"]["conjunto_de_mudancas"]}
+        # 'c/main.tf' tem mudança própria e não é sobrescrita
+        assert list(mudancas) == ["a/main.tf", "b/main.tf"]
+        assert mudancas["b/main.tf"]["conteudo"] == "novo"
+        assert "Mesma mudança de 'a/main.tf'" in mudancas["b/main.tf"]["justificativa"]
+
+    def test_mudanca_em_copia_nao_volta_ao_original(self):
+        duplicatas = {"pkg/b/helper.py": "pkg/a/helper.py", "pkg/c/helper.py": "pkg/a/helper.py"}
+        json_inicial = {"conjunto_de_mudancas": [
+            {"caminho_do_arquivo": "pkg/b/helper.py", "status": "REMOVIDO", "conteudo": None, "justificativa": "Duplicado"},
+            {"caminho_do_arquivo": "pkg/c/helper.py", "status": "MODIFICADO", "conteudo": "novo", "justificativa": "Ajuste"},
+        ]}
+        json_agrupado = {"grupo": {"conjunto_de_mudancas": [
+            {"caminho_do_arquivo": "pkg/b/helper.py"}, {"caminho_do_arquivo": "pkg/c/helper.py"}
+        ]}}
+
+        resultado = ChangesetFiller().main(json_agrupado, json_inicial, duplicatas=duplicatas)
+
+        mudancas = {m["caminho_do_arquivo"]: m["status"] for m in resultado["grupo"]["conjunto_de_mudancas"]}
+        assert mudancas == {"pkg/b/helper.py": "REMOVIDO", "pkg/c/helper.py": "MODIFICADO"}
+
+    def test_remocao_do_original_nao_e_replicada(self):
+        json_inicial = {"conjunto_de_mudancas": [
+            {"caminho_do_arquivo": "a/main.tf", "status": "REMOVIDO", "conteudo": None, "justificativa": "Sem uso"},
+        ]}
+        json_agrupado = {"grupo": {"conjunto_de_mudancas": [{"caminho_do_arquivo": "a/main.tf"}]}}
+
+        resultado = ChangesetFiller().main(json_agrupado, json_inicial, duplicatas={"b/main.tf": "a/main.tf"})
+
+        assert [m["caminho_do_arquivo"] for m in resultado["grupo"]["conjunto_de_mudancas"]] == ["a/main.tf"]
+
+    def test_revisor_retorna_as_duplicatas(self):
+        reader = MagicMock()
+        reader.iter_repository.return_value = iter([("a/main.tf", 0, MODULO), ("b/main.tf", 0, MODULO)])
+        llm = MagicMock()
+        llm.executar_prompt.return_value = {'reposta_final': '{}'}
+
+        resultado = AgenteRevisor(reader, llm).main("relatorio_avaliacao_terraform", "org/repo")
+
+        assert resultado["duplicatas"] == {"b/main.tf": "a/main.tf"}
+        assert llm.executar_prompt.call_args.kwargs['prompt_principal'].count("valor_39") == 1
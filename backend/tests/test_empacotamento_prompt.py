@@ -0,0 +1,52 @@
+import json
+import pytest
+from tools.empacotamento_prompt import empacotar_codigo, empacotar_dados, registrar_formato, formatos_disponiveis
+from tools.medir_empacotamento import medir_formatos
+
+ARQUIVOS = [
+    ('src/app.py', 0, 'def ola():\n    return "olá"\n'),
+    ('README.md', 0, '# Título\n'),
+]
+
+class TestEmpacotamentoPrompt:
+    """
+    Testes dos formatos de empacotamento do código enviado ao LLM.
+    """
+
+    def test_json_padrao_identico_ao_formato_historico(self):
+        """Sem formato informado, o texto é o mesmo de json.dumps(indent=2, ensure_ascii=False)."""
+        esperado = json.dumps({caminho: conteudo for caminho, _, conteudo in ARQUIVOS}, indent=2, ensure_ascii=False)
+
+        assert empacotar_codigo(iter(ARQUIVOS)) == esperado
+        assert json.loads(empacotar_codigo(iter(ARQUIVOS), 'json_compacto')) == json.loads(esperado)
+        assert empacotar_codigo(iter([]), 'arquivos') is None
+
+    def test_arquivos_com_cabecalho_e_numeros_de_linha(self):
+        """Os formatos com cabeçalho mantêm o conteúdo bruto, sem escapes."""
+        texto = empacotar_codigo(iter(ARQUIVOS), 'arquivos')
+        assert '==> src/app.py <==\ndef ola():\n    return "olá"\n\n==> README.md <==\n# Título' in texto
+
+        numerado = empacotar_codigo(iter(ARQUIVOS), 'arquivos_numerados')
+        assert '==> src/app.py <==\n1\tdef ola():\n2\t    return "olá"\n\n' in numerado
+
+    def test_dados_estruturados_e_formato_invalido(self):
+        """Dados que não são {caminho: texto} recorrem ao JSON compacto; formatos desconhecidos falham."""
+        dados = {'resultado': [{'arquivo': 'a.py'}]}
+        assert empacotar_dados(dados) == json.dumps(dados, indent=2, ensure_ascii=False)
+        assert empacotar_dados(dados, 'arquivos') == '{"resultado":[{"arquivo":"a.py"}]}'
+        assert empacotar_dados({'a.py': 'x = 1\n'}, 'arquivos').endswith('==> a.py <==\nx = 1')
+        with pytest.raises(ValueError, match="formato_prompt"):
+            empacotar_codigo(iter(ARQUIVOS), 'xml')
+
+    def test_formato_registrado_e_medicao(self, monkeypatch):
+        """Formatos registrados entram na medição, que compara tokens com o formato 'json'."""
+        import tools.empacotamento_prompt
+        monkeypatch.setattr(tools.empacotamento_prompt, '_FORMATOS', dict(tools.empacotamento_prompt._FORMATOS))
+        registrar_formato('caminhos', lambda arquivos: '\n'.join(caminho for caminho, _, _ in arquivos) or None)
+        assert 'caminhos' in formatos_disponiveis()
+
+        medicoes = medir_formatos(ARQUIVOS, contar_tokens=len)
+
+        assert medicoes['json']['economia_percentual'] == 0.0
+        assert medicoes['caminhos']['tokens'] == len('src/app.py\nREADME.md')
+        assert medicoes['json_compacto']['economia_percentual'] > 0
@@ -0,0 +1,199 @@
+import asyncio
+import json
+import threading
+import anthropic
+import pytest
+from unittest.mock import MagicMock
+import tools.orcamento_tokens
+import tools.progresso_llm
+from domain.interfaces.llm_provider_interface import ILLMProvider
+from tools.fragmentacao_codigo import SEPARADOR_RELATORIOS
+from tools.orcamento_tokens import FragmentacaoNecessaria, Tokenizador
+from tools.limitador_cotas_llm import ArmazenamentoDeCotasLocal, Cota, LimitadorDeCotasLLM
+from tools.requisicao_claude import AnthropicClaudeProvider, CACHE_EFEMERO
+from tools.resiliencia_llm import PoliticaDeRetentativas, ProvedorComReserva
+from agents.agente_processador import AgenteProcessador
+from agents.agente_revisor import AgenteRevisor
+from backend.tests.test_requisicao_claude import _StreamFalso
+from backend.tests.test_resiliencia_llm import _erro_http
+
+class _StreamAssincronoFalso(_StreamFalso):
+    """Substitui o AsyncMessageStream do SDK."""
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    async def __aiter__(self):
+        for evento in self.eventos:
+            yield evento
+
+    async def get_final_message(self):
+        return self.mensagem_final
+
+class _ProvedorAssincronoFalso(ILLMProvider):
+    """Provedor com executar_prompt_async próprio; executar_prompt não deve ser usado."""
+
+    def __init__(self, responder):
+        self.responder = responder
+        self.chamadas = []
+
+    def executar_prompt(self, *args, **kwargs):
+        raise AssertionError("executar_prompt chamado no caminho assíncrono")
+
+    async def executar_prompt_async(self, **kwargs):
+        self.chamadas.append(kwargs)
+        return await self.responder(**kwargs)
+
+@pytest.fixture
+def tokenizador_estimativa(monkeypatch):
+    monkeypatch.setattr(tools.orcamento_tokens, 'obter_tokenizador', lambda model_name: Tokenizador("estimativa"))
+    monkeypatch.setattr(tools.progresso_llm, 'obter_tokenizador', lambda model_name: Tokenizador("estimativa"))
+    monkeypatch.setattr('agents.agente_revisor.obter_tokenizador', lambda model_name: Tokenizador("estimativa"))
+
+class TestProvedoresAssincronos:
+    """
+    Testes de executar_prompt_async nos provedores e nos componentes de resiliência.
+    """
+
+    def test_claude_usa_o_cliente_assincrono_e_retenta_sem_bloquear(self, tokenizador_estimativa):
+        secret_manager = MagicMock()
+        secret_manager.get_secret.return_value = "chave-teste"
+        esperas = []
+
+        async def dormir(segundos):
+            esperas.append(segundos)
+
+        provedor = AnthropicClaudeProvider(
+            secret_manager=secret_manager,
+            politica_retentativas=PoliticaDeRetentativas(max_tentativas=2, espera_base_s=0.1, dormir_async=dormir)
+        )
+        provedor.anthropic_client = MagicMock()
+        provedor.anthropic_client_async = MagicMock()
+        provedor.anthropic_client_async.messages.stream.side_effect = [
+            _erro_http(anthropic.RateLimitError, 429, {"retry-after": "3"}),
+            _StreamAssincronoFalso(cache_read_input_tokens=900, cache_creation_input_tokens=0)
+        ]
+
+        resultado = asyncio.run(provedor.executar_prompt_async("relatorio_sast", "print('ola')", instrucoes_extras="foco em SQL"))
+
+        kwargs = provedor.anthropic_client_async.messages.stream.call_args.kwargs
+        assert kwargs['system'][0]['cache_control'] == CACHE_EFEMERO
+        assert "print('ola')" in kwargs['messages'][0]['content'][0]['text']
+        assert resultado['reposta_final'] == '{"relatorio": "ok"}'
+        assert resultado['tokens_cache_leitura'] == 900
+        assert 3 <= esperas[0] <= 3.1
+        provedor.anthropic_client.messages.stream.assert_not_called()
+
+    def test_interface_executa_provedores_sincronos_em_uma_thread(self):
+        threads = []
+
+        class _ProvedorSincrono(ILLMProvider):
+            def executar_prompt(self, tipo_tarefa, prompt_principal, **kwargs):
+                threads.append(threading.current_thread())
+                return {'reposta_final': prompt_principal, 'tokens_entrada': 1, 'tokens_saida': 1}
+
+        resultado = asyncio.run(_ProvedorSincrono().executar_prompt_async("relatorio_sast", "{}"))
+
+        assert resultado['reposta_final'] == "{}"
+        assert threads[0] is not threading.main_thread()
+
+    def test_reserva_responde_e_a_geracao_lenta_e_cancelada(self):
+        canceladas = []
+
+        async def lento(**kwargs):
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                canceladas.append(kwargs['model_name'])
+                raise
+
+        async def rapido(**kwargs):
+            return {'reposta_final': '{}', 'tokens_entrada': 1, 'tokens_saida': 1}
+
+        async def executar():
+            provedor = ProvedorComReserva(
+                _ProvedorAssincronoFalso(lento), _ProvedorAssincronoFalso(rapido), "gpt-4.1-mini", latencia_maxima_s=0.05
+            )
+            resultado = await provedor.executar_prompt_async("relatorio_sast", "{}", model_name="gpt-4.1")
+            await asyncio.sleep(0)
+            return resultado
+
+        resultado = asyncio.run(executar())
+
+        assert resultado['modelo_reserva_utilizado'] == "gpt-4.1-mini"
+        assert canceladas == ["gpt-4.1"]
+
+    def test_limitador_espera_a_cota_no_event_loop(self):
+        agora = [0.0]
+
+        async def dormir(segundos):
+            agora[0] += segundos
+
+        limitador = LimitadorDeCotasLLM(
+            ArmazenamentoDeCotasLocal(lambda: agora[0]), {"gpt-4": Cota(tpm=600, rpm=60)},
+            espera_maxima_s=120, dormir_async=dormir
+        )
+
+        async def reservar_duas_vezes():
+            await limitador.reservar_async("azure_openai", "https://a", "gpt-4", 600)
+            return await limitador.reservar_async("azure_openai", "https://a", "gpt-4", 300)
+
+        reserva = asyncio.run(reservar_duas_vezes())
+
+        assert reserva.tokens == 300
+        assert agora[0] == pytest.approx(30, abs=1)
+
+class TestAgentesAssincronos:
+    """
+    Testes de main_async nos agentes.
+    """
+
+    def test_processador_trunca_e_chama_o_provedor_assincrono(self):
+        async def responder(**kwargs):
+            return {'reposta_final': '{"ok": true}', 'tokens_entrada': 10, 'tokens_saida': 5}
+        llm = _ProvedorAssincronoFalso(responder)
+
+        resultado = asyncio.run(AgenteProcessador(llm).main_async(
+            "relatorio_sast", {"dados": [1, 2]}, politica_orcamento="fragmentar", model_name="gpt-4.1"
+        ))
+
+        assert resultado == {"resultado": {"reposta_final": {'reposta_final': '{"ok": true}', 'tokens_entrada': 10, 'tokens_saida': 5}}}
+        assert llm.chamadas[0]['politica_orcamento'] == "truncar"
+        assert json.loads(llm.chamadas[0]['prompt_principal']) == {"dados": [1, 2]}
+
+    def test_revisor_analisa_fragmentos_como_tarefas_concorrentes(self, tokenizador_estimativa):
+        arquivos = [(f"pasta_{n}/arquivo.py", 600, str(n) * 600) for n in range(3)]
+        reader = MagicMock()
+        reader.iter_repository.return_value = iter(arquivos)
+        reader.ultimo_commit_sha = "abc"
+        em_andamento = []
+
+        async def responder(prompt_principal, instrucoes_extras="", politica_orcamento=None, **kwargs):
+            if politica_orcamento == "fragmentar":
+                raise FragmentacaoNecessaria("excede", {}, tokens_disponiveis_codigo=400)
+            # Só responde quando os três fragmentos estão em andamento no mesmo event loop
+            em_andamento.append(prompt_principal)
+            while len(em_andamento) < 3:
+                await asyncio.sleep(0.001)
+            caminhos = [c for c, _, _ in arquivos if c in prompt_principal]
+            return {
+                'reposta_final': json.dumps({"relatorio": f"sobre {caminhos[0]}", "conjunto_de_mudancas": caminhos}),
+                'tokens_entrada': 10, 'tokens_saida': 5, 'orcamento_tokens': {'acao': 'nenhuma', 'total_entrada': 10}
+            }
+
+        resultado = asyncio.run(asyncio.wait_for(
+            AgenteRevisor(reader, _ProvedorAssincronoFalso(responder)).main_async(
+                "relatorio_cleancode", "org/repo", instrucoes_extras="revisar"
+            ),
+            timeout=5
+        ))
+
+        resposta = resultado['resultado']['reposta_final']
+        mesclado = json.loads(resposta['reposta_final'])
+        assert mesclado['conjunto_de_mudancas'] == [c for c, _, _ in arquivos]
+        assert mesclado['relatorio'].split(SEPARADOR_RELATORIOS) == [f"sobre {c}" for c, _, _ in arquivos]
+        assert resposta['tokens_entrada'] == 30
+        assert resultado['commit_sha'] == "abc"
@@ -0,0 +1,86 @@
+import base64
+import pytest
+from unittest.mock import Mock, patch
+from tools.filtro_arquivos import LimitesDeLeitura, EXCLUSOES_PADRAO
+from tools.github_reader import GitHubRepositoryReader, ElementoArvore
+from tools.github_repository_provider import GitHubRepositoryProvider
+
+class TestLimitesDeLeitura:
+    """
+    Testes dos limites de leitura por workflow aplicados antes da busca de conteúdo.
+    """
+
+    def test_de_config_usa_padroes_e_valida_valores(self):
+        """Chaves ausentes assumem os padrões; limites inválidos são rejeitados."""
+        limites = LimitesDeLeitura.de_config(None)
+        assert limites.exclusoes == EXCLUSOES_PADRAO
+        assert limites.max_bytes_total is None
+
+        limites = LimitesDeLeitura.de_config({'max_total_bytes': 100, 'exclude': ['docs/**']})
+        assert limites.max_bytes_total == 100
+        assert limites.excluido('docs/a.py')
+        assert not limites.excluido('vendor/a.py')
+
+        with pytest.raises(ValueError):
+            LimitesDeLeitura.de_config({'max_file_bytes': -1})
+
+    def test_selecionar_aplica_exclusoes_tamanho_e_orcamento(self):
+        """Exclusões, tamanho por arquivo e orçamento total usam apenas os metadados."""
+        limites = LimitesDeLeitura(max_bytes_arquivo=50, max_bytes_total=60, exclusoes=['vendor/**', '*_pb2.py'])
+        elementos = [
+            ElementoArvore('src/a.py', 'blob', 's1', 30),
+            ElementoArvore('vendor/lib.py', 'blob', 's2', 10),
+            ElementoArvore('api/msg_pb2.py', 'blob', 's3', 10),
+            ElementoArvore('src/gigante.py', 'blob', 's4', 500),
+            ElementoArvore('src/b.py', 'blob', 's5', 40),
+            ElementoArvore('src/c.py', 'blob', 's6', 20),
+        ]
+
+        selecionados = limites.selecionar(elementos)
+
+        assert [e.path for e in selecionados] == ['src/a.py', 'src/c.py']
+
+    def test_parece_binario(self):
+        assert LimitesDeLeitura.parece_binario(b'\x89PNG\r\n\x1a\n\x00\x00')
+        assert not LimitesDeLeitura.parece_binario('código'.encode('utf-8'))
+
+    @patch('tools.github_reader.GitHubConnector')
+    @patch('tools.workflow_registry.yaml.safe_load')
+    @patch('builtins.open')
+    def test_reader_nao_busca_blobs_descartados_pelos_limites(self, mock_open, mock_yaml, mock_connector):
+        """Arquivos excluídos ou grandes demais não geram requisição; binários não voltam a ser baixados."""
+        mock_yaml.return_value = {
+            'relatorio_sast': {
+                'extensions': ['.py'],
+                'limits': {'max_file_bytes': 1000, 'exclude': ['vendor/**', '*_pb2.py']}
+            }
+        }
+
+        def item(caminho, sha, tamanho):
+            elemento = Mock(type='blob', sha=sha, size=tamanho)
+            elemento.path = caminho
+            return elemento
+
+        conteudos = {'s-ok': b'x = 1', 's-bin': b'\x00\x01\x02'}
+        mock_repo = Mock()
+        mock_repo.default_branch = 'main'
+        mock_repo.get_git_ref.return_value.object.sha = 'commit1'
+        mock_repo.get_git_tree.return_value = Mock(tree=[
+            item('src/ok.py', 's-ok', 5),
+            item('src/dados.py', 's-bin', 3),
+            item('vendor/lib.py', 's-vendor', 10),
+            item('proto/msg_pb2.py', 's-pb2', 10),
+            item('src/gerado.py', 's-grande', 50000),
+        ], truncated=False)
+        mock_repo.get_git_blob.side_effect = lambda sha: Mock(content=base64.b64encode(conteudos[sha]).decode())
+        mock_connector.return_value.connection.return_value = mock_repo
+
+        reader = GitHubRepositoryReader(repository_provider=GitHubRepositoryProvider())
+        resultado = reader.read_repository(nome_repo="org/repo", tipo_analise="relatorio_sast")
+
+        assert resultado == {'src/ok.py': 'x = 1'}
+        assert sorted(c.args[0] for c in mock_repo.get_git_blob.call_args_list) == ['s-bin', 's-ok']
+
+        mock_repo.get_git_blob.reset_mock()
+        reader.read_repository(nome_repo="org/repo", tipo_analise="relatorio_sast")
+        mock_repo.get_git_blob.assert_not_called()
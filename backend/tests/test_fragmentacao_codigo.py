@@ -0,0 +1,71 @@
+import json
+import threading
+from unittest.mock import MagicMock
+from tools.fragmentacao_codigo import planejar_fragmentos, mesclar_respostas, SEPARADOR_RELATORIOS
+from tools.orcamento_tokens import FragmentacaoNecessaria, Tokenizador
+from agents.agente_revisor import AgenteRevisor
+
+def _arquivo(caminho, tokens):
+    return (caminho, tokens, "x" * tokens)
+
+class TestFragmentacaoCodigo:
+    """
+    Testes da análise em map-reduce de repositórios maiores que a janela de contexto.
+    """
+
+    def test_fragmentos_mantem_diretorios_juntos(self):
+        arquivos = [
+            _arquivo("b/um.py", 40), _arquivo("a/um.py", 30), _arquivo("a/dois.py", 30),
+            _arquivo("b/dois.py", 40), _arquivo("c/grande.py", 150), _arquivo("raiz.py", 10),
+        ]
+        fragmentos = planejar_fragmentos(arquivos, 100, contar_tokens=lambda arquivo: arquivo[1])
+        caminhos = [[caminho for caminho, _, _ in fragmento] for fragmento in fragmentos]
+
+        # 'raiz.py' (diretório '.') vem primeiro; 'b' não cabe junto de 'a' e abre outro fragmento
+        assert caminhos == [["raiz.py", "a/dois.py", "a/um.py"], ["b/dois.py", "b/um.py"], ["c/grande.py"]]
+
+    def test_diretorio_maior_que_o_fragmento_e_dividido(self):
+        arquivos = [_arquivo(f"src/{n}.py", 40) for n in range(5)]
+        fragmentos = planejar_fragmentos(arquivos, 100, contar_tokens=lambda arquivo: arquivo[1])
+        assert [len(f) for f in fragmentos] == [2, 2, 1]
+
+    def test_reducao_preserva_o_esquema(self):
+        respostas = [
+            {"resumo_geral": "A", "conjunto_de_mudancas": [{"caminho_do_arquivo": "a.py", "conteudo": "1"}]},
+            {"resumo_geral": "B", "conjunto_de_mudancas": [{"caminho_do_arquivo": "b.py", "conteudo": "2"}]},
+        ]
+        mesclado = mesclar_respostas(respostas)
+        assert mesclado["resumo_geral"] == f"A{SEPARADOR_RELATORIOS}B"
+        assert [m["caminho_do_arquivo"] for m in mesclado["conjunto_de_mudancas"]] == ["a.py", "b.py"]
+
+    def test_revisor_analisa_fragmentos_em_paralelo(self, monkeypatch):
+        """Com código acima do orçamento, os fragmentos são analisados ao mesmo tempo e combinados."""
+        monkeypatch.setattr('agents.agente_revisor.obter_tokenizador', lambda model_name: Tokenizador("estimativa"))
+        arquivos = [(f"pasta_{n}/arquivo.py", 600, str(n) * 600) for n in range(3)]
+        reader = MagicMock()
+        reader.iter_repository.return_value = iter(arquivos)
+        reader.ultimo_commit_sha = "abc"
+
+        barreira = threading.Barrier(3, timeout=5)
+        def executar_prompt(prompt_principal, instrucoes_extras="", politica_orcamento=None, **kwargs):
+            if politica_orcamento == "fragmentar":
+                raise FragmentacaoNecessaria("excede", {}, tokens_disponiveis_codigo=400)
+            assert "parte" in instrucoes_extras and "revisar" in instrucoes_extras
+            # Só avança quando os três fragmentos estão em andamento
+            barreira.wait()
+            caminhos = [c for c, _, _ in arquivos if c in prompt_principal]
+            return {
+                'reposta_final': json.dumps({"relatorio": f"sobre {caminhos[0]}", "conjunto_de_mudancas": caminhos}),
+                'tokens_entrada': 10, 'tokens_saida': 5, 'orcamento_tokens': {'acao': 'nenhuma', 'total_entrada': 10}
+            }
+        llm = MagicMock()
+        llm.executar_prompt.side_effect = executar_prompt
+
+        resultado = AgenteRevisor(reader, llm).main("relatorio_cleancode", "org/repo", instrucoes_extras="revisar")
+
+        resposta = resultado['resultado']['reposta_final']
+        mesclado = json.loads(resposta['reposta_final'])
+        assert mesclado['conjunto_de_mudancas'] == [c for c, _, _ in arquivos]
+        assert mesclado['relatorio'].split(SEPARADOR_RELATORIOS) == [f"sobre {c}" for c, _, _ in arquivos]
+        assert resposta['tokens_entrada'] == 30
+        assert resposta['orcamento_tokens']['total_fragmentos'] == 3
@@ -0,0 +1,88 @@
+import os
+import shutil
+import subprocess
+import pytest
+from tools.git_mirror_reader import GitMirrorRepositoryReader
+from tools.workflow_registry import WorkflowRegistry
+
+pytestmark = pytest.mark.skipif(shutil.which('git') is None, reason="git não disponível")
+
+WORKFLOWS = {'relatorio_sast': {'extensions': ['.py']}}
+
+def _git(repositorio, *argumentos):
+    subprocess.run(["git", "-C", str(repositorio), *argumentos], check=True, capture_output=True)
+
+def _criar_repositorio(raiz, nome_repo, arquivos):
+    """Cria um repositório de origem em raiz/nome_repo com um commit inicial na branch main."""
+    repositorio = raiz / nome_repo
+    repositorio.mkdir(parents=True)
+    _git(repositorio, "init", "--quiet", "--initial-branch=main")
+    _git(repositorio, "config", "user.email", "testes@example.com")
+    _git(repositorio, "config", "user.name", "Testes")
+    _commitar(repositorio, arquivos)
+    return repositorio
+
+def _commitar(repositorio, arquivos):
+    for caminho, conteudo in arquivos.items():
+        destino = repositorio / caminho
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        destino.write_bytes(conteudo if isinstance(conteudo, bytes) else conteudo.encode('utf-8'))
+    _git(repositorio, "add", "-A")
+    _git(repositorio, "commit", "--quiet", "-m", "alteracao")
+    return subprocess.run(
+        ["git", "-C", str(repositorio), "rev-parse", "HEAD"], check=True, capture_output=True, text=True
+    ).stdout.strip()
+
+class TestGitMirrorRepositoryReader:
+    """
+    Testes do leitor baseado em espelhos Git locais, contra remotos file://.
+    """
+
+    def _criar_reader(self, tmp_path, **kwargs):
+        return GitMirrorRepositoryReader(
+            diretorio_espelhos=str(tmp_path / 'espelhos'),
+            url_remoto=f"file://{tmp_path / 'origem'}/{{nome_repo}}",
+            workflow_registry=WorkflowRegistry.de_config(WORKFLOWS),
+            **kwargs
+        )
+
+    def test_le_arquivos_filtrados_e_atualiza_por_fetch(self, tmp_path):
+        """O primeiro uso clona o espelho; os seguintes enxergam novos commits via fetch."""
+        origem = _criar_repositorio(tmp_path / 'origem', 'org/projeto', {
+            'app/main.py': 'print("ola")\n',
+            'README.md': '# Projeto\n',
+            'imagem.py': b'\x89PNG\x00\x00dados',
+        })
+        reader = self._criar_reader(tmp_path)
+
+        resultado = reader.read_repository('org/projeto', 'relatorio_sast', 'main')
+
+        assert resultado == {'app/main.py': 'print("ola")\n'}
+        assert os.path.isdir(tmp_path / 'espelhos' / 'org__projeto.git')
+
+        novo_sha = _commitar(origem, {'app/util.py': 'x = 1\n'})
+        arquivos = list(reader.iter_repository('org/projeto', 'relatorio_sast'))
+
+        assert [(caminho, tamanho) for caminho, tamanho, _ in arquivos] == [('app/main.py', 13), ('app/util.py', 6)]
+        assert reader.ultimo_commit_sha == novo_sha
+
+    def test_branch_inexistente(self, tmp_path):
+        """Uma branch ausente no remoto gera ValueError, como nos demais leitores."""
+        _criar_repositorio(tmp_path / 'origem', 'org/projeto', {'app.py': 'x = 1\n'})
+        reader = self._criar_reader(tmp_path)
+
+        with pytest.raises(ValueError):
+            reader.read_repository('org/projeto', 'relatorio_sast', 'inexistente')
+
+    def test_despeja_espelho_menos_usado_acima_do_orcamento(self, tmp_path):
+        """Acima do orçamento de disco o espelho menos recentemente usado é removido."""
+        for nome in ('org/antigo', 'org/recente'):
+            _criar_repositorio(tmp_path / 'origem', nome, {'app.py': 'x = 1\n'})
+        reader = self._criar_reader(tmp_path, limite_bytes_disco=1)
+
+        reader.read_repository('org/antigo', 'relatorio_sast')
+        reader.read_repository('org/recente', 'relatorio_sast')
+
+        espelhos = tmp_path / 'espelhos'
+        assert not os.path.isdir(espelhos / 'org__antigo.git')
+        assert os.path.isdir(espelhos / 'org__recente.git')
@@ -0,0 +1,51 @@
+from unittest.mock import MagicMock
+from tools.indice_lexico import IndiceBM25, extrair_termos, selecionar_por_relevancia
+from tools.orcamento_tokens import Tokenizador
+from agents.agente_revisor import AgenteRevisor
+
+ARQUIVOS = [
+    ("src/pagamentos/cobranca.py", 0, "class CobrancaCartao:\n    def estornar(self, valor): ...\n"),
+    ("src/usuarios/cadastro.py", 0, "def criar_usuario(nome, email): ...\n"),
+    ("src/relatorios/exportar_csv.py", 0, "import csv\n\ndef exportar(linhas): ...\n"),
+    ("README.md", 0, "Projeto de exemplo com pagamentos e usuários.\n"),
+]
+
+class TestIndiceLexico:
+    """
+    Testes da seleção de arquivos por relevância (BM25) sob orçamento de tokens.
+    """
+
+    def test_termos_separam_identificadores_e_removem_acentos(self):
+        assert extrair_termos("Estorno via CobrancaCartao em cobrança_recorrente") == [
+            "estorno", "via", "cobranca", "cartao", "cobranca", "recorrente"
+        ]
+
+    def test_caminhos_e_simbolos_pesam_mais_que_o_conteudo(self):
+        ranking = IndiceBM25(ARQUIVOS).pontuar("Permitir estorno parcial na cobrança com cartão")
+        assert ranking[0][0] == 0
+        assert dict(ranking)[2] == 0.0
+
+    def test_selecao_respeita_o_orcamento(self):
+        selecionados, omitidos = selecionar_por_relevancia(ARQUIVOS, "cadastro de usuário e pagamentos", 2, lambda _: 1)
+        assert [c for c, _, _ in selecionados] == ["src/pagamentos/cobranca.py", "src/usuarios/cadastro.py"]
+        assert [c for c, _, _ in omitidos] == ["src/relatorios/exportar_csv.py", "README.md"]
+
+        # Se tudo couber, nada é omitido
+        assert selecionar_por_relevancia(ARQUIVOS, "qualquer coisa", 10, lambda _: 1)[1] == []
+
+    def test_revisor_envia_relevantes_e_lista_os_demais(self, monkeypatch):
+        monkeypatch.setattr('agents.agente_revisor.obter_tokenizador', lambda model_name: Tokenizador("estimativa"))
+        reader = MagicMock()
+        reader.iter_repository.return_value = iter(ARQUIVOS)
+        llm = MagicMock()
+        llm.executar_prompt.return_value = {'reposta_final': '{}'}
+
+        AgenteRevisor(reader, llm).main(
+            "relatorio_implentacao_feature", "org/repo", instrucoes_extras="Exportar relatório em CSV",
+            formato_prompt="arquivos", orcamento_relevancia_tokens=90
+        )
+
+        prompt = llm.executar_prompt.call_args.kwargs['prompt_principal']
+        assert "==> src/relatorios/exportar_csv.py <==" in prompt
+        assert "==> src/pagamentos/cobranca.py <==" not in prompt
+        assert prompt.endswith("conteúdo não incluído por relevância) ---\nsrc/pagamentos/cobranca.py\nsrc/usuarios/cadastro.py\nREADME.md")
@@ -0,0 +1,187 @@
+import anthropic
+import pytest
+from unittest.mock import MagicMock, call
+import tools.orcamento_tokens
+import tools.progresso_llm
+from types import SimpleNamespace
+from tools.limitador_cotas_llm import (
+    ArmazenamentoDeCotasLocal, ArmazenamentoDeCotasRedis, Cota, CotaIndisponivel, EXPIRACAO_FILA_S,
+    LimitadorDeCotasLLM, ler_cotas
+)
+from tools.orcamento_tokens import Tokenizador
+from tools.requisicao_claude import AnthropicClaudeProvider
+from tools.resiliencia_llm import FalhaNaChamadaAoLLM, PoliticaDeRetentativas
+from backend.tests.test_requisicao_claude import _StreamFalso
+from backend.tests.test_resiliencia_llm import _erro_http
+
+class _Relogio:
+    """Relógio simulado: avança apenas quando o limitador dorme."""
+
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+    def dormir(self, segundos):
+        self.agora += segundos
+
+@pytest.fixture
+def relogio():
+    return _Relogio()
+
+@pytest.fixture(params=["local", "redis"])
+def armazenamento(request, relogio, monkeypatch):
+    """
+    Os cenários rodam nos dois armazenamentos: em memória e nos scripts Lua do
+    Redis (fakeredis com Lua). No Redis, o relógio simulado é o do comando TIME.
+    """
+    if request.param == "local":
+        return ArmazenamentoDeCotasLocal(relogio)
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    monkeypatch.setattr(
+        "fakeredis.commands_mixins.server_mixin.time", SimpleNamespace(time=lambda: 1_700_000_000 + relogio.agora)
+    )
+    return ArmazenamentoDeCotasRedis(fakeredis.FakeRedis())
+
+@pytest.fixture
+def limitador(relogio, armazenamento):
+    # 600 tokens por minuto: 10 tokens por segundo
+    return LimitadorDeCotasLLM(
+        armazenamento, {"gpt-4": Cota(tpm=600, rpm=60), "gpt-4.1": Cota(tpm=6000, rpm=60)},
+        espera_maxima_s=120, dormir=relogio.dormir
+    )
+
+class TestLimitadorDeCotasLLM:
+    """
+    Testes das reservas de cota por deployment, com o armazenamento local e o do Redis.
+    """
+
+    def test_espera_o_reabastecimento_do_balde(self, limitador, relogio):
+        limitador.reservar("azure_openai", "https://a", "gpt-4", 600)
+        assert relogio.agora == 0
+
+        limitador.reservar("azure_openai", "https://a", "gpt-4", 300)
+        assert relogio.agora == pytest.approx(30, abs=1)
+
+    def test_reconciliacao_devolve_o_que_nao_foi_usado(self, limitador, relogio):
+        reserva = limitador.reservar("azure_openai", "https://a", "gpt-4", 600)
+        limitador.reconciliar(reserva, tokens_usados=100)
+
+        limitador.reservar("azure_openai", "https://a", "gpt-4", 500)
+        assert relogio.agora == 0
+
+    def test_reconciliacao_nao_passa_da_capacidade(self, limitador, relogio):
+        reserva = limitador.reservar("azure_openai", "https://a", "gpt-4", 300)
+        relogio.agora += 60
+        limitador.reservar("azure_openai", "https://a", "gpt-4", 10)
+        # O balde já está cheio de novo: os 300 tokens devolvidos não passam de 600
+        limitador.reconciliar(reserva, tokens_usados=0)
+
+        limitador.reservar("azure_openai", "https://a", "gpt-4", 600)
+        limitador.reservar("azure_openai", "https://a", "gpt-4", 290)
+        assert relogio.agora == pytest.approx(60 + 29, abs=1)
+
+    def test_cota_por_prefixo_mais_longo_e_por_deployment(self, limitador, relogio):
+        assert limitador.obter_cota("gpt-4.1-mini") == Cota(6000, 60)
+        assert limitador.reservar("azure_openai", "https://a", "claude-sonnet-4", 10 ** 9) is None
+
+        limitador.reservar("azure_openai", "https://a", "gpt-4", 600)
+        limitador.reservar("azure_openai", "https://b", "gpt-4", 600)
+        assert relogio.agora == 0
+
+    def test_fila_nao_deixa_chamadas_pequenas_passarem_a_frente(self, armazenamento, relogio):
+        cota = Cota(tpm=600, rpm=60)
+        assert armazenamento.tentar_reservar("d", "inicial", 500, cota) == 0
+
+        assert armazenamento.tentar_reservar("d", "grande", 300, cota) > 0
+        # Há 100 tokens livres, mas 'grande' chegou antes
+        assert armazenamento.tentar_reservar("d", "pequena", 50, cota) == -1
+
+        relogio.agora += 20
+        assert armazenamento.tentar_reservar("d", "grande", 300, cota) == 0
+        assert armazenamento.tentar_reservar("d", "pequena", 0, cota) == 0
+
+    def test_quem_abandona_a_fila_perde_o_lugar(self, armazenamento, relogio):
+        cota = Cota(tpm=600, rpm=60)
+        armazenamento.tentar_reservar("d", "inicial", 600, cota)
+        assert armazenamento.tentar_reservar("d", "abandonada", 600, cota) > 0
+        # Enquanto 'abandonada' ainda consulta a fila, ela vem primeiro
+        relogio.agora += 1
+        assert armazenamento.tentar_reservar("d", "seguinte", 10, cota) == -1
+
+        relogio.agora += EXPIRACAO_FILA_S + 1
+        assert armazenamento.tentar_reservar("d", "seguinte", 10, cota) == 0
+
+    def test_desiste_apos_a_espera_maxima(self, limitador):
+        limitador.reservar("azure_openai", "https://a", "gpt-4", 600)
+        limitador.espera_maxima_s = 5
+
+        with pytest.raises(CotaIndisponivel):
+            limitador.reservar("azure_openai", "https://a", "gpt-4", 600)
+
+    def test_limite_de_requisicoes(self, armazenamento, relogio):
+        limitador = LimitadorDeCotasLLM(armazenamento, ler_cotas('{"gpt-4": {"tpm": 100000, "rpm": 2}}'), dormir=relogio.dormir)
+        for _ in range(3):
+            limitador.reservar("azure_openai", None, "gpt-4", 10)
+        assert relogio.agora == pytest.approx(30, abs=1)
+
+    def test_provedor_reserva_a_estimativa_e_reconcilia_com_o_uso_real(self, monkeypatch):
+        monkeypatch.setattr(tools.orcamento_tokens, 'obter_tokenizador', lambda model_name: Tokenizador("estimativa"))
+        monkeypatch.setattr(tools.progresso_llm, 'obter_tokenizador', lambda model_name: Tokenizador("estimativa"))
+        secret_manager = MagicMock()
+        secret_manager.get_secret.return_value = "chave-teste"
+        limitador = MagicMock()
+        provedor = AnthropicClaudeProvider(secret_manager=secret_manager, limitador_cotas=limitador)
+        provedor.anthropic_client = MagicMock()
+        provedor.anthropic_client.messages.stream.return_value = _StreamFalso()
+
+        resultado = provedor.executar_prompt("relatorio_sast", "print('ola')", model_name="claude-sonnet-4", max_token_out=1000)
+
+        orcamento = resultado['orcamento_tokens']
+        limitador.reservar.assert_called_once_with("anthropic", None, "claude-sonnet-4", orcamento['total_entrada'] + 1000)
+        limitador.reconciliar.assert_called_once_with(limitador.reservar.return_value, 120)
+
+    def test_cada_tentativa_reserva_e_as_falhas_cobram_so_a_entrada(self, monkeypatch):
+        monkeypatch.setattr(tools.orcamento_tokens, 'obter_tokenizador', lambda model_name: Tokenizador("estimativa"))
+        monkeypatch.setattr(tools.progresso_llm, 'obter_tokenizador', lambda model_name: Tokenizador("estimativa"))
+        secret_manager = MagicMock()
+        secret_manager.get_secret.return_value = "chave-teste"
+        limitador = MagicMock()
+        limitador.reservar.side_effect = ["r1", "r2", "r3"]
+        provedor = AnthropicClaudeProvider(
+            secret_manager=secret_manager, limitador_cotas=limitador,
+            politica_retentativas=PoliticaDeRetentativas(max_tentativas=3, dormir=lambda s: None)
+        )
+        provedor.anthropic_client = MagicMock()
+        provedor.anthropic_client.messages.stream.side_effect = [
+            _erro_http(anthropic.RateLimitError, 429), _erro_http(anthropic.InternalServerError, 500), _StreamFalso()
+        ]
+
+        resultado = provedor.executar_prompt("relatorio_sast", "print('ola')", model_name="claude-sonnet-4", max_token_out=1000)
+
+        entrada = resultado['orcamento_tokens']['total_entrada']
+        assert limitador.reservar.call_count == 3
+        assert limitador.reconciliar.call_args_list == [call("r1", entrada), call("r2", entrada), call("r3", 120)]
+
+    def test_falha_definitiva_devolve_a_saida_reservada(self, monkeypatch):
+        monkeypatch.setattr(tools.orcamento_tokens, 'obter_tokenizador', lambda model_name: Tokenizador("estimativa"))
+        secret_manager = MagicMock()
+        secret_manager.get_secret.return_value = "chave-teste"
+        relogio = _Relogio()
+        limitador = LimitadorDeCotasLLM(ArmazenamentoDeCotasLocal(relogio), {"claude": Cota(tpm=100000, rpm=100)}, dormir=relogio.dormir)
+        provedor = AnthropicClaudeProvider(
+            secret_manager=secret_manager, limitador_cotas=limitador,
+            politica_retentativas=PoliticaDeRetentativas(max_tentativas=2, dormir=lambda s: None)
+        )
+        provedor.anthropic_client = MagicMock()
+        provedor.anthropic_client.messages.stream.side_effect = _erro_http(anthropic.InternalServerError, 500)
+
+        with pytest.raises(FalhaNaChamadaAoLLM):
+            provedor.executar_prompt("relatorio_sast", "print('ola')", model_name="claude-sonnet-4", max_token_out=90000)
+
+        # Só a entrada das duas tentativas continua cobrada: a saída reservada (2 x 90000
+        # tokens, acima da cota) voltou ao balde e uma nova reserva grande não espera
+        limitador.reservar("anthropic", None, "claude-sonnet-4", 90000)
+        assert relogio.agora == 0
@@ -0,0 +1,94 @@
+import pytest
+import tools.orcamento_tokens
+from tools.orcamento_tokens import (
+    LimitesDoModelo, OrcamentoDeTokens, OrcamentoDeTokensExcedido, FragmentacaoNecessaria, Tokenizador
+)
+
+@pytest.fixture
+def modelo_pequeno(monkeypatch):
+    """Modelo fictício de 1000 tokens de contexto, contado por estimativa (3 caracteres por token)."""
+    monkeypatch.setitem(tools.orcamento_tokens.LIMITES_POR_MODELO, "modelo-teste", LimitesDoModelo(1000, 200))
+    monkeypatch.setattr(tools.orcamento_tokens, 'obter_tokenizador', lambda model_name: Tokenizador("estimativa"))
+    return "modelo-teste"
+
+class TestOrcamentoDeTokens:
+    """
+    Testes da verificação prévia de tokens e das políticas rejeitar/truncar/fragmentar.
+    """
+
+    def test_requisicao_que_cabe_nao_e_alterada(self, modelo_pequeno):
+        orcamento = OrcamentoDeTokens(margem_formatacao=0)
+        codigo, contagem = orcamento.preparar(modelo_pequeno, "s" * 30, "r" * 30, "c" * 300, "i" * 30, 15000)
+
+        assert codigo == "c" * 300
+        assert contagem['acao'] == 'nenhuma'
+        assert (contagem['sistema'], contagem['rag'], contagem['codigo'], contagem['instrucoes']) == (10, 10, 100, 10)
+        assert contagem['max_saida'] == 200
+        assert contagem['limite_entrada'] == 800
+
+    def test_rejeitar_levanta_antes_da_chamada(self, modelo_pequeno):
+        with pytest.raises(OrcamentoDeTokensExcedido) as erro:
+            OrcamentoDeTokens(margem_formatacao=0).preparar(modelo_pequeno, "", "", "c" * 3000, "", 200)
+        assert erro.value.contagem['acao'] == 'rejeitada'
+        assert erro.value.contagem['codigo'] == 1000
+
+        with pytest.raises(ValueError, match="politica_orcamento"):
+            OrcamentoDeTokens().preparar(modelo_pequeno, "", "", "c", "", 200, politica="ignorar")
+
+    def test_truncar_corta_o_codigo_e_indica_o_corte(self, modelo_pequeno):
+        codigo, contagem = OrcamentoDeTokens(margem_formatacao=0).preparar(
+            modelo_pequeno, "s" * 300, "", "c" * 3000, "", 200, politica="truncar"
+        )
+
+        assert contagem['acao'] == 'truncada'
+        assert contagem['total_entrada'] <= contagem['limite_entrada']
+        assert contagem['tokens_removidos'] > 0
+        assert "conteúdo truncado pelo orçamento de tokens" in codigo
+
+    def test_fragmentar_informa_tokens_disponiveis_para_o_codigo(self, modelo_pequeno):
+        with pytest.raises(FragmentacaoNecessaria) as erro:
+            OrcamentoDeTokens(margem_formatacao=0).preparar(
+                modelo_pequeno, "s" * 300, "", "c" * 3000, "", 200, politica="fragmentar"
+            )
+        assert erro.value.tokens_disponiveis_codigo == 700
+
+class TestTokenizadorPorModelo:
+    """
+    Testes da escolha do tokenizador e do fallback para a estimativa.
+    """
+
+    @pytest.fixture(autouse=True)
+    def cache_vazio(self, monkeypatch):
+        monkeypatch.setattr(tools.orcamento_tokens, '_tokenizadores', {})
+
+    def test_usa_o_encoding_do_tiktoken_do_modelo(self, monkeypatch):
+        tiktoken = pytest.importorskip("tiktoken")
+        carregados = []
+
+        class CodificadorFalso:
+            def encode(self, texto, disallowed_special=()):
+                return texto.split()
+
+            def decode(self, tokens):
+                return " ".join(tokens)
+
+        monkeypatch.setattr(tiktoken, 'get_encoding', lambda nome: carregados.append(nome) or CodificadorFalso())
+
+        tokenizador = tools.orcamento_tokens.obter_tokenizador("gpt-4.1")
+
+        assert carregados == ["o200k_base"]
+        assert tokenizador.nome == "o200k_base"
+        assert tokenizador.contar("um dois tres") == 3
+
+    def test_encoding_inacessivel_cai_para_estimativa_com_aviso(self, monkeypatch, capsys):
+        tiktoken = pytest.importorskip("tiktoken")
+
+        def falhar(nome):
+            raise OSError("sem rede")
+
+        monkeypatch.setattr(tiktoken, 'get_encoding', falhar)
+
+        tokenizador = tools.orcamento_tokens.obter_tokenizador("gpt-4.1")
+
+        assert tokenizador.nome == "estimativa"
+        assert "AVISO: Tokenizador 'o200k_base' indisponível (sem rede)" in capsys.readouterr().out
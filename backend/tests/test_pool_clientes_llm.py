@@ -0,0 +1,100 @@
+import anthropic
+import httpx
+import pytest
+from unittest.mock import MagicMock
+import tools.orcamento_tokens
+import tools.progresso_llm
+import tools.requisicao_claude
+from tools.orcamento_tokens import Tokenizador
+from tools.pool_clientes_llm import ConfiguracaoDeCliente, PoolDeClientesLLM
+from tools.requisicao_claude import AnthropicClaudeProvider
+from backend.tests.test_requisicao_claude import _StreamFalso
+
+class _ErroDeAutenticacao(Exception):
+    pass
+
+def _erro_anthropic_401():
+    resposta = httpx.Response(401, request=httpx.Request("POST", "https://api.anthropic.com/v1/messages"))
+    return anthropic.AuthenticationError("invalid x-api-key", response=resposta, body=None)
+
+@pytest.fixture
+def secret_manager():
+    secret_manager = MagicMock()
+    secret_manager.get_secret.side_effect = ["chave-1", "chave-2", "chave-3"]
+    return secret_manager
+
+def _configuracao(endpoint="https://a.example.com"):
+    return ConfiguracaoDeCliente(
+        provedor="teste",
+        endpoint=endpoint,
+        nome_segredo="segredo",
+        fabrica=lambda api_key, limites: MagicMock(api_key=api_key, limites=limites),
+        erros_autenticacao=(_ErroDeAutenticacao,)
+    )
+
+class TestPoolDeClientesLLM:
+    """
+    Testes do reaproveitamento e da renovação dos clientes de LLM.
+    """
+
+    def test_cliente_criado_uma_vez_por_endpoint(self, secret_manager):
+        pool = PoolDeClientesLLM(secret_manager)
+
+        primeiro = pool.obter(_configuracao())
+        assert pool.obter(_configuracao()) is primeiro
+        assert pool.obter(_configuracao("https://b.example.com")) is not primeiro
+        assert secret_manager.get_secret.call_count == 2
+        assert primeiro.limites.max_keepalive_connections > 0
+
+    def test_renovacao_com_cliente_ja_renovado_nao_rele_o_segredo(self, secret_manager):
+        pool = PoolDeClientesLLM(secret_manager)
+        recusado = pool.obter(_configuracao())
+
+        renovado = pool.renovar(_configuracao(), recusado)
+        # Segunda thread que falhou com o mesmo cliente recebe o já renovado
+        assert pool.renovar(_configuracao(), recusado) is renovado
+        assert renovado.api_key == "chave-2"
+        assert secret_manager.get_secret.call_count == 2
+
+    def test_chamar_repete_uma_vez_com_a_chave_renovada(self, secret_manager):
+        pool = PoolDeClientesLLM(secret_manager)
+        cliente = pool.obter(_configuracao())
+
+        def chamada(cliente_usado):
+            if cliente_usado.api_key == "chave-1":
+                raise _ErroDeAutenticacao()
+            return "ok"
+
+        resultado, cliente_final = pool.chamar(_configuracao(), cliente, chamada)
+        assert resultado == "ok"
+        assert cliente_final is pool.obter(_configuracao())
+        assert cliente_final.api_key == "chave-2"
+
+    def test_provedores_compartilham_o_cliente_e_renovam_a_chave(self, monkeypatch, secret_manager):
+        monkeypatch.setattr(tools.orcamento_tokens, 'obter_tokenizador', lambda model_name: Tokenizador("estimativa"))
+        monkeypatch.setattr(tools.progresso_llm, 'obter_tokenizador', lambda model_name: Tokenizador("estimativa"))
+        clientes = {}
+
+        def fabrica(api_key, limites):
+            cliente = MagicMock()
+            if api_key == "chave-1":
+                cliente.messages.stream.side_effect = _erro_anthropic_401()
+            else:
+                cliente.messages.stream.return_value = _StreamFalso()
+            clientes[api_key] = cliente
+            return cliente
+
+        monkeypatch.setattr(
+            tools.requisicao_claude, 'CONFIGURACAO_CLIENTE_ANTHROPIC',
+            tools.requisicao_claude.CONFIGURACAO_CLIENTE_ANTHROPIC._replace(fabrica=fabrica)
+        )
+        pool = PoolDeClientesLLM(secret_manager)
+        primeiro = AnthropicClaudeProvider(pool_clientes=pool)
+        segundo = AnthropicClaudeProvider(pool_clientes=pool)
+        assert primeiro.anthropic_client is segundo.anthropic_client
+
+        resultado = primeiro.executar_prompt("relatorio_sast", "print('ola')")
+
+        assert resultado['reposta_final'] == '{"relatorio": "ok"}'
+        assert primeiro.anthropic_client is clientes["chave-2"]
+        assert AnthropicClaudeProvider(pool_clientes=pool).anthropic_client is clientes["chave-2"]
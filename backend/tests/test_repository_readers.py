@@ -1,6 +1,7 @@
 import pytest
 from unittest.mock import Mock, patch, MagicMock
 from tools.github_reader import GitHubRepositoryReader
+from tools.github_archive_reader import GitHubArchiveRepositoryReader
 from tools.repository_provider_factory import (
     get_repository_provider,
     get_repository_provider_explicit,
@@ -141,7 +142,7 @@ class TestRepositoryReaderIntegration:
     """
     
     @patch('tools.github_reader.GitHubConnector')
-    @patch('tools.github_reader.yaml.safe_load')
+    @patch('tools.workflow_registry.yaml.safe_load')
     @patch('builtins.open')
     def test_github_repository_reading(self, mock_open, mock_yaml, mock_connector):
         """
@@ -204,7 +205,7 @@ class TestRepositoryReaderIntegration:
         assert isinstance(call_args[1]['repository_provider'], GitHubRepositoryProvider)
     
     @patch('tools.github_reader.GitHubConnector')
-    @patch('tools.github_reader.yaml.safe_load')
+    @patch('tools.workflow_registry.yaml.safe_load')
     @patch('builtins.open')
     def test_gitlab_repository_reading(self, mock_open, mock_yaml, mock_connector):
         """
@@ -263,7 +264,7 @@ class TestRepositoryReaderIntegration:
         assert isinstance(call_args[1]['repository_provider'], GitLabRepositoryProvider)
     
     @patch('tools.github_reader.GitHubConnector')
-    @patch('tools.github_reader.yaml.safe_load')
+    @patch('tools.workflow_registry.yaml.safe_load')
     @patch('builtins.open')
     def test_azure_devops_repository_reading(self, mock_open, mock_yaml, mock_connector):
         """
@@ -382,4 +383,533 @@ class TestRepositoryReaderIntegration:
         mock_print.assert_called_with("Detectado repositório GitLab: gitlab-org/gitlab")
         
         get_repository_provider("org/proj/repo")
-        mock_print.assert_called_with("Detectado repositório Azure DevOps: org/proj/repo")
\ No newline at end of file
+        mock_print.assert_called_with("Detectado repositório Azure DevOps: org/proj/repo")
+
+class TestLeituraConcorrenteDeBlobs:
+    """
+    Testes da leitura concorrente de blobs no GitHubRepositoryReader.
+    
+    Verifica que o pool de workers mantém a ordem da árvore, repete
+    arquivos após rate limit secundário e ignora falhas definitivas.
+    """
+
+    @staticmethod
+    def _montar_repo(caminhos):
+        """Cria um repositório simulado com um blob por caminho informado."""
+        mock_repo = Mock()
+        mock_repo.default_branch = 'main'
+        elementos = []
+        for i, caminho in enumerate(caminhos):
+            elemento = Mock()
+            elemento.type = 'blob'
+            elemento.path = caminho
+            elemento.sha = f'sha{i}'
+            elementos.append(elemento)
+        mock_tree_response = Mock()
+        mock_tree_response.tree = elementos
+        mock_tree_response.truncated = False
+        mock_repo.get_git_ref.return_value.object.sha = 'head'
+        mock_repo.get_git_tree.return_value = mock_tree_response
+        return mock_repo
+
+    @patch('tools.github_reader.GitHubConnector')
+    @patch('tools.workflow_registry.yaml.safe_load')
+    @patch('builtins.open')
+    def test_ordem_deterministica_com_varios_workers(self, mock_open, mock_yaml, mock_connector):
+        """A ordem do dicionário retornado segue a ordem da árvore, não a de conclusão."""
+        import base64
+        import random
+        import time
+
+        mock_yaml.return_value = {'refatoracao': {'extensions': ['.py']}}
+        caminhos = [f'pkg/modulo_{i:03d}.py' for i in range(40)]
+        mock_repo = self._montar_repo(caminhos)
+
+        def get_git_blob(sha):
+            time.sleep(random.uniform(0, 0.005))
+            blob = Mock()
+            blob.content = base64.b64encode(f'# {sha}'.encode()).decode()
+            return blob
+
+        mock_repo.get_git_blob.side_effect = get_git_blob
+        mock_connector.return_value.connection.return_value = mock_repo
+
+        reader = GitHubRepositoryReader(repository_provider=GitHubRepositoryProvider(), max_workers=8)
+        resultado = reader.read_repository(nome_repo="org/repo", tipo_analise="refatoracao")
+
+        assert list(resultado.keys()) == caminhos
+        assert resultado['pkg/modulo_007.py'] == '# sha7'
+
+    @patch('tools.github_reader.time.sleep')
+    @patch('tools.github_reader.GitHubConnector')
+    @patch('tools.workflow_registry.yaml.safe_load')
+    @patch('builtins.open')
+    def test_retentativa_apos_rate_limit_secundario(self, mock_open, mock_yaml, mock_connector, mock_sleep):
+        """Um 403 de rate limit secundário é repetido; um 404 é descartado sem retentativa."""
+        from github import GithubException
+
+        mock_yaml.return_value = {'refatoracao': {'extensions': ['.py']}}
+        mock_repo = self._montar_repo(['a.py', 'b.py'])
+
+        blob_ok = Mock()
+        blob_ok.content = 'cHJpbnQoMSk='  # base64 de 'print(1)'
+        rate_limit = GithubException(
+            403, {'message': 'You have exceeded a secondary rate limit.'}, {'Retry-After': '0'}
+        )
+        chamadas = {'sha0': [rate_limit, blob_ok], 'sha1': [GithubException(404, {'message': 'Not Found'}, {})]}
+
+        def get_git_blob(sha):
+            resposta = chamadas[sha].pop(0)
+            if isinstance(resposta, Exception):
+                raise resposta
+            return resposta
+
+        mock_repo.get_git_blob.side_effect = get_git_blob
+        mock_connector.return_value.connection.return_value = mock_repo
+
+        reader = GitHubRepositoryReader(repository_provider=GitHubRepositoryProvider(), max_workers=1)
+        resultado = reader.read_repository(nome_repo="org/repo", tipo_analise="refatoracao")
+
+        assert resultado == {'a.py': 'print(1)'}
+        assert mock_repo.get_git_blob.call_count == 3
+
+
+class TestLeituraViaTarball:
+    """
+    Testes do GitHubArchiveRepositoryReader (modo snapshot via tarball).
+    """
+
+    @staticmethod
+    def _gerar_tarball(arquivos):
+        """Gera um tarball gzip em memória no layout do GitHub ('{owner}-{repo}-{sha}/...')."""
+        import io
+        import tarfile
+
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode='w:gz') as tar:
+            for caminho, conteudo in arquivos.items():
+                info = tarfile.TarInfo(name=f'org-repo-abc123/{caminho}')
+                info.size = len(conteudo)
+                tar.addfile(info, io.BytesIO(conteudo))
+        buffer.seek(0)
+        return buffer
+
+    @patch('tools.github_archive_reader.requests.get')
+    @patch('tools.github_reader.GitHubConnector')
+    @patch('tools.workflow_registry.yaml.safe_load')
+    @patch('builtins.open')
+    def test_extrai_apenas_extensoes_do_workflow(self, mock_open, mock_yaml, mock_connector, mock_get):
+        """Somente arquivos com as extensões alvo e decodificáveis em UTF-8 são retornados."""
+        mock_yaml.return_value = {'relatorio_avaliacao_terraform': {'extensions': ['.tf', '.tfvars']}}
+
+        mock_repo = Mock()
+        mock_repo.default_branch = 'main'
+        mock_repo.get_archive_link.return_value = 'https://codeload.github.com/org/repo/tar.gz/main?token=x'
+        mock_connector.return_value.connection.return_value = mock_repo
+
+        resposta = MagicMock()
+        resposta.raw = self._gerar_tarball({
+            'main.tf': b'resource "aws_s3_bucket" "b" {}',
+            'envs/prod.tfvars': b'region = "us-east-1"',
+            'README.md': b'# docs',
+            'modules/bin.tf': b'\xff\xfe\x00',
+        })
+        mock_get.return_value.__enter__.return_value = resposta
+
+        reader = GitHubArchiveRepositoryReader(repository_provider=GitHubRepositoryProvider())
+        resultado = reader.read_repository(nome_repo="org/repo", tipo_analise="relatorio_avaliacao_terraform")
+
+        assert resultado == {
+            'main.tf': 'resource "aws_s3_bucket" "b" {}',
+            'envs/prod.tfvars': 'region = "us-east-1"',
+        }
+        mock_repo.get_archive_link.assert_called_once_with("tarball", ref='main')
+        mock_repo.get_git_blob.assert_not_called()
+
+    @patch('tools.github_archive_reader.requests.get')
+    @patch('tools.github_reader.GitHubConnector')
+    @patch('tools.workflow_registry.yaml.safe_load')
+    @patch('builtins.open')
+    def test_leitura_fixada_no_commit_resolvido(self, mock_open, mock_yaml, mock_connector, mock_get):
+        """O commit resolvido antes da leitura é o baixado e o informado em ultimo_commit_sha."""
+        mock_yaml.return_value = {'relatorio_avaliacao_terraform': {'extensions': ['.tf']}}
+        sha = 'a' * 40
+
+        mock_repo = Mock()
+        mock_repo.default_branch = 'main'
+        mock_repo.get_git_ref.return_value.object.sha = sha
+        mock_repo.get_archive_link.return_value = 'https://codeload.github.com/org/repo/tar.gz/x?token=x'
+        mock_connector.return_value.connection.return_value = mock_repo
+        resposta = MagicMock()
+        resposta.raw = self._gerar_tarball({'main.tf': b'locals {}'})
+        mock_get.return_value.__enter__.return_value = resposta
+
+        reader = GitHubArchiveRepositoryReader(repository_provider=GitHubRepositoryProvider())
+        fixado = reader.resolver_commit("org/repo")
+        reader.read_repository(nome_repo="org/repo", tipo_analise="relatorio_avaliacao_terraform", nome_branch=fixado)
+
+        assert fixado == sha
+        mock_repo.get_git_ref.assert_called_once_with("heads/main")
+        mock_repo.get_archive_link.assert_called_once_with("tarball", ref=sha)
+        assert reader.ultimo_commit_sha == sha
+
+
+class TestLeituraIncremental:
+    """
+    Testes da leitura incremental (delta desde um commit) do GitHubRepositoryReader.
+    """
+
+    @patch('tools.github_reader.GitHubConnector')
+    @patch('tools.workflow_registry.yaml.safe_load')
+    @patch('builtins.open')
+    def test_delta_mescla_alterados_e_remove_apagados(self, mock_open, mock_yaml, mock_connector):
+        """Só os blobs novos são buscados; removidos somem e inalterados vêm do snapshot."""
+        import base64
+
+        mock_yaml.return_value = {'relatorio_sast': {'extensions': ['.py']}}
+        conteudos = {'a1': 'a = 1', 'b1': 'b = 1', 'a2': 'a = 2', 'c1': 'c = 1', 'd1': 'd = 1'}
+
+        def elemento(caminho, sha):
+            item = Mock(type='blob', sha=sha, size=None)
+            item.path = caminho
+            return item
+
+        mock_repo = Mock()
+        mock_repo.default_branch = 'main'
+        mock_repo.get_git_blob.side_effect = lambda sha: Mock(content=base64.b64encode(conteudos[sha].encode()).decode())
+        mock_repo.get_git_tree.return_value = Mock(
+            tree=[elemento('a.py', 'a1'), elemento('b.py', 'b1'), elemento('d.py', 'd1')], truncated=False
+        )
+        mock_connector.return_value.connection.return_value = mock_repo
+
+        reader = GitHubRepositoryReader(repository_provider=GitHubRepositoryProvider())
+        mock_repo.get_git_ref.return_value.object.sha = 'commit1'
+        reader.read_repository(nome_repo="org/repo", tipo_analise="relatorio_sast")
+        assert reader.ultimo_commit_sha == 'commit1'
+
+        def alterado(filename, status, sha=None, previous_filename=None):
+            return Mock(filename=filename, status=status, sha=sha, previous_filename=previous_filename)
+
+        mock_repo.get_git_ref.return_value.object.sha = 'commit2'
+        mock_repo.compare.return_value = Mock(status='ahead', files=[
+            alterado('a.py', 'modified', 'a2'),
+            alterado('b.py', 'removed'),
+            alterado('c.py', 'added', 'c1'),
+            alterado('docs/README.md', 'added', 'r1'),
+        ])
+        mock_repo.get_git_blob.reset_mock()
+
+        resultado = reader.read_repository_delta(nome_repo="org/repo", tipo_analise="relatorio_sast", commit_base='commit1')
+
+        assert resultado == {'a.py': 'a = 2', 'd.py': 'd = 1', 'c.py': 'c = 1'}
+        assert reader.ultimo_commit_sha == 'commit2'
+        mock_repo.compare.assert_called_once_with('commit1', 'commit2')
+        assert sorted(c.args[0] for c in mock_repo.get_git_blob.call_args_list) == ['a2', 'c1']
+        assert mock_repo.get_git_tree.call_count == 1
+
+    @patch('tools.github_reader.GitHubConnector')
+    @patch('tools.workflow_registry.yaml.safe_load')
+    @patch('builtins.open')
+    def test_delta_sem_snapshot_faz_leitura_completa(self, mock_open, mock_yaml, mock_connector):
+        """Sem o manifesto do commit base no cache, o leitor recorre à leitura completa."""
+        mock_yaml.return_value = {'relatorio_sast': {'extensions': ['.py']}}
+        item = Mock(type='blob', sha='x1', size=None)
+        item.path = 'x.py'
+        mock_repo = Mock()
+        mock_repo.default_branch = 'main'
+        mock_repo.get_git_ref.return_value.object.sha = 'commit9'
+        mock_repo.get_git_tree.return_value = Mock(tree=[item], truncated=False)
+        mock_repo.get_git_blob.return_value = Mock(content='eCA9IDE=')  # base64 de 'x = 1'
+        mock_connector.return_value.connection.return_value = mock_repo
+
+        reader = GitHubRepositoryReader(repository_provider=GitHubRepositoryProvider())
+        resultado = reader.read_repository_delta(nome_repo="org/repo", tipo_analise="relatorio_sast", commit_base='desconhecido')
+
+        assert resultado == {'x.py': 'x = 1'}
+        mock_repo.compare.assert_not_called()
+
+
+    @patch('tools.github_reader.GitHubConnector')
+    @patch('tools.workflow_registry.yaml.safe_load')
+    @patch('builtins.open')
+    def test_comparacao_no_limite_da_api_faz_leitura_completa(self, mock_open, mock_yaml, mock_connector):
+        """Com 300 arquivos a lista da Compare API pode estar truncada: o delta é descartado."""
+        mock_yaml.return_value = {'relatorio_sast': {'extensions': ['.py']}}
+        item = Mock(type='blob', sha='x1', size=None)
+        item.path = 'x.py'
+        mock_repo = Mock()
+        mock_repo.default_branch = 'main'
+        mock_repo.get_git_ref.return_value.object.sha = 'commit1'
+        mock_repo.get_git_tree.return_value = Mock(tree=[item], truncated=False)
+        mock_repo.get_git_blob.return_value = Mock(content='eCA9IDE=')  # base64 de 'x = 1'
+        mock_connector.return_value.connection.return_value = mock_repo
+
+        reader = GitHubRepositoryReader(repository_provider=GitHubRepositoryProvider())
+        reader.read_repository(nome_repo="org/repo", tipo_analise="relatorio_sast")
+
+        mock_repo.get_git_ref.return_value.object.sha = 'commit2'
+        mock_repo.compare.return_value = Mock(status='ahead', files=[
+            Mock(filename=f'gerado_{n}.py', status='added', sha=f'g{n}', previous_filename=None) for n in range(300)
+        ])
+
+        resultado = reader.read_repository_delta(nome_repo="org/repo", tipo_analise="relatorio_sast", commit_base='commit1')
+
+        assert resultado == {'x.py': 'x = 1'}
+        assert mock_repo.get_git_tree.call_count == 2
+        assert reader.ultimo_commit_sha == 'commit2'
+
+
+class TestArvoreTruncada:
+    """
+    Testes da listagem completa de árvores truncadas pela Git Trees API.
+    """
+
+    @staticmethod
+    def _item(caminho, tipo, sha):
+        item = Mock(type=tipo, sha=sha, size=None)
+        item.path = caminho
+        return item
+
+    @patch('tools.github_reader.GitHubConnector')
+    @patch('tools.workflow_registry.yaml.safe_load')
+    @patch('builtins.open')
+    def test_completa_listagem_por_subarvores(self, mock_open, mock_yaml, mock_connector):
+        """Subárvores são listadas em paralelo, com prefixo, e as truncadas expandidas nível a nível."""
+        import base64
+
+        mock_yaml.return_value = {'relatorio_sast': {'extensions': ['.py']}}
+        item = self._item
+        # commit1 -> raiz: main.py, src/ (cabe em uma chamada), mono/ (também truncada)
+        # mono/ -> svc/ ; svc/ -> api.py
+        arvores = {
+            ('commit1', True): Mock(tree=[item('main.py', 'blob', 'b-main')], truncated=True),
+            ('commit1', False): Mock(tree=[item('main.py', 'blob', 'b-main'), item('src', 'tree', 't-src'), item('mono', 'tree', 't-mono')], truncated=False),
+            ('t-src', True): Mock(tree=[item('util.py', 'blob', 'b-util'), item('pkg', 'tree', 't-pkg'), item('pkg/mod.py', 'blob', 'b-mod')], truncated=False),
+            ('t-mono', True): Mock(tree=[], truncated=True),
+            ('t-mono', False): Mock(tree=[item('svc', 'tree', 't-svc')], truncated=False),
+            ('t-svc', True): Mock(tree=[item('api.py', 'blob', 'b-api')], truncated=False),
+        }
+        mock_repo = Mock()
+        mock_repo.default_branch = 'main'
+        mock_repo.get_git_ref.return_value.object.sha = 'commit1'
+        mock_repo.get_git_tree.side_effect = lambda sha, recursive=False: arvores[(sha, recursive)]
+        mock_repo.get_git_blob.side_effect = lambda sha: Mock(content=base64.b64encode(sha.encode()).decode())
+        mock_connector.return_value.connection.return_value = mock_repo
+
+        reader = GitHubRepositoryReader(repository_provider=GitHubRepositoryProvider())
+        resultado = reader.read_repository(nome_repo="org/repo", tipo_analise="relatorio_sast")
+
+        assert resultado == {
+            'main.py': 'b-main',
+            'src/util.py': 'b-util',
+            'src/pkg/mod.py': 'b-mod',
+            'mono/svc/api.py': 'b-api',
+        }
+
+        # Segunda leitura do mesmo commit usa a listagem completa do cache
+        chamadas = mock_repo.get_git_tree.call_count
+        reader.read_repository(nome_repo="org/repo", tipo_analise="relatorio_sast")
+        assert mock_repo.get_git_tree.call_count == chamadas
+
+    @patch('tools.github_reader.GitHubConnector')
+    @patch('tools.workflow_registry.yaml.safe_load')
+    @patch('builtins.open')
+    def test_reaproveita_subarvores_inalteradas_do_cache(self, mock_open, mock_yaml, mock_connector):
+        """Um novo commit só lista as subárvores cujo SHA mudou."""
+        mock_yaml.return_value = {'relatorio_sast': {'extensions': ['.py']}}
+        item = self._item
+        arvores = {
+            ('commit1', True): Mock(tree=[], truncated=True),
+            ('commit1', False): Mock(tree=[item('a', 'tree', 't-a1'), item('b', 'tree', 't-b')], truncated=False),
+            ('commit2', True): Mock(tree=[], truncated=True),
+            ('commit2', False): Mock(tree=[item('a', 'tree', 't-a2'), item('b', 'tree', 't-b')], truncated=False),
+            ('t-a1', True): Mock(tree=[item('x.py', 'blob', 'b-x1')], truncated=False),
+            ('t-a2', True): Mock(tree=[item('x.py', 'blob', 'b-x2')], truncated=False),
+            ('t-b', True): Mock(tree=[item('y.py', 'blob', 'b-y')], truncated=False),
+        }
+        mock_repo = Mock()
+        mock_repo.default_branch = 'main'
+        mock_repo.get_git_tree.side_effect = lambda sha, recursive=False: arvores[(sha, recursive)]
+        mock_repo.get_git_blob.return_value = Mock(content='eCA9IDE=')
+        mock_connector.return_value.connection.return_value = mock_repo
+
+        reader = GitHubRepositoryReader(repository_provider=GitHubRepositoryProvider())
+        mock_repo.get_git_ref.return_value.object.sha = 'commit1'
+        reader.read_repository(nome_repo="org/repo", tipo_analise="relatorio_sast")
+
+        mock_repo.get_git_tree.reset_mock()
+        mock_repo.get_git_ref.return_value.object.sha = 'commit2'
+        resultado = reader.read_repository(nome_repo="org/repo", tipo_analise="relatorio_sast")
+
+        assert set(resultado) == {'a/x.py', 'b/y.py'}
+        shas_listados = [c.args[0] for c in mock_repo.get_git_tree.call_args_list]
+        assert 't-b' not in shas_listados
+        assert 't-a2' in shas_listados
+
+
+    @patch('tools.github_reader.GitHubConnector')
+    @patch('tools.workflow_registry.yaml.safe_load')
+    @patch('builtins.open')
+    def test_subarvore_repetida_apos_rate_limit_secundario(self, mock_open, mock_yaml, mock_connector):
+        """Um 403 com Retry-After em uma subárvore pausa os workers e a listagem é concluída."""
+        from github import GithubException
+
+        mock_yaml.return_value = {'relatorio_sast': {'extensions': ['.py']}}
+        item = self._item
+        arvores = {
+            ('commit1', True): Mock(tree=[], truncated=True),
+            ('commit1', False): Mock(tree=[item('a', 'tree', 't-a'), item('b', 'tree', 't-b')], truncated=False),
+            ('t-a', True): Mock(tree=[item('x.py', 'blob', 'b-x')], truncated=False),
+            ('t-b', True): Mock(tree=[item('y.py', 'blob', 'b-y')], truncated=False),
+        }
+        falhas = [GithubException(403, {'message': 'You have exceeded a secondary rate limit.'}, {'Retry-After': '0.01'})]
+
+        def get_git_tree(sha, recursive=False):
+            if sha == 't-b' and falhas:
+                raise falhas.pop()
+            return arvores[(sha, recursive)]
+
+        mock_repo = Mock()
+        mock_repo.default_branch = 'main'
+        mock_repo.get_git_ref.return_value.object.sha = 'commit1'
+        mock_repo.get_git_tree.side_effect = get_git_tree
+        mock_repo.get_git_blob.return_value = Mock(content='eCA9IDE=')
+        mock_connector.return_value.connection.return_value = mock_repo
+
+        reader = GitHubRepositoryReader(repository_provider=GitHubRepositoryProvider())
+        registrar_pausa = Mock(wraps=reader._registrar_pausa)
+        reader._registrar_pausa = registrar_pausa
+        resultado = reader.read_repository(nome_repo="org/repo", tipo_analise="relatorio_sast")
+
+        assert set(resultado) == {'a/x.py', 'b/y.py'}
+        registrar_pausa.assert_called_once_with(0.01)
+        assert [c.args[0] for c in mock_repo.get_git_tree.call_args_list].count('t-b') == 2
+
+
+class TestLeituraSobDemanda:
+    """
+    Testes do iterador iter_repository do GitHubRepositoryReader.
+    """
+
+    @patch('tools.github_reader.GitHubConnector')
+    @patch('tools.workflow_registry.yaml.safe_load')
+    @patch('builtins.open')
+    def test_iterador_entrega_tamanho_e_limita_leituras_antecipadas(self, mock_open, mock_yaml, mock_connector):
+        """Interromper a iteração cedo não dispara a leitura do repositório inteiro."""
+        import base64
+
+        mock_yaml.return_value = {'relatorio_sast': {'extensions': ['.py']}}
+        itens = []
+        for i in range(200):
+            item = Mock(type='blob', sha=f'sha{i}', size=None)
+            item.path = f'mod_{i}.py'
+            itens.append(item)
+
+        mock_repo = Mock()
+        mock_repo.default_branch = 'main'
+        mock_repo.get_git_ref.return_value.object.sha = 'commit1'
+        mock_repo.get_git_tree.return_value = Mock(tree=itens, truncated=False)
+        mock_repo.get_git_blob.side_effect = lambda sha: Mock(content=base64.b64encode(f'# {sha} ç'.encode()).decode())
+        mock_connector.return_value.connection.return_value = mock_repo
+
+        reader = GitHubRepositoryReader(repository_provider=GitHubRepositoryProvider(), max_workers=2)
+        iterador = reader.iter_repository(nome_repo="org/repo", tipo_analise="relatorio_sast")
+
+        caminho, tamanho, conteudo = next(iterador)
+        iterador.close()
+
+        assert (caminho, conteudo) == ('mod_0.py', '# sha0 ç')
+        assert tamanho == len('# sha0 ç'.encode('utf-8'))
+        assert reader.ultimo_commit_sha == 'commit1'
+        assert mock_repo.get_git_blob.call_count <= 2 * 4 + 1
+
+
+class TestLeitoresGitLabEAzure:
+    """
+    Testes dos leitores do GitLab (árvore + blobs brutos) e do Azure DevOps (zip da Items API).
+    """
+
+    def test_factory_seleciona_leitor_pelo_provedor(self):
+        """O leitor acompanha o provedor detectado; reader_mode só vale para o GitHub."""
+        from tools.repository_provider_factory import get_repository_reader
+        from tools.gitlab_reader import GitLabRepositoryReader
+        from tools.azure_devops_reader import AzureDevOpsRepositoryReader
+
+        assert type(get_repository_reader("microsoft/vscode")) is GitHubRepositoryReader
+        assert type(get_repository_reader("microsoft/vscode", reader_mode="archive")) is GitHubArchiveRepositoryReader
+        assert type(get_repository_reader("gitlab-org/gitlab", reader_mode="archive")) is GitLabRepositoryReader
+        assert type(get_repository_reader("myorg/proj/repo")) is AzureDevOpsRepositoryReader
+        with pytest.raises(ValueError, match="reader_mode"):
+            get_repository_reader("microsoft/vscode", reader_mode="ftp")
+
+    @patch('tools.github_reader.GitHubConnector')
+    @patch('tools.workflow_registry.yaml.safe_load')
+    @patch('builtins.open')
+    def test_gitlab_le_arvore_e_blobs_brutos(self, mock_open, mock_yaml, mock_connector):
+        """Blobs brutos são lidos em paralelo na ordem da árvore; binários e outras extensões são ignorados."""
+        from tools.gitlab_reader import GitLabRepositoryReader
+
+        mock_yaml.return_value = {'relatorio_sast': {'extensions': ['.py']}}
+        mock_projeto = Mock()
+        mock_projeto.default_branch = 'main'
+        mock_projeto.branches.get.return_value.commit = {'id': 'commit-gl'}
+        mock_projeto.repository_tree.return_value = [
+            {'id': 'sha-a', 'type': 'blob', 'path': 'app/a.py'},
+            {'id': 'sha-d', 'type': 'tree', 'path': 'app'},
+            {'id': 'sha-b', 'type': 'blob', 'path': 'app/b.py'},
+            {'id': 'sha-c', 'type': 'blob', 'path': 'README.md'},
+            {'id': 'sha-e', 'type': 'blob', 'path': 'app/bin.py'},
+        ]
+        blobs = {'sha-a': b'a = 1', 'sha-b': b'b = 2', 'sha-e': b'\x00\x01'}
+        mock_projeto.repository_raw_blob.side_effect = lambda sha: blobs[sha]
+        mock_connector.return_value.connection.return_value = mock_projeto
+
+        reader = GitLabRepositoryReader(max_workers=4)
+        resultado = reader.read_repository(nome_repo="grupo/projeto", tipo_analise="relatorio_sast")
+
+        assert resultado == {'app/a.py': 'a = 1', 'app/b.py': 'b = 2'}
+        assert reader.ultimo_commit_sha == 'commit-gl'
+        mock_projeto.branches.get.assert_called_once_with('main')
+        assert mock_projeto.repository_raw_blob.call_count == 3
+        assert isinstance(mock_connector.call_args[1]['repository_provider'], GitLabRepositoryProvider)
+
+    @patch('tools.azure_devops_reader.requests.get')
+    @patch('tools.azure_devops_reader.GitHubConnector')
+    @patch('tools.workflow_registry.yaml.safe_load')
+    @patch('builtins.open')
+    def test_azure_le_zip_do_commit(self, mock_open, mock_yaml, mock_connector, mock_get):
+        """A branch é resolvida para o commit e o zip é filtrado pelo diretório central."""
+        import io
+        import zipfile
+        from tools.azure_devops_reader import AzureDevOpsRepositoryReader
+
+        mock_yaml.return_value = {'relatorio_sast': {'extensions': ['.py'], 'limits': {'max_file_bytes': 100}}}
+        mock_connector.return_value._get_token_for_org.return_value = 'pat'
+
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as pacote:
+            pacote.writestr('src/', '')
+            pacote.writestr('src/app.py', 'print("azure")')
+            pacote.writestr('src/grande.py', 'x' * 500)
+            pacote.writestr('docs/leia.md', '# docs')
+        buffer.seek(0)
+
+        resposta_refs = Mock(status_code=200)
+        resposta_refs.json.return_value = {'value': [
+            {'name': 'refs/heads/main-antiga', 'objectId': 'outro'},
+            {'name': 'refs/heads/main', 'objectId': 'commit-az'},
+        ]}
+        resposta_zip = MagicMock()
+        resposta_zip.raw = buffer
+        resposta_zip.__enter__.return_value = resposta_zip
+        mock_get.side_effect = [resposta_refs, resposta_zip]
+
+        reader = AzureDevOpsRepositoryReader()
+        resultado = reader.read_repository(nome_repo="org/proj/repo", tipo_analise="relatorio_sast", nome_branch="main")
+
+        assert resultado == {'src/app.py': 'print("azure")'}
+        assert reader.ultimo_commit_sha == 'commit-az'
+        parametros_zip = mock_get.call_args_list[1][1]['params']
+        assert parametros_zip['versionDescriptor.version'] == 'commit-az'
+        assert parametros_zip['$format'] == 'zip'
+        mock_connector.return_value._get_token_for_org.assert_called_once_with('org')
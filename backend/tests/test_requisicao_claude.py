@@ -0,0 +1,101 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+import tools.orcamento_tokens
+import tools.progresso_llm
+from tools.orcamento_tokens import Tokenizador
+from tools.progresso_llm import GeracaoInterrompida
+from tools.requisicao_claude import AnthropicClaudeProvider, CACHE_EFEMERO
+
+class _StreamFalso:
+    """Substitui o MessageStream do SDK: eventos de texto, message_delta e a mensagem final."""
+
+    def __init__(self, textos=('{"relatorio": ', '"ok"}'), motivo_parada="end_turn", conteudo=None, **uso):
+        self.eventos = [SimpleNamespace(type="text", text=texto) for texto in textos]
+        self.eventos.append(SimpleNamespace(type="message_delta", delta=SimpleNamespace(stop_reason=motivo_parada)))
+        self.mensagem_final = SimpleNamespace(
+            content=conteudo or [SimpleNamespace(type="text", text="".join(textos))],
+            usage=SimpleNamespace(input_tokens=100, output_tokens=20, **uso)
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def __iter__(self):
+        return iter(self.eventos)
+
+    def get_final_message(self):
+        return self.mensagem_final
+
+@pytest.fixture
+def provedor(monkeypatch):
+    monkeypatch.setattr(tools.orcamento_tokens, 'obter_tokenizador', lambda model_name: Tokenizador("estimativa"))
+    monkeypatch.setattr(tools.progresso_llm, 'obter_tokenizador', lambda model_name: Tokenizador("estimativa"))
+    secret_manager = MagicMock()
+    secret_manager.get_secret.return_value = "chave-teste"
+    provedor = AnthropicClaudeProvider(secret_manager=secret_manager)
+    provedor.anthropic_client = MagicMock()
+    return provedor
+
+class TestAnthropicClaudeProvider:
+    """
+    Testes da montagem da requisição à API da Anthropic.
+    """
+
+    def test_breakpoints_de_cache_no_sistema_e_no_codigo(self, provedor):
+        provedor.anthropic_client.messages.stream.return_value = _StreamFalso(
+            cache_read_input_tokens=900, cache_creation_input_tokens=0
+        )
+
+        resultado = provedor.executar_prompt("relatorio_sast", "print('ola')", instrucoes_extras="foco em SQL")
+
+        kwargs = provedor.anthropic_client.messages.stream.call_args.kwargs
+        assert kwargs['system'][0]['cache_control'] == CACHE_EFEMERO
+        codigo, instrucoes = kwargs['messages']
+        assert codigo['content'][0]['cache_control'] == CACHE_EFEMERO
+        assert "print('ola')" in codigo['content'][0]['text']
+        # Instruções variam entre etapas: ficam fora do prefixo em cache
+        assert instrucoes['content'] == "--- INSTRUÇÕES EXTRAS ---\nfoco em SQL"
+        assert resultado['reposta_final'] == '{"relatorio": "ok"}'
+        assert resultado['tokens_cache_leitura'] == 900
+        assert resultado['tokens_cache_escrita'] == 0
+
+    def test_cache_de_prompt_desligado(self, provedor):
+        provedor.cache_de_prompt = False
+        provedor.anthropic_client.messages.stream.return_value = _StreamFalso()
+
+        resultado = provedor.executar_prompt("relatorio_sast", "x = 1")
+
+        kwargs = provedor.anthropic_client.messages.stream.call_args.kwargs
+        assert 'cache_control' not in kwargs['system'][0]
+        assert 'cache_control' not in kwargs['messages'][0]['content'][0]
+        assert len(kwargs['messages']) == 1
+        assert resultado['tokens_cache_leitura'] == resultado['tokens_cache_escrita'] == 0
+
+    def test_progresso_e_parada_por_max_tokens(self, provedor):
+        progressos = []
+        provedor.anthropic_client.messages.stream.return_value = _StreamFalso(textos=["a" * 30, "b" * 30])
+
+        provedor.executar_prompt("relatorio_sast", "x = 1", ao_progredir=progressos.append)
+
+        assert progressos[-1]['concluido'] is True
+        assert progressos[-1]['tokens_gerados'] == 20
+
+        provedor.anthropic_client.messages.stream.return_value = _StreamFalso(motivo_parada="max_tokens")
+        with pytest.raises(GeracaoInterrompida) as erro:
+            provedor.executar_prompt("relatorio_sast", "x = 1")
+        assert erro.value.motivo == "max_tokens"
+
+    def test_saida_estruturada_por_ferramenta(self, provedor):
+        ferramenta = SimpleNamespace(type="tool_use", name="registrar_resposta", input={"relatorio": "# Relatório"})
+        provedor.anthropic_client.messages.stream.return_value = _StreamFalso(textos=[], motivo_parada="tool_use", conteudo=[ferramenta])
+
+        resultado = provedor.executar_prompt("relatorio_sast", "x = 1", saida_estruturada=True)
+
+        kwargs = provedor.anthropic_client.messages.stream.call_args.kwargs
+        assert kwargs['tool_choice'] == {"type": "tool", "name": "registrar_resposta"}
+        assert kwargs['tools'][0]['input_schema']['required'] == ["relatorio"]
+        assert resultado['reposta_final'] == '{"relatorio": "# Relatório"}'
@@ -0,0 +1,161 @@
+import threading
+import httpx
+import openai
+import pytest
+from unittest.mock import MagicMock
+import tools.orcamento_tokens
+import tools.progresso_llm
+from tools.orcamento_tokens import Tokenizador
+from tools.requisicao_claude import AnthropicClaudeProvider
+from tools.resiliencia_llm import (
+    FalhaNaChamadaAoLLM, GeracaoSuperada, PoliticaDeRetentativas, ProvedorComReserva, erro_retentavel, espera_indicada
+)
+from backend.tests.test_requisicao_claude import _StreamFalso
+
+def _erro_http(classe, status, cabecalhos=None):
+    resposta = httpx.Response(status, headers=cabecalhos or {}, request=httpx.Request("POST", "https://api.example.com"))
+    return classe(f"status {status}", response=resposta, body=None)
+
+class _ProvedorFalso:
+    """Provedor que responde, falha ou espera um evento, conforme configurado."""
+
+    def __init__(self, resposta=None, erro=None, liberar=None):
+        self.resposta, self.erro, self.liberar = resposta, erro, liberar
+        self.modelos = []
+
+    def executar_prompt(self, model_name=None, ao_progredir=None, **kwargs):
+        self.modelos.append(model_name)
+        if self.liberar is not None:
+            while not self.liberar.wait(0.01):
+                ao_progredir({'tokens_gerados': 1})
+        if self.erro is not None:
+            raise self.erro
+        return dict(self.resposta)
+
+class TestPoliticaDeRetentativas:
+    """
+    Testes da classificação das falhas e das esperas entre tentativas.
+    """
+
+    def test_classificacao_de_falhas(self):
+        assert erro_retentavel(_erro_http(openai.RateLimitError, 429))
+        assert erro_retentavel(_erro_http(openai.InternalServerError, 503))
+        assert erro_retentavel(openai.APITimeoutError(httpx.Request("POST", "https://api.example.com")))
+        assert not erro_retentavel(_erro_http(openai.BadRequestError, 400))
+        assert not erro_retentavel(ValueError("resposta inválida"))
+
+    def test_cabecalhos_de_espera(self):
+        assert espera_indicada(_erro_http(openai.RateLimitError, 429, {"retry-after-ms": "1500"})) == 1.5
+        assert espera_indicada(_erro_http(openai.RateLimitError, 429, {"retry-after": "7"})) == 7
+        reset = {"x-ratelimit-reset-requests": "20ms", "x-ratelimit-reset-tokens": "1m6s"}
+        assert espera_indicada(_erro_http(openai.RateLimitError, 429, reset)) == 66
+        assert espera_indicada(_erro_http(openai.RateLimitError, 429)) is None
+
+    def test_respeita_retry_after_e_desiste_de_falhas_fatais(self):
+        esperas = []
+        politica = PoliticaDeRetentativas(max_tentativas=3, espera_base_s=0.5, espera_maxima_s=60, dormir=esperas.append)
+        chamada = MagicMock(side_effect=[_erro_http(openai.RateLimitError, 429, {"retry-after": "10"}), "ok"])
+
+        assert politica.executar(chamada) == "ok"
+        assert 10 <= esperas[0] <= 10.5
+
+        fatal = MagicMock(side_effect=_erro_http(openai.BadRequestError, 400))
+        with pytest.raises(openai.BadRequestError):
+            politica.executar(fatal)
+        assert fatal.call_count == 1
+
+    def test_backoff_exponencial_limitado(self):
+        esperas = []
+        politica = PoliticaDeRetentativas(max_tentativas=4, espera_base_s=1, espera_maxima_s=3, dormir=esperas.append)
+        chamada = MagicMock(side_effect=_erro_http(openai.InternalServerError, 500))
+
+        with pytest.raises(openai.InternalServerError):
+            politica.executar(chamada)
+        assert chamada.call_count == 4
+        assert len(esperas) == 3
+        assert esperas[0] <= 1 and esperas[1] <= 2 and esperas[2] <= 3
+
+    def test_provedor_repete_e_classifica_a_falha(self, monkeypatch):
+        monkeypatch.setattr(tools.orcamento_tokens, 'obter_tokenizador', lambda model_name: Tokenizador("estimativa"))
+        monkeypatch.setattr(tools.progresso_llm, 'obter_tokenizador', lambda model_name: Tokenizador("estimativa"))
+        secret_manager = MagicMock()
+        secret_manager.get_secret.return_value = "chave-teste"
+        provedor = AnthropicClaudeProvider(
+            secret_manager=secret_manager,
+            politica_retentativas=PoliticaDeRetentativas(max_tentativas=2, dormir=lambda segundos: None)
+        )
+        provedor.anthropic_client = MagicMock()
+        sobrecarga = _erro_http(openai.InternalServerError, 529)
+        provedor.anthropic_client.messages.stream.side_effect = [sobrecarga, _StreamFalso()]
+
+        assert provedor.executar_prompt("relatorio_sast", "print('ola')")['tokens_saida'] == 20
+
+        provedor.anthropic_client.messages.stream.side_effect = [sobrecarga, sobrecarga]
+        with pytest.raises(FalhaNaChamadaAoLLM) as erro:
+            provedor.executar_prompt("relatorio_sast", "print('ola')")
+        assert erro.value.retentavel and erro.value.limite_de_taxa
+
+class TestProvedorComReserva:
+    """
+    Testes das requisições cobertas por um modelo de reserva.
+    """
+
+    def test_principal_rapido_nao_aciona_a_reserva(self):
+        reserva = _ProvedorFalso({'reposta_final': 'reserva'})
+        provedor = ProvedorComReserva(_ProvedorFalso({'reposta_final': 'principal'}), reserva, "gpt-4.1-mini", latencia_maxima_s=5)
+
+        assert provedor.executar_prompt("relatorio_sast", "codigo", model_name="gpt-4.1")['reposta_final'] == 'principal'
+        assert reserva.modelos == []
+
+    def test_principal_lento_perde_para_a_reserva(self):
+        liberar = threading.Event()
+        principal = _ProvedorFalso({'reposta_final': 'principal'}, liberar=liberar)
+        provedor = ProvedorComReserva(principal, _ProvedorFalso({'reposta_final': 'reserva'}), "gpt-4.1-mini", latencia_maxima_s=0.05)
+
+        try:
+            resultado = provedor.executar_prompt("relatorio_sast", "codigo", model_name="gpt-4.1")
+        finally:
+            liberar.set()
+        assert resultado['reposta_final'] == 'reserva'
+        assert resultado['modelo_reserva_utilizado'] == "gpt-4.1-mini"
+
+    def test_limite_de_taxa_persistente_vai_para_a_reserva(self):
+        limitado = FalhaNaChamadaAoLLM("limitado", _erro_http(openai.RateLimitError, 429))
+        reserva = _ProvedorFalso({'reposta_final': 'reserva'})
+        provedor = ProvedorComReserva(_ProvedorFalso(erro=limitado), reserva, "claude-sonnet-4")
+
+        assert provedor.executar_prompt("relatorio_sast", "codigo", model_name="gpt-4.1")['reposta_final'] == 'reserva'
+        assert reserva.modelos == ["claude-sonnet-4"]
+
+    def test_falha_fatal_do_principal_nao_aciona_a_reserva(self):
+        fatal = FalhaNaChamadaAoLLM("inválida", _erro_http(openai.BadRequestError, 400))
+        reserva = _ProvedorFalso({'reposta_final': 'reserva'})
+        provedor = ProvedorComReserva(_ProvedorFalso(erro=fatal), reserva, "claude-sonnet-4")
+
+        with pytest.raises(FalhaNaChamadaAoLLM):
+            provedor.executar_prompt("relatorio_sast", "codigo", model_name="gpt-4.1")
+        assert reserva.modelos == []
+
+    def test_geracao_perdedora_e_abandonada(self):
+        liberar = threading.Event()
+        erros = []
+        principal = _ProvedorFalso({'reposta_final': 'principal'}, liberar=liberar)
+        original = principal.executar_prompt
+
+        def registrar_erro(**kwargs):
+            try:
+                return original(**kwargs)
+            except GeracaoSuperada as e:
+                erros.append(e)
+                raise
+
+        principal.executar_prompt = registrar_erro
+        provedor = ProvedorComReserva(principal, _ProvedorFalso({'reposta_final': 'reserva'}), "gpt-4.1-mini", latencia_maxima_s=0.05)
+        provedor.executar_prompt("relatorio_sast", "codigo", model_name="gpt-4.1")
+
+        for _ in range(200):
+            if erros:
+                break
+            threading.Event().wait(0.01)
+        liberar.set()
+        assert erros
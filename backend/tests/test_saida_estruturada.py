@@ -0,0 +1,91 @@
+import json
+import pytest
+from unittest.mock import MagicMock
+from tools.orcamento_tokens import FragmentacaoNecessaria, Tokenizador
+from tools.saida_estruturada import ReparadorDeJson, RespostaJsonInvalida, extrair_json, obter_esquema
+from agents.agente_revisor import AgenteRevisor
+
+MUDANCAS = {"resumo_geral": "ok", "conjunto_de_mudancas": [
+    {"caminho_do_arquivo": f"src/m{n}.py", "status": "MODIFICADO", "conteudo": "x = 1\n" * 200} for n in range(5)
+]}
+
+class TestSaidaEstruturada:
+    """
+    Testes dos esquemas de saída e da correção de respostas JSON inválidas.
+    """
+
+    def test_esquemas_por_tipo_de_tarefa(self):
+        assert obter_esquema("relatorio_owasp")["required"] == ["relatorio"]
+        assert "conjunto_de_mudancas" in obter_esquema("aplicacao_de_mudancas")["properties"]
+        assert obter_esquema("tarefa_sem_esquema") == {"type": "object"}
+
+    def test_correcoes_locais(self):
+        assert extrair_json('```json\n{"relatorio": "ok"}\n```') == {"relatorio": "ok"}
+        assert extrair_json('Segue o resultado:\n{"a": [1, 2,],}\nFim.') == {"a": [1, 2]}
+        with pytest.raises(RespostaJsonInvalida):
+            extrair_json('{"a": "sem fim')
+
+    def test_reenvia_apenas_o_trecho_quebrado(self):
+        texto = json.dumps(MUDANCAS, indent=2)
+        quebrado = texto.replace('"src/m3.py"', '"src/m3.py" "')
+        llm = MagicMock()
+
+        def corrigir(prompt_principal, **kwargs):
+            assert kwargs['tipo_tarefa'] == "reparo_json" and kwargs['saida_estruturada'] is True
+            assert len(prompt_principal) < len(quebrado) / 2
+            return {'reposta_final': json.dumps({"trecho_corrigido": prompt_principal.replace('"src/m3.py" "', '"src/m3.py"')})}
+        llm.executar_prompt.side_effect = corrigir
+
+        assert ReparadorDeJson(llm).carregar(quebrado) == MUDANCAS
+        assert llm.executar_prompt.call_count == 1
+
+        with pytest.raises(RespostaJsonInvalida):
+            ReparadorDeJson(llm, max_reparos=0).carregar(quebrado)
+
+    def test_trecho_limitado_em_resposta_de_uma_linha(self):
+        """Valores 'conteudo' longos ficam em uma única linha: o trecho é cortado por caracteres."""
+        mudancas = {"conjunto_de_mudancas": [
+            {"caminho_do_arquivo": f"src/m{n}.py", "status": "MODIFICADO", "conteudo": "linha = \"x\"\n" * 1000} for n in range(4)
+        ]}
+        texto = json.dumps(mudancas)
+        assert "\n" not in texto and len(texto) > 50_000
+        # Vírgula ausente no terceiro arquivo, no meio da linha única
+        posicao = texto.index('"src/m2.py", "status"')
+        quebrado = texto[:posicao] + texto[posicao:].replace('"MODIFICADO", "conteudo"', '"MODIFICADO" "conteudo"', 1)
+        llm = MagicMock()
+
+        def corrigir(prompt_principal, max_token_out, **kwargs):
+            assert len(prompt_principal) <= 2100
+            assert max_token_out >= len(prompt_principal)
+            # O corte não separa uma barra invertida do caractere escapado
+            assert (len(prompt_principal) - len(prompt_principal.rstrip('\\'))) % 2 == 0
+            return {'reposta_final': json.dumps({"trecho_corrigido": prompt_principal.replace('"MODIFICADO" "conteudo"', '"MODIFICADO", "conteudo"')})}
+        llm.executar_prompt.side_effect = corrigir
+
+        assert ReparadorDeJson(llm).carregar(quebrado) == mudancas
+        assert llm.executar_prompt.call_count == 1
+
+    def test_fragmento_invalido_e_refeito_sozinho(self, monkeypatch):
+        monkeypatch.setattr('agents.agente_revisor.obter_tokenizador', lambda model_name: Tokenizador("estimativa"))
+        arquivos = [(f"pasta_{n}/arquivo.py", 600, str(n) * 600) for n in range(2)]
+        reader = MagicMock()
+        reader.iter_repository.return_value = iter(arquivos)
+        reader.ultimo_commit_sha = "abc"
+        chamadas = []
+
+        def executar_prompt(prompt_principal, instrucoes_extras="", politica_orcamento=None, **kwargs):
+            if politica_orcamento == "fragmentar":
+                raise FragmentacaoNecessaria("excede", {}, tokens_disponiveis_codigo=400)
+            if kwargs.get('tipo_tarefa') == "reparo_json":
+                return {'reposta_final': "sem correção"}
+            chamadas.append(prompt_principal)
+            if "pasta_1" in prompt_principal and chamadas.count(prompt_principal) == 1:
+                return {'reposta_final': '{"relatorio": "quebrado'}
+            return {'reposta_final': json.dumps({"relatorio": "ok"})}
+        llm = MagicMock()
+        llm.executar_prompt.side_effect = executar_prompt
+
+        AgenteRevisor(reader, llm).main("relatorio_cleancode", "org/repo", instrucoes_extras="revisar")
+
+        assert sum("pasta_0" in prompt for prompt in chamadas) == 1
+        assert sum("pasta_1" in prompt for prompt in chamadas) == 2
@@ -0,0 +1,106 @@
+import shutil
+import subprocess
+import pytest
+from unittest.mock import MagicMock
+from tools.blob_cache import TwoTierBlobCache
+from tools.snapshot_repositorio import ArmazemDeSnapshots, sha_do_blob
+from tools.git_mirror_reader import GitMirrorRepositoryReader
+from tools.workflow_registry import WorkflowRegistry
+from agents.agente_revisor import AgenteRevisor
+from backend.tests.test_git_mirror_reader import _criar_repositorio, _commitar
+
+ARQUIVOS = [("app/main.py", 13, 'print("ola")\n'), ("app/util.py", 6, "x = 1\n")]
+
+def _llm():
+    llm = MagicMock()
+    llm.executar_prompt.return_value = {'reposta_final': '{}'}
+    return llm
+
+class TestSnapshotRepositorio:
+    """
+    Testes do snapshot do repositório reaproveitado entre as etapas de um job.
+    """
+
+    def test_gravar_e_carregar(self):
+        armazem = ArmazemDeSnapshots(TwoTierBlobCache(limite_memoria_bytes=1024 * 1024))
+        gravacao = armazem.iniciar_gravacao()
+        assert list(gravacao.registrar(iter(ARQUIVOS))) == ARQUIVOS
+
+        snapshot_id = gravacao.concluir("c" * 40)
+        snapshot = armazem.carregar(snapshot_id)
+
+        assert snapshot.commit_sha == "c" * 40
+        assert snapshot.arquivos == ARQUIVOS
+        # Leitura interrompida não gera snapshot
+        incompleta = armazem.iniciar_gravacao()
+        next(incompleta.registrar(iter(ARQUIVOS)))
+        assert incompleta.concluir("c" * 40) is None
+
+    def test_reaproveita_os_blobs_guardados_pelo_leitor(self):
+        cache = TwoTierBlobCache(limite_memoria_bytes=1024 * 1024)
+        for _, _, conteudo in ARQUIVOS:
+            cache.set(f"blob:{sha_do_blob(conteudo.encode('utf-8'))}", conteudo.encode('utf-8'))
+        bytes_antes = cache.estatisticas()['bytes_memoria']
+
+        armazem = ArmazemDeSnapshots(cache)
+        gravacao = armazem.iniciar_gravacao()
+        list(gravacao.registrar(iter(ARQUIVOS)))
+        snapshot_id = gravacao.concluir("c" * 40)
+
+        # Só o manifesto é acrescentado ao cache
+        manifesto = cache.get(f"snapshot:{snapshot_id}")
+        assert cache.estatisticas()['bytes_memoria'] == bytes_antes + len(manifesto)
+        assert armazem.carregar(snapshot_id).arquivos == ARQUIVOS
+
+    @pytest.mark.skipif(shutil.which('git') is None, reason="git não disponível")
+    def test_sha_do_blob_igual_ao_do_git(self):
+        for _, _, conteudo in ARQUIVOS:
+            sha_git = subprocess.run(
+                ["git", "hash-object", "--stdin"], input=conteudo.encode('utf-8'), capture_output=True, check=True
+            ).stdout.decode().strip()
+            assert sha_do_blob(conteudo.encode('utf-8')) == sha_git
+
+    def test_snapshot_despejado_do_cache(self):
+        armazem = ArmazemDeSnapshots(TwoTierBlobCache(limite_memoria_bytes=1024 * 1024))
+        gravacao = armazem.iniciar_gravacao()
+        list(gravacao.registrar(iter(ARQUIVOS)))
+        snapshot_id = gravacao.concluir(None)
+
+        armazem.cache = TwoTierBlobCache(limite_memoria_bytes=1024 * 1024)
+        assert armazem.carregar(snapshot_id) is None
+        assert armazem.carregar("inexistente") is None
+
+    def test_etapa_posterior_nao_consulta_o_provedor(self):
+        armazem = ArmazemDeSnapshots(TwoTierBlobCache(limite_memoria_bytes=1024 * 1024))
+        reader = MagicMock()
+        reader.iter_repository.return_value = iter(ARQUIVOS)
+        reader.ultimo_commit_sha = "a" * 40
+
+        primeira = AgenteRevisor(reader, _llm(), armazem_snapshots=armazem).main("relatorio_sast", "org/repo", nome_branch="main")
+
+        reader.iter_repository.reset_mock()
+        reader.ultimo_commit_sha = "b" * 40
+        llm = _llm()
+        segunda = AgenteRevisor(reader, llm, armazem_snapshots=armazem).main(
+            "aplicacao_de_mudancas", "org/repo", nome_branch="main", snapshot_id=primeira["snapshot_id"]
+        )
+
+        reader.iter_repository.assert_not_called()
+        assert segunda["commit_sha"] == "a" * 40
+        assert segunda["snapshot_id"] == primeira["snapshot_id"]
+        assert 'print(\\"ola\\")' in llm.executar_prompt.call_args.kwargs['prompt_principal']
+
+    @pytest.mark.skipif(shutil.which('git') is None, reason="git não disponível")
+    def test_leitura_fixada_em_commit(self, tmp_path):
+        """Com o SHA em nome_branch, a leitura ignora commits posteriores na branch."""
+        origem = _criar_repositorio(tmp_path / 'origem', 'org/projeto', {'app.py': 'x = 1\n'})
+        reader = GitMirrorRepositoryReader(
+            diretorio_espelhos=str(tmp_path / 'espelhos'),
+            url_remoto=f"file://{tmp_path / 'origem'}/{{nome_repo}}",
+            workflow_registry=WorkflowRegistry.de_config({'relatorio_sast': {'extensions': ['.py']}})
+        )
+        fixado = reader.resolver_commit('org/projeto', 'main')
+        _commitar(origem, {'app.py': 'x = 2\n'})
+
+        assert reader.read_repository('org/projeto', 'relatorio_sast', fixado) == {'app.py': 'x = 1\n'}
+        assert reader.ultimo_commit_sha == fixado
@@ -0,0 +1,63 @@
+import os
+from tools.workflow_registry import FiltroDeArquivos, WorkflowRegistry
+
+WORKFLOWS = {
+    'relatorio_avaliacao_terraform': {
+        'extensions': ['.tf', '.tfvars'],
+        'limits': {'exclude': ['**/.terraform/**']},
+        'steps': [{'params': {'tipo_analise': 'relatorio_avaliacao_terraform'}}, {'params': {'tipo_analise': 'aplicacao_de_mudancas'}}],
+    },
+    'relatorio_sast': {
+        'extensions': ['.py'],
+        'include': ['Dockerfile', 'deploy/*.yaml'],
+        'steps': [{'params': {'tipo_analise': 'relatorio_sast'}}, {'params': {'tipo_analise': 'aplicacao_de_mudancas'}}],
+    },
+}
+
+class TestWorkflowRegistry:
+    """
+    Testes do registro compilado de workflows compartilhado por servidor e leitores.
+    """
+
+    def test_sufixos_equivalem_a_endswith(self):
+        """A busca em conjunto por sufixo reproduz a semântica de endswith das extensões."""
+        extensoes = ['.py', '.d.ts', '.tfvars', 'Makefile']
+        filtro = FiltroDeArquivos(extensoes, limites=None)
+        caminhos = [
+            'a.py', 'src/a.b.py', 'x.pyc', 'py', 'dir.py/arquivo', 'types/index.d.ts', 'index.ts',
+            'env/prod.auto.tfvars', 'Makefile', 'docs/Makefile', 'GNUmakefile', '.py',
+        ]
+        for caminho in caminhos:
+            assert filtro.corresponde_extensao(caminho) == any(caminho.endswith(ext) for ext in extensoes), caminho
+
+    def test_inclusoes_exclusoes_e_precedencia_do_workflow(self):
+        """Globs de inclusão/exclusão valem por workflow; o workflow em execução tem precedência."""
+        registry = WorkflowRegistry.de_config(WORKFLOWS)
+
+        sast = registry.obter_filtro('relatorio_sast')
+        assert sast.corresponde('Dockerfile')
+        assert sast.corresponde('deploy/app.yaml')
+        assert not sast.corresponde('outros/app.yaml')
+        assert not sast.corresponde('vendor/lib.py')
+
+        terraform = registry.obter_filtro('aplicacao_de_mudancas', 'relatorio_avaliacao_terraform')
+        assert terraform.extensoes == ['.tf', '.tfvars']
+        assert not terraform.corresponde('.terraform/modules/x.tf')
+        assert registry.obter_filtro('aplicacao_de_mudancas').extensoes == ['.py']
+        assert registry.obter_filtro('inexistente') is None
+        assert registry.nomes() == ['relatorio_avaliacao_terraform', 'relatorio_sast']
+
+    def test_recarrega_quando_o_arquivo_muda(self, tmp_path):
+        """Uma alteração no mtime recompila o registro; uma versão inválida é ignorada."""
+        caminho = tmp_path / 'workflows.yaml'
+        caminho.write_text("relatorio_sast:\n  extensions: ['.py']\n", encoding='utf-8')
+        registry = WorkflowRegistry(str(caminho), intervalo_verificacao=0)
+        assert registry.obter_filtro('relatorio_sast').extensoes == ['.py']
+
+        caminho.write_text("relatorio_sast:\n  extensions: ['.py', '.pyi']\n", encoding='utf-8')
+        os.utime(caminho, ns=(0, os.stat(caminho).st_mtime_ns + 1_000_000_000))
+        assert registry.obter_filtro('relatorio_sast').extensoes == ['.py', '.pyi']
+
+        caminho.write_text("relatorio_sast: [quebrado\n", encoding='utf-8')
+        os.utime(caminho, ns=(0, os.stat(caminho).st_mtime_ns + 2_000_000_000))
+        assert registry.obter_filtro('relatorio_sast').extensoes == ['.py', '.pyi']
@@ -0,0 +1,42 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional
+
+class IBlobCache(ABC):
+    """
+    Interface para caches de conteúdo endereçado por SHA (blobs e árvores Git).
+
+    Objetos Git são imutáveis: o mesmo SHA sempre corresponde ao mesmo conteúdo.
+    Por isso as implementações não precisam de invalidação, apenas de uma
+    política de despejo por tamanho.
+    """
+
+    @abstractmethod
+    def get(self, chave: str) -> Optional[bytes]:
+        """
+        Obtém o conteúdo armazenado para a chave.
+
+        Args:
+            chave (str): Chave endereçada por conteúdo (ex: 'blob:<sha>', 'tree:<sha>')
+
+        Returns:
+            Optional[bytes]: Conteúdo armazenado, ou None em caso de miss
+        """
+        pass
+
+    @abstractmethod
+    def set(self, chave: str, valor: bytes):
+        """
+        Armazena o conteúdo para a chave, despejando entradas antigas se necessário.
+
+        Args:
+            chave (str): Chave endereçada por conteúdo
+            valor (bytes): Conteúdo a ser armazenado
+        """
+        pass
+
+    @abstractmethod
+    def estatisticas(self) -> Dict[str, Any]:
+        """
+        Retorna os contadores de uso do cache (hits, misses, bytes armazenados).
+        """
+        pass
@@ -1,10 +1,10 @@
 from abc import ABC, abstractmethod
-from typing import Dict
+from typing import Dict, Optional
 
 class IChangesetFiller(ABC):
     """
     Interface para preenchimento/reconstituição de conjuntos de mudanças.
     """
     @abstractmethod
-    def main(self, json_agrupado: dict, json_inicial: dict) -> dict:
+    def main(self, json_agrupado: dict, json_inicial: dict, duplicatas: Optional[Dict[str, str]] = None) -> dict:
         pass
@@ -45,4 +45,55 @@ class JobStoreInterface(ABC):
             ConnectionError: Se não conseguir conectar ao sistema de armazenamento
             ValueError: Se job_id for inválido
         """
-        pass
\ No newline at end of file
+        pass
+
+    @abstractmethod
+    def set_ultimo_commit_analisado(self, repo_name: str, branch_name: Optional[str], analysis_type: str, commit_sha: str):
+        """
+        Registra o SHA do último commit analisado para um repositório/branch/análise.
+        
+        Usado pela leitura incremental: a próxima execução da mesma análise
+        pode ler apenas o delta desde este commit.
+        
+        Args:
+            repo_name (str): Nome do repositório no formato 'org/repo'
+            branch_name (Optional[str]): Branch analisada (None para a branch padrão)
+            analysis_type (str): Tipo de análise (workflow) executado
+            commit_sha (str): SHA do commit efetivamente analisado
+        """
+        pass
+
+    @abstractmethod
+    def get_ultimo_commit_analisado(self, repo_name: str, branch_name: Optional[str], analysis_type: str) -> Optional[str]:
+        """
+        Recupera o SHA do último commit analisado para um repositório/branch/análise.
+        
+        Returns:
+            Optional[str]: SHA registrado, ou None se não houver análise anterior
+        """
+        pass
+
+    @abstractmethod
+    def set_progresso(self, job_id: str, progresso: Dict[str, Any], ttl: int = 86400):
+        """
+        Registra o progresso da etapa em execução, separado dos dados do job.
+
+        Gravado com frequência durante a geração em streaming; por isso fica em
+        uma chave própria e pequena, sem regravar o job inteiro.
+
+        Args:
+            job_id (str): Identificador único do job
+            progresso (Dict[str, Any]): Tokens gerados, tempo decorrido e etapa
+            ttl (int, optional): Tempo de vida em segundos. Padrão é 86400 (24 horas)
+        """
+        pass
+
+    @abstractmethod
+    def get_progresso(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Recupera o último progresso registrado para o job.
+
+        Returns:
+            Optional[Dict[str, Any]]: Progresso registrado, ou None se não houver
+        """
+        pass
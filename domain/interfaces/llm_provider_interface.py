@@ -1,5 +1,6 @@
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Optional
 
 class ILLMProvider(ABC):
     """
@@ -17,6 +18,8 @@ class ILLMProvider(ABC):
     - Respostas devem ser estruturadas consistentemente
     - Erros de rede/API devem ser encapsulados em RuntimeError
     - Validação de parâmetros deve gerar ValueError
+    - executar_prompt_async é opcional: por padrão executa executar_prompt em
+      uma thread; provedores com cliente assíncrono a sobrescrevem
     
     Example:
         >>> class MyLLMProvider(ILLMProvider):
@@ -33,7 +36,10 @@ class ILLMProvider(ABC):
         instrucoes_extras: str = "",
         usar_rag: bool = False,
         model_name: Optional[str] = None,
-        max_token_out: int = 15000
+        max_token_out: int = 15000,
+        politica_orcamento: Optional[str] = None,
+        ao_progredir: Optional[Callable[[Dict[str, Any]], None]] = None,
+        saida_estruturada: bool = False
     ) -> Dict[str, Any]:
         """
         Executa uma tarefa básica no LLM e retorna o resultado estruturado.
@@ -62,12 +68,26 @@ class ILLMProvider(ABC):
                 Se None, implementação deve usar modelo padrão. Defaults to None
             max_token_out (int, optional): Máximo de tokens na resposta.
                 Implementação deve respeitar este limite. Defaults to 15000
+            politica_orcamento (Optional[str], optional): O que fazer se a requisição
+                não couber na janela de contexto do modelo: 'rejeitar', 'truncar' ou
+                'fragmentar' (ver tools/orcamento_tokens.py). Defaults to None ('rejeitar')
+            ao_progredir (Optional[Callable], optional): Recebe periodicamente o progresso
+                da geração em streaming (tokens gerados, tempo decorrido; ver
+                tools/progresso_llm.py). Uma exceção levantada por ele aborta a geração.
+                Defaults to None
+            saida_estruturada (bool, optional): Se a resposta deve ser restrita ao
+                esquema JSON do tipo de tarefa (ver tools/saida_estruturada.py), com
+                o mecanismo nativo do provedor. Defaults to False
         
         Returns:
             Dict[str, Any]: Dicionário com estrutura padronizada contendo:
                 - reposta_final (str): Resposta principal do LLM
                 - tokens_entrada (int): Número de tokens consumidos na entrada
                 - tokens_saida (int): Número de tokens gerados na saída
+                - orcamento_tokens (Dict, opcional): Contagem prévia de tokens por
+                  parte da requisição e ação tomada pelo orçamento
+                - tokens_cache_leitura / tokens_cache_escrita (int, opcional): Tokens
+                  de entrada lidos do / gravados no cache de prompt do provedor
                 
                 Estrutura mínima esperada:
                 {
@@ -80,9 +100,16 @@ class ILLMProvider(ABC):
             ValueError: Se tipo_tarefa não for suportado, parâmetros inválidos,
                 ou prompt_principal estiver vazio
             RuntimeError: Se houver falha na comunicação com o LLM,
-                problemas de autenticação, ou erros de rede
+                problemas de autenticação, ou erros de rede. Os provedores do
+                projeto levantam FalhaNaChamadaAoLLM, que indica se a falha era
+                transitória (retentativas esgotadas) ou de limite de taxa
             TimeoutError: Se a requisição exceder o tempo limite configurado
                 (implementações devem definir timeout apropriado)
+            OrcamentoDeTokensExcedido: (subclasse de ValueError) Se a requisição
+                não couber no modelo e a política não permitir truncá-la
+            GeracaoInterrompida: (subclasse de RuntimeError) Se o provedor parar a
+                geração antes de uma resposta completa ('max_tokens', 'length')
+                ou ela exceder o tempo máximo
         
         Note:
             - Implementações devem fazer log de erros para debugging
@@ -91,6 +118,45 @@ class ILLMProvider(ABC):
         """
         pass
 
+    async def executar_prompt_async(
+        self,
+        tipo_tarefa: str,
+        prompt_principal: str,
+        instrucoes_extras: str = "",
+        usar_rag: bool = False,
+        model_name: Optional[str] = None,
+        max_token_out: int = 15000,
+        politica_orcamento: Optional[str] = None,
+        ao_progredir: Optional[Callable[[Dict[str, Any]], None]] = None,
+        saida_estruturada: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Versão assíncrona de executar_prompt, para chamadas concorrentes em um único event loop.
+        
+        Mesmos argumentos, retorno e exceções de executar_prompt. A
+        implementação padrão executa executar_prompt em uma thread
+        (asyncio.to_thread), de modo que qualquer provedor possa ser usado
+        pelos agentes assíncronos; provedores com cliente assíncrono do SDK
+        (AsyncAzureOpenAI, AsyncAnthropic) a sobrescrevem e não ocupam uma
+        thread por chamada.
+        
+        Note:
+            - Nos provedores com cliente assíncrono, ao_progredir é chamado no
+              event loop e deve ser rápido
+        """
+        return await asyncio.to_thread(
+            self.executar_prompt,
+            tipo_tarefa=tipo_tarefa,
+            prompt_principal=prompt_principal,
+            instrucoes_extras=instrucoes_extras,
+            usar_rag=usar_rag,
+            model_name=model_name,
+            max_token_out=max_token_out,
+            politica_orcamento=politica_orcamento,
+            ao_progredir=ao_progredir,
+            saida_estruturada=saida_estruturada
+        )
+
 class ILLMProviderWithRAG(ILLMProvider):
     """
     Interface estendida para provedores que suportam RAG (Retrieval-Augmented Generation).
@@ -274,7 +340,10 @@ class ILLMProviderComplete(ILLMProviderWithRAG, ILLMProviderWithModelSelection):
         instrucoes_extras: str = "",
         usar_rag: bool = False,
         model_name: Optional[str] = None,
-        max_token_out: int = 15000
+        max_token_out: int = 15000,
+        politica_orcamento: Optional[str] = None,
+        ao_progredir: Optional[Callable[[Dict[str, Any]], None]] = None,
+        saida_estruturada: bool = False
     ) -> Dict[str, Any]:
         """
         Executa uma tarefa completa no LLM com todas as funcionalidades disponíveis.
@@ -299,6 +368,12 @@ class ILLMProviderComplete(ILLMProviderWithRAG, ILLMProviderWithModelSelection):
                 Se None, usa padrão otimizado para o tipo_tarefa. Defaults to None
             max_token_out (int, optional): Máximo de tokens na resposta.
                 Ajustado automaticamente se RAG adicionar contexto. Defaults to 15000
+            politica_orcamento (Optional[str], optional): Política do orçamento
+                de tokens verificado antes da chamada. Defaults to None ('rejeitar')
+            ao_progredir (Optional[Callable], optional): Recebe o progresso da geração
+                em streaming. Defaults to None
+            saida_estruturada (bool, optional): Se a resposta deve seguir o esquema
+                JSON do tipo de tarefa. Defaults to False
         
         Returns:
             Dict[str, Any]: Resposta estruturada com todas as funcionalidades aplicadas.
@@ -1,11 +1,85 @@
+import re
 from abc import ABC, abstractmethod
-from typing import Dict
+from typing import Dict, Iterator, Optional, Tuple
+
+_PADRAO_SHA_COMMIT = re.compile(r'^[0-9a-fA-F]{40}$')
+
+def e_sha_de_commit(referencia: Optional[str]) -> bool:
+    """Indica se a referência recebida em nome_branch é o SHA completo de um commit."""
+    return bool(referencia) and bool(_PADRAO_SHA_COMMIT.match(referencia))
 
 class IRepositoryReader(ABC):
     """
     Interface para leitores de repositório de código-fonte.
+
+    Em nome_branch, as implementações também aceitam o SHA completo de um
+    commit (ver e_sha_de_commit): a leitura fica fixada nesse commit, mesmo
+    que a branch tenha avançado.
+
+    Attributes:
+        ultimo_commit_sha (Optional[str]): SHA do commit efetivamente lido na última
+            chamada de leitura, ou None se a implementação não o conhecer
     """
+    ultimo_commit_sha: Optional[str] = None
+
+    def resolver_commit(self, nome_repo: str, nome_branch: str = None) -> Optional[str]:
+        """
+        Resolve a branch (ou a branch padrão) para o SHA do commit que ela aponta agora.
+
+        Permite fixar um job em um commit antes da primeira leitura, passando o
+        SHA retornado em nome_branch de todas as leituras seguintes. A
+        implementação padrão retorna None (commit desconhecido).
+        """
+        return None
+
     @abstractmethod
     def read_repository(self, nome_repo: str, tipo_analise: str, nome_branch: str = None) -> Dict[str, str]:
         """Lê os arquivos do repositório e retorna um dicionário {caminho: conteudo}."""
         pass
+
+    def read_repository_delta(
+        self,
+        nome_repo: str,
+        tipo_analise: str,
+        commit_base: str,
+        nome_branch: str = None
+    ) -> Dict[str, str]:
+        """
+        Lê o repositório reaproveitando o snapshot do commit_base já analisado.
+
+        Implementações que suportam leitura incremental buscam apenas os arquivos
+        adicionados ou modificados desde commit_base, mesclam com o snapshot
+        anterior e descartam os caminhos removidos. O resultado tem o mesmo
+        contrato de read_repository.
+
+        A implementação padrão faz a leitura completa, permitindo que leitores
+        sem suporte a incremental continuem funcionando.
+        """
+        return self.read_repository(nome_repo=nome_repo, tipo_analise=tipo_analise, nome_branch=nome_branch)
+
+    def iter_repository(
+        self,
+        nome_repo: str,
+        tipo_analise: str,
+        nome_branch: str = None,
+        commit_base: Optional[str] = None
+    ) -> Iterator[Tuple[str, int, str]]:
+        """
+        Percorre os arquivos do repositório sob demanda, gerando (caminho, tamanho, conteudo).
+
+        Permite que consumidores filtrem, agrupem ou serializem o código sem manter
+        o repositório inteiro em memória várias vezes. O tamanho é expresso em bytes.
+        Se commit_base for informado, o conjunto de arquivos é o mesmo de
+        read_repository_delta; caso contrário, o de read_repository.
+
+        A implementação padrão materializa o dicionário e o percorre; leitores
+        que conseguem ler arquivo a arquivo devem sobrescrever este método.
+        """
+        if commit_base:
+            arquivos = self.read_repository_delta(
+                nome_repo=nome_repo, tipo_analise=tipo_analise, commit_base=commit_base, nome_branch=nome_branch
+            )
+        else:
+            arquivos = self.read_repository(nome_repo=nome_repo, tipo_analise=tipo_analise, nome_branch=nome_branch)
+        for caminho, conteudo in arquivos.items():
+            yield caminho, len(conteudo.encode('utf-8')), conteudo
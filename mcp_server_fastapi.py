@@ -1,9 +1,11 @@
+import asyncio
 import json
 import uuid
-import yaml
 import time
+import threading
 import traceback
 import enum
+from concurrent.futures import ThreadPoolExecutor
 from fastapi import FastAPI, BackgroundTasks, HTTPException, Path
 from pydantic import BaseModel, Field, ValidationError
 from typing import Optional, Literal, List, Dict, Any
@@ -18,18 +20,22 @@ from agents.agente_revisor import AgenteRevisor
 from agents.agente_processador import AgenteProcessador
 from tools.requisicao_openai import OpenAILLMProvider
 from tools.requisicao_claude import AnthropicClaudeProvider
+from tools.resiliencia_llm import ProvedorComReserva
 from tools.rag_retriever import AzureAISearchRAGRetriever
 from tools.preenchimento import ChangesetFiller
-from tools.github_reader import GitHubRepositoryReader
+from tools.snapshot_repositorio import ArmazemDeSnapshots
+from tools.saida_estruturada import ReparadorDeJson
+from tools.repository_provider_factory import get_repository_reader
+from tools.workflow_registry import obter_registry_padrao
 from domain.interfaces.llm_provider_interface import ILLMProvider
+from domain.interfaces.repository_reader_interface import IRepositoryReader
 
 # --- WORKFLOW_REGISTRY ---
-def load_workflow_registry(filepath: str) -> dict:
-    print(f"Carregando workflows do arquivo: {filepath}")
-    with open(filepath, 'r', encoding='utf-8') as f:
-        return yaml.safe_load(f)
-WORKFLOW_REGISTRY = load_workflow_registry("workflows.yaml")
-valid_analysis_keys = {key: key for key in WORKFLOW_REGISTRY.keys()}
+# Registro compilado compartilhado com os leitores de repositório. Alterações em
+# workflows existentes são recarregadas automaticamente; novos nomes de workflow
+# exigem reiniciar o servidor, pois o enum de validação é montado aqui.
+WORKFLOW_REGISTRY = obter_registry_padrao()
+valid_analysis_keys = {key: key for key in WORKFLOW_REGISTRY.nomes()}
 ValidAnalysisTypes = enum.Enum('ValidAnalysisTypes', valid_analysis_keys)
 
 # --- Modelos de Dados Pydantic ---
@@ -41,6 +47,7 @@ class StartAnalysisPayload(BaseModel):
     usar_rag: bool = Field(False)
     gerar_relatorio_apenas: bool = Field(False)
     model_name: Optional[str] = Field(None, description="Nome do modelo de LLM a ser usado. Se nulo, usa o padrão.")
+    leitura_incremental: bool = Field(False, description="Lê apenas os arquivos alterados desde o último commit analisado para este repositório/branch/análise.")
 
 class StartAnalysisResponse(BaseModel):
     job_id: str
@@ -62,6 +69,7 @@ class FinalStatusResponse(BaseModel):
     error_details: Optional[str] = Field(None)
     analysis_report: Optional[str] = Field(None)
     diagnostic_logs: Optional[Dict[str, Any]] = Field(None)
+    progresso: Optional[Dict[str, Any]] = Field(None)
 
 class ReportResponse(BaseModel):
     job_id: str
@@ -89,6 +97,24 @@ def create_llm_provider(model_name: Optional[str], rag_retriever: AzureAISearchR
     else:
         return OpenAILLMProvider(rag_retriever=rag_retriever)
 
+def create_repository_reader(workflow: Dict[str, Any], repo_name: str, nome_workflow: Optional[str] = None) -> IRepositoryReader:
+    """
+    Instancia o leitor de repositório do provedor detectado pelo nome do repositório.
+    No GitHub, o 'reader_mode' do workflow escolhe a estratégia:
+    - 'api' (padrão): Git Trees API + leitura concorrente de blobs.
+    - 'archive': download único do tarball da branch, extraído em streaming.
+    - 'mirror': espelho Git local atualizado por fetch incremental e lido via cat-file.
+    GitLab (árvore + blobs brutos em paralelo) e Azure DevOps (zip da Items API)
+    têm uma estratégia única.
+    O leitor usa os filtros de arquivos do workflow em execução (nome_workflow).
+    """
+    return get_repository_reader(
+        repo_name,
+        reader_mode=workflow.get('reader_mode'),
+        workflow_registry=WORKFLOW_REGISTRY,
+        nome_workflow=nome_workflow
+    )
+
 
 # --- Funções de Tarefa (Tasks) ---
 def handle_task_exception(job_id: str, e: Exception, step: str):
@@ -103,31 +129,83 @@ def handle_task_exception(job_id: str, e: Exception, step: str):
     except Exception as redis_e:
         print(f"[{job_id}] ERRO CRÍTICO ADICIONAL: Falha ao registrar o erro no Redis. Erro: {redis_e}")
 
-def run_workflow_task(job_id: str, start_from_step: int = 0):
+# Gravações de progresso saem do event loop; poucas threads bastam, pois as
+# notificações de cada etapa são coalescidas (no máximo uma gravação em curso)
+_executor_progresso = ThreadPoolExecutor(max_workers=2, thread_name_prefix="progresso")
+
+def _registrador_de_progresso(job_id: str, indice_etapa: int):
+    """
+    Publica o progresso da geração em streaming da etapa (tokens gerados,
+    tempo decorrido) na chave de progresso do job, exposta em /status enquanto
+    a etapa executa.
+
+    A notificação pode chegar no event loop (main_async) ou de threads de
+    fragmentos; ela só guarda o progresso mais recente e, se não houver
+    gravação em curso, agenda uma em _executor_progresso. Notificações que
+    chegam durante a gravação são coalescidas na seguinte.
+    """
+    trava = threading.Lock()  # protege apenas a troca do estado, nunca a gravação
+    estado = {'pendente': None, 'gravando': False}
+
+    def gravar():
+        while True:
+            with trava:
+                progresso, estado['pendente'] = estado['pendente'], None
+                if progresso is None:
+                    estado['gravando'] = False
+                    return
+            job_store.set_progresso(job_id, progresso)
+
+    def registrar(progresso: Dict[str, Any]):
+        with trava:
+            estado['pendente'] = dict(progresso, etapa=indice_etapa)
+            if estado['gravando']:
+                return
+            estado['gravando'] = True
+        _executor_progresso.submit(gravar)
+    return registrar
+
+async def run_workflow_task(job_id: str, start_from_step: int = 0):
     """
     Orquestrador de workflow único e genérico.
     - Executa os passos definidos no workflows.yaml.
     - Pode começar de um passo específico (útil após aprovação).
     - Pausa a execução se um passo tiver 'requires_approval: true'.
     - Incorpora o feedback do usuário (observacoes) após uma aprovação.
+    - Roda no event loop do servidor: as chamadas ao LLM usam os clientes
+      assíncronos dos SDKs (main_async) e a leitura do repositório, a criação
+      dos clientes e os commits rodam em threads.
     """
     job_info = None
     try:
         job_info = job_store.get_job(job_id)
         if not job_info: raise ValueError("Job não encontrado.")
 
-        rag_retriever = AzureAISearchRAGRetriever()
+        rag_retriever = await asyncio.to_thread(AzureAISearchRAGRetriever)
         changeset_filler = ChangesetFiller()
-        repo_reader = GitHubRepositoryReader()
+        armazem_snapshots = ArmazemDeSnapshots()
         
-        workflow = WORKFLOW_REGISTRY.get(job_info['data']['original_analysis_type'])
+        workflow = WORKFLOW_REGISTRY.obter_workflow(job_info['data']['original_analysis_type'])
         if not workflow: raise ValueError("Workflow não encontrado.")
+        repo_reader = await asyncio.to_thread(
+            create_repository_reader, workflow, job_info['data']['repo_name'], job_info['data']['original_analysis_type']
+        )
 
         # O ponto de partida é o resultado da etapa anterior à etapa de início
         previous_step_result = job_info['data'].get(f'step_{start_from_step - 1}_result', {})
         
         # O loop agora itera sobre os passos a partir do ponto de início
         steps_to_run = workflow.get('steps', [])[start_from_step:]
+
+        # Fixa o commit antes da primeira leitura: todas as etapas, inclusive as
+        # retomadas após uma aprovação, leem esse commit mesmo que a branch avance
+        if not job_info['data'].get('commit_sha_fixado') and any(s.get('agent_type') == 'revisor' for s in steps_to_run):
+            commit_sha_fixado = await asyncio.to_thread(
+                repo_reader.resolver_commit, job_info['data']['repo_name'], job_info['data']['branch_name']
+            )
+            if commit_sha_fixado:
+                print(f"[{job_id}] Leituras do job fixadas no commit {commit_sha_fixado}.")
+                job_info['data']['commit_sha_fixado'] = commit_sha_fixado
         
         for i, step in enumerate(steps_to_run):
             current_step_index = start_from_step + i
@@ -135,10 +213,16 @@ def run_workflow_task(job_id: str, start_from_step: int = 0):
             job_store.set_job(job_id, job_info)
             
             model_para_etapa = step.get('model_name', job_info.get('data', {}).get('model_name'))
-            llm_provider = create_llm_provider(model_para_etapa, rag_retriever)
+            llm_provider = await asyncio.to_thread(create_llm_provider, model_para_etapa, rag_retriever)
+            modelo_reserva = step.get('fallback_model_name')
+            if modelo_reserva:
+                # O modelo de reserva responde se o principal demorar ou continuar limitado pela API
+                provedor_reserva = await asyncio.to_thread(create_llm_provider, modelo_reserva, rag_retriever)
+                llm_provider = ProvedorComReserva(llm_provider, provedor_reserva, modelo_reserva, step.get('fallback_after_s'))
             
             agent_params = step.get('params', {}).copy()
             agent_params.update({'usar_rag': job_info.get("data", {}).get("usar_rag", False), 'model_name': model_para_etapa})
+            agent_params['ao_progredir'] = _registrador_de_progresso(job_id, current_step_index)
             
             # --- LÓGICA DE CONTEXTO CORRIGIDA E FINAL ---
             # Prepara o input principal para a etapa atual
@@ -156,26 +240,69 @@ def run_workflow_task(job_id: str, start_from_step: int = 0):
 
             agent_type = step.get("agent_type")
             if agent_type == "revisor":
-                agente = AgenteRevisor(repository_reader=repo_reader, llm_provider=llm_provider)
+                agente = AgenteRevisor(repository_reader=repo_reader, llm_provider=llm_provider, armazem_snapshots=armazem_snapshots)
                 # O input para a primeira etapa do job vem do payload; para as seguintes, do contexto
                 instrucoes = job_info['data']['instrucoes_extras'] if current_step_index == 0 else json.dumps(input_para_etapa, indent=2, ensure_ascii=False)
                 agent_params.update({'repositorio': job_info['data']['repo_name'], 'nome_branch': job_info['data']['branch_name'], 'instrucoes_extras': instrucoes})
-                agent_response = agente.main(**agent_params)
+                if current_step_index == 0 and job_info['data'].get('leitura_incremental'):
+                    commit_base = job_store.get_ultimo_commit_analisado(
+                        job_info['data']['repo_name'], job_info['data']['branch_name'], job_info['data']['original_analysis_type']
+                    )
+                    if commit_base:
+                        print(f"[{job_id}] Leitura incremental desde o commit {commit_base}.")
+                        agent_params['commit_base'] = commit_base
+                # Todas as etapas leem o mesmo commit: o snapshot da primeira leitura do job
+                # (o filtro de arquivos é o mesmo em todo o workflow) ou, se ele já tiver
+                # sido despejado do cache, o commit fixado em vez da ponta da branch
+                if job_info['data'].get('snapshot_id'):
+                    agent_params['snapshot_id'] = job_info['data']['snapshot_id']
+                if job_info['data'].get('commit_sha_fixado'):
+                    agent_params['nome_branch'] = job_info['data']['commit_sha_fixado']
+                agent_response = await agente.main_async(**agent_params)
+                if agent_response.get('snapshot_id'):
+                    job_info['data']['snapshot_id'] = agent_response['snapshot_id']
             elif agent_type == "processador":
                 agente = AgenteProcessador(llm_provider=llm_provider)
                 # O input para a primeira etapa do job vem do payload; para as seguintes, do contexto
                 agent_params['codigo'] = {"instrucoes_iniciais": job_info['data']['instrucoes_extras']} if current_step_index == 0 else input_para_etapa
-                agent_response = agente.main(**agent_params)
+                agent_response = await agente.main_async(**agent_params)
             else:
                 raise ValueError(f"Tipo de agente desconhecido '{agent_type}'.")
 
             json_string = agent_response['resultado']['reposta_final'].get('reposta_final', '')
             if not json_string.strip(): raise ValueError(f"IA retornou resposta vazia.")
             
-            current_step_result = json.loads(json_string.replace("```json", "").replace("```", "").strip())
+            # Correções locais e, se preciso, reenvio só do trecho inválido, sem refazer a etapa
+            current_step_result = await ReparadorDeJson(llm_provider).carregar_async(json_string, model_para_etapa)
 
             job_info['data'][f'step_{current_step_index}_result'] = current_step_result
+            orcamento_tokens = agent_response['resultado']['reposta_final'].get('orcamento_tokens')
+            if orcamento_tokens:
+                job_info['data'][f'step_{current_step_index}_orcamento_tokens'] = orcamento_tokens
+            resposta_llm = agent_response['resultado']['reposta_final']
+            if resposta_llm.get('tokens_cache_leitura') or resposta_llm.get('tokens_cache_escrita'):
+                job_info['data'][f'step_{current_step_index}_tokens_cache'] = {
+                    'leitura': resposta_llm.get('tokens_cache_leitura', 0),
+                    'escrita': resposta_llm.get('tokens_cache_escrita', 0)
+                }
+            if resposta_llm.get('modelo_reserva_utilizado'):
+                job_info['data'][f'step_{current_step_index}_modelo_reserva'] = resposta_llm['modelo_reserva_utilizado']
+            if resposta_llm.get('cache_hit'):
+                # Resposta do cache de respostas: os tokens registrados são os da chamada original
+                job_info['data'][f'step_{current_step_index}_cache_hit'] = True
             previous_step_result = current_step_result
+
+            # Cópias enviadas ao LLM só como referência: o preenchimento replica as mudanças para elas
+            if agent_response.get('duplicatas'):
+                job_info['data'].setdefault('duplicatas_por_conteudo', {}).update(agent_response['duplicatas'])
+
+            # Registra o commit analisado apenas após a análise inicial ser concluída com sucesso
+            commit_sha = agent_response.get('commit_sha')
+            if commit_sha and current_step_index == 0:
+                job_info['data']['commit_sha_analisado'] = commit_sha
+                job_store.set_ultimo_commit_analisado(
+                    job_info['data']['repo_name'], job_info['data']['branch_name'], job_info['data']['original_analysis_type'], commit_sha
+                )
             
             if step.get('requires_approval'):
                 print(f"[{job_id}] Etapa requer aprovação. Extraindo relatório e pausando workflow.")
@@ -221,7 +348,8 @@ def run_workflow_task(job_id: str, start_from_step: int = 0):
         job_store.set_job(job_id, job_info)
 
         dados_preenchidos = changeset_filler.main(json_agrupado=resultado_agrupamento,
-                                                  json_inicial=resultado_refatoracao)
+                                                  json_inicial=resultado_refatoracao,
+                                                  duplicatas=job_info['data'].get('duplicatas_por_conteudo'))
 
         dados_finais_formatados = {"resumo_geral": dados_preenchidos.get("resumo_geral", ""), "grupos": []}
         for nome_grupo, detalhes_pr in dados_preenchidos.items():
@@ -233,7 +361,8 @@ def run_workflow_task(job_id: str, start_from_step: int = 0):
         
         branch_base_para_pr = job_info['data'].get('branch_name', 'main')
         
-        commit_results = commit_multiplas_branchs.processar_e_subir_mudancas_agrupadas(
+        commit_results = await asyncio.to_thread(
+            commit_multiplas_branchs.processar_e_subir_mudancas_agrupadas,
             nome_repo=job_info['data']['repo_name'], 
             dados_agrupados=dados_finais_formatados,
             base_branch=branch_base_para_pr
@@ -263,7 +392,8 @@ def start_analysis(payload: StartAnalysisPayload, background_tasks: BackgroundTa
             'instrucoes_extras': payload.instrucoes_extras,
             'model_name': payload.model_name,
             'usar_rag': payload.usar_rag,
-            'gerar_relatorio_apenas': payload.gerar_relatorio_apenas # Mantido para consistência
+            'gerar_relatorio_apenas': payload.gerar_relatorio_apenas, # Mantido para consistência
+            'leitura_incremental': payload.leitura_incremental
         },
         'error_details': None
     }
@@ -356,7 +486,7 @@ def get_status(job_id: str = Path(..., title="O ID do Job a ser verificado")):
                 diagnostic_logs=logs
             )
         else:
-            return FinalStatusResponse(job_id=job_id, status=status)
+            return FinalStatusResponse(job_id=job_id, status=status, progresso=job_store.get_progresso(job_id))
     except ValidationError as e:
         print(f"ERRO CRÍTICO de Validação no Job ID {job_id}: {e}")
         print(f"Dados brutos do job que causaram o erro: {job}")
@@ -0,0 +1,175 @@
+# Arquivo: tools/aplicacao_patch.py
+
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+FORMATO_MUDANCAS_COMPLETO = "completo"
+FORMATO_MUDANCAS_PATCH = "patch"
+FORMATOS_MUDANCAS = (FORMATO_MUDANCAS_COMPLETO, FORMATO_MUDANCAS_PATCH)
+
+# Prompts do modo patch ficam ao lado do prompt original: <tipo_analise>_patch.md
+SUFIXO_PROMPT_PATCH = "_patch"
+
+# Instrução da nova chamada que pede o conteúdo completo dos arquivos cujo patch falhou
+MODELO_INSTRUCAO_CONTEUDO_COMPLETO = (
+    "Os patches gerados para os arquivos abaixo não puderam ser aplicados ao código original. "
+    "Gere novamente as mudanças destes arquivos, e somente deles, informando o código-fonte "
+    "completo de cada um em 'conteudo':\n{arquivos}"
+)
+
+_PADRAO_CABECALHO_HUNK = re.compile(r'^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@')
+
+class FalhaAoAplicarPatch(ValueError):
+    """O patch não corresponde ao conteúdo original do arquivo."""
+
+def _dividir_linhas(texto: str) -> Tuple[List[str], str, bool]:
+    """Linhas sem quebra, a quebra de linha usada e se o texto termina com quebra."""
+    quebra = '\r\n' if '\r\n' in texto else '\n'
+    return texto.splitlines(), quebra, texto.endswith(('\n', '\r'))
+
+def _ler_hunks(diff: str) -> List[Tuple[int, List[str], List[str]]]:
+    """
+    Interpreta um diff unificado de um único arquivo.
+
+    Returns:
+        List[Tuple[int, List[str], List[str]]]: (linha inicial no original, como no
+            cabeçalho, linhas esperadas, linhas resultantes) de cada hunk
+    """
+    hunks = []
+    atual = None
+    for linha in diff.splitlines():
+        cabecalho = _PADRAO_CABECALHO_HUNK.match(linha)
+        if cabecalho:
+            atual = (int(cabecalho.group(1)), [], [])
+            hunks.append(atual)
+        elif atual is None or linha.startswith('\\'):
+            # Cabeçalhos '---'/'+++' e "\ No newline at end of file"
+            continue
+        elif linha.startswith('-'):
+            atual[1].append(linha[1:])
+        elif linha.startswith('+'):
+            atual[2].append(linha[1:])
+        else:
+            # Linha de contexto; modelos costumam omitir o espaço de linhas vazias
+            contexto = linha[1:] if linha.startswith(' ') else linha
+            atual[1].append(contexto)
+            atual[2].append(contexto)
+    if not hunks:
+        raise FalhaAoAplicarPatch("O diff não contém nenhum hunk ('@@ -a,b +c,d @@').")
+    return hunks
+
+def _localizar(linhas: List[str], esperadas: List[str], posicao_esperada: int, inicio_minimo: int) -> Optional[int]:
+    """Posição das linhas esperadas mais próxima da indicada pelo hunk, exata ou ignorando espaços no fim das linhas."""
+    ultima = len(linhas) - len(esperadas)
+    if ultima < inicio_minimo:
+        return None
+    posicao_esperada = min(max(posicao_esperada, inicio_minimo), ultima)
+    candidatas = sorted(range(inicio_minimo, ultima + 1), key=lambda posicao: abs(posicao - posicao_esperada))
+    for normalizar in (lambda linha: linha, str.rstrip):
+        alvo = [normalizar(linha) for linha in esperadas]
+        for posicao in candidatas:
+            if [normalizar(linha) for linha in linhas[posicao:posicao + len(esperadas)]] == alvo:
+                return posicao
+    return None
+
+def aplicar_diff_unificado(original: str, diff: str) -> str:
+    """
+    Aplica um diff unificado ao conteúdo original de um arquivo.
+
+    Os hunks são aplicados em ordem. Cada hunk é procurado na linha indicada
+    pelo cabeçalho (corrigida pelo deslocamento dos hunks anteriores) e, se os
+    números de linha do modelo estiverem errados, na posição mais próxima em
+    que o contexto corresponde.
+
+    Raises:
+        FalhaAoAplicarPatch: Se algum hunk não corresponder ao conteúdo original
+    """
+    linhas, quebra, termina_com_quebra = _dividir_linhas(original)
+    deslocamento, inicio_minimo = 0, 0
+    for numero, (inicio, esperadas, resultantes) in enumerate(_ler_hunks(diff), start=1):
+        if esperadas:
+            posicao = _localizar(linhas, esperadas, inicio - 1 + deslocamento, inicio_minimo)
+            if posicao is None:
+                raise FalhaAoAplicarPatch(f"O hunk {numero} não corresponde ao conteúdo original.")
+        else:
+            # Hunk só de inserção: '@@ -n,0 ... @@' insere após a linha n (0 para arquivo novo)
+            posicao = min(max(inicio + deslocamento, inicio_minimo), len(linhas))
+        linhas[posicao:posicao + len(esperadas)] = resultantes
+        deslocamento += len(resultantes) - len(esperadas)
+        inicio_minimo = posicao + len(resultantes)
+    return quebra.join(linhas) + (quebra if linhas and (termina_com_quebra or not original) else "")
+
+def aplicar_substituicoes(original: str, substituicoes: List[Dict[str, str]]) -> str:
+    """
+    Aplica blocos de busca/substituição, em ordem, ao conteúdo original de um arquivo.
+
+    Cada bloco {"buscar": ..., "substituir": ...} deve encontrar exatamente um
+    trecho do arquivo; um bloco ambíguo ou sem correspondência invalida o patch.
+
+    Raises:
+        FalhaAoAplicarPatch: Se algum bloco não encontrar exatamente um trecho
+    """
+    conteudo = original
+    for numero, bloco in enumerate(substituicoes, start=1):
+        buscar, substituir = bloco.get('buscar') or "", bloco.get('substituir') or ""
+        if not buscar:
+            if conteudo:
+                raise FalhaAoAplicarPatch(f"O bloco {numero} não informa o trecho a buscar.")
+            conteudo = substituir
+            continue
+        ocorrencias = conteudo.count(buscar)
+        if ocorrencias != 1:
+            motivo = "não foi encontrado" if ocorrencias == 0 else f"é ambíguo ({ocorrencias} ocorrências)"
+            raise FalhaAoAplicarPatch(f"O trecho do bloco {numero} {motivo}.")
+        conteudo = conteudo.replace(buscar, substituir, 1)
+    return conteudo
+
+def aplicar_mudanca(mudanca: Dict[str, Any], original: Optional[str]) -> Dict[str, Any]:
+    """
+    Converte uma mudança no formato patch para o formato completo (com 'conteudo').
+
+    Mudanças que já trazem o conteúdo completo, ou sem 'diff'/'substituicoes'
+    (ex: status 'REMOVIDO'), são mantidas.
+
+    Raises:
+        FalhaAoAplicarPatch: Se o patch não puder ser aplicado ao original
+    """
+    if mudanca.get('conteudo') is not None or not (mudanca.get('diff') or mudanca.get('substituicoes')):
+        return {chave: valor for chave, valor in mudanca.items() if chave not in ('diff', 'substituicoes')}
+    if original is None and mudanca.get('substituicoes'):
+        raise FalhaAoAplicarPatch("O arquivo não existe no snapshot.")
+
+    base = original or ""
+    if mudanca.get('diff'):
+        conteudo = aplicar_diff_unificado(base, mudanca['diff'])
+    else:
+        conteudo = aplicar_substituicoes(base, mudanca['substituicoes'])
+    completa = {chave: valor for chave, valor in mudanca.items() if chave not in ('diff', 'substituicoes')}
+    completa['conteudo'] = conteudo
+    return completa
+
+def materializar_mudancas(resposta: Dict[str, Any], originais: Dict[str, str]) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Aplica os patches de 'conjunto_de_mudancas' ao conteúdo original dos arquivos.
+
+    Args:
+        resposta (Dict[str, Any]): Resposta da etapa no formato patch
+        originais (Dict[str, str]): Caminho -> conteúdo do arquivo no snapshot analisado
+
+    Returns:
+        Tuple[Dict[str, Any], List[str]]: Resposta com o conteúdo completo de cada
+            arquivo, sem as mudanças que falharam, e os caminhos dessas mudanças
+    """
+    mudancas, falhas = [], []
+    for mudanca in resposta.get('conjunto_de_mudancas') or []:
+        caminho = mudanca.get('caminho_do_arquivo') if isinstance(mudanca, dict) else None
+        if caminho is None:
+            mudancas.append(mudanca)
+            continue
+        try:
+            mudancas.append(aplicar_mudanca(mudanca, originais.get(caminho)))
+        except FalhaAoAplicarPatch as e:
+            print(f"AVISO: Patch de '{caminho}' não aplicado: {e}")
+            falhas.append(caminho)
+    print(f"Patches aplicados: {len(mudancas)} mudanças, {len(falhas)} falhas.")
+    return dict(resposta, conjunto_de_mudancas=mudancas), falhas
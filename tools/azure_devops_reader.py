@@ -0,0 +1,230 @@
+# Arquivo: tools/azure_devops_reader.py
+
+import shutil
+import tempfile
+import zipfile
+import requests
+from typing import Dict, Iterator, Optional, Tuple
+from domain.interfaces.repository_reader_interface import IRepositoryReader, e_sha_de_commit
+from domain.interfaces.repository_provider_interface import IRepositoryProvider
+from tools.azure_repository_provider import AzureRepositoryProvider
+from tools.github_connector import GitHubConnector
+from tools.filtro_arquivos import LimitesDeLeitura, TAMANHO_AMOSTRA_BINARIO, decodificar_texto
+from tools.workflow_registry import FiltroDeArquivos, WorkflowRegistry, obter_registry_padrao
+
+# Tempo máximo (segundos) para conectar e entre pacotes recebidos do download do zip
+TIMEOUT_DOWNLOAD_PADRAO = 300
+
+# O zip é mantido em memória até este tamanho; acima disso, é despejado em disco
+TAMANHO_ZIP_EM_MEMORIA = 64 * 1024 * 1024
+
+class AzureDevOpsRepositoryReader(IRepositoryReader):
+    """
+    Leitor de repositório para Azure DevOps baseado no zip da Items API.
+
+    Uma única requisição `git/repositories/{repo}/items?path=/&recursionLevel=Full
+    &download=true&$format=zip` baixa o snapshot do commit; os arquivos são lidos
+    do diretório central do zip, que informa o tamanho de cada um. Exclusões e
+    limites de tamanho do workflow são aplicados antes de descompactar qualquer
+    arquivo, e binários são descartados após os primeiros bytes.
+
+    O zip é baixado para um arquivo temporário (em memória até
+    TAMANHO_ZIP_EM_MEMORIA), pois o formato exige acesso aleatório ao diretório
+    central no fim do arquivo.
+
+    Formato do nome do repositório: 'organization/project/repository'.
+
+    Attributes:
+        repository_provider (AzureRepositoryProvider): Provedor usado para autenticação e URLs
+        timeout_download (int): Timeout em segundos do download do zip
+
+    Example:
+        >>> reader = AzureDevOpsRepositoryReader()
+        >>> codigo = reader.read_repository("minhaorg/projeto/repo", "relatorio_sast", "main")
+    """
+
+    def __init__(
+        self,
+        repository_provider: Optional[IRepositoryProvider] = None,
+        timeout_download: int = TIMEOUT_DOWNLOAD_PADRAO,
+        workflow_registry: Optional[WorkflowRegistry] = None,
+        nome_workflow: Optional[str] = None
+    ):
+        """
+        Inicializa o leitor do Azure DevOps.
+
+        Args:
+            repository_provider (Optional[IRepositoryProvider]): Provedor de repositório.
+                Se None, usa AzureRepositoryProvider
+            timeout_download (int): Timeout em segundos do download do zip
+            workflow_registry (Optional[WorkflowRegistry]): Registro de workflows. Se None,
+                usa o registro compartilhado do processo
+            nome_workflow (Optional[str]): Workflow do job em execução
+        """
+        self.repository_provider = repository_provider or AzureRepositoryProvider()
+        self.timeout_download = timeout_download
+        self.workflow_registry = workflow_registry or obter_registry_padrao()
+        self.nome_workflow = nome_workflow
+
+    def _obter_filtro(self, tipo_analise: str) -> FiltroDeArquivos:
+        """
+        Obtém o filtro de arquivos compilado para o tipo de análise.
+
+        Raises:
+            ValueError: Se tipo_analise não possuir 'extensions' em workflows.yaml
+        """
+        filtro = self.workflow_registry.obter_filtro(tipo_analise, self.nome_workflow)
+        if filtro is None:
+            raise ValueError(f"Tipo de análise '{tipo_analise}' não encontrado ou não possui 'extensions' definidas em workflows.yaml")
+        return filtro
+
+    def _obter_cabecalhos(self, organizacao: str) -> Dict[str, str]:
+        """Obtém o token da organização pelo gerenciador de segredos e monta os cabeçalhos."""
+        connector = GitHubConnector(repository_provider=self.repository_provider)
+        token = connector._get_token_for_org(organizacao)
+        return self.repository_provider._get_auth_headers(token)
+
+    def _resolver_commit(
+        self,
+        nome_repo: str,
+        nome_branch: Optional[str],
+        cabecalhos: Dict[str, str]
+    ) -> Tuple[str, str]:
+        """
+        Resolve a branch (ou a branch padrão) para o SHA do commit.
+
+        Returns:
+            Tuple[str, str]: (branch lida, SHA do commit)
+
+        Raises:
+            ValueError: Se o repositório ou a branch não existirem
+        """
+        if e_sha_de_commit(nome_branch):
+            return nome_branch, nome_branch.lower()
+        organizacao, projeto, repositorio = self.repository_provider._parse_repository_name(nome_repo)
+        if nome_branch is None:
+            url_repo = self.repository_provider._build_api_url(organizacao, projeto, f"git/repositories/{repositorio}")
+            resposta = requests.get(url_repo, headers=cabecalhos, timeout=30)
+            if resposta.status_code != 200:
+                raise ValueError(f"Erro ao acessar repositório '{nome_repo}': {resposta.status_code} - {resposta.text}")
+            nome_branch = resposta.json().get('defaultBranch', 'refs/heads/main').split('refs/heads/', 1)[-1]
+            print(f"Nenhuma branch especificada. Usando a branch padrão: '{nome_branch}'")
+
+        url_refs = self.repository_provider._build_api_url(organizacao, projeto, f"git/repositories/{repositorio}/refs")
+        resposta = requests.get(url_refs, headers=cabecalhos, params={'filter': f"heads/{nome_branch}"}, timeout=30)
+        if resposta.status_code != 200:
+            raise ValueError(f"Erro ao acessar repositório '{nome_repo}': {resposta.status_code} - {resposta.text}")
+        # O filtro é por prefixo; apenas o nome exato da branch é aceito
+        for ref in resposta.json().get('value', []):
+            if ref.get('name') == f"refs/heads/{nome_branch}":
+                return nome_branch, ref['objectId']
+        raise ValueError(f"Branch '{nome_branch}' não encontrada.")
+
+    def resolver_commit(self, nome_repo: str, nome_branch: str = None) -> str:
+        """
+        Resolve a branch (ou a branch padrão) para o SHA do commit que ela aponta agora.
+
+        Raises:
+            ValueError: Se o repositório ou a branch não existirem
+        """
+        organizacao, _, _ = self.repository_provider._parse_repository_name(nome_repo)
+        _, commit_sha = self._resolver_commit(nome_repo, nome_branch, self._obter_cabecalhos(organizacao))
+        return commit_sha
+
+    def iter_repository(
+        self,
+        nome_repo: str,
+        tipo_analise: str,
+        nome_branch: str = None,
+        commit_base: Optional[str] = None
+    ) -> Iterator[Tuple[str, int, str]]:
+        """
+        Percorre os arquivos relevantes do zip do commit à medida que são descompactados.
+
+        Args:
+            nome_repo (str): Nome do repositório no formato 'organization/project/repository'
+            tipo_analise (str): Tipo de análise que determina os arquivos incluídos
+            nome_branch (str, optional): Branch a ser lida. Se None, usa a branch padrão
+            commit_base (Optional[str]): Ignorado; o zip é sempre um snapshot completo
+
+        Yields:
+            Tuple[str, int, str]: (caminho, tamanho em bytes, conteúdo), na ordem do zip
+
+        Raises:
+            ValueError: Se tipo_analise não existir em workflows.yaml, se o nome do
+                repositório for inválido ou se a branch não existir
+            requests.exceptions.RequestException: Se o download falhar
+        """
+        print(f"Iniciando leitura via zip (Items API) do repositório Azure DevOps: {nome_repo}")
+        filtro = self._obter_filtro(tipo_analise)
+        limites = filtro.limites
+        organizacao, projeto, repositorio = self.repository_provider._parse_repository_name(nome_repo)
+        cabecalhos = self._obter_cabecalhos(organizacao)
+        branch_a_ler, commit_sha = self._resolver_commit(nome_repo, nome_branch, cabecalhos)
+        self.ultimo_commit_sha = commit_sha
+
+        url_itens = self.repository_provider._build_api_url(organizacao, projeto, f"git/repositories/{repositorio}/items")
+        parametros = {
+            'path': '/',
+            'recursionLevel': 'Full',
+            'download': 'true',
+            '$format': 'zip',
+            'versionDescriptor.version': commit_sha,
+            'versionDescriptor.versionType': 'commit',
+        }
+        cabecalhos_download = dict(cabecalhos, Accept='application/zip')
+
+        total_lidos = 0
+        total_bytes = 0
+        print(f"Baixando o zip do commit {commit_sha} (branch '{branch_a_ler}')...")
+        with tempfile.SpooledTemporaryFile(max_size=TAMANHO_ZIP_EM_MEMORIA) as arquivo_zip:
+            with requests.get(url_itens, headers=cabecalhos_download, params=parametros, stream=True, timeout=self.timeout_download) as resposta:
+                resposta.raise_for_status()
+                resposta.raw.decode_content = True
+                shutil.copyfileobj(resposta.raw, arquivo_zip)
+            arquivo_zip.seek(0)
+
+            with zipfile.ZipFile(arquivo_zip) as pacote:
+                for info in pacote.infolist():
+                    if info.is_dir():
+                        continue
+                    caminho = info.filename.lstrip('/')
+                    if not filtro.corresponde(caminho):
+                        continue
+                    # Limites de tamanho usam o diretório central, sem descompactar
+                    if not limites.cabe_no_limite_por_arquivo(info.file_size) or not limites.cabe_no_total(info.file_size, total_bytes):
+                        continue
+
+                    with pacote.open(info) as arquivo:
+                        amostra = arquivo.read(TAMANHO_AMOSTRA_BINARIO)
+                        if LimitesDeLeitura.parece_binario(amostra):
+                            print(f"AVISO: Arquivo '{caminho}' parece binário. Pulando.")
+                            continue
+                        conteudo, erro = decodificar_texto(amostra + arquivo.read())
+                    if conteudo is None:
+                        print(f"AVISO: Falha ao decodificar o conteúdo do arquivo '{caminho}'. Pulando. Erro: {erro}")
+                        continue
+
+                    total_lidos += 1
+                    total_bytes += info.file_size
+                    if total_lidos % 500 == 0:
+                        print(f"  ...{total_lidos} arquivos extraídos ({caminho})")
+                    yield caminho, info.file_size, conteudo
+
+        print(f"\nLeitura via zip concluída. Total de {total_lidos} arquivos lidos e processados.")
+
+    def read_repository(self, nome_repo: str, tipo_analise: str, nome_branch: str = None) -> Dict[str, str]:
+        """
+        Lê os arquivos relevantes do repositório a partir do zip do commit.
+
+        Returns:
+            Dict[str, str]: Dicionário mapeando caminhos de arquivo para conteúdo
+
+        Raises:
+            ValueError: Se tipo_analise não existir em workflows.yaml ou a branch não existir
+            requests.exceptions.RequestException: Se o download falhar
+        """
+        return {
+            caminho: conteudo
+            for caminho, _, conteudo in self.iter_repository(nome_repo, tipo_analise, nome_branch)
+        }
@@ -0,0 +1,257 @@
+# Arquivo: tools/blob_cache.py
+
+import os
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from domain.interfaces.blob_cache_interface import IBlobCache
+
+MEMORIA_PADRAO_MB = 256
+DISCO_PADRAO_MB = 2048
+
+class LRUMemoryCache:
+    """
+    Cache em memória com despejo LRU limitado pelo total de bytes armazenados.
+
+    Thread-safe: os workers de leitura de blobs compartilham a mesma instância.
+
+    Attributes:
+        limite_bytes (int): Total máximo de bytes mantidos em memória
+    """
+
+    def __init__(self, limite_bytes: int):
+        self.limite_bytes = limite_bytes
+        self._entradas: "OrderedDict[str, bytes]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, chave: str) -> Optional[bytes]:
+        with self._lock:
+            valor = self._entradas.get(chave)
+            if valor is not None:
+                self._entradas.move_to_end(chave)
+            return valor
+
+    def set(self, chave: str, valor: bytes):
+        # Entradas maiores que o próprio limite esvaziariam o cache inteiro
+        if len(valor) > self.limite_bytes:
+            return
+        with self._lock:
+            anterior = self._entradas.pop(chave, None)
+            if anterior is not None:
+                self._bytes -= len(anterior)
+            self._entradas[chave] = valor
+            self._bytes += len(valor)
+            while self._bytes > self.limite_bytes:
+                _, removido = self._entradas.popitem(last=False)
+                self._bytes -= len(removido)
+
+    @property
+    def bytes_armazenados(self) -> int:
+        return self._bytes
+
+class DiskBlobStore:
+    """
+    Armazenamento em disco endereçado por conteúdo, com despejo por tamanho.
+
+    Cada entrada é um arquivo em '<diretorio>/<2 primeiros chars>/<hash da chave>'.
+    As gravações são atômicas (arquivo temporário + os.replace), permitindo que
+    vários processos do servidor compartilhem o mesmo diretório. O despejo remove
+    os arquivos menos recentemente usados (mtime, atualizado a cada leitura) até
+    que o total fique abaixo de 90% do limite.
+
+    Attributes:
+        diretorio (str): Diretório raiz do armazenamento
+        limite_bytes (int): Tamanho máximo ocupado em disco
+    """
+
+    def __init__(self, diretorio: str, limite_bytes: int):
+        self.diretorio = diretorio
+        self.limite_bytes = limite_bytes
+        self._lock = threading.Lock()
+        os.makedirs(self.diretorio, exist_ok=True)
+        self._bytes = sum(os.path.getsize(caminho) for caminho in self._listar_arquivos())
+
+    def _caminho(self, chave: str) -> str:
+        nome = hashlib.sha256(chave.encode('utf-8')).hexdigest()
+        return os.path.join(self.diretorio, nome[:2], nome)
+
+    def _listar_arquivos(self):
+        for raiz, _, arquivos in os.walk(self.diretorio):
+            for arquivo in arquivos:
+                if not arquivo.endswith('.tmp'):
+                    yield os.path.join(raiz, arquivo)
+
+    def get(self, chave: str) -> Optional[bytes]:
+        caminho = self._caminho(chave)
+        try:
+            with open(caminho, 'rb') as f:
+                valor = f.read()
+            os.utime(caminho)
+            return valor
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            print(f"AVISO: Falha ao ler o cache em disco '{caminho}': {e}")
+            return None
+
+    def set(self, chave: str, valor: bytes):
+        if len(valor) > self.limite_bytes:
+            return
+        caminho = self._caminho(chave)
+        if os.path.exists(caminho):
+            return
+        try:
+            os.makedirs(os.path.dirname(caminho), exist_ok=True)
+            fd, temporario = tempfile.mkstemp(dir=os.path.dirname(caminho), suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(valor)
+            os.replace(temporario, caminho)
+        except OSError as e:
+            print(f"AVISO: Falha ao gravar no cache em disco '{caminho}': {e}")
+            return
+        with self._lock:
+            self._bytes += len(valor)
+            if self._bytes > self.limite_bytes:
+                self._despejar()
+
+    def remover(self, chave: str):
+        """Remove a entrada da chave, se existir."""
+        caminho = self._caminho(chave)
+        try:
+            tamanho = os.path.getsize(caminho)
+            os.remove(caminho)
+        except OSError:
+            return
+        with self._lock:
+            self._bytes -= tamanho
+
+    def _despejar(self):
+        """Remove os arquivos menos recentemente usados até 90% do limite."""
+        alvo = int(self.limite_bytes * 0.9)
+        arquivos = []
+        for caminho in self._listar_arquivos():
+            try:
+                estado = os.stat(caminho)
+                arquivos.append((estado.st_mtime, estado.st_size, caminho))
+            except FileNotFoundError:
+                continue
+        arquivos.sort()
+        total = sum(tamanho for _, tamanho, _ in arquivos)
+        for _, tamanho, caminho in arquivos:
+            if total <= alvo:
+                break
+            try:
+                os.remove(caminho)
+                total -= tamanho
+            except FileNotFoundError:
+                continue
+        self._bytes = total
+
+    @property
+    def bytes_armazenados(self) -> int:
+        return self._bytes
+
+class TwoTierBlobCache(IBlobCache):
+    """
+    Cache de dois níveis para objetos Git: LRU em memória + armazenamento em disco.
+
+    Leituras consultam primeiro a memória e depois o disco; um hit em disco
+    promove a entrada para a memória. Como as chaves são SHAs de objetos Git
+    imutáveis, reexecutar uma análise em um repositório com 95% dos arquivos
+    inalterados praticamente não gera I/O de rede.
+
+    Attributes:
+        memoria (LRUMemoryCache): Nível em memória do processo
+        disco (Optional[DiskBlobStore]): Nível em disco (None se desabilitado)
+
+    Example:
+        >>> cache = TwoTierBlobCache(limite_memoria_bytes=64 * 1024 * 1024, diretorio_disco="/var/cache/mcp")
+        >>> cache.set("blob:3b18e512", b"print('ok')")
+        >>> cache.get("blob:3b18e512")
+        b"print('ok')"
+        >>> cache.estatisticas()["hits_memoria"]
+        1
+    """
+
+    def __init__(
+        self,
+        limite_memoria_bytes: int = MEMORIA_PADRAO_MB * 1024 * 1024,
+        diretorio_disco: Optional[str] = None,
+        limite_disco_bytes: int = DISCO_PADRAO_MB * 1024 * 1024
+    ):
+        """
+        Inicializa os níveis do cache.
+
+        Args:
+            limite_memoria_bytes (int): Limite do nível em memória
+            diretorio_disco (Optional[str]): Diretório do nível em disco. Se None,
+                apenas o nível em memória é usado
+            limite_disco_bytes (int): Limite do nível em disco
+        """
+        self.memoria = LRUMemoryCache(limite_memoria_bytes)
+        self.disco = DiskBlobStore(diretorio_disco, limite_disco_bytes) if diretorio_disco else None
+        self._lock_contadores = threading.Lock()
+        self._contadores = {'hits_memoria': 0, 'hits_disco': 0, 'misses': 0, 'gravacoes': 0}
+
+    def _incrementar(self, contador: str):
+        with self._lock_contadores:
+            self._contadores[contador] += 1
+
+    def get(self, chave: str) -> Optional[bytes]:
+        valor = self.memoria.get(chave)
+        if valor is not None:
+            self._incrementar('hits_memoria')
+            return valor
+
+        if self.disco is not None:
+            valor = self.disco.get(chave)
+            if valor is not None:
+                self._incrementar('hits_disco')
+                self.memoria.set(chave, valor)
+                return valor
+
+        self._incrementar('misses')
+        return None
+
+    def set(self, chave: str, valor: bytes):
+        self._incrementar('gravacoes')
+        self.memoria.set(chave, valor)
+        if self.disco is not None:
+            self.disco.set(chave, valor)
+
+    def estatisticas(self) -> Dict[str, Any]:
+        with self._lock_contadores:
+            estatisticas = dict(self._contadores)
+        consultas = estatisticas['hits_memoria'] + estatisticas['hits_disco'] + estatisticas['misses']
+        estatisticas['taxa_de_acerto'] = round((consultas - estatisticas['misses']) / consultas, 4) if consultas else 0.0
+        estatisticas['bytes_memoria'] = self.memoria.bytes_armazenados
+        estatisticas['bytes_disco'] = self.disco.bytes_armazenados if self.disco is not None else 0
+        return estatisticas
+
+_cache_padrao: Optional[TwoTierBlobCache] = None
+_lock_cache_padrao = threading.Lock()
+
+def obter_cache_padrao() -> TwoTierBlobCache:
+    """
+    Retorna o cache de blobs compartilhado pelo processo, criando-o na primeira chamada.
+
+    Configuração via variáveis de ambiente:
+    - REPO_CACHE_MEMORY_MB: limite do nível em memória (padrão: 256)
+    - REPO_CACHE_DIR: diretório do nível em disco (se ausente, o disco fica desabilitado)
+    - REPO_CACHE_DISK_MB: limite do nível em disco (padrão: 2048)
+
+    Returns:
+        TwoTierBlobCache: Instância única por processo
+    """
+    global _cache_padrao
+    with _lock_cache_padrao:
+        if _cache_padrao is None:
+            _cache_padrao = TwoTierBlobCache(
+                limite_memoria_bytes=int(os.getenv("REPO_CACHE_MEMORY_MB", MEMORIA_PADRAO_MB)) * 1024 * 1024,
+                diretorio_disco=os.getenv("REPO_CACHE_DIR") or None,
+                limite_disco_bytes=int(os.getenv("REPO_CACHE_DISK_MB", DISCO_PADRAO_MB)) * 1024 * 1024
+            )
+        return _cache_padrao
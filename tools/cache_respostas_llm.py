@@ -0,0 +1,189 @@
+# Arquivo: tools/cache_respostas_llm.py
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from tools.blob_cache import DiskBlobStore
+
+ARMAZENAMENTO_REDIS = "redis"
+ARMAZENAMENTO_DISCO = "disco"
+ARMAZENAMENTOS_CACHE_RESPOSTAS = (ARMAZENAMENTO_REDIS, ARMAZENAMENTO_DISCO)
+
+TTL_PADRAO_S = 7 * 86400
+MAX_ENTRADAS_REDIS_PADRAO = 5000
+DISCO_PADRAO_MB = 512
+
+PREFIXO_REDIS = "mcp_llm_resposta"
+
+# Campos do resultado de executar_prompt guardados no cache. 'orcamento_tokens'
+# fica de fora: é recalculado a cada chamada, antes da consulta ao cache.
+CAMPOS_EM_CACHE = ('reposta_final', 'tokens_entrada', 'tokens_saida', 'tokens_cache_leitura', 'tokens_cache_escrita')
+
+class ArmazenamentoRedisDeRespostas:
+    """
+    Respostas no Redis, com TTL por entrada e limite de entradas.
+
+    Um sorted set indexa as chaves pelo instante da gravação; quando o total
+    passa de max_entradas, as mais antigas são removidas.
+    """
+
+    def __init__(self, redis_client, max_entradas: int = MAX_ENTRADAS_REDIS_PADRAO):
+        self.redis_client = redis_client
+        self.max_entradas = max_entradas
+        self._indice = f"{PREFIXO_REDIS}:indice"
+
+    def get(self, chave: str) -> Optional[bytes]:
+        return self.redis_client.get(f"{PREFIXO_REDIS}:{chave}")
+
+    def set(self, chave: str, valor: bytes, ttl_s: int):
+        pipeline = self.redis_client.pipeline()
+        pipeline.set(f"{PREFIXO_REDIS}:{chave}", valor, ex=ttl_s)
+        pipeline.zadd(self._indice, {chave: time.time()})
+        pipeline.zcard(self._indice)
+        total = pipeline.execute()[-1]
+        if total > self.max_entradas:
+            antigas = [membro for membro, _ in self.redis_client.zpopmin(self._indice, total - self.max_entradas)]
+            if antigas:
+                self.redis_client.delete(*(f"{PREFIXO_REDIS}:{_texto(membro)}" for membro in antigas))
+
+    def remover(self, chave: str):
+        self.redis_client.delete(f"{PREFIXO_REDIS}:{chave}")
+        self.redis_client.zrem(self._indice, chave)
+
+class ArmazenamentoEmDiscoDeRespostas:
+    """
+    Respostas em disco (DiskBlobStore), com despejo por tamanho.
+
+    O disco não expira entradas: a validade é verificada na leitura pelo
+    instante gravado junto com a resposta.
+    """
+
+    def __init__(self, diretorio: str, limite_bytes: int = DISCO_PADRAO_MB * 1024 * 1024):
+        self.disco = DiskBlobStore(diretorio, limite_bytes)
+
+    def get(self, chave: str) -> Optional[bytes]:
+        return self.disco.get(chave)
+
+    def set(self, chave: str, valor: bytes, ttl_s: int):
+        # DiskBlobStore não sobrescreve entradas; uma resposta expirada é removida na leitura
+        self.disco.set(chave, valor)
+
+    def remover(self, chave: str):
+        self.disco.remover(chave)
+
+def _texto(valor) -> str:
+    return valor.decode('utf-8') if isinstance(valor, bytes) else valor
+
+class CacheDeRespostasLLM:
+    """
+    Cache das respostas de executar_prompt, endereçado pelo conteúdo da requisição.
+
+    A chave é o hash de tudo o que determina a resposta: provedor, modelo,
+    prompt de sistema (já com o contexto RAG), mensagens, temperatura, limite
+    de saída e parâmetros de saída estruturada. Reexecuções após uma
+    rejeição, equipes analisando o mesmo commit e retentativas após falhas
+    posteriores à chamada recebem a resposta gravada, com o uso de tokens da
+    chamada original e 'cache_hit': True. Os provedores só gravam respostas
+    que decodificam como JSON (ver ProvedorLLMBase._concluir).
+
+    Attributes:
+        armazenamento: ArmazenamentoRedisDeRespostas ou ArmazenamentoEmDiscoDeRespostas
+        ttl_s (int): Validade de cada resposta, em segundos
+
+    Example:
+        >>> cache = CacheDeRespostasLLM(ArmazenamentoEmDiscoDeRespostas("/var/cache/mcp-llm"))
+        >>> chave = cache.chave(provedor="anthropic", modelo="claude-sonnet-4", sistema="...", mensagens=[...])
+        >>> cache.obter(chave) is None
+        True
+        >>> cache.gravar(chave, resultado)
+        >>> cache.obter(chave)['cache_hit']
+        True
+    """
+
+    def __init__(self, armazenamento, ttl_s: int = TTL_PADRAO_S):
+        self.armazenamento = armazenamento
+        self.ttl_s = ttl_s
+
+    @staticmethod
+    def chave(**partes: Any) -> str:
+        """Hash SHA-256 da serialização canônica das partes da requisição."""
+        corpo = json.dumps(partes, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(corpo.encode('utf-8')).hexdigest()
+
+    def obter(self, chave: str) -> Optional[Dict[str, Any]]:
+        """Resposta gravada para a chave, ou None em caso de miss ou resposta expirada."""
+        try:
+            dados = self.armazenamento.get(chave)
+            if dados is None:
+                return None
+            entrada = json.loads(dados)
+            if entrada['expira_em'] < time.time():
+                self.armazenamento.remover(chave)
+                return None
+        except Exception as e:
+            print(f"AVISO: Falha ao consultar o cache de respostas do LLM: {e}")
+            return None
+        return dict(entrada['resultado'], cache_hit=True)
+
+    def gravar(self, chave: str, resultado: Dict[str, Any]):
+        entrada = {
+            'expira_em': time.time() + self.ttl_s,
+            'resultado': {campo: resultado[campo] for campo in CAMPOS_EM_CACHE if campo in resultado}
+        }
+        try:
+            self.armazenamento.set(chave, json.dumps(entrada, ensure_ascii=False).encode('utf-8'), self.ttl_s)
+        except Exception as e:
+            print(f"AVISO: Falha ao gravar no cache de respostas do LLM: {e}")
+
+_cache_padrao: Optional[CacheDeRespostasLLM] = None
+_cache_padrao_configurado = False
+_lock_cache_padrao = threading.Lock()
+
+def obter_cache_respostas_padrao() -> Optional[CacheDeRespostasLLM]:
+    """
+    Retorna o cache de respostas compartilhado pelo processo, ou None se desabilitado.
+
+    Configuração via variáveis de ambiente:
+    - LLM_CACHE_RESPOSTAS: 'redis' (usa REDIS_URL) ou 'disco'; ausente, o cache fica desabilitado
+    - LLM_CACHE_TTL_S: validade das respostas (padrão: 7 dias)
+    - LLM_CACHE_MAX_ENTRADAS: limite de respostas no Redis (padrão: 5000)
+    - LLM_CACHE_DIR / LLM_CACHE_DISK_MB: diretório e limite do armazenamento em disco (padrão: 512)
+    """
+    global _cache_padrao, _cache_padrao_configurado
+    with _lock_cache_padrao:
+        if not _cache_padrao_configurado:
+            _cache_padrao = _criar_cache_padrao()
+            _cache_padrao_configurado = True
+        return _cache_padrao
+
+def _criar_cache_padrao() -> Optional[CacheDeRespostasLLM]:
+    tipo = (os.getenv("LLM_CACHE_RESPOSTAS") or "").lower()
+    if not tipo:
+        return None
+    if tipo not in ARMAZENAMENTOS_CACHE_RESPOSTAS:
+        raise ValueError(
+            f"LLM_CACHE_RESPOSTAS '{tipo}' inválido. Valores aceitos: {', '.join(repr(a) for a in ARMAZENAMENTOS_CACHE_RESPOSTAS)}."
+        )
+
+    if tipo == ARMAZENAMENTO_REDIS:
+        import redis
+        redis_url = os.getenv("REDIS_URL")
+        if not redis_url:
+            raise ValueError("A variável de ambiente REDIS_URL não foi configurada.")
+        armazenamento = ArmazenamentoRedisDeRespostas(
+            redis.from_url(redis_url),
+            max_entradas=int(os.getenv("LLM_CACHE_MAX_ENTRADAS", MAX_ENTRADAS_REDIS_PADRAO))
+        )
+    else:
+        diretorio = os.getenv("LLM_CACHE_DIR")
+        if not diretorio:
+            raise ValueError("A variável de ambiente LLM_CACHE_DIR não foi configurada.")
+        armazenamento = ArmazenamentoEmDiscoDeRespostas(
+            diretorio, int(os.getenv("LLM_CACHE_DISK_MB", DISCO_PADRAO_MB)) * 1024 * 1024
+        )
+    print(f"Cache de respostas do LLM habilitado ({tipo}).")
+    return CacheDeRespostasLLM(armazenamento, ttl_s=int(os.getenv("LLM_CACHE_TTL_S", TTL_PADRAO_S)))
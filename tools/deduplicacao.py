@@ -0,0 +1,166 @@
+# Arquivo: tools/deduplicacao.py
+
+import difflib
+import hashlib
+import zlib
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from tools.empacotamento_prompt import Arquivo
+
+DEDUPLICACAO_EXATA = "exata"
+DEDUPLICACAO_APROXIMADA = "aproximada"
+DEDUPLICACAO_DESLIGADA = "desligada"
+MODOS_DEDUPLICACAO = (DEDUPLICACAO_EXATA, DEDUPLICACAO_APROXIMADA, DEDUPLICACAO_DESLIGADA)
+DEDUPLICACAO_PADRAO = DEDUPLICACAO_EXATA
+
+MODELO_REFERENCIA_IDENTICA = "[Conteúdo idêntico ao do arquivo '{original}'.]"
+MODELO_REFERENCIA_SEMELHANTE = (
+    "[Conteúdo quase idêntico ao do arquivo '{original}' ({similaridade}% semelhante). "
+    "Diferenças em relação a '{original}':]\n{diferencas}"
+)
+
+# MinHash: NUM_PERMUTACOES = NUM_BANDAS * LINHAS_POR_BANDA. Dois arquivos viram
+# candidatos se coincidirem em todas as linhas de ao menos uma banda.
+NUM_BANDAS = 8
+LINHAS_POR_BANDA = 4
+NUM_PERMUTACOES = NUM_BANDAS * LINHAS_POR_BANDA
+LINHAS_POR_SHINGLE = 3
+LIMIAR_SIMILARIDADE_PADRAO = 0.85
+
+_PRIMO_MERSENNE = (1 << 61) - 1
+_COEFICIENTES = [
+    (int.from_bytes(hashlib.sha256(f"a{i}".encode()).digest()[:8], 'big') % _PRIMO_MERSENNE | 1,
+     int.from_bytes(hashlib.sha256(f"b{i}".encode()).digest()[:8], 'big') % _PRIMO_MERSENNE)
+    for i in range(NUM_PERMUTACOES)
+]
+
+def _shingles(conteudo: str) -> set:
+    """Hashes de sequências de LINHAS_POR_SHINGLE linhas não vazias, sem espaços das bordas."""
+    linhas = [linha.strip() for linha in conteudo.splitlines() if linha.strip()]
+    if len(linhas) < LINHAS_POR_SHINGLE:
+        return {zlib.crc32("\n".join(linhas).encode('utf-8'))}
+    return {
+        zlib.crc32("\n".join(linhas[i:i + LINHAS_POR_SHINGLE]).encode('utf-8'))
+        for i in range(len(linhas) - LINHAS_POR_SHINGLE + 1)
+    }
+
+def assinatura_minhash(conteudo: str) -> Tuple[int, ...]:
+    """Assinatura MinHash do conjunto de shingles de linhas do arquivo."""
+    shingles = _shingles(conteudo)
+    return tuple(min((a * h + b) % _PRIMO_MERSENNE for h in shingles) for a, b in _COEFICIENTES)
+
+def similaridade_estimada(assinatura_a: Tuple[int, ...], assinatura_b: Tuple[int, ...]) -> float:
+    """Estimativa da similaridade de Jaccard entre dois arquivos pelas assinaturas."""
+    return sum(1 for a, b in zip(assinatura_a, assinatura_b) if a == b) / NUM_PERMUTACOES
+
+class DeduplicadorDeArquivos:
+    """
+    Substitui cópias de arquivos por referências antes da montagem do prompt.
+
+    - 'exata' (padrão): arquivos com o mesmo hash de conteúdo são enviados uma
+      única vez; as cópias seguintes viram a referência "conteúdo idêntico ao de X"
+    - 'aproximada': além das cópias exatas, arquivos quase idênticos (MinHash
+      sobre sequências de linhas, com LSH por bandas) viram uma referência ao
+      semelhante já enviado seguida apenas das diferenças
+    - 'desligada': nenhum arquivo é alterado
+
+    Um arquivo só é substituído se a referência for menor que o conteúdo.
+
+    Attributes:
+        duplicatas (Dict[str, str]): Cópia exata -> arquivo enviado com o conteúdo
+        semelhantes (Dict[str, str]): Arquivo quase idêntico -> arquivo de referência
+    """
+
+    def __init__(self, modo: Optional[str] = None, limiar_similaridade: float = LIMIAR_SIMILARIDADE_PADRAO):
+        self.modo = (modo or DEDUPLICACAO_PADRAO).lower()
+        if self.modo not in MODOS_DEDUPLICACAO:
+            raise ValueError(f"deduplicacao '{self.modo}' inválida. Valores aceitos: {', '.join(repr(m) for m in MODOS_DEDUPLICACAO)}.")
+        self.limiar_similaridade = limiar_similaridade
+        self.duplicatas: Dict[str, str] = {}
+        self.semelhantes: Dict[str, str] = {}
+
+    def filtrar(self, arquivos: Iterable[Arquivo]) -> Iterator[Arquivo]:
+        """
+        Gera os arquivos com as cópias substituídas por referências, na mesma ordem.
+
+        No modo 'exata' apenas os hashes dos arquivos já vistos são mantidos; no
+        modo 'aproximada' também o conteúdo dos arquivos enviados por inteiro,
+        para calcular as diferenças.
+        """
+        if self.modo == DEDUPLICACAO_DESLIGADA:
+            yield from arquivos
+            return
+
+        por_hash: Dict[str, str] = {}
+        conteudos: Dict[str, str] = {}
+        assinaturas: Dict[str, Tuple[int, ...]] = {}
+        baldes: Dict[Tuple[int, Tuple[int, ...]], List[str]] = defaultdict(list)
+
+        for caminho, tamanho, conteudo in arquivos:
+            digest = hashlib.sha256(conteudo.encode('utf-8')).hexdigest()
+            original = por_hash.get(digest)
+            if original is not None:
+                referencia = MODELO_REFERENCIA_IDENTICA.format(original=original)
+                if len(referencia) < len(conteudo):
+                    self.duplicatas[caminho] = original
+                    yield caminho, tamanho, referencia
+                    continue
+            else:
+                por_hash[digest] = caminho
+
+            if self.modo == DEDUPLICACAO_APROXIMADA and caminho not in self.duplicatas:
+                substituto = self._referencia_semelhante(caminho, conteudo, conteudos, assinaturas, baldes)
+                if substituto is not None:
+                    yield caminho, tamanho, substituto
+                    continue
+
+            yield caminho, tamanho, conteudo
+
+    def _referencia_semelhante(self, caminho, conteudo, conteudos, assinaturas, baldes) -> Optional[str]:
+        """Referência ao arquivo quase idêntico já enviado, ou None (o arquivo passa a ser candidato)."""
+        assinatura = assinatura_minhash(conteudo)
+        chaves = [
+            (banda, assinatura[banda * LINHAS_POR_BANDA:(banda + 1) * LINHAS_POR_BANDA])
+            for banda in range(NUM_BANDAS)
+        ]
+        candidatos = dict.fromkeys(candidato for chave in chaves for candidato in baldes.get(chave, []))
+        melhor, melhor_similaridade = None, 0.0
+        for candidato in candidatos:
+            similaridade = similaridade_estimada(assinatura, assinaturas[candidato])
+            if similaridade > melhor_similaridade:
+                melhor, melhor_similaridade = candidato, similaridade
+
+        if melhor is not None and melhor_similaridade >= self.limiar_similaridade:
+            diferencas = "".join(difflib.unified_diff(
+                conteudos[melhor].splitlines(keepends=True), conteudo.splitlines(keepends=True),
+                fromfile=melhor, tofile=caminho, n=1
+            ))
+            referencia = MODELO_REFERENCIA_SEMELHANTE.format(
+                original=melhor, similaridade=round(100 * melhor_similaridade), diferencas=diferencas
+            )
+            if len(referencia) < len(conteudo):
+                self.semelhantes[caminho] = melhor
+                return referencia
+
+        # Enviado por inteiro: passa a ser referência para os próximos arquivos
+        conteudos[caminho] = conteudo
+        assinaturas[caminho] = assinatura
+        for chave in chaves:
+            baldes[chave].append(caminho)
+        return None
+
+def agrupar_duplicatas(duplicatas: Dict[str, str]) -> Dict[str, List[str]]:
+    """
+    Agrupa as cópias exatas pelo arquivo enviado com o conteúdo.
+
+    Args:
+        duplicatas (Dict[str, str]): Cópia -> arquivo original
+
+    Returns:
+        Dict[str, List[str]]: Para cada arquivo original, as cópias enviadas só como referência
+    """
+    copias: Dict[str, List[str]] = defaultdict(list)
+    for copia, original in duplicatas.items():
+        copias[original].append(copia)
+    return dict(copias)
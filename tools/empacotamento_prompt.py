@@ -0,0 +1,141 @@
+# Arquivo: tools/empacotamento_prompt.py
+
+import json
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Arquivo lido do repositório: (caminho, tamanho em bytes, conteúdo)
+Arquivo = Tuple[str, int, str]
+Empacotador = Callable[[Iterable[Arquivo]], Optional[str]]
+
+FORMATO_PADRAO = "json"
+
+# Linha que abre cada arquivo nos formatos com cabeçalho (mesma convenção do `head`)
+MODELO_CABECALHO = "==> {caminho} <=="
+
+def _empacotar_json(arquivos: Iterable[Arquivo]) -> Optional[str]:
+    """
+    Objeto JSON {caminho: conteudo} legível, idêntico a json.dumps(dict, indent=2, ensure_ascii=False).
+
+    Gerado arquivo a arquivo: o conteúdo original de cada arquivo pode ser
+    liberado assim que é codificado.
+    """
+    partes = [
+        f"  {json.dumps(caminho, ensure_ascii=False)}: {json.dumps(conteudo, ensure_ascii=False)}"
+        for caminho, _, conteudo in arquivos
+    ]
+    if not partes:
+        return None
+    return "{\n" + ",\n".join(partes) + "\n}"
+
+def _empacotar_json_compacto(arquivos: Iterable[Arquivo]) -> Optional[str]:
+    """Objeto JSON {caminho: conteudo} sem indentação nem espaços entre os separadores."""
+    partes = [
+        f"{json.dumps(caminho, ensure_ascii=False)}:{json.dumps(conteudo, ensure_ascii=False)}"
+        for caminho, _, conteudo in arquivos
+    ]
+    if not partes:
+        return None
+    return "{" + ",".join(partes) + "}"
+
+def _empacotar_com_cabecalhos(arquivos: Iterable[Arquivo], numerar_linhas: bool) -> Optional[str]:
+    partes = []
+    for caminho, _, conteudo in arquivos:
+        if numerar_linhas:
+            linhas = conteudo.split('\n')
+            if linhas and linhas[-1] == '':
+                linhas.pop()
+            conteudo = '\n'.join(f"{numero}\t{linha}" for numero, linha in enumerate(linhas, start=1))
+        corpo = conteudo[:-1] if conteudo.endswith('\n') else conteudo
+        partes.append(f"{MODELO_CABECALHO.format(caminho=caminho)}\n{corpo}")
+    if not partes:
+        return None
+    introducao = (
+        "Arquivos do repositório. Cada arquivo começa com uma linha "
+        f"'{MODELO_CABECALHO.format(caminho='caminho/do/arquivo')}' seguida do seu conteúdo original"
+    )
+    if numerar_linhas:
+        introducao += ", com o número de cada linha e uma tabulação no início"
+    return introducao + ".\n\n" + "\n\n".join(partes)
+
+def _empacotar_arquivos(arquivos: Iterable[Arquivo]) -> Optional[str]:
+    """Cabeçalho por arquivo seguido do conteúdo bruto, sem escapes de JSON."""
+    return _empacotar_com_cabecalhos(arquivos, numerar_linhas=False)
+
+def _empacotar_arquivos_numerados(arquivos: Iterable[Arquivo]) -> Optional[str]:
+    """Como 'arquivos', com o número de cada linha, útil quando a resposta cita linhas."""
+    return _empacotar_com_cabecalhos(arquivos, numerar_linhas=True)
+
+_FORMATOS: Dict[str, Empacotador] = {
+    "json": _empacotar_json,
+    "json_compacto": _empacotar_json_compacto,
+    "arquivos": _empacotar_arquivos,
+    "arquivos_numerados": _empacotar_arquivos_numerados,
+}
+
+def registrar_formato(nome: str, empacotador: Empacotador):
+    """
+    Registra um novo formato de empacotamento de código.
+
+    Args:
+        nome (str): Nome usado no parâmetro 'formato_prompt' das etapas do workflows.yaml
+        empacotador (Empacotador): Função que recebe os arquivos (caminho, tamanho,
+            conteúdo) e retorna o texto do prompt, ou None se não houver arquivos
+    """
+    _FORMATOS[nome.lower()] = empacotador
+
+def formatos_disponiveis() -> List[str]:
+    """Retorna os nomes dos formatos registrados."""
+    return list(_FORMATOS.keys())
+
+def obter_empacotador(formato: Optional[str]) -> Empacotador:
+    """
+    Obtém o empacotador de um formato.
+
+    Args:
+        formato (Optional[str]): Nome do formato. Se None, usa FORMATO_PADRAO
+
+    Raises:
+        ValueError: Se o formato não estiver registrado
+    """
+    nome = (formato or FORMATO_PADRAO).lower()
+    if nome not in _FORMATOS:
+        raise ValueError(f"formato_prompt '{nome}' inválido. Valores aceitos: {', '.join(repr(f) for f in _FORMATOS)}.")
+    return _FORMATOS[nome]
+
+def empacotar_codigo(arquivos: Iterable[Arquivo], formato: Optional[str] = None) -> Optional[str]:
+    """
+    Empacota os arquivos de um repositório no texto enviado ao LLM.
+
+    Formatos registrados:
+    - 'json' (padrão): objeto {caminho: conteudo} com indentação, formato histórico
+    - 'json_compacto': o mesmo objeto sem indentação
+    - 'arquivos': cabeçalho '==> caminho <==' seguido do conteúdo bruto; sem
+      escapes de quebras de linha e aspas, costuma usar bem menos tokens
+    - 'arquivos_numerados': como 'arquivos', com números de linha
+
+    Returns:
+        Optional[str]: Texto do prompt, ou None se nenhum arquivo for recebido
+
+    Raises:
+        ValueError: Se o formato não estiver registrado
+    """
+    return obter_empacotador(formato)(arquivos)
+
+def empacotar_dados(dados: Any, formato: Optional[str] = None) -> str:
+    """
+    Serializa os dados estruturados de uma etapa anterior (entrada do AgenteProcessador).
+
+    Com 'json' o resultado é o formato histórico. Nos demais formatos, um
+    dicionário {caminho: conteudo} só com textos é empacotado como arquivos, e
+    qualquer outra estrutura é serializada em JSON compacto.
+
+    Raises:
+        ValueError: Se o formato não estiver registrado
+    """
+    empacotador = obter_empacotador(formato)
+    nome = (formato or FORMATO_PADRAO).lower()
+    if nome == "json":
+        return json.dumps(dados, indent=2, ensure_ascii=False)
+    if isinstance(dados, dict) and dados and all(isinstance(valor, str) for valor in dados.values()):
+        return empacotador((caminho, len(conteudo.encode('utf-8')), conteudo) for caminho, conteudo in dados.items())
+    return json.dumps(dados, ensure_ascii=False, separators=(',', ':'))
@@ -0,0 +1,184 @@
+# Arquivo: tools/filtro_arquivos.py
+
+import re
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import pathspec
+
+# Limite padrão por arquivo. Arquivos maiores que isso são quase sempre gerados
+# (fixtures, dumps, bundles) e consomem o contexto do LLM sem valor para a análise.
+MAX_BYTES_ARQUIVO_PADRAO = 1024 * 1024
+
+# Exclusões aplicadas quando o workflow não declara as suas. Sintaxe do .gitignore:
+# padrões com '/' no meio são ancorados na raiz; '**/' casa em qualquer diretório.
+EXCLUSOES_PADRAO = [
+    "**/vendor/**",
+    "**/third_party/**",
+    "**/node_modules/**",
+    "**/.venv/**",
+    "**/site-packages/**",
+    "*_pb2.py",
+    "*_pb2_grpc.py",
+    "*.min.js",
+]
+
+# Quantidade de bytes inspecionada pela detecção de binários (mesma heurística do git)
+TAMANHO_AMOSTRA_BINARIO = 8000
+
+def compilar_globs(padroes: List[str]) -> Callable[[str], bool]:
+    """
+    Compila globs no formato .gitignore em uma única função de correspondência.
+
+    Sem padrões de negação ('!padrao'), as expressões regulares geradas pelo
+    pathspec são unidas em uma só, avaliada em uma passada por caminho. Com
+    negações a ordem dos padrões importa, e a avaliação fica a cargo do pathspec.
+
+    Returns:
+        Callable[[str], bool]: Função que indica se um caminho casa com os padrões
+    """
+    spec = pathspec.GitIgnoreSpec.from_lines(padroes)
+    ativos = [padrao for padrao in spec.patterns if padrao.include is not None]
+    if not ativos:
+        return lambda caminho: False
+    if any(not padrao.include for padrao in ativos):
+        return spec.match_file
+    # Grupos nomeados se repetiriam na união; caminhos de arquivo não dependem deles
+    uniao = '|'.join(
+        f"(?:{re.sub(r'[(][?]P<[^>]+>', '(?:', padrao.regex.pattern)})" for padrao in ativos
+    )
+    return re.compile(uniao).match
+
+class LimitesDeLeitura:
+    """
+    Limites de leitura de um workflow, aplicados aos metadados antes de buscar conteúdo.
+
+    Declarados no bloco opcional 'limits' de cada workflow em workflows.yaml:
+
+        limits:
+          max_file_bytes: 200000
+          max_total_bytes: 5000000
+          exclude: ["vendor/**", "*_pb2.py"]
+
+    Os tamanhos vêm da própria árvore Git (ou do cabeçalho do tarball), de modo
+    que arquivos excluídos nunca geram requisição de blob nem download de conteúdo.
+
+    Attributes:
+        max_bytes_arquivo (Optional[int]): Tamanho máximo de um arquivo (None = sem limite)
+        max_bytes_total (Optional[int]): Soma máxima dos arquivos lidos (None = sem limite)
+        exclusoes (List[str]): Padrões glob (sintaxe .gitignore) de caminhos ignorados
+    """
+
+    def __init__(
+        self,
+        max_bytes_arquivo: Optional[int] = MAX_BYTES_ARQUIVO_PADRAO,
+        max_bytes_total: Optional[int] = None,
+        exclusoes: Optional[List[str]] = None
+    ):
+        self.max_bytes_arquivo = max_bytes_arquivo
+        self.max_bytes_total = max_bytes_total
+        self.exclusoes = list(EXCLUSOES_PADRAO if exclusoes is None else exclusoes)
+        self._corresponde_exclusao = compilar_globs(self.exclusoes)
+
+    @classmethod
+    def de_config(cls, config: Optional[Dict[str, Any]]) -> 'LimitesDeLeitura':
+        """
+        Constrói os limites a partir do bloco 'limits' de um workflow.
+
+        Chaves ausentes assumem os valores padrão; 'exclude' substitui
+        EXCLUSOES_PADRAO por completo quando informado.
+
+        Raises:
+            ValueError: Se algum limite numérico não for um inteiro positivo
+        """
+        config = config or {}
+        limites = {}
+        for chave in ('max_file_bytes', 'max_total_bytes'):
+            if config.get(chave) is None:
+                continue
+            valor = config[chave]
+            if not isinstance(valor, int) or valor <= 0:
+                raise ValueError(f"'limits.{chave}' deve ser um inteiro positivo, recebido: {valor!r}")
+            limites[chave] = valor
+        return cls(
+            max_bytes_arquivo=limites.get('max_file_bytes', MAX_BYTES_ARQUIVO_PADRAO),
+            max_bytes_total=limites.get('max_total_bytes'),
+            exclusoes=config.get('exclude')
+        )
+
+    def excluido(self, caminho: str) -> bool:
+        """Indica se o caminho casa com algum padrão de exclusão."""
+        return bool(self._corresponde_exclusao(caminho))
+
+    def admite(self, caminho: str, tamanho: Optional[int]) -> bool:
+        """
+        Indica se um arquivo passa nos filtros individuais (exclusões e tamanho máximo).
+
+        Tamanho None (desconhecido) não é rejeitado; nesse caso o limite por
+        arquivo é verificado após a leitura.
+        """
+        return not self.excluido(caminho) and self.cabe_no_limite_por_arquivo(tamanho)
+
+    def cabe_no_limite_por_arquivo(self, tamanho: Optional[int]) -> bool:
+        """Indica se o tamanho respeita max_bytes_arquivo (tamanho desconhecido é aceito)."""
+        return self.max_bytes_arquivo is None or tamanho is None or tamanho <= self.max_bytes_arquivo
+
+    def cabe_no_total(self, tamanho: Optional[int], total_acumulado: int) -> bool:
+        """Indica se um arquivo ainda cabe no orçamento total de bytes."""
+        if self.max_bytes_total is None or tamanho is None:
+            return True
+        return total_acumulado + tamanho <= self.max_bytes_total
+
+    def selecionar(self, elementos: Iterable[Any]) -> List[Any]:
+        """
+        Filtra elementos de árvore (com atributos 'path' e 'size') antes de qualquer leitura.
+
+        Aplica exclusões, tamanho máximo por arquivo e, na ordem recebida, o
+        orçamento total: arquivos que não cabem no que resta são pulados, mas os
+        seguintes, menores, ainda podem entrar.
+
+        Returns:
+            List[Any]: Elementos admitidos, na ordem original
+        """
+        selecionados = []
+        total = 0
+        descartes = {'excluidos': 0, 'grandes_demais': 0, 'fora_do_orcamento': 0}
+        for element in elementos:
+            if self.excluido(element.path):
+                descartes['excluidos'] += 1
+                continue
+            if not self.cabe_no_limite_por_arquivo(element.size):
+                descartes['grandes_demais'] += 1
+                continue
+            if not self.cabe_no_total(element.size, total):
+                descartes['fora_do_orcamento'] += 1
+                continue
+            total += element.size or 0
+            selecionados.append(element)
+
+        if any(descartes.values()):
+            print(f"Limites do workflow aplicados antes da leitura: {descartes}")
+        return selecionados
+
+    @staticmethod
+    def parece_binario(amostra: bytes) -> bool:
+        """
+        Detecta conteúdo binário pela presença de byte nulo no início do arquivo.
+
+        É a mesma heurística usada pelo git: barata, e suficiente para descartar
+        imagens, executáveis e arquivos compactados antes da decodificação UTF-8.
+        """
+        return b'\x00' in amostra[:TAMANHO_AMOSTRA_BINARIO]
+
+def decodificar_texto(conteudo_bruto: bytes) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Decodifica o conteúdo de um arquivo em UTF-8, rejeitando binários sem decodificá-los.
+
+    Returns:
+        Tuple[Optional[str], Optional[str]]: (texto, None) em caso de sucesso ou
+            (None, motivo) se o conteúdo for binário ou não for UTF-8 válido
+    """
+    if LimitesDeLeitura.parece_binario(conteudo_bruto):
+        return None, "conteúdo binário"
+    try:
+        return conteudo_bruto.decode('utf-8'), None
+    except UnicodeDecodeError as e:
+        return None, str(e)
@@ -0,0 +1,141 @@
+# Arquivo: tools/fragmentacao_codigo.py
+
+import os
+import posixpath
+from itertools import groupby
+from typing import Any, Callable, Dict, List
+
+from tools.empacotamento_prompt import Arquivo
+
+# Máximo de fragmentos analisados ao mesmo tempo. Com fragmentos até esse
+# número, o tempo total da análise é o do fragmento mais lento.
+MAX_FRAGMENTOS_PARALELOS = int(os.getenv("LLM_MAX_FRAGMENTOS_PARALELOS", "8"))
+
+# Instrução acrescentada a cada fragmento para que o modelo não trate
+# arquivos ausentes do fragmento como ausentes do repositório
+MODELO_INSTRUCAO_FRAGMENTO = (
+    "Esta requisição contém apenas a parte {numero} de {total} do repositório "
+    "(diretórios: {diretorios}). Analise somente os arquivos recebidos; as demais "
+    "partes são analisadas separadamente e os resultados serão combinados."
+)
+
+# Separador entre os relatórios parciais na resposta combinada
+SEPARADOR_RELATORIOS = "\n\n---\n\n"
+
+def diretorio_do_arquivo(caminho: str) -> str:
+    return posixpath.dirname(caminho) or "."
+
+def planejar_fragmentos(
+    arquivos: List[Arquivo],
+    tokens_por_fragmento: int,
+    contar_tokens: Callable[[Arquivo], int]
+) -> List[List[Arquivo]]:
+    """
+    Divide os arquivos em fragmentos que cabem no orçamento de tokens.
+
+    Os arquivos são agrupados por diretório, na ordem dos caminhos, e cada
+    diretório é mantido inteiro em um fragmento sempre que cabe nele: um
+    diretório só é dividido se sozinho exceder o orçamento. Um arquivo que
+    sozinho excede o orçamento forma um fragmento próprio, truncado pelo
+    provedor ao analisá-lo.
+
+    Args:
+        arquivos (List[Arquivo]): Arquivos (caminho, tamanho, conteúdo) do repositório
+        tokens_por_fragmento (int): Tokens que o código de cada fragmento pode usar
+        contar_tokens (Callable[[Arquivo], int]): Tokens de um arquivo já empacotado
+
+    Returns:
+        List[List[Arquivo]]: Fragmentos, na ordem dos caminhos
+    """
+    fragmentos: List[List[Arquivo]] = []
+    atual: List[Arquivo] = []
+    tokens_atual = 0
+
+    def fechar_fragmento():
+        nonlocal atual, tokens_atual
+        if atual:
+            fragmentos.append(atual)
+        atual, tokens_atual = [], 0
+
+    ordenados = sorted(arquivos, key=lambda arquivo: (diretorio_do_arquivo(arquivo[0]), arquivo[0]))
+    for _, grupo in groupby(ordenados, key=lambda arquivo: diretorio_do_arquivo(arquivo[0])):
+        contados = [(arquivo, contar_tokens(arquivo)) for arquivo in grupo]
+        tokens_diretorio = sum(tokens for _, tokens in contados)
+
+        if tokens_atual + tokens_diretorio > tokens_por_fragmento:
+            fechar_fragmento()
+        if tokens_diretorio <= tokens_por_fragmento:
+            atual.extend(arquivo for arquivo, _ in contados)
+            tokens_atual += tokens_diretorio
+            continue
+
+        # Diretório maior que um fragmento: dividido arquivo a arquivo
+        for arquivo, tokens in contados:
+            if atual and tokens_atual + tokens > tokens_por_fragmento:
+                fechar_fragmento()
+            atual.append(arquivo)
+            tokens_atual += tokens
+    fechar_fragmento()
+    return fragmentos
+
+def descrever_fragmento(fragmento: List[Arquivo], max_diretorios: int = 10) -> str:
+    """Lista os diretórios de um fragmento, para a instrução enviada ao modelo."""
+    diretorios = list(dict.fromkeys(diretorio_do_arquivo(caminho) for caminho, _, _ in fragmento))
+    descricao = ", ".join(diretorios[:max_diretorios])
+    if len(diretorios) > max_diretorios:
+        descricao += f" e mais {len(diretorios) - max_diretorios}"
+    return descricao
+
+def _mesclar_conjunto_de_mudancas(listas: List[list]) -> list:
+    """Concatena as mudanças dos fragmentos, mantendo uma por caminho_do_arquivo."""
+    mudancas, indices = [], {}
+    for lista in listas:
+        for mudanca in lista:
+            caminho = mudanca.get("caminho_do_arquivo") if isinstance(mudanca, dict) else None
+            if caminho is None:
+                mudancas.append(mudanca)
+            elif caminho not in indices:
+                indices[caminho] = len(mudancas)
+                mudancas.append(mudanca)
+            else:
+                print(f"AVISO: '{caminho}' alterado por mais de um fragmento. Mantendo a última versão.")
+                mudancas[indices[caminho]] = mudanca
+    return mudancas
+
+def mesclar_respostas(respostas: List[Any], chave: str = "") -> Any:
+    """
+    Etapa de redução: combina as respostas JSON dos fragmentos no esquema de uma resposta única.
+
+    - 'conjunto_de_mudancas': listas concatenadas, com uma mudança por arquivo
+    - demais listas: concatenadas
+    - dicionários: mesclados chave a chave
+    - textos (ex: 'relatorio', 'resumo_geral'): relatórios parciais distintos,
+      na ordem dos fragmentos, separados por SEPARADOR_RELATORIOS
+    - outros valores: prevalece o do último fragmento
+
+    Args:
+        respostas (List[Any]): Respostas já decodificadas, na ordem dos fragmentos
+        chave (str): Chave do valor sendo mesclado (uso interno)
+    """
+    respostas = [r for r in respostas if r is not None]
+    if not respostas:
+        return None
+    if all(isinstance(r, dict) for r in respostas):
+        chaves = list(dict.fromkeys(c for r in respostas for c in r))
+        return {c: mesclar_respostas([r.get(c) for r in respostas], c) for c in chaves}
+    if all(isinstance(r, list) for r in respostas):
+        if chave == "conjunto_de_mudancas":
+            return _mesclar_conjunto_de_mudancas(respostas)
+        return [item for r in respostas for item in r]
+    if all(isinstance(r, str) for r in respostas):
+        return SEPARADOR_RELATORIOS.join(dict.fromkeys(r.strip() for r in respostas if r.strip()))
+    return respostas[-1]
+
+def resumir_orcamentos(orcamentos: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Contagem de tokens da análise fragmentada, registrada nos dados do job."""
+    return {
+        'acao': 'fragmentada',
+        'total_fragmentos': len(orcamentos),
+        'total_entrada': sum((o or {}).get('total_entrada', 0) for o in orcamentos),
+        'fragmentos': orcamentos,
+    }
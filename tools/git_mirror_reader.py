@@ -0,0 +1,456 @@
+# Arquivo: tools/git_mirror_reader.py
+
+import os
+import re
+import shutil
+import base64
+import tempfile
+import threading
+import subprocess
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from domain.interfaces.repository_reader_interface import IRepositoryReader, e_sha_de_commit
+from domain.interfaces.repository_provider_interface import IRepositoryProvider
+from tools.github_connector import GitHubConnector
+from tools.github_repository_provider import GitHubRepositoryProvider
+from tools.github_reader import ElementoArvore
+from tools.filtro_arquivos import decodificar_texto
+from tools.workflow_registry import FiltroDeArquivos, WorkflowRegistry, obter_registry_padrao
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows: o lock entre processos fica desabilitado
+    fcntl = None
+
+URL_REMOTO_PADRAO = "https://github.com/{nome_repo}.git"
+LIMITE_DISCO_PADRAO_MB = 10240
+TIMEOUT_GIT_PADRAO = 900
+
+# Arquivo tocado a cada uso do espelho; seu mtime ordena o despejo LRU
+ARQUIVO_ULTIMO_USO = "mcp-ultimo-uso"
+
+class GitMirrorRepositoryReader(IRepositoryReader):
+    """
+    Leitor de repositório baseado em espelhos Git locais (bare mirrors).
+
+    Cada repositório analisado é mantido como um espelho `git clone --mirror` em
+    disco. A cada leitura o espelho é atualizado com um `git fetch` incremental
+    (apenas objetos novos trafegam) e o conteúdo é lido por um único processo
+    `git cat-file --batch`, sem consumir cota de API e na velocidade do disco local.
+
+    Os espelhos são despejados por LRU (mtime do arquivo ARQUIVO_ULTIMO_USO)
+    quando o total em disco excede o orçamento configurado. Um lock de arquivo
+    (flock) por espelho coordena threads e processos do servidor: fetch e despejo
+    exigem lock exclusivo, e leituras em andamento mantêm um lock compartilhado
+    que impede o despejo do espelho que estão lendo.
+
+    Attributes:
+        diretorio_espelhos (str): Diretório onde os espelhos são mantidos
+        limite_bytes_disco (int): Orçamento total de disco dos espelhos
+        url_remoto (str): Modelo da URL do remoto, com o marcador '{nome_repo}'
+        timeout_git (int): Timeout em segundos de clone e fetch
+
+    Example:
+        >>> reader = GitMirrorRepositoryReader(diretorio_espelhos="/var/cache/mcp/espelhos")
+        >>> for caminho, tamanho, conteudo in reader.iter_repository("org/projeto", "relatorio_sast"):
+        ...     print(caminho, tamanho)
+    """
+
+    _locks_sem_fcntl: Dict[str, threading.Lock] = {}
+    _lock_registro = threading.Lock()
+
+    def __init__(
+        self,
+        diretorio_espelhos: Optional[str] = None,
+        limite_bytes_disco: Optional[int] = None,
+        url_remoto: Optional[str] = None,
+        repository_provider: Optional[IRepositoryProvider] = None,
+        obter_token: Optional[Callable[[str], Optional[str]]] = None,
+        timeout_git: int = TIMEOUT_GIT_PADRAO,
+        workflow_registry: Optional[WorkflowRegistry] = None,
+        nome_workflow: Optional[str] = None
+    ):
+        """
+        Inicializa o leitor de espelhos.
+
+        Args:
+            diretorio_espelhos (Optional[str]): Diretório dos espelhos. Se None, usa
+                REPO_MIRROR_DIR ou '<tmp>/mcp-espelhos'
+            limite_bytes_disco (Optional[int]): Orçamento de disco. Se None, usa
+                REPO_MIRROR_DISK_MB (padrão: 10240 MB)
+            url_remoto (Optional[str]): Modelo da URL do remoto com '{nome_repo}'. Se None,
+                usa REPO_MIRROR_URL_TEMPLATE ou URL_REMOTO_PADRAO. Aceita 'file://'
+            repository_provider (Optional[IRepositoryProvider]): Provedor usado para
+                localizar o token da organização. Se None, usa GitHubRepositoryProvider
+            obter_token (Optional[Callable[[str], Optional[str]]]): Função que recebe
+                nome_repo e retorna o token de acesso. Se None, usa o gerenciador de
+                segredos do GitHubConnector. Só é chamada para remotos http(s)
+            timeout_git (int): Timeout em segundos de clone e fetch
+            workflow_registry (Optional[WorkflowRegistry]): Registro de workflows. Se None,
+                usa o registro compartilhado do processo
+            nome_workflow (Optional[str]): Workflow do job em execução
+        """
+        self.diretorio_espelhos = diretorio_espelhos or os.getenv("REPO_MIRROR_DIR") or os.path.join(tempfile.gettempdir(), "mcp-espelhos")
+        self.limite_bytes_disco = limite_bytes_disco or int(os.getenv("REPO_MIRROR_DISK_MB", LIMITE_DISCO_PADRAO_MB)) * 1024 * 1024
+        self.url_remoto = url_remoto or os.getenv("REPO_MIRROR_URL_TEMPLATE") or URL_REMOTO_PADRAO
+        self.repository_provider = repository_provider or GitHubRepositoryProvider()
+        self._obter_token = obter_token
+        self.timeout_git = timeout_git
+        self.workflow_registry = workflow_registry or obter_registry_padrao()
+        self.nome_workflow = nome_workflow
+        os.makedirs(self.diretorio_espelhos, exist_ok=True)
+
+    # --- Execução do git ---
+
+    def _ambiente_git(self, nome_repo: str) -> Dict[str, str]:
+        """
+        Monta o ambiente dos comandos git que acessam o remoto.
+
+        O token é enviado como cabeçalho HTTP via GIT_CONFIG_* (git >= 2.31): não
+        aparece na linha de comando nem fica gravado na configuração do espelho.
+        """
+        ambiente = dict(os.environ, GIT_TERMINAL_PROMPT="0")
+        if not self.url_remoto.startswith(("http://", "https://")):
+            return ambiente
+        token = self._token_para(nome_repo)
+        if token:
+            credencial = base64.b64encode(f"x-access-token:{token}".encode('utf-8')).decode('ascii')
+            ambiente.update({
+                "GIT_CONFIG_COUNT": "1",
+                "GIT_CONFIG_KEY_0": "http.extraHeader",
+                "GIT_CONFIG_VALUE_0": f"Authorization: Basic {credencial}",
+            })
+        return ambiente
+
+    def _token_para(self, nome_repo: str) -> Optional[str]:
+        if self._obter_token is not None:
+            return self._obter_token(nome_repo)
+        connector = GitHubConnector(repository_provider=self.repository_provider)
+        return connector._get_token_for_org(nome_repo.split('/')[0])
+
+    def _executar_git(self, argumentos: List[str], ambiente: Optional[Dict[str, str]] = None, timeout: Optional[int] = None) -> str:
+        """
+        Executa um comando git e retorna sua saída padrão.
+
+        Raises:
+            RuntimeError: Se o comando falhar ou exceder o timeout
+        """
+        try:
+            resultado = subprocess.run(
+                ["git", *argumentos],
+                capture_output=True,
+                env=ambiente,
+                timeout=timeout,
+                check=True
+            )
+        except subprocess.CalledProcessError as e:
+            erro = e.stderr.decode('utf-8', errors='replace').strip()
+            raise RuntimeError(f"Falha ao executar 'git {argumentos[0]}': {erro}") from e
+        except subprocess.TimeoutExpired as e:
+            raise RuntimeError(f"Timeout de {timeout}s ao executar 'git {argumentos[0]}'.") from e
+        return resultado.stdout.decode('utf-8', errors='replace')
+
+    # --- Gestão dos espelhos ---
+
+    def _caminho_espelho(self, nome_repo: str) -> str:
+        """
+        Calcula o diretório do espelho de um repositório.
+
+        Raises:
+            ValueError: Se o nome do repositório contiver caracteres não permitidos
+        """
+        if not re.fullmatch(r"[A-Za-z0-9._-]+(/[A-Za-z0-9._-]+)+", nome_repo) or '..' in nome_repo:
+            raise ValueError(f"Nome de repositório inválido para espelho local: '{nome_repo}'")
+        return os.path.join(self.diretorio_espelhos, nome_repo.replace('/', '__') + '.git')
+
+    @classmethod
+    def _travar_espelho(cls, caminho: str, exclusivo: bool = True, bloquear: bool = True):
+        """
+        Obtém o lock de um espelho, exclusivo (fetch, despejo) ou compartilhado (leitura).
+
+        Returns:
+            Optional[Any]: Handle a ser passado para _liberar_espelho, ou None se
+                bloquear=False e o espelho estiver em uso
+        """
+        if fcntl is None:
+            # Sem flock, apenas operações exclusivas são serializadas, e só entre threads
+            if not exclusivo:
+                return ('sem_lock', None)
+            with cls._lock_registro:
+                lock = cls._locks_sem_fcntl.setdefault(caminho, threading.Lock())
+            return ('thread', lock) if lock.acquire(blocking=bloquear) else None
+
+        arquivo_lock = open(caminho + '.lock', 'a')
+        modo = fcntl.LOCK_EX if exclusivo else fcntl.LOCK_SH
+        try:
+            fcntl.flock(arquivo_lock, modo if bloquear else modo | fcntl.LOCK_NB)
+        except OSError:
+            arquivo_lock.close()
+            return None
+        return ('flock', arquivo_lock)
+
+    @staticmethod
+    def _rebaixar_para_compartilhado(handle):
+        """Converte um lock exclusivo em compartilhado, liberando fetches de outros jobs."""
+        tipo, recurso = handle
+        if tipo == 'flock':
+            fcntl.flock(recurso, fcntl.LOCK_SH)
+            return handle
+        if tipo == 'thread':
+            recurso.release()
+        return ('sem_lock', None)
+
+    @staticmethod
+    def _liberar_espelho(handle):
+        tipo, recurso = handle
+        if tipo == 'flock':
+            fcntl.flock(recurso, fcntl.LOCK_UN)
+            recurso.close()
+        elif tipo == 'thread':
+            recurso.release()
+
+    def _atualizar_espelho(self, nome_repo: str, caminho: str):
+        """Clona o espelho na primeira vez ou busca apenas os objetos novos."""
+        ambiente = self._ambiente_git(nome_repo)
+        url = self.url_remoto.format(nome_repo=nome_repo)
+        if os.path.isdir(caminho):
+            print(f"Atualizando espelho local de '{nome_repo}' (fetch incremental)...")
+            self._executar_git(["-C", caminho, "fetch", "--prune", "--quiet", "origin"], ambiente, self.timeout_git)
+        else:
+            print(f"Criando espelho local de '{nome_repo}' em '{caminho}'...")
+            temporario = caminho + '.tmp'
+            shutil.rmtree(temporario, ignore_errors=True)
+            self._executar_git(["clone", "--mirror", "--quiet", url, temporario], ambiente, self.timeout_git)
+            os.replace(temporario, caminho)
+        with open(os.path.join(caminho, ARQUIVO_ULTIMO_USO), 'w'):
+            pass
+
+    @staticmethod
+    def _tamanho_diretorio(caminho: str) -> int:
+        total = 0
+        for raiz, _, arquivos in os.walk(caminho):
+            for arquivo in arquivos:
+                try:
+                    total += os.path.getsize(os.path.join(raiz, arquivo))
+                except OSError:
+                    continue
+        return total
+
+    def _despejar_espelhos(self, caminho_em_uso: str):
+        """
+        Remove os espelhos menos recentemente usados até caber no orçamento de disco.
+
+        O espelho em uso e espelhos travados por outro job nunca são removidos.
+        """
+        espelhos = []
+        for nome in os.listdir(self.diretorio_espelhos):
+            caminho = os.path.join(self.diretorio_espelhos, nome)
+            if not nome.endswith('.git') or not os.path.isdir(caminho):
+                continue
+            try:
+                ultimo_uso = os.path.getmtime(os.path.join(caminho, ARQUIVO_ULTIMO_USO))
+            except OSError:
+                ultimo_uso = 0.0
+            espelhos.append((ultimo_uso, caminho, self._tamanho_diretorio(caminho)))
+
+        total = sum(tamanho for _, _, tamanho in espelhos)
+        for _, caminho, tamanho in sorted(espelhos):
+            if total <= self.limite_bytes_disco:
+                break
+            if caminho == caminho_em_uso:
+                continue
+            handle = self._travar_espelho(caminho, exclusivo=True, bloquear=False)
+            if handle is None:
+                continue
+            try:
+                print(f"Despejando espelho local '{os.path.basename(caminho)}' ({tamanho} bytes) por orçamento de disco.")
+                shutil.rmtree(caminho, ignore_errors=True)
+                total -= tamanho
+            finally:
+                self._liberar_espelho(handle)
+
+    # --- Leitura ---
+
+    def _resolver_commit(self, caminho: str, nome_branch: Optional[str]) -> str:
+        """
+        Resolve a branch (ou a branch padrão do remoto) para o SHA do commit.
+
+        Raises:
+            ValueError: Se a branch não existir no espelho
+        """
+        if nome_branch is None:
+            referencia = self._executar_git(["-C", caminho, "symbolic-ref", "HEAD"]).strip()
+            print(f"Nenhuma branch especificada. Usando a branch padrão: '{referencia.split('refs/heads/', 1)[-1]}'")
+        elif e_sha_de_commit(nome_branch):
+            referencia = nome_branch
+        else:
+            referencia = f"refs/heads/{nome_branch}"
+        try:
+            return self._executar_git(["-C", caminho, "rev-parse", "--verify", "--quiet", f"{referencia}^{{commit}}"]).strip()
+        except RuntimeError:
+            raise ValueError(f"Branch '{nome_branch}' não encontrada.")
+
+    def resolver_commit(self, nome_repo: str, nome_branch: str = None) -> str:
+        """
+        Atualiza o espelho e resolve a branch (ou a branch padrão) para o SHA do commit.
+
+        Raises:
+            ValueError: Se o nome do repositório for inválido ou se a branch não existir
+            RuntimeError: Se o clone ou o fetch do espelho falhar
+        """
+        caminho = self._caminho_espelho(nome_repo)
+        handle = self._travar_espelho(caminho, exclusivo=True)
+        try:
+            self._atualizar_espelho(nome_repo, caminho)
+            return self._resolver_commit(caminho, nome_branch)
+        finally:
+            self._liberar_espelho(handle)
+
+    def _listar_arvore(self, caminho: str, commit_sha: str) -> List[ElementoArvore]:
+        """Lista os blobs do commit com tamanhos, via `git ls-tree -r -l -z`."""
+        saida = self._executar_git(["-C", caminho, "ls-tree", "-r", "-l", "-z", commit_sha])
+        elementos = []
+        for linha in saida.split('\0'):
+            if not linha:
+                continue
+            metadados, caminho_arquivo = linha.split('\t', 1)
+            _, tipo, sha, tamanho = metadados.split()
+            elementos.append(ElementoArvore(
+                path=caminho_arquivo,
+                type=tipo,
+                sha=sha,
+                size=int(tamanho) if tamanho.isdigit() else None
+            ))
+        return elementos
+
+    @staticmethod
+    def _ler_objetos(caminho: str, elementos: List[ElementoArvore]) -> Iterator[Tuple[ElementoArvore, Optional[bytes]]]:
+        """
+        Lê o conteúdo dos blobs por um único processo `git cat-file --batch`.
+
+        Os SHAs são escritos por uma thread enquanto as respostas são consumidas,
+        evitando o deadlock de pipes cheios em repositórios grandes.
+        """
+        processo = subprocess.Popen(
+            ["git", "-C", caminho, "cat-file", "--batch"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        )
+
+        def escrever_pedidos():
+            try:
+                for element in elementos:
+                    processo.stdin.write(f"{element.sha}\n".encode('ascii'))
+                processo.stdin.close()
+            except (BrokenPipeError, ValueError):
+                pass
+
+        escritor = threading.Thread(target=escrever_pedidos, daemon=True)
+        escritor.start()
+        try:
+            for element in elementos:
+                cabecalho = processo.stdout.readline().decode('ascii').split()
+                if len(cabecalho) < 3 or cabecalho[1] == 'missing':
+                    yield element, None
+                    continue
+                conteudo = processo.stdout.read(int(cabecalho[2]))
+                processo.stdout.read(1)  # quebra de linha após o conteúdo
+                yield element, conteudo
+        finally:
+            if processo.poll() is None:
+                processo.kill()
+            processo.wait()
+            escritor.join(timeout=5)
+            processo.stdout.close()
+
+    def _obter_filtro(self, tipo_analise: str) -> FiltroDeArquivos:
+        """
+        Obtém o filtro de arquivos compilado para o tipo de análise.
+
+        Raises:
+            ValueError: Se tipo_analise não possuir 'extensions' em workflows.yaml
+        """
+        filtro = self.workflow_registry.obter_filtro(tipo_analise, self.nome_workflow)
+        if filtro is None:
+            raise ValueError(f"Tipo de análise '{tipo_analise}' não encontrado ou não possui 'extensions' definidas em workflows.yaml")
+        return filtro
+
+    def iter_repository(
+        self,
+        nome_repo: str,
+        tipo_analise: str,
+        nome_branch: str = None,
+        commit_base: Optional[str] = None
+    ) -> Iterator[Tuple[str, int, str]]:
+        """
+        Percorre os arquivos relevantes do repositório a partir do espelho local.
+
+        Args:
+            nome_repo (str): Nome do repositório no formato 'org/repo'
+            tipo_analise (str): Tipo de análise que determina os arquivos incluídos
+            nome_branch (str, optional): Branch a ser lida. Se None, usa a branch padrão
+            commit_base (Optional[str]): Ignorado; a leitura local completa já é
+                limitada apenas pela velocidade do disco
+
+        Yields:
+            Tuple[str, int, str]: (caminho, tamanho em bytes, conteúdo), na ordem da árvore
+
+        Raises:
+            ValueError: Se tipo_analise não existir em workflows.yaml, se o nome do
+                repositório for inválido ou se a branch não existir
+            RuntimeError: Se o clone ou o fetch do espelho falhar
+        """
+        print(f"Iniciando leitura via espelho local do repositório: {nome_repo}")
+        filtro = self._obter_filtro(tipo_analise)
+        limites = filtro.limites
+        caminho = self._caminho_espelho(nome_repo)
+
+        handle = self._travar_espelho(caminho, exclusivo=True)
+        try:
+            self._atualizar_espelho(nome_repo, caminho)
+            commit_sha = self._resolver_commit(caminho, nome_branch)
+            elementos = [
+                element for element in self._listar_arvore(caminho, commit_sha)
+                if element.type == 'blob' and filtro.corresponde(element.path)
+            ]
+
+            # Durante a leitura basta um lock compartilhado: outros jobs podem ler
+            # o mesmo espelho, e o despejo (exclusivo) não o remove no meio da leitura
+            handle = self._rebaixar_para_compartilhado(handle)
+            self._despejar_espelhos(caminho_em_uso=caminho)
+
+            self.ultimo_commit_sha = commit_sha
+            elementos = limites.selecionar(elementos)
+            print(f"Filtragem concluída. {len(elementos)} arquivos com as extensões {filtro.extensoes} serão lidos.")
+
+            total_lidos = 0
+            for element, conteudo_bruto in self._ler_objetos(caminho, elementos):
+                if conteudo_bruto is None:
+                    print(f"AVISO: Objeto '{element.sha}' de '{element.path}' ausente no espelho. Pulando.")
+                    continue
+                conteudo, erro = decodificar_texto(conteudo_bruto)
+                if conteudo is None:
+                    print(f"AVISO: Falha ao decodificar o conteúdo do arquivo '{element.path}'. Pulando. Erro: {erro}")
+                    continue
+                total_lidos += 1
+                yield element.path, len(conteudo_bruto), conteudo
+        finally:
+            self._liberar_espelho(handle)
+
+        print(f"\nLeitura via espelho local concluída. Total de {total_lidos} arquivos lidos e processados.")
+
+    def read_repository(self, nome_repo: str, tipo_analise: str, nome_branch: str = None) -> Dict[str, str]:
+        """
+        Lê os arquivos relevantes do repositório a partir do espelho local.
+
+        Returns:
+            Dict[str, str]: Dicionário mapeando caminhos de arquivo para conteúdo
+
+        Raises:
+            ValueError: Se tipo_analise não existir em workflows.yaml ou a branch não existir
+            RuntimeError: Se o clone ou o fetch do espelho falhar
+        """
+        return {
+            caminho: conteudo
+            for caminho, _, conteudo in self.iter_repository(nome_repo, tipo_analise, nome_branch)
+        }
@@ -0,0 +1,188 @@
+# Arquivo: tools/github_archive_reader.py
+
+import tarfile
+import requests
+from typing import Dict, Iterator, Optional, Tuple
+from github import GithubException, UnknownObjectException
+from domain.interfaces.repository_provider_interface import IRepositoryProvider
+from domain.interfaces.repository_reader_interface import e_sha_de_commit
+from tools.github_reader import GitHubRepositoryReader
+from tools.workflow_registry import WorkflowRegistry
+from tools.filtro_arquivos import LimitesDeLeitura, TAMANHO_AMOSTRA_BINARIO, decodificar_texto
+
+# Tempo máximo (segundos) para conectar e entre pacotes recebidos do download do tarball
+TIMEOUT_DOWNLOAD_PADRAO = 300
+
+class GitHubArchiveRepositoryReader(GitHubRepositoryReader):
+    """
+    Leitor de repositório baseado no tarball da branch (modo snapshot).
+
+    Em vez de uma chamada à Git Trees API seguida de N chamadas a `get_git_blob`,
+    este leitor baixa o tarball da branch uma única vez e o extrai em streaming,
+    mantendo em memória apenas os arquivos com as extensões do workflow. Para
+    repositórios grandes isso troca milhares de requisições à API por um único
+    download, preservando a cota de 5.000 requisições/hora do token.
+
+    Herda de GitHubRepositoryReader a conexão, a resolução de branch e os
+    filtros de arquivos por tipo de análise, mantendo o mesmo contrato
+    Dict[caminho, conteudo] de IRepositoryReader.read_repository.
+
+    Attributes:
+        timeout_download (int): Timeout em segundos do download do tarball
+
+    Example:
+        >>> reader = GitHubArchiveRepositoryReader()
+        >>> codigo = reader.read_repository(
+        ...     nome_repo="org/projeto",
+        ...     tipo_analise="relatorio_sast",
+        ...     nome_branch="main"
+        ... )
+    """
+
+    def __init__(
+        self,
+        repository_provider: Optional[IRepositoryProvider] = None,
+        timeout_download: int = TIMEOUT_DOWNLOAD_PADRAO,
+        workflow_registry: Optional[WorkflowRegistry] = None,
+        nome_workflow: Optional[str] = None
+    ):
+        """
+        Inicializa o leitor de tarball.
+
+        Args:
+            repository_provider (Optional[IRepositoryProvider]): Provedor de repositório.
+                Se None, usa GitHubRepositoryProvider
+            timeout_download (int): Timeout em segundos do download do tarball.
+                Defaults to TIMEOUT_DOWNLOAD_PADRAO
+            workflow_registry (Optional[WorkflowRegistry]): Registro de workflows.
+                Se None, usa o registro compartilhado do processo
+            nome_workflow (Optional[str]): Workflow do job em execução
+        """
+        super().__init__(
+            repository_provider=repository_provider,
+            workflow_registry=workflow_registry,
+            nome_workflow=nome_workflow
+        )
+        self.timeout_download = timeout_download
+
+    @staticmethod
+    def _remover_diretorio_raiz(caminho: str) -> str:
+        """
+        Remove o diretório raiz que o GitHub adiciona ao tarball.
+
+        O tarball gerado pelo GitHub contém todos os arquivos sob um diretório
+        no formato '{owner}-{repo}-{sha}/'. Os caminhos retornados devem ser
+        relativos à raiz do repositório, como na Git Trees API.
+        """
+        partes = caminho.split('/', 1)
+        return partes[1] if len(partes) == 2 else ''
+
+    def iter_repository(
+        self,
+        nome_repo: str,
+        tipo_analise: str,
+        nome_branch: str = None,
+        commit_base: Optional[str] = None
+    ) -> Iterator[Tuple[str, int, str]]:
+        """
+        Percorre os arquivos relevantes do tarball da branch à medida que são extraídos.
+        
+        Args:
+            nome_repo (str): Nome do repositório no formato 'org/repo'
+            tipo_analise (str): Tipo de análise que determina as extensões incluídas
+            nome_branch (str, optional): Branch a ser lida. Se None, usa a branch padrão
+            commit_base (Optional[str]): Ignorado; o tarball é sempre um snapshot completo
+        
+        Yields:
+            Tuple[str, int, str]: (caminho, tamanho em bytes, conteúdo), na ordem do tarball
+        
+        Raises:
+            ValueError: Se tipo_analise não existir em workflows.yaml ou a branch não existir
+            GithubException: Se houver erro ao obter o link do tarball
+            requests.exceptions.RequestException: Se o download falhar
+        
+        Note:
+            - O tarball é processado em streaming (modo 'r|gz'): nenhum arquivo
+              temporário é criado e membros irrelevantes são descartados sem leitura
+            - Os limites do workflow (exclusões e tamanhos) são avaliados pelo
+              cabeçalho de cada membro; binários são descartados após os primeiros bytes
+            - Apenas um arquivo por vez fica em memória entre iterações
+            - Arquivos que não decodificam em UTF-8 são ignorados, como na leitura via API
+        """
+        print(f"Iniciando leitura via tarball do repositório: {nome_repo}")
+
+        repositorio = self._conectar(nome_repo)
+        branch_a_ler = self._resolver_branch(repositorio, nome_branch)
+        filtro = self._obter_filtro(tipo_analise)
+        # O tarball também aceita o SHA de um commit, quando a leitura está fixada nele
+        self.ultimo_commit_sha = branch_a_ler.lower() if e_sha_de_commit(branch_a_ler) else None
+        limites = filtro.limites
+
+        try:
+            # O link retornado é pré-assinado, dispensando o envio do token no download
+            url_tarball = repositorio.get_archive_link("tarball", ref=branch_a_ler)
+        except UnknownObjectException:
+            raise ValueError(f"Branch '{branch_a_ler}' não encontrada.")
+        except GithubException as e:
+            print(f"ERRO CRÍTICO ao obter o link do tarball: {e}")
+            raise
+
+        total_lidos = 0
+        total_bytes = 0
+        print(f"Baixando o tarball da branch '{branch_a_ler}' em streaming...")
+        with requests.get(url_tarball, stream=True, timeout=self.timeout_download) as resposta:
+            resposta.raise_for_status()
+            resposta.raw.decode_content = True
+
+            with tarfile.open(fileobj=resposta.raw, mode='r|gz') as tarball:
+                for membro in tarball:
+                    if not membro.isfile():
+                        continue
+                    caminho = self._remover_diretorio_raiz(membro.name)
+                    if not caminho or not filtro.corresponde(caminho):
+                        continue
+                    # Limites de tamanho usam o cabeçalho tar, sem ler o conteúdo
+                    if not limites.cabe_no_limite_por_arquivo(membro.size) or not limites.cabe_no_total(membro.size, total_bytes):
+                        continue
+
+                    arquivo = tarball.extractfile(membro)
+                    amostra = arquivo.read(TAMANHO_AMOSTRA_BINARIO)
+                    if LimitesDeLeitura.parece_binario(amostra):
+                        print(f"AVISO: Arquivo '{caminho}' parece binário. Pulando.")
+                        continue
+                    conteudo, erro = decodificar_texto(amostra + arquivo.read())
+                    if conteudo is None:
+                        print(f"AVISO: Falha ao decodificar o conteúdo do arquivo '{caminho}'. Pulando. Erro: {erro}")
+                        continue
+
+                    total_lidos += 1
+                    total_bytes += membro.size
+                    # Log de progresso para repositórios grandes
+                    if total_lidos % 500 == 0:
+                        print(f"  ...{total_lidos} arquivos extraídos ({caminho})")
+                    yield caminho, membro.size, conteudo
+
+        print(f"\nLeitura via tarball concluída. Total de {total_lidos} arquivos lidos e processados.")
+
+    def read_repository(self, nome_repo: str, tipo_analise: str, nome_branch: str = None) -> Dict[str, str]:
+        """
+        Lê os arquivos relevantes do repositório a partir do tarball da branch.
+
+        Args:
+            nome_repo (str): Nome do repositório no formato 'org/repo'
+            tipo_analise (str): Tipo de análise que determina as extensões incluídas
+            nome_branch (str, optional): Branch a ser lida. Se None, usa a branch padrão
+
+        Returns:
+            Dict[str, str]: Dicionário mapeando caminhos de arquivo para conteúdo,
+                na ordem em que aparecem no tarball
+
+        Raises:
+            ValueError: Se tipo_analise não existir em workflows.yaml ou a branch não existir
+            GithubException: Se houver erro ao obter o link do tarball
+            requests.exceptions.RequestException: Se o download falhar
+        """
+        return {
+            caminho: conteudo
+            for caminho, _, conteudo in self.iter_repository(nome_repo, tipo_analise, nome_branch)
+        }
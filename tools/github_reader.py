@@ -1,15 +1,46 @@
 # Arquivo: tools/github_reader.py (VERSÃO FINAL E CORRIGIDA)
 
 import time
-import yaml
+import random
+import threading
 import os
-from github import GithubException, GitTreeElement, UnknownObjectException
+import json
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from github import GithubException, UnknownObjectException
 from tools.github_connector import GitHubConnector 
-from domain.interfaces.repository_reader_interface import IRepositoryReader
+from domain.interfaces.repository_reader_interface import IRepositoryReader, e_sha_de_commit
 from domain.interfaces.repository_provider_interface import IRepositoryProvider
+from domain.interfaces.blob_cache_interface import IBlobCache
 from tools.github_repository_provider import GitHubRepositoryProvider
+from tools.blob_cache import obter_cache_padrao
+from tools.filtro_arquivos import LimitesDeLeitura, decodificar_texto
+from tools.workflow_registry import FiltroDeArquivos, WorkflowRegistry, obter_registry_padrao
 import base64
-from typing import Dict, Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+# Número padrão de requisições de blob simultâneas. Mantido abaixo do pool de
+# conexões padrão do requests (10) para não descartar conexões keep-alive.
+MAX_WORKERS_PADRAO = 8
+MAX_TENTATIVAS_PADRAO = 3
+
+# Leituras em andamento por worker na leitura sob demanda. Mantém o pool ocupado
+# sem acumular em memória o conteúdo de arquivos que o consumidor ainda não pediu.
+JANELA_POR_WORKER = 4
+
+# Valor gravado no cache no lugar do conteúdo de blobs binários: releituras do
+# mesmo SHA são descartadas sem rede e sem ocupar o cache com bytes inúteis.
+MARCADOR_BINARIO = b'\x00'
+
+# Representação leve e serializável de um item da árvore Git. Usada tanto para
+# respostas da API quanto para árvores recuperadas do cache.
+ElementoArvore = namedtuple('ElementoArvore', ['path', 'type', 'sha', 'size'])
+
+# Uma resposta da Compare API lista no máximo 300 arquivos alterados (o
+# PyGithub não pagina Comparison.files); com 300 ou mais a lista pode estar
+# incompleta e o leitor recorre à leitura completa.
+LIMITE_ARQUIVOS_COMPARE = 300
 
 class GitHubRepositoryReader(IRepositoryReader):
     """
@@ -30,11 +61,22 @@ class GitHubRepositoryReader(IRepositoryReader):
     - Suporte a diferentes tipos de análise configuráveis
     - Decodificação automática de conteúdo base64
     - Extensibilidade para múltiplos provedores de repositório
+    - Leitura concorrente de blobs com pool de workers limitado, retentativas por
+      arquivo e desaceleração coordenada diante do rate limit secundário do GitHub
+    - Cache de blobs e árvores endereçado por SHA (memória + disco), evitando
+      baixar novamente objetos Git imutáveis entre jobs
+    - Listagem completa de árvores truncadas pela API, percorrendo as subárvores
+      em paralelo e reaproveitando do cache as que já foram vistas
     
     Attributes:
-        _mapeamento_tipo_extensoes (Dict[str, List[str]]): Mapeamento de tipos de análise
-            para extensões de arquivo relevantes, carregado de workflows.yaml
+        workflow_registry (WorkflowRegistry): Registro compilado de workflows.yaml,
+            de onde vêm os filtros de arquivos por tipo de análise
+        nome_workflow (Optional[str]): Workflow em execução, que tem precedência na
+            escolha do filtro de tipos de análise compartilhados entre workflows
         repository_provider (IRepositoryProvider): Provedor de repositório injetado
+        max_workers (int): Número máximo de blobs lidos simultaneamente
+        max_tentativas (int): Número de tentativas por arquivo antes de desistir
+        cache (IBlobCache): Cache de blobs e árvores indexado por SHA
     
     Example:
         >>> # Uso com GitHub (padrão)
@@ -52,7 +94,15 @@ class GitHubRepositoryReader(IRepositoryReader):
         ... )
     """
     
-    def __init__(self, repository_provider: Optional[IRepositoryProvider] = None):
+    def __init__(
+        self,
+        repository_provider: Optional[IRepositoryProvider] = None,
+        max_workers: Optional[int] = None,
+        max_tentativas: int = MAX_TENTATIVAS_PADRAO,
+        cache: Optional[IBlobCache] = None,
+        workflow_registry: Optional[WorkflowRegistry] = None,
+        nome_workflow: Optional[str] = None
+    ):
         """
         Inicializa o leitor carregando configurações de workflow.
         
@@ -60,6 +110,17 @@ class GitHubRepositoryReader(IRepositoryReader):
             repository_provider (Optional[IRepositoryProvider]): Provedor de repositório
                 a ser usado. Se None, usa GitHubRepositoryProvider como padrão para
                 manter compatibilidade com código existente.
+            max_workers (Optional[int]): Número máximo de blobs lidos em paralelo.
+                Se None, usa a variável de ambiente REPO_READER_MAX_WORKERS ou
+                MAX_WORKERS_PADRAO. Use 1 para leitura sequencial.
+            max_tentativas (int): Tentativas por arquivo em falhas transitórias
+                (rate limit, erros 5xx, rede). Defaults to MAX_TENTATIVAS_PADRAO
+            cache (Optional[IBlobCache]): Cache de objetos Git. Se None, usa o cache
+                compartilhado do processo (tools.blob_cache.obter_cache_padrao)
+            workflow_registry (Optional[WorkflowRegistry]): Registro de workflows. Se None,
+                usa o registro compartilhado do processo (obter_registry_padrao)
+            nome_workflow (Optional[str]): Workflow do job em execução, usado para
+                resolver tipos de análise declarados em mais de um workflow
         
         Raises:
             Exception: Se houver erro ao carregar configurações de workflow
@@ -69,62 +130,571 @@ class GitHubRepositoryReader(IRepositoryReader):
             injetar explicitamente o provedor desejado para maior clareza.
         """
         self.repository_provider = repository_provider or GitHubRepositoryProvider()
-        self._mapeamento_tipo_extensoes = self._carregar_config_workflows()
+        self.max_workers = max(1, max_workers or int(os.getenv("REPO_READER_MAX_WORKERS", MAX_WORKERS_PADRAO)))
+        self.max_tentativas = max(1, max_tentativas)
+        self.cache = cache or obter_cache_padrao()
+        self.workflow_registry = workflow_registry or obter_registry_padrao()
+        self.nome_workflow = nome_workflow
+
+        # Janela de pausa compartilhada entre os workers: quando um deles recebe
+        # um rate limit secundário, todos aguardam até o instante registrado aqui.
+        self._lock_taxa = threading.Lock()
+        self._pausado_ate = 0.0
+
+    def _conectar(self, nome_repo: str):
+        """Estabelece conexão com o repositório via GitHubConnector com o provedor injetado."""
+        connector = GitHubConnector(repository_provider=self.repository_provider)
+        return connector.connection(repositorio=nome_repo)
+
+    @staticmethod
+    def _resolver_branch(repositorio, nome_branch: Optional[str]) -> str:
+        """Determina a branch a ser lida (padrão do repositório ou a especificada)."""
+        if nome_branch is None:
+            branch_a_ler = repositorio.default_branch
+            print(f"Nenhuma branch especificada. Usando a branch padrão: '{branch_a_ler}'")
+            return branch_a_ler
+        return nome_branch
 
-    def _carregar_config_workflows(self):
+    def _obter_filtro(self, tipo_analise: str) -> FiltroDeArquivos:
         """
-        Carrega configurações de workflow e constrói mapeamento de extensões.
+        Obtém o filtro de arquivos compilado para o tipo de análise.
         
-        Este método privado lê o arquivo workflows.yaml e constrói um dicionário
-        que mapeia tipos de análise para listas de extensões de arquivo relevantes.
-        Isso permite que o leitor filtre apenas arquivos pertinentes para cada
-        tipo de análise, otimizando performance e relevância.
+        Raises:
+            ValueError: Se tipo_analise não possuir 'extensions' em workflows.yaml
+        """
+        filtro = self.workflow_registry.obter_filtro(tipo_analise, self.nome_workflow)
+        if filtro is None:
+            raise ValueError(f"Tipo de análise '{tipo_analise}' não encontrado ou não possui 'extensions' definidas em workflows.yaml")
+        return filtro
+
+    def _aguardar_janela_de_taxa(self):
+        """
+        Bloqueia o worker atual enquanto houver uma pausa de rate limit ativa.
+        
+        Note:
+            A pausa é compartilhada por todos os workers do leitor, de modo que um
+            único rate limit secundário desacelera o lote inteiro, e não apenas a
+            thread que o recebeu.
+        """
+        while True:
+            with self._lock_taxa:
+                espera = self._pausado_ate - time.monotonic()
+            if espera <= 0:
+                return
+            time.sleep(espera)
+
+    def _registrar_pausa(self, segundos: float):
+        """Estende a pausa compartilhada para pelo menos `segundos` a partir de agora."""
+        with self._lock_taxa:
+            self._pausado_ate = max(self._pausado_ate, time.monotonic() + segundos)
+
+    @staticmethod
+    def _tempo_de_espera_rate_limit(erro: GithubException, tentativa: int) -> Optional[float]:
+        """
+        Calcula quanto aguardar após um erro da API, ou None se o erro não for transitório.
+        
+        Args:
+            erro (GithubException): Exceção retornada pelo PyGithub
+            tentativa (int): Número da tentativa que falhou (começando em 1)
         
         Returns:
-            Dict[str, List[str]]: Mapeamento de tipo_analise (lowercase) para
-                lista de extensões (ex: {'refatoracao': ['.py', '.java']})
+            Optional[float]: Segundos de espera antes de nova tentativa, ou None
+                quando o erro é definitivo (ex: 404) e não deve ser repetido
+        
+        Note:
+            - Respeita o header Retry-After enviado pelo GitHub no rate limit secundário
+            - Usa x-ratelimit-reset quando o limite primário do token foi esgotado
+            - Sem headers, aplica backoff exponencial com jitter
+        """
+        status = getattr(erro, 'status', None)
+        headers = {k.lower(): v for k, v in (getattr(erro, 'headers', None) or {}).items()}
+        mensagem = str(getattr(erro, 'data', '') or '').lower()
+
+        if status in (403, 429) and ('retry-after' in headers or 'rate limit' in mensagem):
+            if 'retry-after' in headers:
+                try:
+                    return float(headers['retry-after'])
+                except ValueError:
+                    pass
+            if headers.get('x-ratelimit-remaining') == '0' and 'x-ratelimit-reset' in headers:
+                try:
+                    return max(float(headers['x-ratelimit-reset']) - time.time(), 1.0)
+                except ValueError:
+                    pass
+            return 60.0 * tentativa
+        if status is not None and status < 500:
+            return None
+        return (2 ** (tentativa - 1)) + random.uniform(0, 1)
+
+    def _chamar_api(self, chamada: Callable[[], Any], descricao: str) -> Any:
+        """
+        Executa uma chamada à API com retentativas, respeitando a pausa de rate limit compartilhada.
+        
+        Erros transitórios são repetidos até max_tentativas. Um rate limit
+        (403/429) estende a pausa de todos os workers, e não apenas a da
+        thread que o recebeu.
+        
+        Args:
+            chamada (Callable[[], Any]): Chamada ao PyGithub a executar
+            descricao (str): Objeto lido, para as mensagens de aviso
         
         Raises:
-            Exception: Se workflows.yaml não for encontrado ou tiver formato inválido
+            GithubException: Se o erro for definitivo (ex: 404) ou persistir em todas as tentativas
+        """
+        for tentativa in range(1, self.max_tentativas + 1):
+            self._aguardar_janela_de_taxa()
+            try:
+                return chamada()
+            except GithubException as e:
+                espera = self._tempo_de_espera_rate_limit(e, tentativa)
+                if espera is None or tentativa == self.max_tentativas:
+                    raise
+                if getattr(e, 'status', None) in (403, 429):
+                    print(f"AVISO: Rate limit do GitHub ao ler {descricao}. Desacelerando todos os workers por {espera:.1f}s.")
+                    self._registrar_pausa(espera)
+                else:
+                    time.sleep(espera)
+
+    def _obter_arvore(self, repositorio, tree_sha: str) -> Tuple[List[ElementoArvore], bool]:
+        """
+        Obtém a árvore recursiva de um SHA, consultando o cache antes da API.
         
-        Note:
-            - Busca workflows.yaml na raiz do projeto
-            - Cria mapeamentos tanto para workflow names quanto step tipo_analise
-            - Converte chaves para lowercase para busca case-insensitive
+        Args:
+            repositorio: Objeto de repositório retornado pelo conector
+            tree_sha (str): SHA do commit ou da árvore a ser listada
+        
+        Returns:
+            Tuple[List[ElementoArvore], bool]: Elementos da árvore e se a resposta
+                da API foi truncada. Árvores truncadas não são armazenadas no cache.
         """
+        chave = f"tree:{tree_sha}:recursive"
+        em_cache = self.cache.get(chave)
+        if em_cache is not None:
+            print(f"Árvore '{tree_sha}' recuperada do cache.")
+            return [ElementoArvore(*item) for item in json.loads(em_cache)], False
+
+        # Chamada recursiva obtém toda a estrutura de arquivos de uma vez
+        # recursive=True garante que subdiretórios sejam incluídos na resposta
+        tree_response = self._chamar_api(
+            lambda: repositorio.get_git_tree(tree_sha, recursive=True), f"a árvore '{tree_sha}'"
+        )
+        elementos = [
+            ElementoArvore(
+                path=element.path,
+                type=element.type,
+                sha=element.sha,
+                size=element.size if isinstance(getattr(element, 'size', None), int) else None
+            )
+            for element in tree_response.tree
+        ]
+        if not tree_response.truncated:
+            self.cache.set(chave, json.dumps(elementos).encode('utf-8'))
+        return elementos, bool(tree_response.truncated)
+
+    def _obter_nivel_arvore(self, repositorio, tree_sha: str) -> List[ElementoArvore]:
+        """
+        Obtém apenas o primeiro nível (não recursivo) de uma árvore, com cache por SHA.
+        
+        Listagens não recursivas nunca são truncadas na prática (o limite da API é
+        por árvore, não por repositório), servindo de base para o percurso nível a
+        nível de árvores grandes demais para a chamada recursiva.
+        """
+        chave = f"tree:{tree_sha}:flat"
+        em_cache = self.cache.get(chave)
+        if em_cache is not None:
+            return [ElementoArvore(*item) for item in json.loads(em_cache)]
+
+        tree_response = self._chamar_api(lambda: repositorio.get_git_tree(tree_sha), f"a árvore '{tree_sha}'")
+        elementos = [
+            ElementoArvore(
+                path=element.path,
+                type=element.type,
+                sha=element.sha,
+                size=element.size if isinstance(getattr(element, 'size', None), int) else None
+            )
+            for element in tree_response.tree
+        ]
+        self.cache.set(chave, json.dumps(elementos).encode('utf-8'))
+        return elementos
+
+    def _listar_subarvore(self, repositorio, tree_sha: str) -> Tuple[List[ElementoArvore], List[ElementoArvore]]:
+        """
+        Lista uma subárvore, recursivamente se possível.
+        
+        Tenta primeiro a listagem recursiva (uma chamada, reaproveitada do cache
+        quando o SHA já foi visto). Se a própria subárvore vier truncada, recorre
+        ao primeiro nível e devolve seus subdiretórios para o próximo nível do percurso.
+        
+        Returns:
+            Tuple[List[ElementoArvore], List[ElementoArvore]]: Elementos listados
+                (caminhos relativos à subárvore) e subdiretórios ainda não expandidos
+        """
+        elementos, truncada = self._obter_arvore(repositorio, tree_sha)
+        if not truncada:
+            return elementos, []
+        nivel = self._obter_nivel_arvore(repositorio, tree_sha)
+        return nivel, [element for element in nivel if element.type == 'tree']
+
+    def _listar_arvore_completa(self, repositorio, commit_sha: str) -> List[ElementoArvore]:
+        """
+        Monta a listagem completa de uma árvore que a API devolveu truncada.
+        
+        Percorre a árvore nível a nível a partir da raiz: em cada nível, todos os
+        subdiretórios pendentes são listados em paralelo pelo pool de workers.
+        Subárvores que cabem em uma chamada recursiva são resolvidas de uma vez;
+        apenas as que também vierem truncadas são expandidas no nível seguinte.
+        Como cada subárvore é armazenada no cache pelo seu SHA, diretórios
+        inalterados entre commits não geram novas requisições.
+        
+        A listagem resultante é registrada no cache como a árvore recursiva do
+        commit, de modo que leituras seguintes do mesmo commit sejam imediatas.
+        
+        Args:
+            repositorio: Objeto de repositório retornado pelo conector
+            commit_sha (str): SHA do commit cuja árvore veio truncada
+        
+        Returns:
+            List[ElementoArvore]: Todos os elementos da árvore, com caminhos
+                relativos à raiz do repositório
+        """
+        print("Árvore truncada pela API. Montando a listagem completa por subárvores em paralelo...")
+        elementos = []
+        pendentes = []
+        for element in self._obter_nivel_arvore(repositorio, commit_sha):
+            elementos.append(element)
+            if element.type == 'tree':
+                pendentes.append(element)
+
+        profundidade = 1
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pendentes:
+                print(f"  ...nível {profundidade}: listando {len(pendentes)} subárvore(s)")
+                proximo_nivel = []
+                resultados = executor.map(lambda diretorio: self._listar_subarvore(repositorio, diretorio.sha), pendentes)
+                for diretorio, (subelementos, nao_expandidos) in zip(pendentes, resultados):
+                    # Caminhos das subárvores são relativos; prefixa com o diretório pai
+                    elementos.extend(element._replace(path=f"{diretorio.path}/{element.path}") for element in subelementos)
+                    proximo_nivel.extend(
+                        element._replace(path=f"{diretorio.path}/{element.path}") for element in nao_expandidos
+                    )
+                pendentes = proximo_nivel
+                profundidade += 1
+
+        self.cache.set(f"tree:{commit_sha}:recursive", json.dumps(elementos).encode('utf-8'))
+        print(f"Listagem completa montada: {len(elementos)} itens.")
+        return elementos
+
+    def _obter_bytes_do_blob(self, repositorio, element: ElementoArvore) -> Optional[bytes]:
+        """
+        Obtém o conteúdo bruto de um blob, do cache ou da API com retentativas.
+        
+        Args:
+            repositorio: Objeto de repositório retornado pelo conector
+            element (ElementoArvore): Elemento da árvore Git a ser lido
+        
+        Returns:
+            Optional[bytes]: Conteúdo decodificado do base64 (MARCADOR_BINARIO para
+                blobs binários), ou None se a leitura falhar após todas as tentativas
+        """
+        chave = f"blob:{element.sha}"
+        em_cache = self.cache.get(chave)
+        if em_cache is not None:
+            return em_cache
+
         try:
-            # Localiza o arquivo workflows.yaml na raiz do projeto
-            script_dir = os.path.dirname(__file__)
-            project_root = os.path.abspath(os.path.join(script_dir, '..'))
-            yaml_path = os.path.join(project_root, 'workflows.yaml')
-            
-            # Carrega e parseia o arquivo YAML
-            with open(yaml_path, 'r', encoding='utf-8') as f:
-                config = yaml.safe_load(f)
-            
-            # Constrói mapeamento expandido incluindo steps internos
-            mapeamento_expandido = {}
-            for workflow_name, data in config.items():
-                extensions = data.get('extensions', [])
-                if not extensions:
-                    continue
-                
-                # Mapeia nome do workflow principal
-                mapeamento_expandido[workflow_name.lower()] = extensions
-                
-                # Mapeia tipo_analise de cada step individual
-                for step in data.get('steps', []):
-                    params = step.get('params', {})
-                    tipo_analise_step = params.get('tipo_analise')
-                    if tipo_analise_step:
-                        mapeamento_expandido[tipo_analise_step.lower()] = extensions
-            
-            return mapeamento_expandido
-            
+            # Obtenção direta do blob via SHA (mais eficiente que path-based)
+            blob_content = self._chamar_api(lambda: repositorio.get_git_blob(element.sha).content, f"'{element.path}'")
+            # Decodificação do conteúdo base64 retornado pela API
+            conteudo_bruto = base64.b64decode(blob_content)
+            if LimitesDeLeitura.parece_binario(conteudo_bruto):
+                conteudo_bruto = MARCADOR_BINARIO
+            self.cache.set(chave, conteudo_bruto)
+            return conteudo_bruto
+        except GithubException as e:
+            print(f"AVISO: Falha ao ler o arquivo '{element.path}' após as retentativas. Pulando. Erro: {e}")
+            return None
         except Exception as e:
-            print(f"ERRO INESPERADO ao carregar workflows: {e}")
+            # Tratamento gracioso de arquivos problemáticos
+            print(f"AVISO: Falha ao ler o conteúdo do arquivo '{element.path}'. Pulando. Erro: {e}")
+            return None
+
+    def _ler_blob(self, repositorio, element: ElementoArvore) -> Optional[str]:
+        """
+        Lê e decodifica um único blob em UTF-8.
+        
+        Args:
+            repositorio: Objeto de repositório retornado pelo conector
+            element (ElementoArvore): Elemento da árvore Git a ser lido
+        
+        Returns:
+            Optional[str]: Conteúdo do arquivo, ou None se o arquivo for binário,
+                estiver corrompido ou não puder ser obtido
+        """
+        conteudo_bruto = self._obter_bytes_do_blob(repositorio, element)
+        if conteudo_bruto is None:
+            return None
+        conteudo, erro = decodificar_texto(conteudo_bruto)
+        if conteudo is None:
+            # Arquivos binários são ignorados sem interromper o processo
+            print(f"AVISO: Falha ao decodificar o conteúdo do arquivo '{element.path}'. Pulando. Erro: {erro}")
+        return conteudo
+
+    def _resolver_commit(self, repositorio, branch_a_ler: str) -> str:
+        """
+        Obtém o SHA do commit apontado pela branch (ou o próprio SHA, se a leitura estiver fixada em um commit).
+        
+        Raises:
+            ValueError: Se a branch não existir
+        """
+        if e_sha_de_commit(branch_a_ler):
+            return branch_a_ler.lower()
+        try:
+            ref = repositorio.get_git_ref(f"heads/{branch_a_ler}")
+            return ref.object.sha
+        except UnknownObjectException:
+            raise ValueError(f"Branch '{branch_a_ler}' não encontrada.")
+
+    def resolver_commit(self, nome_repo: str, nome_branch: str = None) -> str:
+        """
+        Resolve a branch (ou a branch padrão) para o SHA do commit que ela aponta agora.
+        
+        Raises:
+            ValueError: Se a branch não existir
+        """
+        repositorio = self._conectar(nome_repo)
+        return self._resolver_commit(repositorio, self._resolver_branch(repositorio, nome_branch))
+
+    def _iterar_elementos(self, repositorio, elementos: List[ElementoArvore]) -> Iterator[Tuple[ElementoArvore, str]]:
+        """
+        Lê o conteúdo de uma lista de elementos da árvore sob demanda, usando o pool de workers.
+        
+        Os blobs são buscados por um pool limitado de workers, mas no máximo
+        JANELA_POR_WORKER * max_workers leituras ficam em andamento ou aguardando
+        consumo ao mesmo tempo: a memória usada é limitada pela janela, não pelo
+        tamanho do repositório. Os resultados saem na ordem dos elementos
+        recebidos, mantendo o resultado determinístico.
+        
+        Yields:
+            Tuple[ElementoArvore, str]: Elemento e seu conteúdo. Arquivos que
+                falharam ou não são UTF-8 são omitidos
+        """
+        total = len(elementos)
+        restantes = iter(elementos)
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, max(total, 1))) as executor:
+            em_andamento = deque(
+                (element, executor.submit(self._ler_blob, repositorio, element))
+                for element in islice(restantes, self.max_workers * JANELA_POR_WORKER)
+            )
+            lidos = 0
+            while em_andamento:
+                element, futuro = em_andamento.popleft()
+                conteudo = futuro.result()
+                proximo = next(restantes, None)
+                if proximo is not None:
+                    em_andamento.append((proximo, executor.submit(self._ler_blob, repositorio, proximo)))
+
+                lidos += 1
+                # Log de progresso para repositórios grandes
+                if lidos % 50 == 0:
+                    print(f"  ...lidos {lidos} de {total} arquivos ({element.path})")
+                if conteudo is not None:
+                    yield element, conteudo
+
+    @staticmethod
+    def _chave_manifesto(nome_repo: str, commit_sha: str, filtro: FiltroDeArquivos) -> str:
+        """
+        Monta a chave do manifesto de um snapshot.
+        
+        A assinatura do filtro faz parte da chave: o mesmo commit lido com outras
+        extensões, globs ou limites produz outro snapshot.
+        """
+        return f"manifest:{nome_repo}:{commit_sha}:{filtro.assinatura}"
+
+    def _salvar_manifesto(
+        self,
+        nome_repo: str,
+        commit_sha: str,
+        filtro: FiltroDeArquivos,
+        elementos: List[ElementoArvore],
+        caminhos_lidos: Set[str]
+    ):
+        """
+        Registra no cache o manifesto {caminho: sha do blob} do snapshot lido.
+        
+        O conteúdo dos arquivos já está no cache endereçado por SHA; o manifesto
+        é o que permite reconstituir o snapshot em uma leitura incremental futura.
+        Apenas arquivos efetivamente lidos entram no manifesto.
+        """
+        manifesto = {element.path: element.sha for element in elementos if element.path in caminhos_lidos}
+        chave = self._chave_manifesto(nome_repo, commit_sha, filtro)
+        self.cache.set(chave, json.dumps(manifesto).encode('utf-8'))
+
+    def _carregar_manifesto(self, nome_repo: str, commit_sha: str, filtro: FiltroDeArquivos) -> Optional[Dict[str, str]]:
+        """Recupera o manifesto {caminho: sha do blob} de um snapshot, se ainda estiver no cache."""
+        em_cache = self.cache.get(self._chave_manifesto(nome_repo, commit_sha, filtro))
+        return json.loads(em_cache) if em_cache is not None else None
+
+
+    def _planejar_leitura_completa(
+        self,
+        repositorio,
+        branch_a_ler: str,
+        filtro: FiltroDeArquivos
+    ) -> Tuple[str, List[ElementoArvore]]:
+        """
+        Resolve o commit da branch e seleciona os elementos da árvore a serem lidos.
+        
+        Returns:
+            Tuple[str, List[ElementoArvore]]: SHA do commit e blobs relevantes,
+                na ordem da árvore
+        """
+        print(f"Obtendo a árvore de arquivos completa da branch '{branch_a_ler}'...")
+
+        # FASE 1: Obtenção da árvore Git completa
+        # Esta é a otimização principal - uma única chamada API para toda a estrutura
+        tree_sha = self._resolver_commit(repositorio, branch_a_ler)
+        tree_elements, truncada = self._obter_arvore(repositorio, tree_sha)
+
+        # A API trunca listas muito grandes (>100k itens ou 7 MB); nesse caso a
+        # listagem é completada percorrendo as subárvores em paralelo
+        if truncada:
+            tree_elements = self._listar_arvore_completa(repositorio, tree_sha)
+        print(f"Árvore obtida. {len(tree_elements)} itens totais encontrados.")
+
+        # FASE 2: Filtragem inteligente por extensão
+        # Seleciona apenas arquivos (type='blob') relevantes para o workflow, com o
+        # filtro pré-compilado (sufixos em conjunto + globs de inclusão/exclusão)
+        # Exclui diretórios, symlinks e outros objetos Git
+        arquivos_para_ler = [
+            element for element in tree_elements
+            if element.type == 'blob' and filtro.corresponde(element.path)
+        ]
+
+        # Limites de tamanho do workflow usam apenas os metadados da árvore:
+        # arquivos descartados aqui nunca geram requisição de blob
+        arquivos_para_ler = filtro.limites.selecionar(arquivos_para_ler)
+
+        print(f"Filtragem concluída. {len(arquivos_para_ler)} arquivos com as extensões {filtro.extensoes} serão lidos.")
+        return tree_sha, arquivos_para_ler
+
+    def _planejar_leitura_delta(
+        self,
+        repositorio,
+        nome_repo: str,
+        branch_a_ler: str,
+        filtro: FiltroDeArquivos,
+        commit_base: str
+    ) -> Optional[Tuple[str, List[ElementoArvore]]]:
+        """
+        Monta a lista de elementos do HEAD a partir do snapshot de commit_base e da Compare API.
+        
+        Returns:
+            Optional[Tuple[str, List[ElementoArvore]]]: SHA do HEAD e blobs do
+                snapshot atualizado, ou None se a leitura incremental não for
+                possível e a leitura completa deve ser usada
+        """
+        manifesto_base = self._carregar_manifesto(nome_repo, commit_base, filtro)
+        if manifesto_base is None:
+            print(f"AVISO: Snapshot do commit {commit_base} não encontrado no cache. Fazendo leitura completa.")
+            return None
+
+        commit_head = self._resolver_commit(repositorio, branch_a_ler)
+        manifesto = dict(manifesto_base)
+
+        if commit_head != commit_base:
+            comparacao = repositorio.compare(commit_base, commit_head)
+            if comparacao.status not in ('ahead', 'identical'):
+                print(f"AVISO: A branch '{branch_a_ler}' não descende de {commit_base} (status: {comparacao.status}). Fazendo leitura completa.")
+                return None
+
+            arquivos_alterados = list(comparacao.files)
+            if len(arquivos_alterados) >= LIMITE_ARQUIVOS_COMPARE:
+                print(f"AVISO: A comparação lista {len(arquivos_alterados)} arquivos (limite de {LIMITE_ARQUIVOS_COMPARE} por resposta). Fazendo leitura completa.")
+                return None
+
+            for arquivo in arquivos_alterados:
+                if arquivo.status == 'renamed' and arquivo.previous_filename:
+                    manifesto.pop(arquivo.previous_filename, None)
+                if arquivo.status == 'removed':
+                    manifesto.pop(arquivo.filename, None)
+                elif filtro.corresponde(arquivo.filename):
+                    manifesto[arquivo.filename] = arquivo.sha
+            print(f"Compare API: {len(arquivos_alterados)} arquivos alterados entre {commit_base} e {commit_head}.")
+
+        elementos = [ElementoArvore(path=caminho, type='blob', sha=sha, size=None) for caminho, sha in manifesto.items()]
+        return commit_head, filtro.limites.selecionar(elementos)
+
+    def iter_repository(
+        self,
+        nome_repo: str,
+        tipo_analise: str,
+        nome_branch: str = None,
+        commit_base: Optional[str] = None
+    ) -> Iterator[Tuple[str, int, str]]:
+        """
+        Percorre os arquivos relevantes do repositório sob demanda.
+        
+        A árvore (ou o delta desde commit_base) é resolvida na primeira iteração;
+        os blobs são então lidos em paralelo por uma janela limitada e entregues
+        um a um, de modo que o consumidor nunca precisa manter o repositório
+        inteiro em memória. O manifesto do snapshot só é registrado quando a
+        iteração chega ao fim.
+        
+        Args:
+            nome_repo (str): Nome do repositório no formato 'org/repo'
+            tipo_analise (str): Tipo de análise que determina as extensões incluídas
+            nome_branch (str, optional): Branch a ser lida. Se None, usa a branch padrão
+            commit_base (Optional[str]): SHA de uma análise anterior. Se informado,
+                lê de forma incremental, como read_repository_delta
+        
+        Yields:
+            Tuple[str, int, str]: (caminho, tamanho em bytes, conteúdo), na ordem da árvore
+        
+        Raises:
+            ValueError: Se tipo_analise não existir em workflows.yaml ou a branch não existir
+            GithubException: Se houver erro de comunicação com a API
+        """
+        provider_name = type(self.repository_provider).__name__
+        modo = f"incremental desde {commit_base}" if commit_base else "otimizada"
+        print(f"Iniciando leitura {modo} do repositório: {nome_repo} via {provider_name}")
+
+        repositorio = self._conectar(nome_repo)
+        branch_a_ler = self._resolver_branch(repositorio, nome_branch)
+        filtro = self._obter_filtro(tipo_analise)
+        limites = filtro.limites
+
+        try:
+            plano = None
+            if commit_base:
+                plano = self._planejar_leitura_delta(repositorio, nome_repo, branch_a_ler, filtro, commit_base)
+            if plano is None:
+                plano = self._planejar_leitura_completa(repositorio, branch_a_ler, filtro)
+            commit_sha, elementos = plano
+            self.ultimo_commit_sha = commit_sha
+
+            # FASE 3: Leitura concorrente do conteúdo, entregue sob demanda
+            caminhos_lidos = set()
+            total_bytes = 0
+            for element, conteudo in self._iterar_elementos(repositorio, elementos):
+                tamanho = element.size if element.size is not None else len(conteudo.encode('utf-8'))
+                # Elementos sem tamanho conhecido (leitura incremental) só podem ser
+                # checados contra os limites depois de lidos
+                if not limites.cabe_no_limite_por_arquivo(tamanho) or not limites.cabe_no_total(tamanho, total_bytes):
+                    print(f"AVISO: '{element.path}' ({tamanho} bytes) excede os limites do workflow. Pulando.")
+                    continue
+                total_bytes += tamanho
+                caminhos_lidos.add(element.path)
+                yield element.path, tamanho, conteudo
+            self._salvar_manifesto(nome_repo, commit_sha, filtro, elementos, caminhos_lidos)
+
+        except GithubException as e:
+            # Tratamento específico de erros da API
+            print(f"ERRO CRÍTICO durante a comunicação com a API: {e}")
             raise
 
+        print(f"\nLeitura concluída. Total de {len(caminhos_lidos)} arquivos lidos e processados.")
+        print(f"Estatísticas do cache de objetos Git: {self.cache.estatisticas()}")
+
     def read_repository(self, nome_repo: str, tipo_analise: str, nome_branch: str = None) -> dict:
         """
         Lê arquivos de um repositório usando estratégia otimizada.
@@ -156,87 +726,55 @@ class GitHubRepositoryReader(IRepositoryReader):
         
         Note:
             - Usa Git Trees API para performance otimizada
+            - Lê os blobs em paralelo (max_workers), preservando a ordem da árvore
+            - Árvores truncadas pela API são completadas por subárvores em paralelo
             - Filtra automaticamente por extensões relevantes
-            - Ignora arquivos binários e diretórios
+            - Aplica os limites do workflow (exclusões, tamanho por arquivo e total)
+              aos metadados da árvore, antes de qualquer leitura de blob
+            - Ignora arquivos binários (byte nulo no início) e diretórios
             - Faz log de progresso para repositórios grandes
             - Funciona com qualquer provedor que implemente IRepositoryProvider
+            - Materializa iter_repository; prefira o iterador para repositórios grandes
         """
-        provider_name = type(self.repository_provider).__name__
-        print(f"Iniciando leitura otimizada do repositório: {nome_repo} via {provider_name}")
+        return {
+            caminho: conteudo
+            for caminho, _, conteudo in self.iter_repository(nome_repo, tipo_analise, nome_branch)
+        }
 
-        # Estabelece conexão com o repositório via GitHubConnector com provedor injetado
-        connector = GitHubConnector(repository_provider=self.repository_provider)
-        repositorio = connector.connection(repositorio=nome_repo)
-
-        # Determina a branch a ser lida (padrão ou especificada)
-        if nome_branch is None:
-            branch_a_ler = repositorio.default_branch
-            print(f"Nenhuma branch especificada. Usando a branch padrão: '{branch_a_ler}'")
-        else:
-            branch_a_ler = nome_branch
+    def read_repository_delta(
+        self,
+        nome_repo: str,
+        tipo_analise: str,
+        commit_base: str,
+        nome_branch: str = None
+    ) -> Dict[str, str]:
+        """
+        Lê o repositório de forma incremental a partir de um commit já analisado.
         
-        # Obtém extensões relevantes para o tipo de análise
-        extensoes_alvo = self._mapeamento_tipo_extensoes.get(tipo_analise.lower())
-        if extensoes_alvo is None:
-            raise ValueError(f"Tipo de análise '{tipo_analise}' não encontrado ou não possui 'extensions' definidas em workflows.yaml")
-
-        arquivos_do_repo = {}
-        try:
-            print(f"Obtendo a árvore de arquivos completa da branch '{branch_a_ler}'...")
-            
-            # FASE 1: Obtenção da árvore Git completa
-            # Esta é a otimização principal - uma única chamada API para toda a estrutura
-            try:
-                ref = repositorio.get_git_ref(f"heads/{branch_a_ler}")
-                tree_sha = ref.object.sha
-            except UnknownObjectException:
-                raise ValueError(f"Branch '{branch_a_ler}' não encontrada.")
-
-            # Chamada recursiva obtém toda a estrutura de arquivos de uma vez
-            # recursive=True garante que subdiretórios sejam incluídos na resposta
-            tree_response = repositorio.get_git_tree(tree_sha, recursive=True)
-            tree_elements = tree_response.tree
-            print(f"Árvore obtida. {len(tree_elements)} itens totais encontrados.")
-
-            # Verificação de truncamento da API
-            # A API pode truncar listas muito grandes (>100k itens)
-            if tree_response.truncated:
-                print(f"AVISO: A lista de arquivos do repositório '{nome_repo}' foi truncada pela API.")
-
-            # FASE 2: Filtragem inteligente por extensão
-            # Seleciona apenas arquivos (type='blob') com extensões relevantes
-            # Exclui diretórios, symlinks e outros objetos Git
-            arquivos_para_ler = [
-                element for element in tree_elements
-                if element.type == 'blob' and any(element.path.endswith(ext) for ext in extensoes_alvo)
-            ]
-            
-            print(f"Filtragem concluída. {len(arquivos_para_ler)} arquivos com as extensões {extensoes_alvo} serão lidos.")
-            
-            # FASE 3: Leitura otimizada do conteúdo
-            # Usa Git Blob API para acesso direto via SHA, evitando múltiplas chamadas
-            for i, element in enumerate(arquivos_para_ler):
-                # Log de progresso para repositórios grandes
-                if (i + 1) % 50 == 0:
-                    print(f"  ...lendo arquivo {i + 1} de {len(arquivos_para_ler)} ({element.path})")
-                
-                try:
-                    # Obtenção direta do blob via SHA (mais eficiente que path-based)
-                    blob_content = repositorio.get_git_blob(element.sha).content
-                    
-                    # Decodificação do conteúdo base64 retornado pela API
-                    decoded_content = base64.b64decode(blob_content).decode('utf-8')
-                    arquivos_do_repo[element.path] = decoded_content
-                    
-                except Exception as e:
-                    # Tratamento gracioso de arquivos problemáticos
-                    # Arquivos binários ou corrompidos são ignorados sem interromper o processo
-                    print(f"AVISO: Falha ao ler ou decodificar o conteúdo do arquivo '{element.path}'. Pulando. Erro: {e}")
-
-        except GithubException as e:
-            # Tratamento específico de erros da API
-            print(f"ERRO CRÍTICO durante a comunicação com a API: {e}")
-            raise
+        Usa a Compare API para obter apenas os arquivos adicionados, modificados
+        ou renomeados entre commit_base e o HEAD da branch, mescla esses arquivos
+        com o snapshot de commit_base e descarta os caminhos removidos. Arquivos
+        inalterados são reconstituídos a partir do cache de blobs por SHA.
         
-        print(f"\nLeitura otimizada concluída. Total de {len(arquivos_do_repo)} arquivos lidos e processados.")
-        return arquivos_do_repo
\ No newline at end of file
+        Args:
+            nome_repo (str): Nome do repositório no formato 'org/repo'
+            tipo_analise (str): Tipo de análise que determina as extensões incluídas
+            commit_base (str): SHA do commit analisado anteriormente
+            nome_branch (str, optional): Branch a ser lida. Se None, usa a branch padrão
+        
+        Returns:
+            Dict[str, str]: Mesmo contrato de read_repository para o HEAD atual
+        
+        Raises:
+            ValueError: Se tipo_analise não existir em workflows.yaml ou a branch não existir
+            GithubException: Se houver erro de comunicação com a API
+        
+        Note:
+            Faz fallback para a leitura completa quando o manifesto de commit_base
+            não está mais no cache, quando o HEAD não descende de commit_base
+            (ex: force-push) ou quando a comparação excede o limite da API.
+        """
+        return {
+            caminho: conteudo
+            for caminho, _, conteudo in self.iter_repository(nome_repo, tipo_analise, nome_branch, commit_base=commit_base)
+        }
@@ -0,0 +1,183 @@
+# Arquivo: tools/gitlab_reader.py
+
+import time
+import random
+import json
+from typing import List, Optional, Tuple
+import gitlab
+from domain.interfaces.repository_provider_interface import IRepositoryProvider
+from domain.interfaces.repository_reader_interface import e_sha_de_commit
+from domain.interfaces.blob_cache_interface import IBlobCache
+from tools.github_reader import (
+    GitHubRepositoryReader,
+    ElementoArvore,
+    MARCADOR_BINARIO,
+    MAX_TENTATIVAS_PADRAO,
+)
+from tools.gitlab_repository_provider import GitLabRepositoryProvider
+from tools.filtro_arquivos import LimitesDeLeitura
+from tools.workflow_registry import FiltroDeArquivos, WorkflowRegistry
+
+# Itens por página da listagem da árvore (máximo aceito pela API do GitLab)
+ITENS_POR_PAGINA_ARVORE = 100
+
+class GitLabRepositoryReader(GitHubRepositoryReader):
+    """
+    Leitor de repositório para GitLab: árvore recursiva + leitura paralela de blobs brutos.
+
+    Reaproveita do GitHubRepositoryReader o pipeline de leitura (filtros do
+    workflow, limites, janela limitada de leituras concorrentes, cache de objetos
+    Git por SHA e manifesto do snapshot), substituindo apenas as chamadas
+    específicas do provedor:
+
+    - branch → commit: `projects/:id/repository/branches/:branch`
+    - árvore: `projects/:id/repository/tree?recursive=true` com paginação por keyset
+    - conteúdo: `projects/:id/repository/blobs/:sha/raw`, sem base64
+
+    Como os SHAs de blobs e commits são os do próprio Git, o cache é
+    compartilhado com os leitores do GitHub: o mesmo objeto espelhado nos dois
+    provedores é baixado uma única vez.
+
+    A listagem de árvore do GitLab não informa o tamanho dos arquivos, de modo
+    que os limites de tamanho do workflow são verificados após a leitura de cada
+    blob; as exclusões continuam sendo aplicadas antes de qualquer download.
+
+    Example:
+        >>> reader = GitLabRepositoryReader()
+        >>> codigo = reader.read_repository("grupo/projeto", "relatorio_sast", "main")
+    """
+
+    def __init__(
+        self,
+        repository_provider: Optional[IRepositoryProvider] = None,
+        max_workers: Optional[int] = None,
+        max_tentativas: int = MAX_TENTATIVAS_PADRAO,
+        cache: Optional[IBlobCache] = None,
+        workflow_registry: Optional[WorkflowRegistry] = None,
+        nome_workflow: Optional[str] = None
+    ):
+        """
+        Inicializa o leitor do GitLab.
+
+        Args:
+            repository_provider (Optional[IRepositoryProvider]): Provedor de repositório.
+                Se None, usa GitLabRepositoryProvider
+            max_workers (Optional[int]): Número máximo de blobs lidos em paralelo.
+                Se None, usa REPO_READER_MAX_WORKERS
+            max_tentativas (int): Tentativas por arquivo em falhas transitórias
+            cache (Optional[IBlobCache]): Cache de objetos Git. Se None, usa o cache do processo
+            workflow_registry (Optional[WorkflowRegistry]): Registro de workflows. Se None,
+                usa o registro compartilhado do processo
+            nome_workflow (Optional[str]): Workflow do job em execução
+        """
+        super().__init__(
+            repository_provider=repository_provider or GitLabRepositoryProvider(),
+            max_workers=max_workers,
+            max_tentativas=max_tentativas,
+            cache=cache,
+            workflow_registry=workflow_registry,
+            nome_workflow=nome_workflow
+        )
+
+    def _resolver_commit(self, projeto, branch_a_ler: str) -> str:
+        """
+        Obtém o SHA do commit apontado pela branch.
+
+        Raises:
+            ValueError: Se a branch não existir
+        """
+        if e_sha_de_commit(branch_a_ler):
+            return branch_a_ler.lower()
+        try:
+            return projeto.branches.get(branch_a_ler).commit['id']
+        except gitlab.exceptions.GitlabGetError:
+            raise ValueError(f"Branch '{branch_a_ler}' não encontrada.")
+
+    def _obter_arvore(self, projeto, commit_sha: str) -> Tuple[List[ElementoArvore], bool]:
+        """
+        Obtém a árvore recursiva de um commit, consultando o cache antes da API.
+
+        A API do GitLab pagina a listagem em vez de truncá-la; o resultado é
+        sempre completo.
+        """
+        chave = f"tree:{commit_sha}:recursive"
+        em_cache = self.cache.get(chave)
+        if em_cache is not None:
+            print(f"Árvore '{commit_sha}' recuperada do cache.")
+            return [ElementoArvore(*item) for item in json.loads(em_cache)], False
+
+        itens = projeto.repository_tree(
+            ref=commit_sha,
+            recursive=True,
+            iterator=True,
+            per_page=ITENS_POR_PAGINA_ARVORE,
+            pagination='keyset'
+        )
+        elementos = [
+            ElementoArvore(path=item['path'], type=item['type'], sha=item['id'], size=None)
+            for item in itens
+        ]
+        self.cache.set(chave, json.dumps(elementos).encode('utf-8'))
+        return elementos, False
+
+    def _planejar_leitura_delta(
+        self,
+        projeto,
+        nome_repo: str,
+        branch_a_ler: str,
+        filtro: FiltroDeArquivos,
+        commit_base: str
+    ) -> Optional[Tuple[str, List[ElementoArvore]]]:
+        """
+        Sempre recorre à leitura completa.
+
+        A Compare API do GitLab não informa o SHA dos blobs alterados, necessário
+        para atualizar o manifesto. A leitura completa continua barata: apenas
+        os blobs alterados desde commit_base não estão no cache por SHA.
+        """
+        print("AVISO: Leitura incremental não suportada no GitLab. Fazendo leitura completa (blobs inalterados vêm do cache).")
+        return None
+
+    @staticmethod
+    def _tempo_de_espera_gitlab(erro: gitlab.exceptions.GitlabError, tentativa: int) -> Optional[float]:
+        """
+        Calcula quanto aguardar após um erro da API, ou None se o erro não for transitório.
+
+        O python-gitlab já respeita o Retry-After de respostas 429; restam os
+        erros 5xx e de rede, repetidos com backoff exponencial com jitter.
+        """
+        status = getattr(erro, 'response_code', None)
+        if status is not None and status < 500 and status != 429:
+            return None
+        return (2 ** (tentativa - 1)) + random.uniform(0, 1)
+
+    def _obter_bytes_do_blob(self, projeto, element: ElementoArvore) -> Optional[bytes]:
+        """
+        Obtém o conteúdo bruto de um blob, do cache ou da API com retentativas.
+
+        Returns:
+            Optional[bytes]: Conteúdo do blob (MARCADOR_BINARIO para binários), ou
+                None se a leitura falhar após todas as tentativas
+        """
+        chave = f"blob:{element.sha}"
+        em_cache = self.cache.get(chave)
+        if em_cache is not None:
+            return em_cache
+
+        for tentativa in range(1, self.max_tentativas + 1):
+            try:
+                conteudo_bruto = projeto.repository_raw_blob(element.sha)
+                if LimitesDeLeitura.parece_binario(conteudo_bruto):
+                    conteudo_bruto = MARCADOR_BINARIO
+                self.cache.set(chave, conteudo_bruto)
+                return conteudo_bruto
+            except gitlab.exceptions.GitlabError as e:
+                espera = self._tempo_de_espera_gitlab(e, tentativa)
+                if espera is None or tentativa == self.max_tentativas:
+                    print(f"AVISO: Falha ao ler o arquivo '{element.path}' após {tentativa} tentativa(s). Pulando. Erro: {e}")
+                    return None
+                time.sleep(espera)
+            except Exception as e:
+                print(f"AVISO: Falha ao ler o conteúdo do arquivo '{element.path}'. Pulando. Erro: {e}")
+                return None
+        return None
@@ -0,0 +1,165 @@
+# Arquivo: tools/indice_lexico.py
+
+import math
+import re
+import unicodedata
+from collections import Counter
+from typing import Callable, List, Tuple
+
+from tools.empacotamento_prompt import Arquivo
+
+# Parâmetros do BM25: saturação da frequência dos termos e normalização pelo tamanho
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Peso de cada campo na frequência dos termos de um arquivo (BM25F simplificado):
+# um termo no caminho ou no nome de um símbolo indica mais do que uma menção no corpo
+PESO_CAMINHO = 3
+PESO_SIMBOLOS = 2
+PESO_CONTEUDO = 1
+
+# Declarações de símbolos nas linguagens mais comuns dos workflows (Python,
+# JS/TS, Java/C#, Go, Terraform): def, class, function, resource "tipo" "nome" etc.
+_PADRAO_SIMBOLO = re.compile(
+    r'\b(?:def|class|function|func|interface|struct|enum|type|module|resource|data|variable|output)'
+    r'\s+(?:"[^"]*"\s+)?["\']?([A-Za-z_][\w\-]*)'
+)
+_PADRAO_PALAVRA = re.compile(r'[A-Za-z0-9]+')
+_PADRAO_CAMEL = re.compile(r'([a-z0-9])([A-Z])')
+
+# Palavras frequentes nas instruções que não ajudam a distinguir arquivos
+PALAVRAS_IGNORADAS = frozenset("""
+a o as os de da do das dos e em no na nos nas um uma uns umas para por com sem que se ao aos
+como mais ser ter deve devem cada todo toda todos todas este esta isso esse essa nao sim
+the of and or to in on for with is are be by an it this that from as at
+relatorio analise arquivo arquivos codigo implementar criar
+""".split())
+
+def _sem_acentos(texto: str) -> str:
+    return unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode('ascii')
+
+def extrair_termos(texto: str) -> List[str]:
+    """
+    Divide um texto em termos: identificadores em camelCase e snake_case são
+    separados em palavras, acentos são removidos e palavras comuns descartadas.
+    """
+    texto = _PADRAO_CAMEL.sub(r'\1 \2', _sem_acentos(texto))
+    return [
+        termo for termo in (palavra.lower() for palavra in _PADRAO_PALAVRA.findall(texto))
+        if len(termo) > 1 and termo not in PALAVRAS_IGNORADAS
+    ]
+
+def extrair_simbolos(conteudo: str) -> List[str]:
+    """Nomes de funções, classes, recursos etc. declarados no arquivo."""
+    return _PADRAO_SIMBOLO.findall(conteudo)
+
+class IndiceBM25:
+    """
+    Índice léxico local dos arquivos de um snapshot do repositório.
+
+    Cada arquivo é indexado pelos termos do caminho, dos símbolos declarados e
+    do conteúdo, com pesos por campo, e as consultas são pontuadas por BM25.
+
+    Example:
+        >>> indice = IndiceBM25([("src/pagamento.py", 30, "def cobrar_cartao(): ..."), ("src/util.py", 5, "x = 1")])
+        >>> indice.pontuar("cobrança por cartão")
+        [(0, 0.99...), (1, 0.0)]
+    """
+
+    def __init__(self, arquivos: List[Arquivo]):
+        self._frequencias: List[Counter] = []
+        self._tamanhos: List[int] = []
+        documentos_por_termo: Counter = Counter()
+
+        for caminho, _, conteudo in arquivos:
+            frequencias = Counter()
+            for termo in extrair_termos(caminho):
+                frequencias[termo] += PESO_CAMINHO
+            for simbolo in extrair_simbolos(conteudo):
+                for termo in extrair_termos(simbolo):
+                    frequencias[termo] += PESO_SIMBOLOS
+            for termo in extrair_termos(conteudo):
+                frequencias[termo] += PESO_CONTEUDO
+            self._frequencias.append(frequencias)
+            self._tamanhos.append(sum(frequencias.values()))
+            documentos_por_termo.update(frequencias.keys())
+
+        total = len(arquivos)
+        self._tamanho_medio = (sum(self._tamanhos) / total) if total else 0.0
+        self._idf = {
+            termo: math.log(1 + (total - quantidade + 0.5) / (quantidade + 0.5))
+            for termo, quantidade in documentos_por_termo.items()
+        }
+
+    def pontuar(self, consulta: str) -> List[Tuple[int, float]]:
+        """
+        Pontua os arquivos contra a consulta.
+
+        Returns:
+            List[Tuple[int, float]]: (índice do arquivo, pontuação), da maior para
+                a menor pontuação; empates mantêm a ordem dos arquivos
+        """
+        termos = [termo for termo in dict.fromkeys(extrair_termos(consulta)) if termo in self._idf]
+        pontuacoes = []
+        for indice, frequencias in enumerate(self._frequencias):
+            normalizacao = BM25_K1 * (1 - BM25_B + BM25_B * self._tamanhos[indice] / (self._tamanho_medio or 1))
+            pontuacao = 0.0
+            for termo in termos:
+                frequencia = frequencias.get(termo, 0)
+                if frequencia:
+                    pontuacao += self._idf[termo] * frequencia * (BM25_K1 + 1) / (frequencia + normalizacao)
+            pontuacoes.append((indice, pontuacao))
+        pontuacoes.sort(key=lambda item: -item[1])
+        return pontuacoes
+
+def selecionar_por_relevancia(
+    arquivos: List[Arquivo],
+    consulta: str,
+    max_tokens: int,
+    contar_tokens: Callable[[Arquivo], int]
+) -> Tuple[List[Arquivo], List[Arquivo]]:
+    """
+    Seleciona os arquivos mais relevantes para a consulta que cabem no orçamento.
+
+    Se todos os arquivos couberem, nenhum é omitido. Caso contrário, os arquivos
+    são incluídos em ordem de pontuação BM25 enquanto couberem (arquivos que não
+    cabem são pulados em favor dos seguintes); arquivos sem nenhum termo da
+    consulta não são incluídos.
+
+    Args:
+        arquivos (List[Arquivo]): Arquivos (caminho, tamanho, conteúdo) do snapshot
+        consulta (str): Texto usado no ranqueamento (instruções e tipo de análise)
+        max_tokens (int): Orçamento de tokens para o código selecionado
+        contar_tokens (Callable[[Arquivo], int]): Tokens de um arquivo já empacotado
+
+    Returns:
+        Tuple[List[Arquivo], List[Arquivo]]: Arquivos selecionados e omitidos,
+            ambos na ordem original
+    """
+    tokens = [contar_tokens(arquivo) for arquivo in arquivos]
+    if sum(tokens) <= max_tokens:
+        return list(arquivos), []
+
+    selecionados, usados = set(), 0
+    for indice, pontuacao in IndiceBM25(arquivos).pontuar(consulta):
+        if pontuacao <= 0:
+            break
+        if usados + tokens[indice] <= max_tokens:
+            selecionados.add(indice)
+            usados += tokens[indice]
+
+    print(f"Seleção por relevância: {len(selecionados)} de {len(arquivos)} arquivos ({usados} de {sum(tokens)} tokens).")
+    return (
+        [arquivo for indice, arquivo in enumerate(arquivos) if indice in selecionados],
+        [arquivo for indice, arquivo in enumerate(arquivos) if indice not in selecionados]
+    )
+
+def resumir_omitidos(omitidos: List[Arquivo]) -> str:
+    """Listagem dos caminhos dos arquivos não enviados, acrescentada ao prompt."""
+    if not omitidos:
+        return ""
+    caminhos = "\n".join(caminho for caminho, _, _ in omitidos)
+    return (
+        f"\n\n--- DEMAIS ARQUIVOS DO REPOSITÓRIO ({len(omitidos)}, conteúdo não incluído por relevância) ---\n"
+        f"{caminhos}"
+    )
@@ -17,6 +17,8 @@ class RedisJobStore(JobStoreInterface):
         print(f"Conectando ao Redis via URL: {REDIS_URL.split('@')[-1]}")
         self.redis_client = redis.from_url(REDIS_URL, decode_responses=True)
         self.JOB_KEY_PREFIX = "mcp_job"
+        self.COMMIT_KEY_PREFIX = "mcp_ultimo_commit"
+        self.PROGRESSO_KEY_PREFIX = "mcp_progresso"
 
     def set_job(self, job_id: str, job_data: Dict[str, Any], ttl: int = 86400):
         key = f"{self.JOB_KEY_PREFIX}:{job_id}"
@@ -35,3 +37,37 @@ class RedisJobStore(JobStoreInterface):
         except redis.exceptions.RedisError as e:
             print(f"ERRO CRÍTICO ao ler do Redis [Chave: {key}]: {e}")
             return None
+
+    def set_progresso(self, job_id: str, progresso: Dict[str, Any], ttl: int = 86400):
+        key = f"{self.PROGRESSO_KEY_PREFIX}:{job_id}"
+        try:
+            self.redis_client.set(key, json.dumps(progresso), ex=ttl)
+        except redis.exceptions.RedisError as e:
+            print(f"ERRO ao salvar o progresso no Redis [Chave: {key}]: {e}")
+
+    def get_progresso(self, job_id: str) -> Optional[Dict[str, Any]]:
+        key = f"{self.PROGRESSO_KEY_PREFIX}:{job_id}"
+        try:
+            progresso_json = self.redis_client.get(key)
+            return json.loads(progresso_json) if progresso_json else None
+        except redis.exceptions.RedisError as e:
+            print(f"ERRO ao ler o progresso do Redis [Chave: {key}]: {e}")
+            return None
+
+    def _commit_key(self, repo_name: str, branch_name: Optional[str], analysis_type: str) -> str:
+        return f"{self.COMMIT_KEY_PREFIX}:{repo_name}:{branch_name or '__default__'}:{analysis_type}"
+
+    def set_ultimo_commit_analisado(self, repo_name: str, branch_name: Optional[str], analysis_type: str, commit_sha: str, ttl: int = 30 * 86400):
+        key = self._commit_key(repo_name, branch_name, analysis_type)
+        try:
+            self.redis_client.set(key, commit_sha, ex=ttl)
+        except redis.exceptions.RedisError as e:
+            print(f"ERRO ao salvar o último commit analisado no Redis [Chave: {key}]: {e}")
+
+    def get_ultimo_commit_analisado(self, repo_name: str, branch_name: Optional[str], analysis_type: str) -> Optional[str]:
+        key = self._commit_key(repo_name, branch_name, analysis_type)
+        try:
+            return self.redis_client.get(key)
+        except redis.exceptions.RedisError as e:
+            print(f"ERRO ao ler o último commit analisado do Redis [Chave: {key}]: {e}")
+            return None
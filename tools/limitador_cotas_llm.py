@@ -0,0 +1,334 @@
+# Arquivo: tools/limitador_cotas_llm.py
+
+import asyncio
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, namedtuple
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+# Cota de um deployment: tokens e requisições por minuto
+Cota = namedtuple('Cota', ['tpm', 'rpm'])
+
+# Reserva feita antes de uma chamada, reconciliada com o uso real depois dela
+Reserva = namedtuple('Reserva', ['chave', 'tokens', 'cota'])
+
+PREFIXO_REDIS = "mcp_cota_llm"
+
+# Espera máxima por uma reserva antes de desistir da chamada
+ESPERA_MAXIMA_S = float(os.getenv("LLM_COTA_ESPERA_MAXIMA_S", "600"))
+
+# Intervalo entre consultas de quem ainda não é o primeiro da fila
+INTERVALO_CONSULTA_FILA_S = 0.25
+
+# Menor espera entre consultas: o relógio do Redis (TIME) tem resolução de
+# microssegundos, e uma espera residual menor que isso, fruto de arredondamento,
+# não avançaria o reabastecimento do balde
+ESPERA_MINIMA_S = 0.001
+
+# Quem não consulta a fila por este tempo (ex: worker encerrado) perde o lugar
+EXPIRACAO_FILA_S = 10.0
+
+# Baldes sem uso são removidos do Redis após este tempo
+EXPIRACAO_BALDE_S = 3600
+
+class CotaIndisponivel(RuntimeError):
+    """A reserva não foi obtida dentro da espera máxima."""
+
+# Balde de tokens e de requisições com reabastecimento contínuo (cota por
+# minuto) e fila FIFO: só o primeiro da fila pode reservar, para que chamadas
+# grandes não sejam ultrapassadas indefinidamente pelas pequenas.
+# Retorna "0" se reservou, "-1" se não é a vez do chamador, ou a espera em segundos.
+_SCRIPT_RESERVAR = """
+local balde, fila, vistos = KEYS[1], KEYS[2], KEYS[3]
+local id, custo, tpm, rpm, expiracao = ARGV[1], tonumber(ARGV[2]), tonumber(ARGV[3]), tonumber(ARGV[4]), tonumber(ARGV[5])
+local relogio = redis.call('TIME')
+local agora = tonumber(relogio[1]) + tonumber(relogio[2]) / 1000000
+
+redis.call('HSET', vistos, id, agora)
+if not redis.call('ZSCORE', fila, id) then
+    redis.call('ZADD', fila, agora, id)
+end
+redis.call('EXPIRE', fila, ARGV[6])
+redis.call('EXPIRE', vistos, ARGV[6])
+
+local primeiro = redis.call('ZRANGE', fila, 0, 0)[1]
+while primeiro and primeiro ~= id do
+    local visto = tonumber(redis.call('HGET', vistos, primeiro) or '0')
+    if agora - visto <= expiracao then
+        return '-1'
+    end
+    redis.call('ZREM', fila, primeiro)
+    redis.call('HDEL', vistos, primeiro)
+    primeiro = redis.call('ZRANGE', fila, 0, 0)[1]
+end
+
+local estado = redis.call('HMGET', balde, 'tokens', 'requisicoes', 'atualizado')
+local tokens = tonumber(estado[1]) or tpm
+local requisicoes = tonumber(estado[2]) or rpm
+local decorrido = math.max(0, agora - (tonumber(estado[3]) or agora))
+tokens = math.min(tpm, tokens + decorrido * tpm / 60)
+requisicoes = math.min(rpm, requisicoes + decorrido * rpm / 60)
+
+custo = math.min(custo, tpm)
+local espera = 0
+if tokens < custo then
+    espera = (custo - tokens) * 60 / tpm
+end
+if requisicoes < 1 then
+    espera = math.max(espera, (1 - requisicoes) * 60 / rpm)
+end
+if espera == 0 then
+    tokens = tokens - custo
+    requisicoes = requisicoes - 1
+    redis.call('ZREM', fila, id)
+    redis.call('HDEL', vistos, id)
+end
+redis.call('HSET', balde, 'tokens', tostring(tokens), 'requisicoes', tostring(requisicoes), 'atualizado', tostring(agora))
+redis.call('EXPIRE', balde, ARGV[6])
+return tostring(espera)
+"""
+
+# Devolve ao balde a diferença entre o reservado e o uso real (negativa se o
+# uso passou da reserva), sem ultrapassar a capacidade.
+_SCRIPT_DEVOLVER = """
+local tokens = tonumber(redis.call('HGET', KEYS[1], 'tokens'))
+if tokens then
+    tokens = math.min(tonumber(ARGV[2]), tokens + tonumber(ARGV[1]))
+    redis.call('HSET', KEYS[1], 'tokens', tostring(tokens))
+end
+return 1
+"""
+
+class ArmazenamentoDeCotasRedis:
+    """
+    Baldes e filas no Redis, compartilhados por todos os workers.
+
+    As operações são scripts Lua atômicos e usam o relógio do servidor Redis,
+    de modo que workers com relógios diferentes veem o mesmo reabastecimento.
+    """
+
+    def __init__(self, redis_client):
+        self.redis_client = redis_client
+        self._reservar = redis_client.register_script(_SCRIPT_RESERVAR)
+        self._devolver = redis_client.register_script(_SCRIPT_DEVOLVER)
+
+    @staticmethod
+    def _chaves(chave: str):
+        return [f"{PREFIXO_REDIS}:{chave}:balde", f"{PREFIXO_REDIS}:{chave}:fila", f"{PREFIXO_REDIS}:{chave}:vistos"]
+
+    def tentar_reservar(self, chave: str, id_espera: str, tokens: int, cota: Cota) -> float:
+        resultado = self._reservar(
+            keys=self._chaves(chave),
+            args=[id_espera, tokens, cota.tpm, cota.rpm, EXPIRACAO_FILA_S, EXPIRACAO_BALDE_S]
+        )
+        return float(resultado)
+
+    def devolver(self, chave: str, tokens: int, cota: Cota):
+        self._devolver(keys=self._chaves(chave)[:1], args=[tokens, cota.tpm])
+
+class ArmazenamentoDeCotasLocal:
+    """
+    Baldes e filas em memória, com a mesma semântica do ArmazenamentoDeCotasRedis.
+
+    Serve a um único processo (ex: desenvolvimento local sem Redis) e aos testes.
+    """
+
+    def __init__(self, relogio: Callable[[], float] = time.monotonic):
+        self.relogio = relogio
+        self._baldes: Dict[str, Dict[str, float]] = {}
+        self._filas: Dict[str, "OrderedDict[str, float]"] = {}
+        self._lock = threading.Lock()
+
+    def tentar_reservar(self, chave: str, id_espera: str, tokens: int, cota: Cota) -> float:
+        with self._lock:
+            agora = self.relogio()
+            fila = self._filas.setdefault(chave, OrderedDict())
+            fila[id_espera] = agora
+            for primeiro in list(fila):
+                if primeiro == id_espera:
+                    break
+                if agora - fila[primeiro] <= EXPIRACAO_FILA_S:
+                    return -1.0
+                del fila[primeiro]
+
+            balde = self._baldes.setdefault(chave, {'tokens': cota.tpm, 'requisicoes': cota.rpm, 'atualizado': agora})
+            decorrido = max(0.0, agora - balde['atualizado'])
+            balde['tokens'] = min(cota.tpm, balde['tokens'] + decorrido * cota.tpm / 60)
+            balde['requisicoes'] = min(cota.rpm, balde['requisicoes'] + decorrido * cota.rpm / 60)
+            balde['atualizado'] = agora
+
+            custo = min(tokens, cota.tpm)
+            espera = 0.0
+            if balde['tokens'] < custo:
+                espera = (custo - balde['tokens']) * 60 / cota.tpm
+            if balde['requisicoes'] < 1:
+                espera = max(espera, (1 - balde['requisicoes']) * 60 / cota.rpm)
+            if espera == 0:
+                balde['tokens'] -= custo
+                balde['requisicoes'] -= 1
+                del fila[id_espera]
+            return espera
+
+    def devolver(self, chave: str, tokens: int, cota: Cota):
+        with self._lock:
+            balde = self._baldes.get(chave)
+            if balde is not None:
+                balde['tokens'] = min(cota.tpm, balde['tokens'] + tokens)
+
+class LimitadorDeCotasLLM:
+    """
+    Limita as chamadas ao LLM às cotas de tokens (TPM) e requisições (RPM) por minuto de cada deployment.
+
+    Antes de cada chamada, o provedor reserva a entrada estimada mais o
+    limite de saída no balde do deployment (provedor, endpoint e modelo),
+    esperando a sua vez em uma fila FIFO; depois dela, a reserva é
+    reconciliada com o uso informado pela API. Com o ArmazenamentoDeCotasRedis,
+    os baldes são compartilhados por todos os workers, que deixam de colidir
+    em erros 429 no meio dos jobs.
+
+    As cotas são indicadas por prefixo do nome do modelo (ou do deployment);
+    modelos sem cota não são limitados.
+
+    Example:
+        >>> limitador = LimitadorDeCotasLLM(ArmazenamentoDeCotasLocal(), {"gpt-4.1": Cota(tpm=150_000, rpm=900)})
+        >>> reserva = limitador.reservar("azure_openai", endpoint, "gpt-4.1", tokens=42_000)
+        >>> limitador.reconciliar(reserva, tokens_usados=31_500)
+    """
+
+    def __init__(
+        self,
+        armazenamento,
+        cotas: Dict[str, Cota],
+        espera_maxima_s: Optional[float] = None,
+        dormir: Callable[[float], None] = time.sleep,
+        dormir_async: Callable[[float], Awaitable[None]] = asyncio.sleep
+    ):
+        self.armazenamento = armazenamento
+        self.cotas = cotas
+        self.espera_maxima_s = ESPERA_MAXIMA_S if espera_maxima_s is None else espera_maxima_s
+        self.dormir = dormir
+        self.dormir_async = dormir_async
+
+    def obter_cota(self, modelo: Optional[str]) -> Optional[Cota]:
+        """Cota do prefixo mais longo que casar com o modelo, ou None."""
+        nome = (modelo or "").lower()
+        prefixos = [prefixo for prefixo in self.cotas if nome.startswith(prefixo.lower())]
+        return self.cotas[max(prefixos, key=len)] if prefixos else None
+
+    def reservar(self, provedor: str, endpoint: Optional[str], modelo: Optional[str], tokens: int) -> Optional[Reserva]:
+        """
+        Reserva tokens e uma requisição na cota do deployment, esperando a vez na fila.
+
+        Returns:
+            Optional[Reserva]: Reserva a reconciliar após a chamada, ou None se o
+                modelo não tiver cota
+
+        Raises:
+            CotaIndisponivel: Se a reserva não for obtida em espera_maxima_s
+        """
+        cota = self.obter_cota(modelo)
+        if cota is None:
+            return None
+        chave = f"{provedor}:{endpoint or ''}:{modelo}"
+        id_espera = uuid.uuid4().hex
+        esperado = 0.0
+        while True:
+            espera = self.armazenamento.tentar_reservar(chave, id_espera, tokens, cota)
+            if espera == 0:
+                return self._reserva_concedida(chave, modelo, tokens, cota, esperado)
+            intervalo = self._intervalo_de_espera(espera, esperado, modelo, tokens, cota)
+            self.dormir(intervalo)
+            esperado += intervalo
+
+    async def reservar_async(self, provedor: str, endpoint: Optional[str], modelo: Optional[str], tokens: int) -> Optional[Reserva]:
+        """Versão de reservar() para o event loop: a espera na fila não bloqueia outras chamadas."""
+        cota = self.obter_cota(modelo)
+        if cota is None:
+            return None
+        chave = f"{provedor}:{endpoint or ''}:{modelo}"
+        id_espera = uuid.uuid4().hex
+        esperado = 0.0
+        while True:
+            espera = await asyncio.to_thread(self.armazenamento.tentar_reservar, chave, id_espera, tokens, cota)
+            if espera == 0:
+                return self._reserva_concedida(chave, modelo, tokens, cota, esperado)
+            intervalo = self._intervalo_de_espera(espera, esperado, modelo, tokens, cota)
+            await self.dormir_async(intervalo)
+            esperado += intervalo
+
+    @staticmethod
+    def _reserva_concedida(chave: str, modelo: Optional[str], tokens: int, cota: Cota, esperado: float) -> Reserva:
+        if esperado:
+            print(f"Cota de '{modelo}' liberada após {esperado:.1f}s de espera ({tokens} tokens reservados).")
+        return Reserva(chave, tokens, cota)
+
+    def _intervalo_de_espera(self, espera: float, esperado: float, modelo: Optional[str], tokens: int, cota: Cota) -> float:
+        intervalo = INTERVALO_CONSULTA_FILA_S if espera < 0 else min(max(espera, ESPERA_MINIMA_S), 1.0)
+        if esperado + intervalo > self.espera_maxima_s:
+            raise CotaIndisponivel(
+                f"Cota de '{modelo}' indisponível após {esperado:.0f}s de espera ({tokens} tokens, "
+                f"cota de {cota.tpm} tokens e {cota.rpm} requisições por minuto)."
+            )
+        return intervalo
+
+    def reconciliar(self, reserva: Optional[Reserva], tokens_usados: int):
+        """Devolve ao balde a parte da reserva que não foi usada (ou cobra o excedente)."""
+        if reserva is None or tokens_usados == reserva.tokens:
+            return
+        self.armazenamento.devolver(reserva.chave, reserva.tokens - tokens_usados, reserva.cota)
+
+def ler_cotas(configuracao: str) -> Dict[str, Cota]:
+    """
+    Interpreta a configuração de cotas em JSON.
+
+    Example:
+        >>> ler_cotas('{"gpt-4.1": {"tpm": 150000, "rpm": 900}}')
+        {'gpt-4.1': Cota(tpm=150000, rpm=900)}
+    """
+    cotas = {}
+    for prefixo, valores in json.loads(configuracao).items():
+        tpm = int(valores['tpm'])
+        # Sem RPM informado, o limite de requisições acompanha o de tokens (nunca é o gargalo)
+        rpm = int(valores.get('rpm') or tpm)
+        if tpm <= 0 or rpm <= 0:
+            raise ValueError(f"Cota de '{prefixo}' inválida: tpm e rpm devem ser positivos.")
+        cotas[prefixo] = Cota(tpm, rpm)
+    return cotas
+
+_limitador_padrao: Optional[LimitadorDeCotasLLM] = None
+_limitador_padrao_configurado = False
+_lock_limitador_padrao = threading.Lock()
+
+def obter_limitador_padrao() -> Optional[LimitadorDeCotasLLM]:
+    """
+    Retorna o limitador de cotas compartilhado pelo processo, ou None se não houver cotas.
+
+    Configuração via variáveis de ambiente:
+    - LLM_COTAS: cotas por prefixo de modelo/deployment em JSON, ex: {"gpt-4.1": {"tpm": 150000, "rpm": 900}}
+    - REDIS_URL: baldes compartilhados entre workers; sem ele, os baldes ficam no processo
+    - LLM_COTA_ESPERA_MAXIMA_S: espera máxima por uma reserva (padrão: 600)
+    """
+    global _limitador_padrao, _limitador_padrao_configurado
+    with _lock_limitador_padrao:
+        if not _limitador_padrao_configurado:
+            _limitador_padrao = _criar_limitador_padrao()
+            _limitador_padrao_configurado = True
+        return _limitador_padrao
+
+def _criar_limitador_padrao() -> Optional[LimitadorDeCotasLLM]:
+    configuracao = os.getenv("LLM_COTAS")
+    if not configuracao:
+        return None
+    cotas = ler_cotas(configuracao)
+    redis_url = os.getenv("REDIS_URL")
+    if redis_url:
+        import redis
+        armazenamento: Any = ArmazenamentoDeCotasRedis(redis.from_url(redis_url))
+    else:
+        print("AVISO: REDIS_URL não configurada; as cotas do LLM valem apenas para este processo.")
+        armazenamento = ArmazenamentoDeCotasLocal()
+    print(f"Limitador de cotas do LLM habilitado para: {', '.join(cotas)}.")
+    return LimitadorDeCotasLLM(armazenamento, cotas)
@@ -0,0 +1,107 @@
+# Arquivo: tools/medir_empacotamento.py
+"""
+Mede quantos tokens cada formato de empacotamento de prompt gasta em repositórios de amostra.
+
+Uso:
+    python -m tools.medir_empacotamento CAMINHO [CAMINHO ...] [--extensoes .py .tf] [--encoding o200k_base]
+
+Cada CAMINHO é um diretório local (ex: um clone do repositório). Os arquivos
+passam pelas mesmas exclusões padrão e detecção de binários da leitura de
+repositórios, e cada formato registrado em tools/empacotamento_prompt.py é
+comparado ao formato 'json' histórico.
+"""
+
+import os
+import argparse
+from typing import Callable, Dict, List, Optional
+from tools.empacotamento_prompt import Arquivo, FORMATO_PADRAO, empacotar_codigo, formatos_disponiveis
+from tools.filtro_arquivos import LimitesDeLeitura, decodificar_texto
+
+ENCODING_PADRAO = "o200k_base"
+
+# Média de caracteres por token usada quando o tiktoken não está instalado
+CARACTERES_POR_TOKEN_ESTIMADO = 4
+
+def contador_de_tokens(encoding: str = ENCODING_PADRAO) -> Callable[[str], int]:
+    """
+    Retorna uma função de contagem de tokens.
+
+    Usa o tiktoken, se instalado; caso contrário, estima por
+    CARACTERES_POR_TOKEN_ESTIMADO, o que preserva a comparação relativa entre formatos.
+    """
+    try:
+        import tiktoken
+    except ImportError:
+        print(f"AVISO: tiktoken não instalado. Estimando 1 token a cada {CARACTERES_POR_TOKEN_ESTIMADO} caracteres.")
+        return lambda texto: -(-len(texto) // CARACTERES_POR_TOKEN_ESTIMADO)
+    codificador = tiktoken.get_encoding(encoding)
+    return lambda texto: len(codificador.encode(texto, disallowed_special=()))
+
+def ler_diretorio(caminho: str, extensoes: Optional[List[str]] = None) -> List[Arquivo]:
+    """
+    Lê os arquivos de texto de um diretório local, na ordem dos caminhos.
+
+    Args:
+        caminho (str): Diretório raiz da amostra
+        extensoes (Optional[List[str]]): Extensões incluídas. Se None, inclui todos os arquivos
+    """
+    limites = LimitesDeLeitura()
+    arquivos = []
+    for raiz, diretorios, nomes in os.walk(caminho):
+        diretorios[:] = sorted(d for d in diretorios if d != '.git')
+        for nome in sorted(nomes):
+            relativo = os.path.relpath(os.path.join(raiz, nome), caminho).replace(os.sep, '/')
+            if extensoes and not relativo.endswith(tuple(extensoes)):
+                continue
+            tamanho = os.path.getsize(os.path.join(raiz, nome))
+            if not limites.admite(relativo, tamanho):
+                continue
+            with open(os.path.join(raiz, nome), 'rb') as f:
+                conteudo, _ = decodificar_texto(f.read())
+            if conteudo is not None:
+                arquivos.append((relativo, tamanho, conteudo))
+    return arquivos
+
+def medir_formatos(
+    arquivos: List[Arquivo],
+    contar_tokens: Callable[[str], int],
+    formatos: Optional[List[str]] = None
+) -> Dict[str, Dict[str, float]]:
+    """
+    Empacota os arquivos em cada formato e conta os tokens.
+
+    Returns:
+        Dict[str, Dict[str, float]]: Por formato, 'tokens', 'caracteres' e
+            'economia_percentual' em relação ao formato 'json'
+    """
+    formatos = formatos or formatos_disponiveis()
+    if FORMATO_PADRAO not in formatos:
+        formatos = [FORMATO_PADRAO, *formatos]
+
+    medicoes = {}
+    for formato in formatos:
+        texto = empacotar_codigo(iter(arquivos), formato) or ""
+        medicoes[formato] = {'tokens': contar_tokens(texto), 'caracteres': len(texto)}
+
+    referencia = medicoes[FORMATO_PADRAO]['tokens']
+    for medicao in medicoes.values():
+        medicao['economia_percentual'] = round(100.0 * (referencia - medicao['tokens']) / referencia, 1) if referencia else 0.0
+    return medicoes
+
+def main(argumentos: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Compara o custo em tokens dos formatos de empacotamento de prompt.")
+    parser.add_argument('caminhos', nargs='+', help="Diretórios locais de repositórios de amostra")
+    parser.add_argument('--extensoes', nargs='*', default=None, help="Extensões incluídas (ex: .py .tf)")
+    parser.add_argument('--encoding', default=ENCODING_PADRAO, help=f"Encoding do tiktoken (padrão: {ENCODING_PADRAO})")
+    args = parser.parse_args(argumentos)
+
+    contar_tokens = contador_de_tokens(args.encoding)
+    for caminho in args.caminhos:
+        arquivos = ler_diretorio(caminho, args.extensoes)
+        print(f"\n{caminho}: {len(arquivos)} arquivos")
+        print(f"  {'formato':<22}{'tokens':>12}{'caracteres':>14}{'economia vs json':>20}")
+        for formato, medicao in medir_formatos(arquivos, contar_tokens).items():
+            print(f"  {formato:<22}{medicao['tokens']:>12}{medicao['caracteres']:>14}{medicao['economia_percentual']:>19}%")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+# Arquivo: tools/orcamento_tokens.py
+
+import math
+import threading
+from collections import namedtuple
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Janela de contexto e máximo de tokens de saída de um modelo
+LimitesDoModelo = namedtuple('LimitesDoModelo', ['janela_contexto', 'max_saida'])
+
+# Limites por prefixo do nome do modelo (ou do deployment do Azure, que segue o
+# nome do modelo neste projeto). O prefixo mais longo que casar é usado.
+LIMITES_POR_MODELO: Dict[str, LimitesDoModelo] = {
+    "gpt-5": LimitesDoModelo(400_000, 128_000),
+    "gpt-4.1": LimitesDoModelo(1_047_576, 32_768),
+    "gpt-4o": LimitesDoModelo(128_000, 16_384),
+    "gpt-4-turbo": LimitesDoModelo(128_000, 4_096),
+    "gpt-4": LimitesDoModelo(8_192, 4_096),
+    "gpt-35-turbo": LimitesDoModelo(16_385, 4_096),
+    "gpt-3.5-turbo": LimitesDoModelo(16_385, 4_096),
+    "o1": LimitesDoModelo(200_000, 100_000),
+    "o3": LimitesDoModelo(200_000, 100_000),
+    "o4-mini": LimitesDoModelo(200_000, 100_000),
+    "claude-opus-4": LimitesDoModelo(200_000, 32_000),
+    "claude-sonnet-4": LimitesDoModelo(200_000, 64_000),
+    "claude-3-7-sonnet": LimitesDoModelo(200_000, 64_000),
+    "claude-3-5-sonnet": LimitesDoModelo(200_000, 8_192),
+    "claude-3-5-haiku": LimitesDoModelo(200_000, 8_192),
+    "claude-3-opus": LimitesDoModelo(200_000, 4_096),
+    "claude-3-haiku": LimitesDoModelo(200_000, 4_096),
+}
+LIMITES_PADRAO = LimitesDoModelo(128_000, 16_384)
+
+# Encoding do tiktoken por prefixo de modelo OpenAI
+ENCODINGS_OPENAI: Dict[str, str] = {
+    "gpt-5": "o200k_base",
+    "gpt-4.1": "o200k_base",
+    "gpt-4o": "o200k_base",
+    "o1": "o200k_base",
+    "o3": "o200k_base",
+    "o4-mini": "o200k_base",
+    "gpt-4": "cl100k_base",
+    "gpt-35-turbo": "cl100k_base",
+    "gpt-3.5-turbo": "cl100k_base",
+}
+
+# A Anthropic não publica o tokenizador dos modelos Claude. A contagem usa o
+# cl100k_base com esta margem, que cobre a diferença observada em código-fonte.
+FATOR_TOKENIZADOR_CLAUDE = 1.15
+
+# Se os arquivos de encoding do tiktoken não puderem ser carregados (ex: sem rede
+# e sem TIKTOKEN_CACHE_DIR), a contagem é estimada
+# de forma conservadora: código-fonte costuma ter mais de 3 caracteres por token.
+CARACTERES_POR_TOKEN_ESTIMADO = 3.0
+
+# Tokens reservados para a formatação das mensagens (papéis, separadores)
+MARGEM_FORMATACAO_TOKENS = 512
+
+POLITICA_REJEITAR = "rejeitar"
+POLITICA_TRUNCAR = "truncar"
+POLITICA_FRAGMENTAR = "fragmentar"
+POLITICAS = (POLITICA_REJEITAR, POLITICA_TRUNCAR, POLITICA_FRAGMENTAR)
+POLITICA_PADRAO = POLITICA_REJEITAR
+
+MARCADOR_TRUNCAMENTO = "\n\n[... conteúdo truncado pelo orçamento de tokens: {omitidos} tokens omitidos ...]"
+
+class OrcamentoDeTokensExcedido(ValueError):
+    """
+    A requisição não cabe na janela de contexto do modelo.
+
+    Attributes:
+        contagem (Dict[str, Any]): Contagem de tokens por parte da requisição
+    """
+
+    def __init__(self, mensagem: str, contagem: Dict[str, Any]):
+        super().__init__(mensagem)
+        self.contagem = contagem
+
+class FragmentacaoNecessaria(OrcamentoDeTokensExcedido):
+    """
+    O código não cabe em uma requisição e a política da etapa é fragmentá-lo.
+
+    Attributes:
+        tokens_disponiveis_codigo (int): Tokens que o código de cada fragmento pode usar
+    """
+
+    def __init__(self, mensagem: str, contagem: Dict[str, Any], tokens_disponiveis_codigo: int):
+        super().__init__(mensagem, contagem)
+        self.tokens_disponiveis_codigo = tokens_disponiveis_codigo
+
+def _buscar_por_prefixo(tabela: Dict[str, Any], model_name: Optional[str]) -> Optional[Any]:
+    nome = (model_name or "").lower()
+    for prefixo in sorted(tabela, key=len, reverse=True):
+        if nome.startswith(prefixo):
+            return tabela[prefixo]
+    return None
+
+def obter_limites_modelo(model_name: Optional[str]) -> LimitesDoModelo:
+    """Retorna a janela de contexto e o máximo de saída do modelo (LIMITES_PADRAO se desconhecido)."""
+    return _buscar_por_prefixo(LIMITES_POR_MODELO, model_name) or LIMITES_PADRAO
+
+class Tokenizador:
+    """
+    Conta e trunca textos em tokens de um modelo.
+
+    Attributes:
+        nome (str): Identificação do tokenizador (ex: 'o200k_base', 'estimativa')
+        exato (bool): Se a contagem é a do próprio modelo, e não uma estimativa
+    """
+
+    def __init__(
+        self,
+        nome: str,
+        codificar: Optional[Callable[[str], list]] = None,
+        decodificar: Optional[Callable[[list], str]] = None,
+        fator: float = 1.0
+    ):
+        self.nome = nome
+        self.exato = codificar is not None and fator == 1.0
+        self._codificar = codificar
+        self._decodificar = decodificar
+        self._fator = fator
+
+    def contar(self, texto: str) -> int:
+        if not texto:
+            return 0
+        if self._codificar is None:
+            return math.ceil(len(texto) / CARACTERES_POR_TOKEN_ESTIMADO)
+        return math.ceil(len(self._codificar(texto)) * self._fator)
+
+    def truncar(self, texto: str, max_tokens: int) -> str:
+        """Retorna o maior prefixo do texto com no máximo max_tokens tokens."""
+        if max_tokens <= 0:
+            return ""
+        if self._codificar is None:
+            return texto[:int(max_tokens * CARACTERES_POR_TOKEN_ESTIMADO)]
+        tokens = self._codificar(texto)
+        return self._decodificar(tokens[:int(max_tokens / self._fator)])
+
+_tokenizadores: Dict[Tuple[str, float], Tokenizador] = {}
+_lock_tokenizadores = threading.Lock()
+
+def _tokenizador_tiktoken(encoding: str, fator: float = 1.0) -> Tokenizador:
+    """Cria (uma vez por processo) o tokenizador tiktoken, ou a estimativa se indisponível."""
+    chave = (encoding, fator)
+    with _lock_tokenizadores:
+        if chave not in _tokenizadores:
+            try:
+                import tiktoken
+                codificador = tiktoken.get_encoding(encoding)
+                _tokenizadores[chave] = Tokenizador(
+                    encoding,
+                    codificar=lambda texto: codificador.encode(texto, disallowed_special=()),
+                    decodificar=codificador.decode,
+                    fator=fator
+                )
+            except Exception as e:
+                # Arquivo de encoding inacessível (ex: sem rede e sem TIKTOKEN_CACHE_DIR)
+                print(
+                    f"AVISO: Tokenizador '{encoding}' indisponível ({e}). Usando estimativa por caracteres "
+                    f"({CARACTERES_POR_TOKEN_ESTIMADO} caracteres por token); as contagens serão aproximadas. "
+                    "Pré-carregue os encodings em TIKTOKEN_CACHE_DIR para contagens exatas."
+                )
+                _tokenizadores[chave] = Tokenizador("estimativa")
+        return _tokenizadores[chave]
+
+def obter_tokenizador(model_name: Optional[str]) -> Tokenizador:
+    """
+    Retorna o tokenizador do modelo.
+
+    Modelos OpenAI usam o encoding do tiktoken correspondente; modelos Claude,
+    o cl100k_base com FATOR_TOKENIZADOR_CLAUDE; modelos desconhecidos, o o200k_base.
+    """
+    nome = (model_name or "").lower()
+    if nome.startswith("claude"):
+        return _tokenizador_tiktoken("cl100k_base", FATOR_TOKENIZADOR_CLAUDE)
+    return _tokenizador_tiktoken(_buscar_por_prefixo(ENCODINGS_OPENAI, nome) or "o200k_base")
+
+class OrcamentoDeTokens:
+    """
+    Verificação prévia do tamanho de uma requisição ao LLM, antes da chamada à API.
+
+    Conta separadamente os tokens do prompt de sistema, do contexto RAG, do
+    código e das instruções, compara o total com a janela de contexto do modelo
+    (descontada a saída reservada) e aplica a política da etapa:
+
+    - 'rejeitar' (padrão): levanta OrcamentoDeTokensExcedido, sem chamar a API
+    - 'truncar': corta o final do código até caber, indicando o corte no texto
+    - 'fragmentar': levanta FragmentacaoNecessaria com os tokens disponíveis
+      para o código, para que o agente divida o repositório em fragmentos
+
+    Example:
+        >>> orcamento = OrcamentoDeTokens()
+        >>> codigo, contagem = orcamento.preparar("gpt-4.1", "sistema", "", "codigo", "", 15000)
+        >>> contagem['acao']
+        'nenhuma'
+    """
+
+    def __init__(self, margem_formatacao: int = MARGEM_FORMATACAO_TOKENS):
+        self.margem_formatacao = margem_formatacao
+
+    def preparar(
+        self,
+        model_name: Optional[str],
+        prompt_sistema: str,
+        contexto_rag: str,
+        codigo: str,
+        instrucoes: str,
+        max_token_out: int,
+        politica: Optional[str] = None
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Conta os tokens da requisição e aplica a política se ela não couber no modelo.
+
+        Args:
+            model_name (Optional[str]): Modelo (ou deployment) que receberá a requisição
+            prompt_sistema (str): Prompt de sistema, sem o contexto RAG
+            contexto_rag (str): Políticas recuperadas pelo RAG ('' se não usado)
+            codigo (str): Prompt principal (código ou dados da etapa anterior)
+            instrucoes (str): Instruções extras do usuário
+            max_token_out (int): Saída solicitada; é limitada ao máximo do modelo
+            politica (Optional[str]): 'rejeitar', 'truncar' ou 'fragmentar'
+
+        Returns:
+            Tuple[str, Dict[str, Any]]: Código a enviar (truncado, se for o caso) e a
+                contagem: tokens por parte, total de entrada, limite de entrada,
+                saída reservada, tokenizador e ação tomada
+
+        Raises:
+            ValueError: Se a política for desconhecida
+            OrcamentoDeTokensExcedido: Se a requisição não couber e a política for
+                'rejeitar', ou se nem o código vazio couber
+            FragmentacaoNecessaria: Se a requisição não couber e a política for 'fragmentar'
+        """
+        politica = (politica or POLITICA_PADRAO).lower()
+        if politica not in POLITICAS:
+            raise ValueError(f"politica_orcamento '{politica}' inválida. Valores aceitos: {', '.join(repr(p) for p in POLITICAS)}.")
+
+        limites = obter_limites_modelo(model_name)
+        tokenizador = obter_tokenizador(model_name)
+        max_saida = min(max_token_out, limites.max_saida)
+        limite_entrada = limites.janela_contexto - max_saida - self.margem_formatacao
+
+        contagem = {
+            'modelo': model_name,
+            'tokenizador': tokenizador.nome,
+            'contagem_exata': tokenizador.exato,
+            'sistema': tokenizador.contar(prompt_sistema),
+            'rag': tokenizador.contar(contexto_rag),
+            'codigo': tokenizador.contar(codigo),
+            'instrucoes': tokenizador.contar(instrucoes),
+            'janela_contexto': limites.janela_contexto,
+            'max_saida': max_saida,
+            'limite_entrada': limite_entrada,
+            'politica': politica,
+            'acao': 'nenhuma',
+        }
+        contagem['total_entrada'] = contagem['sistema'] + contagem['rag'] + contagem['codigo'] + contagem['instrucoes']
+        if max_saida < max_token_out:
+            print(f"AVISO: max_token_out={max_token_out} excede o máximo do modelo '{model_name}'. Usando {max_saida}.")
+
+        if contagem['total_entrada'] <= limite_entrada:
+            return codigo, contagem
+
+        disponivel_codigo = limite_entrada - (contagem['total_entrada'] - contagem['codigo'])
+        excedente = contagem['total_entrada'] - limite_entrada
+        resumo = (
+            f"A requisição tem {contagem['total_entrada']} tokens de entrada (código: {contagem['codigo']}), "
+            f"acima do limite de {limite_entrada} do modelo '{model_name}' com {max_saida} tokens de saída reservados."
+        )
+        if disponivel_codigo <= 0:
+            contagem['acao'] = 'rejeitada'
+            raise OrcamentoDeTokensExcedido(f"{resumo} Prompt de sistema, RAG e instruções já excedem o limite.", contagem)
+
+        if politica == POLITICA_REJEITAR:
+            contagem['acao'] = 'rejeitada'
+            raise OrcamentoDeTokensExcedido(f"{resumo} Reduza o escopo ou use politica_orcamento 'truncar' ou 'fragmentar'.", contagem)
+
+        if politica == POLITICA_FRAGMENTAR:
+            contagem['acao'] = 'fragmentar'
+            raise FragmentacaoNecessaria(resumo, contagem, disponivel_codigo)
+
+        marcador = MARCADOR_TRUNCAMENTO.format(omitidos=excedente)
+        codigo_truncado = tokenizador.truncar(codigo, disponivel_codigo - tokenizador.contar(marcador)) + marcador
+        tokens_codigo = tokenizador.contar(codigo_truncado)
+        print(f"AVISO: {resumo} Código truncado de {contagem['codigo']} para {tokens_codigo} tokens.")
+        contagem['tokens_removidos'] = contagem['codigo'] - tokens_codigo
+        contagem['codigo'] = tokens_codigo
+        contagem['total_entrada'] = contagem['sistema'] + contagem['rag'] + tokens_codigo + contagem['instrucoes']
+        contagem['acao'] = 'truncada'
+        return codigo_truncado, contagem
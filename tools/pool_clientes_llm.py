@@ -0,0 +1,138 @@
+# Arquivo: tools/pool_clientes_llm.py
+
+import asyncio
+import os
+import threading
+from collections import namedtuple
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import httpx
+
+from domain.interfaces.secret_manager_interface import ISecretManager
+
+# Limites do pool de conexões HTTP de cada cliente de LLM. Os fragmentos de uma
+# análise map-reduce chamam o mesmo cliente em paralelo; conexões ociosas são
+# mantidas abertas para que a etapa seguinte não refaça o handshake TLS.
+MAX_CONEXOES = int(os.getenv("LLM_MAX_CONEXOES", "64"))
+MAX_CONEXOES_OCIOSAS = int(os.getenv("LLM_MAX_CONEXOES_OCIOSAS", "16"))
+KEEPALIVE_S = float(os.getenv("LLM_KEEPALIVE_S", "120"))
+
+# Cliente de um provedor. 'fabrica' recebe a chave da API e os limites de
+# conexão e devolve o cliente do SDK; 'erros_autenticacao' são as exceções do
+# SDK que indicam chave recusada (ex: chave rotacionada no Key Vault).
+ConfiguracaoDeCliente = namedtuple(
+    'ConfiguracaoDeCliente', ['provedor', 'endpoint', 'nome_segredo', 'fabrica', 'erros_autenticacao']
+)
+
+def limites_de_conexao() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=MAX_CONEXOES,
+        max_keepalive_connections=MAX_CONEXOES_OCIOSAS,
+        keepalive_expiry=KEEPALIVE_S
+    )
+
+class PoolDeClientesLLM:
+    """
+    Clientes de SDK de LLM de longa duração, compartilhados pelo processo.
+
+    Cada cliente é criado uma única vez por (provedor, endpoint, segredo), com a
+    chave lida do gerenciador de segredos e um pool de conexões keep-alive
+    (LLM_MAX_CONEXOES, LLM_MAX_CONEXOES_OCIOSAS, LLM_KEEPALIVE_S); os
+    provedores criados a cada etapa passam a reaproveitar o mesmo cliente. Os
+    clientes síncronos dos SDKs são thread-safe; os assíncronos ficam presos ao
+    event loop em que fizeram a primeira requisição e devem ser usados apenas
+    no event loop do servidor.
+
+    Se a API recusar a chave, renovar() lê o segredo novamente e substitui o
+    cliente. Threads que falharem com o mesmo cliente recebem o cliente já
+    renovado, sem uma nova leitura do Key Vault.
+
+    Example:
+        >>> pool = obter_pool_clientes_padrao()
+        >>> cliente = pool.obter(configuracao)
+        >>> cliente = pool.renovar(configuracao, cliente)  # após AuthenticationError
+    """
+
+    def __init__(self, secret_manager: Optional[ISecretManager] = None):
+        self._secret_manager = secret_manager
+        self._clientes: Dict[Tuple[str, Optional[str], str], Any] = {}
+        self._lock = threading.Lock()
+
+    def _obter_secret_manager(self) -> ISecretManager:
+        if self._secret_manager is None:
+            from tools.azure_secret_manager import AzureSecretManager
+            self._secret_manager = AzureSecretManager()
+        return self._secret_manager
+
+    @staticmethod
+    def _chave(configuracao: ConfiguracaoDeCliente) -> Tuple[str, Optional[str], str]:
+        return configuracao.provedor, configuracao.endpoint, configuracao.nome_segredo
+
+    def _criar(self, configuracao: ConfiguracaoDeCliente) -> Any:
+        api_key = self._obter_secret_manager().get_secret(configuracao.nome_segredo)
+        cliente = configuracao.fabrica(api_key, limites_de_conexao())
+        print(f"Cliente '{configuracao.provedor}' criado para o pool de clientes de LLM.")
+        return cliente
+
+    def obter(self, configuracao: ConfiguracaoDeCliente) -> Any:
+        """Cliente compartilhado da configuração, criado no primeiro uso."""
+        chave = self._chave(configuracao)
+        with self._lock:
+            if chave not in self._clientes:
+                self._clientes[chave] = self._criar(configuracao)
+            return self._clientes[chave]
+
+    def renovar(self, configuracao: ConfiguracaoDeCliente, cliente_recusado: Any) -> Any:
+        """
+        Substitui o cliente cuja chave foi recusada por um criado com a chave atual.
+
+        Args:
+            configuracao (ConfiguracaoDeCliente): Configuração do cliente
+            cliente_recusado (Any): Cliente cuja chamada falhou por autenticação
+
+        Returns:
+            Any: Cliente renovado; se outra thread já o renovou, o cliente atual
+        """
+        chave = self._chave(configuracao)
+        with self._lock:
+            atual = self._clientes.get(chave)
+            if atual is not None and atual is not cliente_recusado:
+                return atual
+            print(f"AVISO: Chave do cliente '{configuracao.provedor}' recusada; relendo o segredo '{configuracao.nome_segredo}'.")
+            # O cliente antigo não é fechado: pode haver streams em andamento nele
+            self._clientes[chave] = self._criar(configuracao)
+            return self._clientes[chave]
+
+    def chamar(self, configuracao: ConfiguracaoDeCliente, cliente: Any, chamada: Callable[[Any], Any]) -> Tuple[Any, Any]:
+        """
+        Executa chamada(cliente), renovando o cliente e repetindo uma vez se a chave for recusada.
+
+        Returns:
+            Tuple[Any, Any]: Resultado da chamada e o cliente usado
+        """
+        try:
+            return chamada(cliente), cliente
+        except configuracao.erros_autenticacao:
+            cliente = self.renovar(configuracao, cliente)
+            return chamada(cliente), cliente
+
+    async def chamar_async(
+        self, configuracao: ConfiguracaoDeCliente, cliente: Any, chamada: Callable[[Any], Awaitable[Any]]
+    ) -> Tuple[Any, Any]:
+        """Versão de chamar() para clientes assíncronos; a renovação (leitura do segredo) roda em uma thread."""
+        try:
+            return await chamada(cliente), cliente
+        except configuracao.erros_autenticacao:
+            cliente = await asyncio.to_thread(self.renovar, configuracao, cliente)
+            return await chamada(cliente), cliente
+
+_pool_padrao: Optional[PoolDeClientesLLM] = None
+_lock_pool_padrao = threading.Lock()
+
+def obter_pool_clientes_padrao() -> PoolDeClientesLLM:
+    """Pool de clientes compartilhado pelo processo."""
+    global _pool_padrao
+    with _lock_pool_padrao:
+        if _pool_padrao is None:
+            _pool_padrao = PoolDeClientesLLM()
+        return _pool_padrao
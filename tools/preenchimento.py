@@ -1,7 +1,9 @@
 # Arquivo: tools/preenchimento.py (VERSÃO FINAL E REALMENTE CORRIGIDA)
 
 import json
+from typing import Dict, Optional
 from domain.interfaces.changeset_filler_interface import IChangesetFiller
+from tools.deduplicacao import agrupar_duplicatas
 
 class ChangesetFiller(IChangesetFiller):
     """
@@ -19,7 +21,7 @@ class ChangesetFiller(IChangesetFiller):
     a partir de dados agrupados e dados originais detalhados.
     """
     
-    def main(self, json_agrupado: dict, json_inicial: dict) -> dict:
+    def main(self, json_agrupado: dict, json_inicial: dict, duplicatas: Optional[Dict[str, str]] = None) -> dict:
         """
         Preenche os conjuntos de mudanças agrupados com dados completos dos arquivos.
         
@@ -32,6 +34,8 @@ class ChangesetFiller(IChangesetFiller):
         2. Para cada grupo no JSON agrupado, localiza os dados completos no JSON inicial
         3. Reconstitui o conjunto de mudanças com dados completos
         4. Preserva justificativas específicas do agrupamento quando disponíveis
+        5. Replica cada mudança para os arquivos de conteúdo idêntico, que o LLM
+           recebeu apenas como referência ("conteúdo idêntico ao de X")
         
         Args:
             json_agrupado (dict): Estrutura de agrupamento contendo:
@@ -41,6 +45,8 @@ class ChangesetFiller(IChangesetFiller):
             json_inicial (dict): Dados originais da refatoração contendo:
                 - 'conjunto_de_mudancas': lista completa com todos os detalhes dos arquivos
                 - Cada item deve ter 'caminho_do_arquivo', 'status', 'conteudo', etc.
+            duplicatas (Optional[Dict[str, str]]): Cópia -> arquivo de conteúdo
+                idêntico, registradas pela deduplicação do AgenteRevisor. Defaults to None
         
         Returns:
             dict: Estrutura preenchida onde cada grupo contém conjuntos de mudanças
@@ -56,6 +62,8 @@ class ChangesetFiller(IChangesetFiller):
             - Arquivos sem conteúdo são ignorados (exceto status 'REMOVIDO')
             - Justificativas do agrupamento sobrescrevem as originais quando presentes
             - Fallback de 'codigo_novo' para 'conteudo' é aplicado automaticamente
+            - A mudança de um arquivo original é replicada para as suas cópias exatas,
+              exceto remoções; uma cópia que tenha mudança própria não é sobrescrita
         """
         print("\n" + "="*50)
         print("INICIANDO PROCESSO DE PREENCHIMENTO (ChangesetFiller v3.0 - Lógica Corrigida)")
@@ -73,6 +81,7 @@ class ChangesetFiller(IChangesetFiller):
             if mudanca.get('caminho_do_arquivo')
         }
         print(f"Mapa de dados originais criado com {len(mapa_de_mudancas_originais)} arquivos.")
+        copias_por_original = agrupar_duplicatas(duplicatas or {})
 
         resultado_preenchido = {}
         
@@ -111,6 +120,10 @@ class ChangesetFiller(IChangesetFiller):
                     if mudanca_completa.get("conteudo") is not None or mudanca_completa.get("status") == "REMOVIDO":
                         print(f"  [SUCESSO] Detalhes de '{caminho_do_arquivo}' preenchidos com sucesso.")
                         conjunto_preenchido.append(mudanca_completa)
+                        # 5. Replica a mudança do original para as cópias enviadas só como referência
+                        conjunto_preenchido.extend(
+                            self._replicar_para_copias(mudanca_completa, copias_por_original, mapa_de_mudancas_originais)
+                        )
                     else:
                         print(f"  [AVISO] '{caminho_do_arquivo}' ignorado por falta de conteúdo no JSON INICIAL.")
                 else:
@@ -124,4 +137,29 @@ class ChangesetFiller(IChangesetFiller):
         print("\n" + "="*50)
         print("PROCESSO DE PREENCHIMENTO CONCLUÍDO")
         print("="*50)
-        return resultado_preenchido
\ No newline at end of file
+        return resultado_preenchido
+
+    @staticmethod
+    def _replicar_para_copias(mudanca: dict, copias_por_original: Dict[str, list], mapa_de_mudancas_originais: dict) -> list:
+        """
+        Cria a mesma mudança para cada cópia do arquivo que não tenha mudança própria.
+
+        Só a mudança feita no original (o arquivo que o modelo viu com o
+        conteúdo completo) é replicada; uma mudança proposta para uma cópia
+        vale só para ela. Remoções nunca são replicadas: apagar uma cópia
+        duplicada não deve apagar o original nem as demais.
+        """
+        caminho = mudanca.get('caminho_do_arquivo')
+        if mudanca.get('status') == "REMOVIDO":
+            return []
+        replicas = []
+        for copia in copias_por_original.get(caminho, []):
+            if copia in mapa_de_mudancas_originais:
+                continue
+            replica = dict(mudanca, caminho_do_arquivo=copia)
+            replica['justificativa'] = (
+                f"{mudanca.get('justificativa') or ''} (Mesma mudança de '{caminho}', que tinha conteúdo idêntico.)"
+            ).strip()
+            print(f"  [SUCESSO] Mudança de '{caminho}' replicada para a cópia '{copia}'.")
+            replicas.append(replica)
+        return replicas
@@ -0,0 +1,130 @@
+# Arquivo: tools/progresso_llm.py
+
+import os
+import time
+from typing import Any, Callable, Dict, Optional
+
+from tools.orcamento_tokens import obter_tokenizador
+
+# Recebe o progresso de uma geração em streaming. Pode levantar uma exceção
+# para abortar a geração (ex: job cancelado); o provedor fecha o stream.
+CallbackProgresso = Callable[[Dict[str, Any]], None]
+
+# Intervalo mínimo entre duas notificações de progresso de uma mesma geração
+INTERVALO_PROGRESSO_S = float(os.getenv("LLM_INTERVALO_PROGRESSO_S", "5"))
+
+# Tempo máximo de uma geração. Sem valor, vale apenas o timeout da API.
+TEMPO_MAXIMO_GERACAO_S = float(os.getenv("LLM_TEMPO_MAXIMO_GERACAO_S", "0")) or None
+
+# Motivos de parada que indicam resposta incompleta: 'max_tokens' (Anthropic)
+# e 'length' (OpenAI) cortam o JSON da resposta no meio
+MOTIVOS_PARADA_ANTECIPADA = frozenset({"max_tokens", "length", "content_filter", "refusal"})
+
+class GeracaoInterrompida(RuntimeError):
+    """
+    A geração parou antes de uma resposta completa.
+
+    Attributes:
+        motivo (str): Motivo de parada informado pelo provedor, ou 'tempo_maximo'
+        tokens_saida (int): Tokens gerados até a interrupção
+    """
+
+    def __init__(self, motivo: str, tokens_saida: int, mensagem: str):
+        super().__init__(mensagem)
+        self.motivo = motivo
+        self.tokens_saida = tokens_saida
+
+class AcompanhamentoDeGeracao:
+    """
+    Acompanha uma geração em streaming: conta os tokens recebidos, notifica o
+    progresso periodicamente e interrompe gerações que não vão terminar bem.
+
+    Example:
+        >>> acompanhamento = AcompanhamentoDeGeracao("gpt-4.1", "relatorio_sast", 15000, ao_progredir=print)
+        >>> for trecho in stream:
+        ...     acompanhamento.registrar(trecho)
+        >>> acompanhamento.verificar_parada(motivo_parada)
+        >>> texto = acompanhamento.texto
+    """
+
+    def __init__(
+        self,
+        modelo: Optional[str],
+        tipo_tarefa: str,
+        max_saida: int,
+        ao_progredir: Optional[CallbackProgresso] = None,
+        intervalo_s: Optional[float] = None,
+        tempo_maximo_s: Optional[float] = None
+    ):
+        self.modelo = modelo
+        self.tipo_tarefa = tipo_tarefa
+        self.max_saida = max_saida
+        self.ao_progredir = ao_progredir
+        self.intervalo_s = INTERVALO_PROGRESSO_S if intervalo_s is None else intervalo_s
+        self.tempo_maximo_s = tempo_maximo_s if tempo_maximo_s is not None else TEMPO_MAXIMO_GERACAO_S
+        self.tokens_gerados = 0
+        self._tokenizador = obter_tokenizador(modelo)
+        self._trechos = []
+        self._inicio = time.monotonic()
+        self._ultima_notificacao = self._inicio
+
+    @property
+    def texto(self) -> str:
+        return "".join(self._trechos)
+
+    @property
+    def tempo_decorrido_s(self) -> float:
+        return time.monotonic() - self._inicio
+
+    def progresso(self, concluido: bool = False) -> Dict[str, Any]:
+        return {
+            'modelo': self.modelo,
+            'tipo_tarefa': self.tipo_tarefa,
+            'tokens_gerados': self.tokens_gerados,
+            'max_saida': self.max_saida,
+            'tempo_decorrido_s': round(self.tempo_decorrido_s, 1),
+            'concluido': concluido,
+        }
+
+    def registrar(self, trecho: Optional[str]):
+        """
+        Registra um trecho de texto recebido do stream.
+
+        Raises:
+            GeracaoInterrompida: Se a geração exceder o tempo máximo
+        """
+        if trecho:
+            self._trechos.append(trecho)
+            self.tokens_gerados += self._tokenizador.contar(trecho)
+
+        agora = time.monotonic()
+        if self.tempo_maximo_s and agora - self._inicio > self.tempo_maximo_s:
+            raise GeracaoInterrompida(
+                'tempo_maximo', self.tokens_gerados,
+                f"Geração de '{self.tipo_tarefa}' abortada após {self.tempo_decorrido_s:.0f}s "
+                f"({self.tokens_gerados} tokens gerados)."
+            )
+        if self.ao_progredir and agora - self._ultima_notificacao >= self.intervalo_s:
+            self._ultima_notificacao = agora
+            self.ao_progredir(self.progresso())
+
+    def verificar_parada(self, motivo: Optional[str]):
+        """
+        Interrompe a geração assim que o provedor informa uma parada antecipada.
+
+        Raises:
+            GeracaoInterrompida: Se o motivo indicar uma resposta incompleta
+        """
+        if motivo in MOTIVOS_PARADA_ANTECIPADA:
+            raise GeracaoInterrompida(
+                motivo, self.tokens_gerados,
+                f"Geração de '{self.tipo_tarefa}' interrompida pelo provedor (motivo: '{motivo}') após "
+                f"{self.tokens_gerados} tokens; a resposta está incompleta. Aumente max_token_out ou reduza a entrada."
+            )
+
+    def concluir(self, tokens_saida: Optional[int] = None):
+        """Registra a contagem final do provedor e envia a última notificação."""
+        if tokens_saida is not None:
+            self.tokens_gerados = tokens_saida
+        if self.ao_progredir:
+            self.ao_progredir(self.progresso(concluido=True))
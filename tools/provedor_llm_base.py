@@ -0,0 +1,358 @@
+# Arquivo: tools/provedor_llm_base.py
+
+import asyncio
+import os
+from abc import abstractmethod
+from collections import namedtuple
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from domain.interfaces.llm_provider_interface import ILLMProviderComplete
+from domain.interfaces.rag_retriever_interface import IRAGRetriever
+from tools.cache_respostas_llm import CacheDeRespostasLLM, obter_cache_respostas_padrao
+from tools.limitador_cotas_llm import LimitadorDeCotasLLM, Reserva, obter_limitador_padrao
+from tools.orcamento_tokens import OrcamentoDeTokens
+from tools.progresso_llm import CallbackProgresso, GeracaoInterrompida
+from tools.resiliencia_llm import PoliticaDeRetentativas
+from tools.saida_estruturada import RespostaJsonInvalida, extrair_json
+
+# Requisição montada para a API: 'parametros' são os argumentos da chamada ao
+# SDK (modelo, mensagens, limites), que também identificam a resposta no cache
+RequisicaoLLM = namedtuple('RequisicaoLLM', ['tipo_tarefa', 'modelo', 'parametros', 'orcamento', 'chave_cache'])
+
+class ReservaPorTentativa:
+    """
+    Reserva de cota feita a cada tentativa de uma chamada à API.
+
+    Cada retentativa da PoliticaDeRetentativas é uma nova requisição à API:
+    ela reserva de novo a estimativa da requisição e conta no limite de
+    requisições por minuto. Se a tentativa falhar, a parte de saída volta ao
+    balde e só a entrada estimada continua cobrada, pois a API pode tê-la
+    contado; numa GeracaoInterrompida a saída foi gerada e a reserva inteira
+    permanece. A reserva da tentativa bem-sucedida é reconciliada com o uso
+    real em concluir.
+    """
+
+    def __init__(self, limitador_cotas: Optional[LimitadorDeCotasLLM], provedor: str, endpoint: Optional[str], requisicao: RequisicaoLLM):
+        self.limitador_cotas = limitador_cotas
+        self.destino = (provedor, endpoint, requisicao.modelo)
+        self.tokens_entrada = requisicao.orcamento['total_entrada']
+        self.tokens_estimados = requisicao.orcamento['total_entrada'] + requisicao.orcamento['max_saida']
+        self.reserva: Optional[Reserva] = None
+
+    def executar(self, chamada: Callable[[], Any]) -> Any:
+        """Executa uma tentativa da chamada dentro de uma reserva própria."""
+        if self.limitador_cotas is None:
+            return chamada()
+        reserva = self.limitador_cotas.reservar(*self.destino, self.tokens_estimados)
+        try:
+            resultado = chamada()
+        except BaseException as e:
+            self._reconciliar_falha(reserva, e)
+            raise
+        self.reserva = reserva
+        return resultado
+
+    async def executar_async(self, chamada: Callable[[], Awaitable[Any]]) -> Any:
+        """Versão de executar() para as chamadas com o cliente assíncrono."""
+        if self.limitador_cotas is None:
+            return await chamada()
+        reserva = await self.limitador_cotas.reservar_async(*self.destino, self.tokens_estimados)
+        try:
+            resultado = await chamada()
+        except BaseException as e:
+            # Inclui o cancelamento pela reserva de modelo (ProvedorComReserva)
+            self._reconciliar_falha(reserva, e)
+            raise
+        self.reserva = reserva
+        return resultado
+
+    def _reconciliar_falha(self, reserva: Optional[Reserva], erro: BaseException):
+        if not isinstance(erro, GeracaoInterrompida):
+            self.limitador_cotas.reconciliar(reserva, self.tokens_entrada)
+
+    def concluir(self, tokens_usados: int):
+        """Reconcilia a reserva da tentativa bem-sucedida com o uso real."""
+        if self.reserva is not None:
+            self.limitador_cotas.reconciliar(self.reserva, tokens_usados)
+
+class ProvedorLLMBase(ILLMProviderComplete):
+    """
+    Comportamento comum aos provedores de LLM (OpenAI, Anthropic).
+
+    Concentra o fluxo de executar_prompt e executar_prompt_async: carregamento
+    do prompt de sistema, busca de contexto RAG, verificação prévia do
+    orçamento de tokens, consulta ao cache de respostas, reserva de cota por
+    deployment e reconciliação com o uso real. Cada provedor implementa apenas
+    a montagem dos parâmetros da chamada (_montar_parametros) e a chamada à
+    sua API, com o cliente síncrono (_transmitir) e o assíncrono
+    (_transmitir_async), executando cada tentativa pela ReservaPorTentativa
+    recebida. Os métodos especializados da interface completa
+    delegam a executar_prompt.
+
+    Attributes:
+        rag_retriever (Optional[IRAGRetriever]): Recuperador de políticas para o RAG
+        orcamento_tokens (OrcamentoDeTokens): Verificação do tamanho das requisições
+        cache_respostas (Optional[CacheDeRespostasLLM]): Cache de respostas; None se
+            desabilitado (padrão: o do processo, configurado por LLM_CACHE_RESPOSTAS)
+        limitador_cotas (Optional[LimitadorDeCotasLLM]): Cotas TPM/RPM por deployment;
+            None se não houver cotas (padrão: o do processo, configurado por LLM_COTAS)
+        politica_retentativas (PoliticaDeRetentativas): Retentativas das falhas transitórias da API
+    """
+
+    # Identificação do provedor nas cotas e no cache de respostas
+    PROVEDOR = ""
+    endpoint: Optional[str] = None
+
+    def __init__(
+        self,
+        rag_retriever: Optional[IRAGRetriever] = None,
+        orcamento_tokens: Optional[OrcamentoDeTokens] = None,
+        cache_respostas: Optional[CacheDeRespostasLLM] = None,
+        limitador_cotas: Optional[LimitadorDeCotasLLM] = None,
+        politica_retentativas: Optional[PoliticaDeRetentativas] = None
+    ):
+        self.rag_retriever = rag_retriever
+        self.orcamento_tokens = orcamento_tokens or OrcamentoDeTokens()
+        self.cache_respostas = cache_respostas or obter_cache_respostas_padrao()
+        self.limitador_cotas = limitador_cotas or obter_limitador_padrao()
+        self.politica_retentativas = politica_retentativas or PoliticaDeRetentativas()
+
+    def carregar_prompt(self, tipo_tarefa: str) -> str:
+        caminho_prompt = os.path.join(os.path.dirname(__file__), 'prompts', f'{tipo_tarefa}.md')
+        try:
+            with open(caminho_prompt, 'r', encoding='utf-8') as f:
+                return f.read()
+        except FileNotFoundError:
+            raise ValueError(f"Arquivo de prompt para '{tipo_tarefa}' não encontrado: {caminho_prompt}")
+
+    def _buscar_contexto_rag(self, tipo_tarefa: str, usar_rag: bool) -> str:
+        """Recupera as políticas relevantes da empresa, ou '' se o RAG não for usado."""
+        if not (usar_rag and self.rag_retriever):
+            return ""
+        return self.rag_retriever.buscar_politicas(
+            query=f"políticas de {tipo_tarefa} para desenvolvimento de software"
+        ) or ""
+
+    def _verificar_orcamento(
+        self,
+        modelo: Optional[str],
+        prompt_sistema: str,
+        contexto_rag: str,
+        prompt_principal: str,
+        instrucoes_extras: str,
+        max_token_out: int,
+        politica_orcamento: Optional[str]
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Verifica, antes da chamada à API, se a requisição cabe na janela de contexto do modelo.
+
+        Returns:
+            Tuple[str, Dict[str, Any]]: Prompt principal a enviar (truncado pela
+                política 'truncar', se necessário) e a contagem de tokens
+
+        Raises:
+            OrcamentoDeTokensExcedido: Se a requisição não couber (política 'rejeitar')
+            FragmentacaoNecessaria: Se a requisição não couber (política 'fragmentar')
+        """
+        prompt_principal, contagem = self.orcamento_tokens.preparar(
+            model_name=modelo,
+            prompt_sistema=prompt_sistema,
+            contexto_rag=contexto_rag,
+            codigo=prompt_principal,
+            instrucoes=instrucoes_extras,
+            max_token_out=max_token_out,
+            politica=politica_orcamento
+        )
+        print(
+            f"Orçamento de tokens ({contagem['tokenizador']}): {contagem['total_entrada']} de "
+            f"{contagem['limite_entrada']} tokens de entrada (código: {contagem['codigo']})."
+        )
+        return prompt_principal, contagem
+
+    @abstractmethod
+    def _modelo_final(self, model_name: Optional[str]) -> str:
+        """Modelo usado quando a etapa não informa um."""
+        pass
+
+    @abstractmethod
+    def _montar_parametros(
+        self,
+        tipo_tarefa: str,
+        modelo: str,
+        prompt_sistema: str,
+        contexto_rag: str,
+        prompt_principal: str,
+        instrucoes_extras: str,
+        max_saida: int,
+        saida_estruturada: bool
+    ) -> Dict[str, Any]:
+        """Argumentos da chamada ao SDK do provedor (mensagens, modelo, limites)."""
+        pass
+
+    @abstractmethod
+    def _transmitir(
+        self, requisicao: RequisicaoLLM, ao_progredir: Optional[CallbackProgresso], cota: ReservaPorTentativa
+    ) -> Dict[str, Any]:
+        """Chama a API com o cliente síncrono (cada tentativa via cota.executar) e devolve o resultado de executar_prompt."""
+        pass
+
+    @abstractmethod
+    async def _transmitir_async(
+        self, requisicao: RequisicaoLLM, ao_progredir: Optional[CallbackProgresso], cota: ReservaPorTentativa
+    ) -> Dict[str, Any]:
+        """Chama a API com o cliente assíncrono (cada tentativa via cota.executar_async) e devolve o resultado de executar_prompt."""
+        pass
+
+    def _preparar_requisicao(
+        self,
+        tipo_tarefa: str,
+        prompt_principal: str,
+        instrucoes_extras: str,
+        usar_rag: bool,
+        model_name: Optional[str],
+        max_token_out: int,
+        politica_orcamento: Optional[str],
+        saida_estruturada: bool
+    ) -> Tuple[RequisicaoLLM, Optional[Dict[str, Any]]]:
+        """
+        Monta a requisição e consulta o cache de respostas.
+
+        Returns:
+            Tuple[RequisicaoLLM, Optional[Dict[str, Any]]]: Requisição e a resposta
+                gravada no cache, ou None em caso de miss (ou sem cache)
+
+        Raises:
+            OrcamentoDeTokensExcedido: Se a requisição não couber no modelo
+        """
+        modelo = self._modelo_final(model_name)
+        prompt_sistema = self.carregar_prompt(tipo_tarefa)
+        contexto_rag = self._buscar_contexto_rag(tipo_tarefa, usar_rag)
+
+        # Verificação prévia: uma requisição grande demais falha aqui, sem chamar a API
+        prompt_principal, orcamento = self._verificar_orcamento(
+            modelo, prompt_sistema, contexto_rag, prompt_principal, instrucoes_extras, max_token_out, politica_orcamento
+        )
+        parametros = self._montar_parametros(
+            tipo_tarefa, modelo, prompt_sistema, contexto_rag, prompt_principal, instrucoes_extras,
+            orcamento['max_saida'], saida_estruturada
+        )
+
+        if self.cache_respostas is None:
+            return RequisicaoLLM(tipo_tarefa, modelo, parametros, orcamento, None), None
+        chave = self.cache_respostas.chave(provedor=self.PROVEDOR, endpoint=self.endpoint, **parametros)
+        resposta = self.cache_respostas.obter(chave)
+        if resposta is not None:
+            print(f"Resposta de '{tipo_tarefa}' obtida do cache ({resposta.get('tokens_saida', 0)} tokens de saída na chamada original).")
+            resposta = dict(resposta, orcamento_tokens=orcamento)
+        return RequisicaoLLM(tipo_tarefa, modelo, parametros, orcamento, chave), resposta
+
+    def _reserva_por_tentativa(self, requisicao: RequisicaoLLM) -> ReservaPorTentativa:
+        return ReservaPorTentativa(self.limitador_cotas, self.PROVEDOR, self.endpoint, requisicao)
+
+    def _concluir(self, requisicao: RequisicaoLLM, cota: ReservaPorTentativa, resultado: Dict[str, Any]):
+        """
+        Reconcilia a reserva de cota com o uso real e grava a resposta no cache.
+
+        Só respostas que decodificam como JSON são gravadas: uma resposta
+        inválida em cache seria devolvida de novo à nova tentativa do fragmento
+        e às reexecuções da etapa durante todo o TTL.
+        """
+        cota.concluir(resultado.get('tokens_entrada', 0) + resultado.get('tokens_saida', 0))
+        if requisicao.chave_cache is None:
+            return
+        try:
+            extrair_json(resultado.get('reposta_final', ''))
+        except RespostaJsonInvalida:
+            print(f"AVISO: Resposta de '{requisicao.tipo_tarefa}' não é um JSON válido; não será gravada no cache.")
+            return
+        self.cache_respostas.gravar(requisicao.chave_cache, resultado)
+
+    def executar_prompt(
+        self,
+        tipo_tarefa: str,
+        prompt_principal: str,
+        instrucoes_extras: str = "",
+        usar_rag: bool = False,
+        model_name: Optional[str] = None,
+        max_token_out: int = 15000,
+        politica_orcamento: Optional[str] = None,
+        ao_progredir: Optional[CallbackProgresso] = None,
+        saida_estruturada: bool = False
+    ) -> Dict[str, Any]:
+        """Implementação da interface completa com todas as funcionalidades."""
+        requisicao, resposta_em_cache = self._preparar_requisicao(
+            tipo_tarefa, prompt_principal, instrucoes_extras, usar_rag, model_name, max_token_out,
+            politica_orcamento, saida_estruturada
+        )
+        if resposta_em_cache is not None:
+            return resposta_em_cache
+
+        cota = self._reserva_por_tentativa(requisicao)
+        resultado = self._transmitir(requisicao, ao_progredir, cota)
+        self._concluir(requisicao, cota, resultado)
+        return resultado
+
+    async def executar_prompt_async(
+        self,
+        tipo_tarefa: str,
+        prompt_principal: str,
+        instrucoes_extras: str = "",
+        usar_rag: bool = False,
+        model_name: Optional[str] = None,
+        max_token_out: int = 15000,
+        politica_orcamento: Optional[str] = None,
+        ao_progredir: Optional[CallbackProgresso] = None,
+        saida_estruturada: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Versão assíncrona de executar_prompt, com o cliente assíncrono do SDK.
+
+        A geração não ocupa uma thread. A montagem da requisição (prompt, busca
+        RAG, contagem de tokens, consulta ao cache) e o registro do resultado
+        rodam em uma thread, para não bloquear o event loop.
+        """
+        requisicao, resposta_em_cache = await asyncio.to_thread(
+            self._preparar_requisicao, tipo_tarefa, prompt_principal, instrucoes_extras, usar_rag, model_name,
+            max_token_out, politica_orcamento, saida_estruturada
+        )
+        if resposta_em_cache is not None:
+            return resposta_em_cache
+
+        cota = self._reserva_por_tentativa(requisicao)
+        resultado = await self._transmitir_async(requisicao, ao_progredir, cota)
+        await asyncio.to_thread(self._concluir, requisicao, cota, resultado)
+        return resultado
+
+    def executar_prompt_com_rag(
+        self,
+        tipo_tarefa: str,
+        prompt_principal: str,
+        instrucoes_extras: str = "",
+        usar_rag: bool = False,
+        max_token_out: int = 15000
+    ) -> Dict[str, Any]:
+        """Implementação específica para RAG."""
+        return self.executar_prompt(
+            tipo_tarefa=tipo_tarefa,
+            prompt_principal=prompt_principal,
+            instrucoes_extras=instrucoes_extras,
+            usar_rag=usar_rag,
+            max_token_out=max_token_out
+        )
+
+    def executar_prompt_com_modelo(
+        self,
+        tipo_tarefa: str,
+        prompt_principal: str,
+        instrucoes_extras: str = "",
+        model_name: Optional[str] = None,
+        max_token_out: int = 15000
+    ) -> Dict[str, Any]:
+        """Implementação específica para seleção de modelo."""
+        return self.executar_prompt(
+            tipo_tarefa=tipo_tarefa,
+            prompt_principal=prompt_principal,
+            instrucoes_extras=instrucoes_extras,
+            model_name=model_name,
+            max_token_out=max_token_out
+        )
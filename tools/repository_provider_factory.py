@@ -1,8 +1,14 @@
-from typing import Optional
+from typing import Any, Optional
 from domain.interfaces.repository_provider_interface import IRepositoryProvider
+from domain.interfaces.repository_reader_interface import IRepositoryReader
 from tools.github_repository_provider import GitHubRepositoryProvider
 from tools.gitlab_repository_provider import GitLabRepositoryProvider
 from tools.azure_repository_provider import AzureRepositoryProvider
+from tools.github_reader import GitHubRepositoryReader
+from tools.github_archive_reader import GitHubArchiveRepositoryReader
+from tools.git_mirror_reader import GitMirrorRepositoryReader
+from tools.gitlab_reader import GitLabRepositoryReader
+from tools.azure_devops_reader import AzureDevOpsRepositoryReader
 
 def get_repository_provider(repo_name: str) -> IRepositoryProvider:
     """
@@ -167,4 +173,50 @@ def detect_repository_type(repo_name: str) -> str:
     elif isinstance(provider, AzureRepositoryProvider):
         return 'azure'
     else:
-        return 'unknown'
\ No newline at end of file
+        return 'unknown'
+
+def get_repository_reader(repo_name: str, reader_mode: Optional[str] = None, **kwargs: Any) -> IRepositoryReader:
+    """
+    Factory function que retorna o leitor de repositório adequado ao provedor detectado.
+    
+    O provedor é detectado por get_repository_provider e o leitor correspondente
+    recebe a instância do provedor:
+    
+    - GitHub: 'api' (padrão, Git Trees API + blobs em paralelo), 'archive'
+      (tarball em streaming) ou 'mirror' (espelho Git local)
+    - GitLab: árvore recursiva + blobs brutos em paralelo (GitLabRepositoryReader)
+    - Azure DevOps: zip do commit via Items API (AzureDevOpsRepositoryReader)
+    
+    Args:
+        repo_name (str): Nome do repositório no formato específico do provedor
+        reader_mode (Optional[str]): Estratégia de leitura declarada no workflow.
+            Só se aplica ao GitHub; os demais provedores têm uma estratégia única
+        **kwargs: Repassados ao construtor do leitor (ex: workflow_registry, nome_workflow)
+    
+    Returns:
+        IRepositoryReader: Leitor configurado com o provedor detectado
+    
+    Raises:
+        ValueError: Se o nome do repositório ou o reader_mode forem inválidos
+    
+    Example:
+        >>> reader = get_repository_reader("grupo-empresa/projeto-gitlab")  # GitLabRepositoryReader
+        >>> reader = get_repository_reader("myorg/proj/repo")               # AzureDevOpsRepositoryReader
+        >>> reader = get_repository_reader("org/repo", reader_mode="archive")
+    """
+    reader_mode = (reader_mode or 'api').lower()
+    if reader_mode not in ('api', 'archive', 'mirror'):
+        raise ValueError(f"reader_mode '{reader_mode}' inválido. Valores aceitos: 'api', 'archive', 'mirror'.")
+
+    provider = get_repository_provider(repo_name)
+
+    if isinstance(provider, GitLabRepositoryProvider):
+        return GitLabRepositoryReader(repository_provider=provider, **kwargs)
+    if isinstance(provider, AzureRepositoryProvider):
+        return AzureDevOpsRepositoryReader(repository_provider=provider, **kwargs)
+
+    if reader_mode == 'archive':
+        return GitHubArchiveRepositoryReader(repository_provider=provider, **kwargs)
+    if reader_mode == 'mirror':
+        return GitMirrorRepositoryReader(repository_provider=provider, **kwargs)
+    return GitHubRepositoryReader(repository_provider=provider, **kwargs)
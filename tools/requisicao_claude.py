@@ -1,119 +1,239 @@
+import asyncio
 import os
+import json
 import anthropic
 from typing import Optional, Dict, Any
 
-from domain.interfaces.llm_provider_interface import ILLMProviderComplete
 from domain.interfaces.rag_retriever_interface import IRAGRetriever
 from domain.interfaces.secret_manager_interface import ISecretManager
-from tools.azure_secret_manager import AzureSecretManager
+from tools.cache_respostas_llm import CacheDeRespostasLLM
+from tools.limitador_cotas_llm import LimitadorDeCotasLLM
+from tools.orcamento_tokens import OrcamentoDeTokens
+from tools.progresso_llm import AcompanhamentoDeGeracao, CallbackProgresso, GeracaoInterrompida
+from tools.resiliencia_llm import FalhaNaChamadaAoLLM, PoliticaDeRetentativas
+from tools.saida_estruturada import FERRAMENTA_RESPOSTA, obter_esquema
+from tools.pool_clientes_llm import ConfiguracaoDeCliente, PoolDeClientesLLM, obter_pool_clientes_padrao
+from tools.provedor_llm_base import ProvedorLLMBase, RequisicaoLLM, ReservaPorTentativa
 
-class AnthropicClaudeProvider(ILLMProviderComplete):
+# Breakpoint de cache de prompt da Anthropic: o prefixo da requisição até o
+# bloco marcado é reaproveitado por chamadas seguintes com o mesmo prefixo
+CACHE_EFEMERO = {"type": "ephemeral"}
+
+CONFIGURACAO_CLIENTE_ANTHROPIC = ConfiguracaoDeCliente(
+    provedor="anthropic",
+    endpoint=None,
+    nome_segredo="ANTHROPICAPIKEY",
+    fabrica=lambda api_key, limites: anthropic.Anthropic(
+        api_key=api_key,
+        http_client=anthropic.DefaultHttpxClient(limits=limites),
+        # As retentativas ficam com a PoliticaDeRetentativas do provedor
+        max_retries=0
+    ),
+    erros_autenticacao=(anthropic.AuthenticationError,)
+)
+
+# Cliente do SDK para executar_prompt_async, com o mesmo segredo e limites de conexão
+CONFIGURACAO_CLIENTE_ANTHROPIC_ASYNC = CONFIGURACAO_CLIENTE_ANTHROPIC._replace(
+    provedor="anthropic_async",
+    fabrica=lambda api_key, limites: anthropic.AsyncAnthropic(
+        api_key=api_key,
+        http_client=anthropic.DefaultAsyncHttpxClient(limits=limites),
+        max_retries=0
+    )
+)
+
+class AnthropicClaudeProvider(ProvedorLLMBase):
     """
     Implementação refatorada para Claude seguindo princípios SOLID,
     com injeção de dependência para o gerenciador de segredos.
+
+    Com cache_de_prompt (padrão), o prompt de sistema e a mensagem com o código
+    são marcados com breakpoints de cache_control: retentativas, fragmentos de
+    uma análise map-reduce (que compartilham o prompt de sistema) e novas etapas
+    sobre o mesmo snapshot pagam o preço de entrada em cache. As instruções
+    extras ficam depois dos breakpoints, fora do prefixo reaproveitado.
+
+    A resposta é recebida em streaming: o progresso é notificado a ao_progredir
+    e uma parada por 'max_tokens' interrompe a chamada assim que é informada.
+
+    Com saida_estruturada, a resposta é pedida como a entrada de uma ferramenta
+    obrigatória cujo input_schema é o esquema JSON do tipo de tarefa
+    (tools/saida_estruturada.py), em vez de texto livre.
+
+    O cliente do SDK vem do pool de clientes do processo
+    (tools/pool_clientes_llm.py); se a chave for recusada, o cliente é
+    renovado com a chave atual do Key Vault e a chamada é repetida uma vez.
+    O cliente assíncrono (AsyncAnthropic) de executar_prompt_async é obtido
+    do mesmo pool no primeiro uso.
     """
-    def __init__(self, rag_retriever: Optional[IRAGRetriever] = None, secret_manager: ISecretManager = None):
-        self.rag_retriever = rag_retriever
-        self.secret_manager = secret_manager or AzureSecretManager()
+    PROVEDOR = "anthropic"
+
+    def __init__(
+        self,
+        rag_retriever: Optional[IRAGRetriever] = None,
+        secret_manager: ISecretManager = None,
+        orcamento_tokens: Optional[OrcamentoDeTokens] = None,
+        cache_de_prompt: bool = True,
+        pool_clientes: Optional[PoolDeClientesLLM] = None,
+        cache_respostas: Optional[CacheDeRespostasLLM] = None,
+        limitador_cotas: Optional[LimitadorDeCotasLLM] = None,
+        politica_retentativas: Optional[PoliticaDeRetentativas] = None
+    ):
+        super().__init__(
+            rag_retriever=rag_retriever, orcamento_tokens=orcamento_tokens, cache_respostas=cache_respostas,
+            limitador_cotas=limitador_cotas, politica_retentativas=politica_retentativas
+        )
+        # Um secret_manager injetado (ex: testes) ganha um pool próprio
+        self.pool_clientes = pool_clientes or (
+            PoolDeClientesLLM(secret_manager) if secret_manager else obter_pool_clientes_padrao()
+        )
+        self.cache_de_prompt = cache_de_prompt
+        self.anthropic_client_async = None
         
-        print("Configurando o cliente da Anthropic (Claude)...")
         try:
-            anthropic_api_key = self.secret_manager.get_secret("ANTHROPICAPIKEY")
-            self.anthropic_client = anthropic.Anthropic(api_key=anthropic_api_key)
-            print("Cliente da Anthropic (Claude) configurado com sucesso.")
+            self.anthropic_client = self.pool_clientes.obter(CONFIGURACAO_CLIENTE_ANTHROPIC)
         except Exception as e:
             print(f"ERRO CRÍTICO ao configurar o cliente da Anthropic: {e}")
             raise
 
-    def carregar_prompt(self, tipo_tarefa: str) -> str:
-        caminho_prompt = os.path.join(os.path.dirname(__file__), 'prompts', f'{tipo_tarefa}.md')
-        try:
-            with open(caminho_prompt, 'r', encoding='utf-8') as f:
-                return f.read()
-        except FileNotFoundError:
-            raise ValueError(f"Arquivo de prompt para '{tipo_tarefa}' não encontrado: {caminho_prompt}")
+    def _modelo_final(self, model_name: Optional[str]) -> str:
+        return model_name or "claude-3-opus-20240229"
 
-    def executar_prompt(
+    def _montar_parametros(
         self,
         tipo_tarefa: str,
+        modelo: str,
+        prompt_sistema: str,
+        contexto_rag: str,
         prompt_principal: str,
-        instrucoes_extras: str = "",
-        usar_rag: bool = False,
-        model_name: Optional[str] = None,
-        max_token_out: int = 15000
+        instrucoes_extras: str,
+        max_saida: int,
+        saida_estruturada: bool
     ) -> Dict[str, Any]:
-        """Implementação da interface completa com todas as funcionalidades."""
-        modelo_final = model_name or "claude-3-opus-20240229"
-        
-        prompt_sistema = self.carregar_prompt(tipo_tarefa)
-
-        if usar_rag and self.rag_retriever:
+        if contexto_rag:
             print("[Claude Handler] Usando o RAG retriever injetado...")
-            politicas_relevantes = self.rag_retriever.buscar_politicas(
-                query=f"políticas de {tipo_tarefa} para desenvolvimento de software"
-            )
-            prompt_sistema = f"{prompt_sistema}\n\n--- CONTEXTO ADICIONAL ---\n{politicas_relevantes}"
+            prompt_sistema = f"{prompt_sistema}\n\n--- CONTEXTO ADICIONAL ---\n{contexto_rag}"
+
+        bloco_sistema = {"type": "text", "text": prompt_sistema}
+        bloco_codigo = {"type": "text", "text": f"--- CÓDIGO PARA ANÁLISE ---\n{prompt_principal}"}
+        if self.cache_de_prompt:
+            bloco_sistema["cache_control"] = CACHE_EFEMERO
+            bloco_codigo["cache_control"] = CACHE_EFEMERO
 
         mensagens = [
-            {"role": "user", "content": f"--- CÓDIGO PARA ANÁLISE ---\n{prompt_principal}"},
+            {"role": "user", "content": [bloco_codigo]},
         ]
         if instrucoes_extras.strip():
             mensagens.append({"role": "user", "content": f"--- INSTRUÇÕES EXTRAS ---\n{instrucoes_extras}"})
 
+        parametros = {
+            "model": modelo,
+            "system": [bloco_sistema],
+            "messages": mensagens,
+            "max_tokens": max_saida,
+            "temperature": 0.3
+        }
+        if saida_estruturada:
+            parametros["tools"] = [{
+                "name": FERRAMENTA_RESPOSTA,
+                "description": "Registra a resposta final da tarefa no formato JSON exigido.",
+                "input_schema": obter_esquema(tipo_tarefa)
+            }]
+            parametros["tool_choice"] = {"type": "tool", "name": FERRAMENTA_RESPOSTA}
+        return parametros
+
+    def _transmitir(
+        self, requisicao: RequisicaoLLM, ao_progredir: Optional[CallbackProgresso], cota: ReservaPorTentativa
+    ) -> Dict[str, Any]:
         try:
-            print(f"[Claude Handler] Chamando o modelo: '{modelo_final}'")
-            
-            response = self.anthropic_client.messages.create(
-                model=modelo_final,
-                system=prompt_sistema,  
-                messages=mensagens,
-                max_tokens=max_token_out,
-                temperature=0.3,
-                timeout=900.0
+            print(f"[Claude Handler] Chamando o modelo: '{requisicao.modelo}'")
+
+            def transmitir(cliente):
+                acompanhamento = AcompanhamentoDeGeracao(
+                    requisicao.modelo, requisicao.tipo_tarefa, requisicao.orcamento['max_saida'], ao_progredir
+                )
+                with cliente.messages.stream(timeout=900.0, **requisicao.parametros) as stream:
+                    for evento in stream:
+                        self._registrar_evento(acompanhamento, evento)
+                    return stream.get_final_message(), acompanhamento
+
+            (response, acompanhamento), self.anthropic_client = self.politica_retentativas.executar(
+                lambda: cota.executar(
+                    lambda: self.pool_clientes.chamar(CONFIGURACAO_CLIENTE_ANTHROPIC, self.anthropic_client, transmitir)
+                ),
+                requisicao.modelo
             )
-            
-            conteudo_resposta = response.content[0].text
-            
-            return {
-                'reposta_final': conteudo_resposta,
-                'tokens_entrada': response.usage.input_tokens,
-                'tokens_saida': response.usage.output_tokens
-            }
-            
+            return self._montar_resultado(requisicao, response, acompanhamento)
+        except GeracaoInterrompida as e:
+            print(f"ERRO: {e}")
+            raise
         except Exception as e:
-            print(f"ERRO: Falha na chamada à API da Anthropic para análise '{tipo_tarefa}'. Causa: {e}")
-            raise RuntimeError(f"Erro ao comunicar com a API da Anthropic: {e}") from e
-    
-    def executar_prompt_com_rag(
-        self,
-        tipo_tarefa: str,
-        prompt_principal: str,
-        instrucoes_extras: str = "",
-        usar_rag: bool = False,
-        max_token_out: int = 15000
-    ) -> Dict[str, Any]:
-        """Implementação específica para RAG."""
-        return self.executar_prompt(
-            tipo_tarefa=tipo_tarefa,
-            prompt_principal=prompt_principal,
-            instrucoes_extras=instrucoes_extras,
-            usar_rag=usar_rag,
-            max_token_out=max_token_out
-        )
-    
-    def executar_prompt_com_modelo(
-        self,
-        tipo_tarefa: str,
-        prompt_principal: str,
-        instrucoes_extras: str = "",
-        model_name: Optional[str] = None,
-        max_token_out: int = 15000
+            raise self._falha(requisicao, e) from e
+
+    async def _transmitir_async(
+        self, requisicao: RequisicaoLLM, ao_progredir: Optional[CallbackProgresso], cota: ReservaPorTentativa
     ) -> Dict[str, Any]:
-        """Implementação específica para seleção de modelo."""
-        return self.executar_prompt(
-            tipo_tarefa=tipo_tarefa,
-            prompt_principal=prompt_principal,
-            instrucoes_extras=instrucoes_extras,
-            model_name=model_name,
-            max_token_out=max_token_out
-        )
+        try:
+            if self.anthropic_client_async is None:
+                self.anthropic_client_async = await asyncio.to_thread(
+                    self.pool_clientes.obter, CONFIGURACAO_CLIENTE_ANTHROPIC_ASYNC
+                )
+            print(f"[Claude Handler] Chamando o modelo (async): '{requisicao.modelo}'")
+
+            async def transmitir(cliente):
+                acompanhamento = AcompanhamentoDeGeracao(
+                    requisicao.modelo, requisicao.tipo_tarefa, requisicao.orcamento['max_saida'], ao_progredir
+                )
+                async with cliente.messages.stream(timeout=900.0, **requisicao.parametros) as stream:
+                    async for evento in stream:
+                        self._registrar_evento(acompanhamento, evento)
+                    return await stream.get_final_message(), acompanhamento
+
+            (response, acompanhamento), self.anthropic_client_async = await self.politica_retentativas.executar_async(
+                lambda: cota.executar_async(lambda: self.pool_clientes.chamar_async(
+                    CONFIGURACAO_CLIENTE_ANTHROPIC_ASYNC, self.anthropic_client_async, transmitir
+                )),
+                requisicao.modelo
+            )
+            return self._montar_resultado(requisicao, response, acompanhamento)
+        except GeracaoInterrompida as e:
+            print(f"ERRO: {e}")
+            raise
+        except Exception as e:
+            raise self._falha(requisicao, e) from e
+
+    @staticmethod
+    def _registrar_evento(acompanhamento: AcompanhamentoDeGeracao, evento: Any):
+        if evento.type == "text":
+            acompanhamento.registrar(evento.text)
+        elif evento.type == "input_json":
+            acompanhamento.registrar(evento.partial_json)
+        elif evento.type == "message_delta":
+            acompanhamento.verificar_parada(evento.delta.stop_reason)
+
+    @staticmethod
+    def _montar_resultado(requisicao: RequisicaoLLM, response: Any, acompanhamento: AcompanhamentoDeGeracao) -> Dict[str, Any]:
+        acompanhamento.concluir(response.usage.output_tokens)
+
+        conteudo_resposta = acompanhamento.texto
+        for bloco in response.content:
+            if getattr(bloco, 'type', None) == "tool_use" and bloco.name == FERRAMENTA_RESPOSTA:
+                conteudo_resposta = json.dumps(bloco.input, ensure_ascii=False)
+        tokens_cache_leitura = getattr(response.usage, 'cache_read_input_tokens', None) or 0
+        tokens_cache_escrita = getattr(response.usage, 'cache_creation_input_tokens', None) or 0
+        if tokens_cache_leitura or tokens_cache_escrita:
+            print(f"[Claude Handler] Cache de prompt: {tokens_cache_leitura} tokens lidos, {tokens_cache_escrita} tokens gravados.")
+
+        return {
+            'reposta_final': conteudo_resposta,
+            'tokens_entrada': response.usage.input_tokens,
+            'tokens_saida': response.usage.output_tokens,
+            'tokens_cache_leitura': tokens_cache_leitura,
+            'tokens_cache_escrita': tokens_cache_escrita,
+            'orcamento_tokens': requisicao.orcamento
+        }
+
+    @staticmethod
+    def _falha(requisicao: RequisicaoLLM, erro: Exception) -> FalhaNaChamadaAoLLM:
+        print(f"ERRO: Falha na chamada à API da Anthropic para análise '{requisicao.tipo_tarefa}'. Causa: {erro}")
+        return FalhaNaChamadaAoLLM(f"Erro ao comunicar com a API da Anthropic: {erro}", erro)
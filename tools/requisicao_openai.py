@@ -1,31 +1,95 @@
+import asyncio
 import os
-from openai import AzureOpenAI
+import openai
+from openai import AsyncAzureOpenAI, AzureOpenAI
 from typing import Optional, Dict, Any
 
-from domain.interfaces.llm_provider_interface import ILLMProviderComplete
 from domain.interfaces.rag_retriever_interface import IRAGRetriever
 from domain.interfaces.secret_manager_interface import ISecretManager
-from tools.azure_secret_manager import AzureSecretManager
+from tools.cache_respostas_llm import CacheDeRespostasLLM
+from tools.limitador_cotas_llm import LimitadorDeCotasLLM
+from tools.orcamento_tokens import OrcamentoDeTokens
+from tools.progresso_llm import AcompanhamentoDeGeracao, CallbackProgresso, GeracaoInterrompida
+from tools.resiliencia_llm import FalhaNaChamadaAoLLM, PoliticaDeRetentativas
+from tools.saida_estruturada import obter_esquema
+from tools.pool_clientes_llm import ConfiguracaoDeCliente, PoolDeClientesLLM, obter_pool_clientes_padrao
+from tools.provedor_llm_base import ProvedorLLMBase, RequisicaoLLM, ReservaPorTentativa
 
-class OpenAILLMProvider(ILLMProviderComplete):
+VERSAO_API_AZURE_OPENAI = "2025-03-01-preview"
+
+def configuracao_cliente_azure_openai(azure_endpoint: str) -> ConfiguracaoDeCliente:
+    return ConfiguracaoDeCliente(
+        provedor="azure_openai",
+        endpoint=azure_endpoint,
+        nome_segredo="azure-openai-modelos",
+        fabrica=lambda api_key, limites: AzureOpenAI(
+            azure_endpoint=azure_endpoint,
+            api_version=VERSAO_API_AZURE_OPENAI,
+            api_key=api_key,
+            http_client=openai.DefaultHttpxClient(limits=limites),
+            # As retentativas ficam com a PoliticaDeRetentativas do provedor
+            max_retries=0,
+        ),
+        erros_autenticacao=(openai.AuthenticationError,)
+    )
+
+def configuracao_cliente_azure_openai_async(azure_endpoint: str) -> ConfiguracaoDeCliente:
+    """Cliente do SDK para executar_prompt_async, com o mesmo segredo e limites de conexão."""
+    return configuracao_cliente_azure_openai(azure_endpoint)._replace(
+        provedor="azure_openai_async",
+        fabrica=lambda api_key, limites: AsyncAzureOpenAI(
+            azure_endpoint=azure_endpoint,
+            api_version=VERSAO_API_AZURE_OPENAI,
+            api_key=api_key,
+            http_client=openai.DefaultAsyncHttpxClient(limits=limites),
+            max_retries=0,
+        )
+    )
+
+class OpenAILLMProvider(ProvedorLLMBase):
     """
     Implementação refatorada que implementa a interface completa de LLM,
     seguindo o princípio da Inversão de Dependência.
+
+    A resposta é recebida em streaming: o progresso é notificado a ao_progredir
+    e uma parada por 'length' interrompe a chamada assim que é informada.
+
+    Com saida_estruturada, a resposta é restrita ao esquema JSON do tipo de
+    tarefa (tools/saida_estruturada.py) via response_format.
+
+    O cliente do SDK vem do pool de clientes do processo, por endpoint
+    (tools/pool_clientes_llm.py); se a chave for recusada, o cliente é
+    renovado com a chave atual do Key Vault e a chamada é repetida uma vez.
+    O cliente assíncrono (AsyncAzureOpenAI) de executar_prompt_async é obtido
+    do mesmo pool no primeiro uso.
     """
-    def __init__(self, rag_retriever: Optional[IRAGRetriever] = None, secret_manager: ISecretManager = None):
-        self.rag_retriever = rag_retriever
-        self.secret_manager = secret_manager or AzureSecretManager()
+    PROVEDOR = "azure_openai"
+
+    def __init__(
+        self,
+        rag_retriever: Optional[IRAGRetriever] = None,
+        secret_manager: ISecretManager = None,
+        orcamento_tokens: Optional[OrcamentoDeTokens] = None,
+        pool_clientes: Optional[PoolDeClientesLLM] = None,
+        cache_respostas: Optional[CacheDeRespostasLLM] = None,
+        limitador_cotas: Optional[LimitadorDeCotasLLM] = None,
+        politica_retentativas: Optional[PoliticaDeRetentativas] = None
+    ):
+        super().__init__(
+            rag_retriever=rag_retriever, orcamento_tokens=orcamento_tokens, cache_respostas=cache_respostas,
+            limitador_cotas=limitador_cotas, politica_retentativas=politica_retentativas
+        )
+        # Um secret_manager injetado (ex: testes) ganha um pool próprio
+        self.pool_clientes = pool_clientes or (
+            PoolDeClientesLLM(secret_manager) if secret_manager else obter_pool_clientes_padrao()
+        )
+        self.openai_client_async = None
         
         try:
-            self.azure_endpoint = os.environ["AZURE_OPENAI_MODELS"]
-            
-            api_key = self.secret_manager.get_secret("azure-openai-modelos")
-            
-            self.openai_client = AzureOpenAI(
-                azure_endpoint=self.azure_endpoint,
-                api_version="2025-03-01-preview",
-                api_key=api_key,
-            )
+            self.azure_endpoint = self.endpoint = os.environ["AZURE_OPENAI_MODELS"]
+            self.configuracao_cliente = configuracao_cliente_azure_openai(self.azure_endpoint)
+            self.configuracao_cliente_async = configuracao_cliente_azure_openai_async(self.azure_endpoint)
+            self.openai_client = self.pool_clientes.obter(self.configuracao_cliente)
 
         except KeyError as e:
             raise EnvironmentError(f"ERRO: A variável de ambiente {e} não foi configurada para o Azure OpenAI.")
@@ -33,98 +97,134 @@ class OpenAILLMProvider(ILLMProviderComplete):
             print(f"ERRO CRÍTICO ao configurar o cliente do Azure OpenAI: {e}")
             raise
 
-    def carregar_prompt(self, tipo_tarefa: str) -> str:
-        caminho_prompt = os.path.join(os.path.dirname(__file__), 'prompts', f'{tipo_tarefa}.md')
-        try:
-            with open(caminho_prompt, 'r', encoding='utf-8') as f:
-                return f.read()
-        except FileNotFoundError:
-            raise ValueError(f"Arquivo de prompt para '{tipo_tarefa}' não encontrado: {caminho_prompt}")
-    
-    def executar_prompt(
+    def _modelo_final(self, model_name: Optional[str]) -> str:
+        return model_name or os.environ.get("AZURE_DEFAULT_DEPLOYMENT_NAME")
+
+    def _montar_parametros(
         self,
         tipo_tarefa: str,
+        modelo: str,
+        prompt_sistema: str,
+        contexto_rag: str,
         prompt_principal: str,
-        instrucoes_extras: str = "",
-        usar_rag: bool = False,
-        model_name: Optional[str] = None,
-        max_token_out: int = 15000
+        instrucoes_extras: str,
+        max_saida: int,
+        saida_estruturada: bool
     ) -> Dict[str, Any]:
-        """Implementação da interface completa com todas as funcionalidades."""
-        modelo_final = model_name or os.environ.get("AZURE_DEFAULT_DEPLOYMENT_NAME")
-        
-        prompt_sistema_base = self.carregar_prompt(tipo_tarefa)
-        prompt_sistema_final = prompt_sistema_base
+        if contexto_rag:
+            prompt_sistema = (
+                f"{prompt_sistema}\n\n"
+                "--- POLÍTICAS RELEVANTES DA EMPRESA (CONTEXTO RAG) ---\n"
+                f"{contexto_rag}"
+            )
+
+        mensagens = [
+            {"role": "system", "content": prompt_sistema},
+            {'role': 'user', 'content': prompt_principal},
+            {'role': 'user',
+             'content': f'Instruções extras do usuário: {instrucoes_extras}' if instrucoes_extras.strip() else 'Nenhuma instrução extra.'}
+        ]
 
-        if usar_rag and self.rag_retriever:
-            politicas_relevantes = self.rag_retriever.buscar_politicas(
-                query=f"políticas de {tipo_tarefa} para desenvolvimento de software"
+        parametros = {
+            "model": modelo,
+            "messages": mensagens,
+            "temperature": 0.3,
+            "max_completion_tokens": max_saida
+        }
+        if saida_estruturada:
+            parametros['response_format'] = {
+                "type": "json_schema",
+                "json_schema": {"name": tipo_tarefa, "schema": obter_esquema(tipo_tarefa), "strict": False}
+            }
+        return parametros
+
+    def _transmitir(
+        self, requisicao: RequisicaoLLM, ao_progredir: Optional[CallbackProgresso], cota: ReservaPorTentativa
+    ) -> Dict[str, Any]:
+        def transmitir(cliente):
+            acompanhamento = AcompanhamentoDeGeracao(
+                requisicao.modelo, requisicao.tipo_tarefa, requisicao.orcamento['max_saida'], ao_progredir
             )
-            prompt_sistema_final = (
-                f"{prompt_sistema_base}\n\n"
-                "--- POLÍTICAS RELEVANTES DA EMPRESA (CONTEXTO RAG) ---\n"
-                f"{politicas_relevantes}"
+            stream = cliente.chat.completions.create(
+                stream=True, stream_options={"include_usage": True}, **requisicao.parametros
             )
-        
+            usage = None
+            try:
+                for chunk in stream:
+                    usage = self._registrar_chunk(acompanhamento, chunk) or usage
+            finally:
+                stream.close()
+            return usage, acompanhamento
+
         try:
-            mensagens = [
-                {"role": "system", "content": prompt_sistema_final},
-                {'role': 'user', 'content': prompt_principal},
-                {'role': 'user',
-                 'content': f'Instruções extras do usuário: {instrucoes_extras}' if instrucoes_extras.strip() else 'Nenhuma instrução extra.'}
-            ]
-                
-            response = self.openai_client.chat.completions.create(
-                model=modelo_final,
-                messages=mensagens,
-                temperature=0.3,
-                max_completion_tokens=max_token_out
+            (usage, acompanhamento), self.openai_client = self.politica_retentativas.executar(
+                lambda: cota.executar(
+                    lambda: self.pool_clientes.chamar(self.configuracao_cliente, self.openai_client, transmitir)
+                ),
+                requisicao.modelo
             )
+            return self._montar_resultado(requisicao, usage, acompanhamento)
+        except GeracaoInterrompida as e:
+            print(f"ERRO: {e}")
+            raise
+        except Exception as e:
+            raise self._falha(requisicao, e) from e
 
-            conteudo_resposta = (response.choices[0].message.content or "").strip()
-            tokens_entrada = response.usage.prompt_tokens
-            tokens_saida = response.usage.completion_tokens
+    async def _transmitir_async(
+        self, requisicao: RequisicaoLLM, ao_progredir: Optional[CallbackProgresso], cota: ReservaPorTentativa
+    ) -> Dict[str, Any]:
+        async def transmitir(cliente):
+            acompanhamento = AcompanhamentoDeGeracao(
+                requisicao.modelo, requisicao.tipo_tarefa, requisicao.orcamento['max_saida'], ao_progredir
+            )
+            stream = await cliente.chat.completions.create(
+                stream=True, stream_options={"include_usage": True}, **requisicao.parametros
+            )
+            usage = None
+            try:
+                async for chunk in stream:
+                    usage = self._registrar_chunk(acompanhamento, chunk) or usage
+            finally:
+                await stream.close()
+            return usage, acompanhamento
 
-            return {
-                'reposta_final': conteudo_resposta,
-                'tokens_entrada': tokens_entrada,
-                'tokens_saida': tokens_saida
-            }
-            
+        try:
+            if self.openai_client_async is None:
+                self.openai_client_async = await asyncio.to_thread(self.pool_clientes.obter, self.configuracao_cliente_async)
+            (usage, acompanhamento), self.openai_client_async = await self.politica_retentativas.executar_async(
+                lambda: cota.executar_async(
+                    lambda: self.pool_clientes.chamar_async(self.configuracao_cliente_async, self.openai_client_async, transmitir)
+                ),
+                requisicao.modelo
+            )
+            return self._montar_resultado(requisicao, usage, acompanhamento)
+        except GeracaoInterrompida as e:
+            print(f"ERRO: {e}")
+            raise
         except Exception as e:
-            print(f"ERRO: Falha na chamada à API da OpenAI para o modelo '{modelo_final}'. Causa: {e}")
-            raise RuntimeError(f"Erro ao comunicar com a OpenAI: {e}") from e
-    
-    def executar_prompt_com_rag(
-        self,
-        tipo_tarefa: str,
-        prompt_principal: str,
-        instrucoes_extras: str = "",
-        usar_rag: bool = False,
-        max_token_out: int = 15000
-    ) -> Dict[str, Any]:
-        """Implementação específica para RAG."""
-        return self.executar_prompt(
-            tipo_tarefa=tipo_tarefa,
-            prompt_principal=prompt_principal,
-            instrucoes_extras=instrucoes_extras,
-            usar_rag=usar_rag,
-            max_token_out=max_token_out
-        )
-    
-    def executar_prompt_com_modelo(
-        self,
-        tipo_tarefa: str,
-        prompt_principal: str,
-        instrucoes_extras: str = "",
-        model_name: Optional[str] = None,
-        max_token_out: int = 15000
-    ) -> Dict[str, Any]:
-        """Implementação específica para seleção de modelo."""
-        return self.executar_prompt(
-            tipo_tarefa=tipo_tarefa,
-            prompt_principal=prompt_principal,
-            instrucoes_extras=instrucoes_extras,
-            model_name=model_name,
-            max_token_out=max_token_out
-        )
+            raise self._falha(requisicao, e) from e
+
+    @staticmethod
+    def _registrar_chunk(acompanhamento: AcompanhamentoDeGeracao, chunk: Any) -> Optional[Any]:
+        """Registra o texto do chunk e devolve o uso de tokens, informado no último chunk."""
+        if chunk.choices:
+            acompanhamento.registrar(chunk.choices[0].delta.content)
+            acompanhamento.verificar_parada(chunk.choices[0].finish_reason)
+        return chunk.usage
+
+    @staticmethod
+    def _montar_resultado(requisicao: RequisicaoLLM, usage: Any, acompanhamento: AcompanhamentoDeGeracao) -> Dict[str, Any]:
+        tokens_entrada = usage.prompt_tokens if usage else 0
+        tokens_saida = usage.completion_tokens if usage else acompanhamento.tokens_gerados
+        acompanhamento.concluir(tokens_saida)
+        return {
+            'reposta_final': acompanhamento.texto.strip(),
+            'tokens_entrada': tokens_entrada,
+            'tokens_saida': tokens_saida,
+            'orcamento_tokens': requisicao.orcamento
+        }
+
+    @staticmethod
+    def _falha(requisicao: RequisicaoLLM, erro: Exception) -> FalhaNaChamadaAoLLM:
+        print(f"ERRO: Falha na chamada à API da OpenAI para o modelo '{requisicao.modelo}'. Causa: {erro}")
+        return FalhaNaChamadaAoLLM(f"Erro ao comunicar com a OpenAI: {erro}", erro)
@@ -0,0 +1,314 @@
+# Arquivo: tools/resiliencia_llm.py
+
+import asyncio
+import os
+import random
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError as TempoEsgotado, wait
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import anthropic
+import openai
+
+from domain.interfaces.llm_provider_interface import ILLMProvider
+from tools.progresso_llm import CallbackProgresso
+
+MAX_TENTATIVAS = int(os.getenv("LLM_MAX_TENTATIVAS", "4"))
+ESPERA_BASE_S = float(os.getenv("LLM_ESPERA_BASE_S", "1"))
+ESPERA_MAXIMA_S = float(os.getenv("LLM_ESPERA_MAXIMA_S", "60"))
+
+# Status HTTP transitórios: timeout, conflito, limite de taxa, erros do servidor
+# e sobrecarga da Anthropic (529). Os demais (400, 401, 403, 404, 422) são fatais.
+STATUS_RETENTAVEIS = frozenset({408, 409, 429, 500, 502, 503, 504, 529})
+STATUS_LIMITE_DE_TAXA = frozenset({429, 529})
+
+# Falhas de conexão e timeouts (APITimeoutError herda de APIConnectionError)
+ERROS_DE_CONEXAO = (openai.APIConnectionError, anthropic.APIConnectionError)
+
+# Cabeçalhos de limite da OpenAI com a duração até o reabastecimento (ex: '1s', '6m0s', '20ms')
+CABECALHOS_RESET = ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens")
+_PADRAO_DURACAO = re.compile(r'(\d+(?:\.\d+)?)(ms|h|m|s)')
+_SEGUNDOS_POR_UNIDADE = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}
+
+def _status(erro: BaseException) -> Optional[int]:
+    return getattr(erro, 'status_code', None)
+
+def erro_retentavel(erro: BaseException) -> bool:
+    """Se a falha é transitória e a mesma chamada pode ser repetida."""
+    return isinstance(erro, ERROS_DE_CONEXAO) or _status(erro) in STATUS_RETENTAVEIS
+
+def erro_de_limite_de_taxa(erro: BaseException) -> bool:
+    return _status(erro) in STATUS_LIMITE_DE_TAXA
+
+def _duracao_em_segundos(valor: str) -> Optional[float]:
+    partes = _PADRAO_DURACAO.findall(valor)
+    if not partes or "".join(numero + unidade for numero, unidade in partes) != valor.strip():
+        return None
+    return sum(float(numero) * _SEGUNDOS_POR_UNIDADE[unidade] for numero, unidade in partes)
+
+def espera_indicada(erro: BaseException) -> Optional[float]:
+    """
+    Espera indicada pela API nos cabeçalhos da resposta de erro, em segundos.
+
+    Considera 'retry-after-ms', 'retry-after' (segundos ou data HTTP) e, na
+    falta deles, o maior dos 'x-ratelimit-reset-*'.
+    """
+    cabecalhos = getattr(getattr(erro, 'response', None), 'headers', None)
+    if not cabecalhos:
+        return None
+
+    if cabecalhos.get("retry-after-ms"):
+        try:
+            return float(cabecalhos["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+    if cabecalhos.get("retry-after"):
+        valor = cabecalhos["retry-after"]
+        try:
+            return float(valor)
+        except ValueError:
+            try:
+                return max(0.0, (parsedate_to_datetime(valor) - datetime.now(timezone.utc)).total_seconds())
+            except (TypeError, ValueError):
+                pass
+
+    resets = [_duracao_em_segundos(cabecalhos[nome]) for nome in CABECALHOS_RESET if cabecalhos.get(nome)]
+    resets = [reset for reset in resets if reset is not None]
+    return max(resets) if resets else None
+
+class FalhaNaChamadaAoLLM(RuntimeError):
+    """
+    Falha na chamada à API do LLM, classificada a partir da causa.
+
+    Attributes:
+        retentavel (bool): Se a falha era transitória (as retentativas se esgotaram)
+        limite_de_taxa (bool): Se a API recusou a chamada por limite de taxa ou sobrecarga
+    """
+
+    def __init__(self, mensagem: str, causa: BaseException):
+        super().__init__(mensagem)
+        self.retentavel = erro_retentavel(causa)
+        self.limite_de_taxa = erro_de_limite_de_taxa(causa)
+
+class PoliticaDeRetentativas:
+    """
+    Repete chamadas ao LLM que falham por motivos transitórios.
+
+    A espera entre tentativas segue o backoff exponencial com jitter completo
+    (aleatória entre 0 e ESPERA_BASE_S * 2^tentativa, até ESPERA_MAXIMA_S). Se
+    a API indicar quando tentar de novo (Retry-After, x-ratelimit-reset-*), a
+    indicação é respeitada, com um pequeno jitter para que os workers não
+    voltem todos ao mesmo tempo. Falhas fatais (requisição inválida,
+    permissão, modelo inexistente) são levantadas na primeira ocorrência.
+
+    Example:
+        >>> politica = PoliticaDeRetentativas(max_tentativas=4)
+        >>> resposta = politica.executar(lambda: cliente.chat.completions.create(...), "gpt-4.1")
+    """
+
+    def __init__(
+        self,
+        max_tentativas: Optional[int] = None,
+        espera_base_s: Optional[float] = None,
+        espera_maxima_s: Optional[float] = None,
+        dormir: Callable[[float], None] = time.sleep,
+        dormir_async: Callable[[float], Awaitable[None]] = asyncio.sleep
+    ):
+        self.max_tentativas = MAX_TENTATIVAS if max_tentativas is None else max_tentativas
+        self.espera_base_s = ESPERA_BASE_S if espera_base_s is None else espera_base_s
+        self.espera_maxima_s = ESPERA_MAXIMA_S if espera_maxima_s is None else espera_maxima_s
+        self.dormir = dormir
+        self.dormir_async = dormir_async
+
+    def calcular_espera(self, erro: BaseException, tentativa: int) -> float:
+        """Espera antes da próxima tentativa, após a falha da tentativa indicada (a partir de 1)."""
+        indicada = espera_indicada(erro)
+        if indicada is not None:
+            return min(indicada + random.uniform(0, self.espera_base_s), self.espera_maxima_s)
+        return random.uniform(0, min(self.espera_base_s * 2 ** (tentativa - 1), self.espera_maxima_s))
+
+    def executar(self, chamada: Callable[[], Any], descricao: str = "LLM") -> Any:
+        """
+        Raises:
+            Exception: A falha fatal, ou a última falha transitória após max_tentativas
+        """
+        for tentativa in range(1, self.max_tentativas + 1):
+            try:
+                return chamada()
+            except Exception as e:
+                if not erro_retentavel(e) or tentativa == self.max_tentativas:
+                    raise
+                self.dormir(self._espera_apos_falha(e, tentativa, descricao))
+
+    async def executar_async(self, chamada: Callable[[], Awaitable[Any]], descricao: str = "LLM") -> Any:
+        """Versão de executar() para chamadas assíncronas; a espera não bloqueia o event loop."""
+        for tentativa in range(1, self.max_tentativas + 1):
+            try:
+                return await chamada()
+            except Exception as e:
+                if not erro_retentavel(e) or tentativa == self.max_tentativas:
+                    raise
+                await self.dormir_async(self._espera_apos_falha(e, tentativa, descricao))
+
+    def _espera_apos_falha(self, erro: BaseException, tentativa: int, descricao: str) -> float:
+        espera = self.calcular_espera(erro, tentativa)
+        print(
+            f"AVISO: Falha transitória na chamada a '{descricao}' (tentativa {tentativa} de "
+            f"{self.max_tentativas}): {erro}. Nova tentativa em {espera:.1f}s."
+        )
+        return espera
+
+class GeracaoSuperada(RuntimeError):
+    """A outra requisição da cobertura terminou antes; esta geração é abandonada."""
+
+class ProvedorComReserva(ILLMProvider):
+    """
+    Cobre as chamadas de uma etapa com um modelo de reserva (requisição hedged).
+
+    A chamada vai primeiro ao modelo principal. Se ele não responder em
+    latencia_maxima_s, a mesma chamada é enviada também ao modelo de reserva e
+    vale a primeira resposta bem-sucedida; se ele falhar por limite de taxa
+    depois de esgotar as retentativas, a chamada vai só para a reserva. A
+    geração que perder é abandonada na sua próxima notificação de progresso
+    (em executar_prompt_async, a tarefa que perder é também cancelada).
+
+    Attributes:
+        primario (ILLMProvider): Provedor do modelo da etapa
+        reserva (ILLMProvider): Provedor do modelo de reserva (pode ser de outro fornecedor)
+        modelo_reserva (str): Nome do modelo de reserva
+        latencia_maxima_s (Optional[float]): Tempo de espera pelo principal antes
+            de acionar a reserva; None aciona a reserva apenas por limite de taxa
+    """
+
+    def __init__(self, primario: ILLMProvider, reserva: ILLMProvider, modelo_reserva: str, latencia_maxima_s: Optional[float] = None):
+        self.primario = primario
+        self.reserva = reserva
+        self.modelo_reserva = modelo_reserva
+        self.latencia_maxima_s = latencia_maxima_s
+
+    def executar_prompt(
+        self,
+        tipo_tarefa: str,
+        prompt_principal: str,
+        instrucoes_extras: str = "",
+        usar_rag: bool = False,
+        model_name: Optional[str] = None,
+        max_token_out: int = 15000,
+        politica_orcamento: Optional[str] = None,
+        ao_progredir: Optional[CallbackProgresso] = None,
+        saida_estruturada: bool = False
+    ) -> Dict[str, Any]:
+        parametros = dict(
+            tipo_tarefa=tipo_tarefa, prompt_principal=prompt_principal, instrucoes_extras=instrucoes_extras,
+            usar_rag=usar_rag, max_token_out=max_token_out, politica_orcamento=politica_orcamento,
+            saida_estruturada=saida_estruturada
+        )
+        encerrada = threading.Event()
+
+        def executar(provedor: ILLMProvider, modelo: Optional[str]) -> Dict[str, Any]:
+            def notificar(progresso: Dict[str, Any]):
+                if encerrada.is_set():
+                    raise GeracaoSuperada(f"Geração de '{modelo}' abandonada: a outra requisição terminou antes.")
+                if ao_progredir:
+                    ao_progredir(progresso)
+            return provedor.executar_prompt(model_name=modelo, ao_progredir=notificar, **parametros)
+
+        executor = ThreadPoolExecutor(max_workers=2)
+        try:
+            futuro_primario = executor.submit(executar, self.primario, model_name)
+            try:
+                return futuro_primario.result(timeout=self.latencia_maxima_s)
+            except TempoEsgotado:
+                print(f"AVISO: '{model_name}' sem resposta em {self.latencia_maxima_s}s; enviando também para '{self.modelo_reserva}'.")
+                pendentes = {futuro_primario}
+            except FalhaNaChamadaAoLLM as e:
+                if not e.limite_de_taxa:
+                    raise
+                print(f"AVISO: '{model_name}' continua limitado pela API; usando o modelo de reserva '{self.modelo_reserva}'.")
+                pendentes = set()
+
+            futuro_reserva = executor.submit(executar, self.reserva, self.modelo_reserva)
+            pendentes.add(futuro_reserva)
+            ultimo_erro: Optional[BaseException] = None
+            while pendentes:
+                concluidos, pendentes = wait(pendentes, return_when=FIRST_COMPLETED)
+                for futuro in concluidos:
+                    try:
+                        resultado = futuro.result()
+                    except Exception as e:
+                        ultimo_erro = e
+                        continue
+                    if futuro is futuro_reserva:
+                        resultado = dict(resultado, modelo_reserva_utilizado=self.modelo_reserva)
+                    return resultado
+            raise ultimo_erro
+        finally:
+            encerrada.set()
+            executor.shutdown(wait=False)
+
+    async def executar_prompt_async(
+        self,
+        tipo_tarefa: str,
+        prompt_principal: str,
+        instrucoes_extras: str = "",
+        usar_rag: bool = False,
+        model_name: Optional[str] = None,
+        max_token_out: int = 15000,
+        politica_orcamento: Optional[str] = None,
+        ao_progredir: Optional[CallbackProgresso] = None,
+        saida_estruturada: bool = False
+    ) -> Dict[str, Any]:
+        parametros = dict(
+            tipo_tarefa=tipo_tarefa, prompt_principal=prompt_principal, instrucoes_extras=instrucoes_extras,
+            usar_rag=usar_rag, max_token_out=max_token_out, politica_orcamento=politica_orcamento,
+            saida_estruturada=saida_estruturada
+        )
+        # Provedores sem cliente assíncrono geram em uma thread, que o cancelamento não interrompe
+        encerrada = threading.Event()
+        tarefas = []
+
+        def executar(provedor: ILLMProvider, modelo: Optional[str]) -> asyncio.Task:
+            def notificar(progresso: Dict[str, Any]):
+                if encerrada.is_set():
+                    raise GeracaoSuperada(f"Geração de '{modelo}' abandonada: a outra requisição terminou antes.")
+                if ao_progredir:
+                    ao_progredir(progresso)
+            tarefa = asyncio.ensure_future(provedor.executar_prompt_async(model_name=modelo, ao_progredir=notificar, **parametros))
+            tarefas.append(tarefa)
+            return tarefa
+
+        try:
+            tarefa_primaria = executar(self.primario, model_name)
+            try:
+                return await asyncio.wait_for(asyncio.shield(tarefa_primaria), self.latencia_maxima_s)
+            except asyncio.TimeoutError:
+                print(f"AVISO: '{model_name}' sem resposta em {self.latencia_maxima_s}s; enviando também para '{self.modelo_reserva}'.")
+                pendentes = {tarefa_primaria}
+            except FalhaNaChamadaAoLLM as e:
+                if not e.limite_de_taxa:
+                    raise
+                print(f"AVISO: '{model_name}' continua limitado pela API; usando o modelo de reserva '{self.modelo_reserva}'.")
+                pendentes = set()
+
+            tarefa_reserva = executar(self.reserva, self.modelo_reserva)
+            pendentes.add(tarefa_reserva)
+            ultimo_erro: Optional[BaseException] = None
+            while pendentes:
+                concluidas, pendentes = await asyncio.wait(pendentes, return_when=asyncio.FIRST_COMPLETED)
+                for tarefa in concluidas:
+                    if tarefa.exception() is not None:
+                        ultimo_erro = tarefa.exception()
+                        continue
+                    resultado = tarefa.result()
+                    if tarefa is tarefa_reserva:
+                        resultado = dict(resultado, modelo_reserva_utilizado=self.modelo_reserva)
+                    return resultado
+            raise ultimo_erro
+        finally:
+            encerrada.set()
+            for tarefa in tarefas:
+                tarefa.cancel()
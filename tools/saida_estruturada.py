@@ -0,0 +1,226 @@
+# Arquivo: tools/saida_estruturada.py
+
+import json
+import os
+import re
+from typing import Any, Dict, Optional, Tuple
+
+from domain.interfaces.llm_provider_interface import ILLMProvider
+
+# Nome da ferramenta usada pelo Claude para devolver a resposta estruturada
+FERRAMENTA_RESPOSTA = "registrar_resposta"
+
+# Tipo de tarefa (prompt tools/prompts/reparo_json.md) da correção de trechos inválidos
+TAREFA_REPARO_JSON = "reparo_json"
+
+# Número máximo de trechos reenviados ao modelo para correção em uma mesma resposta
+MAX_REPAROS_JSON = int(os.getenv("LLM_MAX_REPAROS_JSON", "3"))
+
+# Caracteres reenviados antes e depois da posição do erro
+JANELA_REPARO_ANTES = 1500
+JANELA_REPARO_DEPOIS = 500
+
+_MUDANCA = {
+    "type": "object",
+    "properties": {
+        "caminho_do_arquivo": {"type": "string"},
+        "status": {"type": "string", "enum": ["ADICIONADO", "CRIADO", "MODIFICADO", "REMOVIDO"]},
+        "conteudo": {"type": ["string", "null"]},
+        "justificativa": {"type": "string"},
+    },
+    "required": ["caminho_do_arquivo", "status"],
+}
+
+_MUDANCA_PATCH = {
+    "type": "object",
+    "properties": dict(
+        _MUDANCA["properties"],
+        diff={"type": "string"},
+        substituicoes={
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"buscar": {"type": "string"}, "substituir": {"type": "string"}},
+                "required": ["buscar", "substituir"],
+            },
+        },
+    ),
+    "required": ["caminho_do_arquivo", "status"],
+}
+
+ESQUEMA_RELATORIO = {
+    "type": "object",
+    "properties": {"relatorio": {"type": "string"}},
+    "required": ["relatorio"],
+}
+
+ESQUEMA_CONJUNTO_DE_MUDANCAS = {
+    "type": "object",
+    "properties": {
+        "resumo_geral": {"type": "string"},
+        "conjunto_de_mudancas": {"type": "array", "items": _MUDANCA},
+    },
+    "required": ["resumo_geral", "conjunto_de_mudancas"],
+}
+
+# Esquemas das respostas por tipo de tarefa. Tarefas 'relatorio_*' usam o
+# ESQUEMA_RELATORIO; as demais, sem esquema próprio, apenas um objeto JSON.
+ESQUEMAS_POR_TAREFA: Dict[str, Dict[str, Any]] = {
+    "aplicacao_de_mudancas": ESQUEMA_CONJUNTO_DE_MUDANCAS,
+    "criando_codigos": ESQUEMA_CONJUNTO_DE_MUDANCAS,
+    "aplicacao_de_mudancas_patch": {
+        "type": "object",
+        "properties": {
+            "resumo_geral": {"type": "string"},
+            "conjunto_de_mudancas": {"type": "array", "items": _MUDANCA_PATCH},
+        },
+        "required": ["resumo_geral", "conjunto_de_mudancas"],
+    },
+    "agrupamento_commits": {
+        "type": "object",
+        "properties": {"resumo_geral": {"type": "string"}},
+        "additionalProperties": {
+            "type": "object",
+            "properties": {
+                "resumo_do_pr": {"type": "string"},
+                "descricao_do_pr": {"type": "string"},
+                "conjunto_de_mudancas": {"type": "array", "items": _MUDANCA},
+            },
+            "required": ["resumo_do_pr", "descricao_do_pr", "conjunto_de_mudancas"],
+        },
+        "required": ["resumo_geral"],
+    },
+    "geracao_codigo_a_partir_de_reuniao": ESQUEMA_RELATORIO,
+    TAREFA_REPARO_JSON: {
+        "type": "object",
+        "properties": {"trecho_corrigido": {"type": "string"}},
+        "required": ["trecho_corrigido"],
+    },
+}
+
+def obter_esquema(tipo_tarefa: str) -> Dict[str, Any]:
+    """Esquema JSON da resposta esperada para o tipo de tarefa."""
+    if tipo_tarefa in ESQUEMAS_POR_TAREFA:
+        return ESQUEMAS_POR_TAREFA[tipo_tarefa]
+    if tipo_tarefa.startswith("relatorio_"):
+        return ESQUEMA_RELATORIO
+    return {"type": "object"}
+
+class RespostaJsonInvalida(ValueError):
+    """
+    A resposta do modelo não é um JSON válido.
+
+    Attributes:
+        texto (str): Texto da resposta, já sem as cercas de markdown
+        posicao (int): Posição do erro no texto
+    """
+
+    def __init__(self, mensagem: str, texto: str, posicao: int):
+        super().__init__(mensagem)
+        self.texto = texto
+        self.posicao = posicao
+
+_PADRAO_VIRGULA_FINAL = re.compile(r',(\s*[}\]])')
+
+def extrair_json(texto: str) -> Any:
+    """
+    Decodifica a resposta do modelo, corrigindo localmente os defeitos mais comuns:
+    cercas ```json, texto antes ou depois do objeto e vírgulas antes de '}' ou ']'.
+
+    Raises:
+        RespostaJsonInvalida: Se o texto continuar inválido após as correções locais
+    """
+    texto = (texto or "").replace("```json", "").replace("```", "").strip()
+    try:
+        return json.loads(texto)
+    except json.JSONDecodeError:
+        inicio, fim = texto.find('{'), texto.rfind('}')
+        candidato = texto[inicio:fim + 1] if 0 <= inicio < fim else texto
+        candidato = _PADRAO_VIRGULA_FINAL.sub(r'\1', candidato)
+        try:
+            return json.loads(candidato)
+        except json.JSONDecodeError as erro:
+            raise RespostaJsonInvalida(f"Resposta não é um JSON válido: {erro}", candidato, erro.pos) from erro
+
+def _fora_de_escape(texto: str, posicao: int) -> int:
+    """Avança a posição de corte para não separar uma barra invertida do caractere que ela escapa."""
+    barras = 0
+    while posicao - barras > 0 and texto[posicao - barras - 1] == '\\':
+        barras += 1
+    return min(posicao + barras % 2, len(texto))
+
+class ReparadorDeJson:
+    """
+    Decodifica respostas JSON do modelo, reenviando apenas o trecho quebrado.
+
+    Se as correções locais (extrair_json) não bastarem, o trecho em torno da
+    posição do erro é enviado ao modelo com o prompt 'reparo_json' e saída
+    estruturada, e a versão corrigida substitui o trecho na resposta. O
+    processo se repete para o próximo erro, até MAX_REPAROS_JSON trechos.
+    Nada é reanalisado: a correção custa apenas o trecho reenviado.
+    """
+
+    def __init__(self, llm_provider: ILLMProvider, max_reparos: Optional[int] = None):
+        self.llm_provider = llm_provider
+        self.max_reparos = MAX_REPAROS_JSON if max_reparos is None else max_reparos
+
+    def carregar(self, texto: str, model_name: Optional[str] = None) -> Any:
+        """
+        Raises:
+            RespostaJsonInvalida: Se a resposta continuar inválida após os reparos
+        """
+        for tentativa in range(self.max_reparos + 1):
+            try:
+                return extrair_json(texto)
+            except RespostaJsonInvalida as e:
+                if tentativa == self.max_reparos:
+                    raise
+                print(f"AVISO: {e} Reenviando o trecho em torno da posição {e.posicao} para correção.")
+                texto = self._reparar_trecho(e, model_name)
+
+    async def carregar_async(self, texto: str, model_name: Optional[str] = None) -> Any:
+        """Versão de carregar() com os reparos pedidos via executar_prompt_async."""
+        for tentativa in range(self.max_reparos + 1):
+            try:
+                return extrair_json(texto)
+            except RespostaJsonInvalida as e:
+                if tentativa == self.max_reparos:
+                    raise
+                print(f"AVISO: {e} Reenviando o trecho em torno da posição {e.posicao} para correção.")
+                inicio, fim, requisicao = self._requisicao_de_reparo(e, model_name)
+                resultado = await self.llm_provider.executar_prompt_async(**requisicao)
+                texto = self._substituir_trecho(e.texto, inicio, fim, resultado)
+
+    def _reparar_trecho(self, erro: RespostaJsonInvalida, model_name: Optional[str]) -> str:
+        inicio, fim, requisicao = self._requisicao_de_reparo(erro, model_name)
+        resultado = self.llm_provider.executar_prompt(**requisicao)
+        return self._substituir_trecho(erro.texto, inicio, fim, resultado)
+
+    @staticmethod
+    def _requisicao_de_reparo(erro: RespostaJsonInvalida, model_name: Optional[str]) -> Tuple[int, int, Dict[str, Any]]:
+        """
+        Limites do trecho em torno do erro e os argumentos da chamada que o corrige.
+
+        O trecho é cortado por caracteres, não por linhas: o JSON do modelo
+        costuma manter cada 'conteudo' em uma única linha, e a linha inteira
+        pode ser a resposta toda.
+        """
+        texto = erro.texto
+        motivo = getattr(erro.__cause__, 'msg', str(erro))
+        inicio = _fora_de_escape(texto, max(erro.posicao - JANELA_REPARO_ANTES, 0))
+        fim = _fora_de_escape(texto, min(erro.posicao + JANELA_REPARO_DEPOIS, len(texto)))
+        trecho = texto[inicio:fim]
+        return inicio, fim, dict(
+            tipo_tarefa=TAREFA_REPARO_JSON,
+            prompt_principal=trecho,
+            instrucoes_extras=f"Erro do decodificador JSON neste trecho: {motivo}.",
+            model_name=model_name,
+            # O trecho volta escapado dentro de 'trecho_corrigido': até um token por caractere
+            max_token_out=len(trecho) + 256,
+            saida_estruturada=True
+        )
+
+    @staticmethod
+    def _substituir_trecho(texto: str, inicio: int, fim: int, resultado: Dict[str, Any]) -> str:
+        trecho = extrair_json(resultado.get('reposta_final', '')).get('trecho_corrigido', '')
+        return texto[:inicio] + trecho + texto[fim:]
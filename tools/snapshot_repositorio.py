@@ -0,0 +1,118 @@
+# Arquivo: tools/snapshot_repositorio.py
+
+import json
+import hashlib
+from collections import namedtuple
+from typing import Iterable, Iterator, List, Optional
+
+from domain.interfaces.blob_cache_interface import IBlobCache
+from tools.blob_cache import obter_cache_padrao
+from tools.empacotamento_prompt import Arquivo
+
+# Mesmo prefixo dos blobs guardados pelos leitores: o snapshot reaproveita essas entradas
+PREFIXO_CONTEUDO = "blob:"
+PREFIXO_MANIFESTO = "snapshot:"
+
+# Arquivos lidos de um commit, na ordem de leitura
+Snapshot = namedtuple('Snapshot', ['commit_sha', 'arquivos'])
+
+def sha_do_blob(dados: bytes) -> str:
+    """Calcula o SHA do objeto blob que o Git atribui a este conteúdo."""
+    return hashlib.sha1(b"blob %d\0" % len(dados) + dados).hexdigest()
+
+class GravacaoDeSnapshot:
+    """
+    Registra os arquivos de uma leitura à medida que são consumidos.
+
+    Attributes:
+        completa (bool): Se todos os arquivos da leitura foram consumidos
+    """
+
+    def __init__(self, cache: IBlobCache):
+        self.cache = cache
+        self.completa = False
+        self._manifesto: List[list] = []
+
+    def registrar(self, arquivos: Iterable[Arquivo]) -> Iterator[Arquivo]:
+        """
+        Repassa os arquivos, anotando no manifesto o SHA do blob Git de cada um.
+
+        Os leitores via API já guardam o conteúdo em 'blob:<sha>'; nesse caso a
+        entrada existente é reaproveitada, sem uma segunda cópia. O conteúdo só
+        é gravado quando o leitor não o guardou (tarball, zip, espelho local).
+        """
+        for caminho, tamanho, conteudo in arquivos:
+            dados = conteudo.encode('utf-8')
+            sha_blob = sha_do_blob(dados)
+            if self.cache.get(f"{PREFIXO_CONTEUDO}{sha_blob}") is None:
+                self.cache.set(f"{PREFIXO_CONTEUDO}{sha_blob}", dados)
+            self._manifesto.append([caminho, tamanho, sha_blob])
+            yield caminho, tamanho, conteudo
+        self.completa = True
+
+    def concluir(self, commit_sha: Optional[str]) -> Optional[str]:
+        """
+        Grava o manifesto do snapshot.
+
+        Returns:
+            Optional[str]: Identificador do snapshot (hash do manifesto), ou None
+                se a leitura não foi consumida até o fim
+        """
+        if not self.completa:
+            return None
+        corpo = json.dumps({'commit_sha': commit_sha, 'arquivos': self._manifesto}).encode('utf-8')
+        snapshot_id = hashlib.sha256(corpo).hexdigest()
+        self.cache.set(f"{PREFIXO_MANIFESTO}{snapshot_id}", corpo)
+        print(f"Snapshot do repositório registrado: {snapshot_id} ({len(self._manifesto)} arquivos, commit {commit_sha}).")
+        return snapshot_id
+
+class ArmazemDeSnapshots:
+    """
+    Snapshots dos arquivos lidos de um repositório, reaproveitados entre as etapas de um job.
+
+    O snapshot é um manifesto [caminho, tamanho, SHA do blob Git] identificado
+    pelo próprio hash; o conteúdo de cada arquivo fica nas entradas 'blob:<sha>'
+    do cache, as mesmas que os leitores usam, de modo que cada blob ocupa
+    espaço uma única vez. O job guarda apenas o identificador: etapas
+    posteriores, inclusive as retomadas após uma aprovação, carregam o snapshot
+    sem consultar o provedor. Para que isso funcione entre processos, o cache
+    precisa do nível em disco (REPO_CACHE_DIR).
+
+    Example:
+        >>> armazem = ArmazemDeSnapshots()
+        >>> gravacao = armazem.iniciar_gravacao()
+        >>> arquivos = list(gravacao.registrar(reader.iter_repository("org/repo", "relatorio_cleancode")))
+        >>> snapshot_id = gravacao.concluir(reader.ultimo_commit_sha)
+        >>> armazem.carregar(snapshot_id).arquivos == arquivos
+        True
+    """
+
+    def __init__(self, cache: Optional[IBlobCache] = None):
+        self.cache = cache or obter_cache_padrao()
+
+    def iniciar_gravacao(self) -> GravacaoDeSnapshot:
+        return GravacaoDeSnapshot(self.cache)
+
+    def carregar(self, snapshot_id: str) -> Optional[Snapshot]:
+        """
+        Carrega um snapshot.
+
+        Returns:
+            Optional[Snapshot]: Commit e arquivos do snapshot, ou None se o manifesto
+                ou o conteúdo de algum arquivo já tiver sido despejado do cache
+        """
+        corpo = self.cache.get(f"{PREFIXO_MANIFESTO}{snapshot_id}")
+        if corpo is None:
+            print(f"AVISO: Snapshot '{snapshot_id}' não está mais no cache.")
+            return None
+        manifesto = json.loads(corpo)
+
+        arquivos = []
+        for caminho, tamanho, sha_blob in manifesto['arquivos']:
+            dados = self.cache.get(f"{PREFIXO_CONTEUDO}{sha_blob}")
+            if dados is None:
+                print(f"AVISO: Conteúdo de '{caminho}' do snapshot '{snapshot_id}' não está mais no cache.")
+                return None
+            arquivos.append((caminho, tamanho, dados.decode('utf-8')))
+        print(f"Snapshot '{snapshot_id}' carregado do cache ({len(arquivos)} arquivos, commit {manifesto['commit_sha']}).")
+        return Snapshot(manifesto['commit_sha'], arquivos)
@@ -0,0 +1,242 @@
+# Arquivo: tools/workflow_registry.py
+
+import os
+import time
+import json
+import hashlib
+import threading
+import yaml
+from typing import Any, Dict, List, Optional
+from tools.filtro_arquivos import LimitesDeLeitura, compilar_globs
+
+# Intervalo mínimo (segundos) entre verificações do mtime de workflows.yaml
+INTERVALO_VERIFICACAO_PADRAO = 2.0
+
+def _caminho_yaml_padrao() -> str:
+    """Localiza o workflows.yaml na raiz do projeto (ou em WORKFLOWS_YAML_PATH)."""
+    caminho = os.getenv("WORKFLOWS_YAML_PATH")
+    if caminho:
+        return caminho
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    return os.path.join(project_root, 'workflows.yaml')
+
+class FiltroDeArquivos:
+    """
+    Seleção de arquivos de um workflow, compilada uma única vez.
+
+    Um caminho é relevante se terminar com uma das extensões do workflow ou casar
+    com um glob de 'include', e não estiver excluído pelos limites ('limits.exclude').
+    As extensões são pré-compiladas em uma tupla de sufixos verificada por uma
+    única chamada a str.endswith (em C), e os globs em uma única expressão regular.
+
+    Attributes:
+        extensoes (List[str]): Extensões do workflow (ex: ['.py', '.tf'])
+        inclusoes (List[str]): Globs (sintaxe .gitignore) incluídos além das extensões
+        limites (LimitesDeLeitura): Exclusões e limites de tamanho do workflow
+        assinatura (str): Impressão digital da configuração, usada em chaves de cache
+
+    Example:
+        >>> filtro = FiltroDeArquivos(['.py'], inclusoes=['Dockerfile'])
+        >>> filtro.corresponde('src/app.py'), filtro.corresponde('Dockerfile')
+        (True, True)
+        >>> filtro.corresponde('vendor/lib.py')
+        False
+    """
+
+    def __init__(
+        self,
+        extensoes: List[str],
+        inclusoes: Optional[List[str]] = None,
+        limites: Optional[LimitesDeLeitura] = None
+    ):
+        self.extensoes = list(extensoes or [])
+        self.inclusoes = list(inclusoes or [])
+        self.limites = limites or LimitesDeLeitura()
+        self._sufixos = tuple(sorted(set(self.extensoes)))
+        self._corresponde_inclusao = compilar_globs(self.inclusoes) if self.inclusoes else None
+
+        configuracao = {
+            'extensoes': sorted(self.extensoes),
+            'inclusoes': self.inclusoes,
+            'exclusoes': self.limites.exclusoes,
+            'max_bytes_arquivo': self.limites.max_bytes_arquivo,
+            'max_bytes_total': self.limites.max_bytes_total,
+        }
+        self.assinatura = hashlib.sha1(json.dumps(configuracao, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+
+    def corresponde_extensao(self, caminho: str) -> bool:
+        """Indica se o caminho termina com alguma das extensões do workflow."""
+        return bool(self._sufixos) and caminho.endswith(self._sufixos)
+
+    def corresponde(self, caminho: str) -> bool:
+        """Indica se o caminho deve ser lido para o workflow."""
+        selecionado = self.corresponde_extensao(caminho) or (
+            self._corresponde_inclusao is not None and bool(self._corresponde_inclusao(caminho))
+        )
+        return selecionado and not self.limites.excluido(caminho)
+
+class WorkflowRegistry:
+    """
+    Registro único por processo das definições de workflows.yaml, já compiladas.
+
+    Servidor e leitores de repositório consultam a mesma instância: o YAML é
+    lido uma vez e os filtros de arquivos (FiltroDeArquivos) são compilados por
+    workflow e por tipo_analise. Quando o mtime do arquivo muda, o registro é
+    recompilado na próxima consulta; se a nova versão for inválida, a anterior
+    continua em uso.
+
+    Um tipo_analise compartilhado por vários workflows (ex: 'aplicacao_de_mudancas')
+    usa, por padrão, o filtro do último workflow que o declara. Informe
+    nome_workflow em obter_filtro para usar o filtro do workflow em execução.
+
+    Attributes:
+        caminho_yaml (Optional[str]): Arquivo de origem (None se criado a partir de um dict)
+        intervalo_verificacao (float): Intervalo mínimo entre verificações do mtime
+
+    Example:
+        >>> registry = WorkflowRegistry.de_config({'relatorio_sast': {'extensions': ['.py']}})
+        >>> registry.obter_filtro('relatorio_sast').corresponde('app/main.py')
+        True
+    """
+
+    def __init__(
+        self,
+        caminho_yaml: Optional[str] = None,
+        intervalo_verificacao: float = INTERVALO_VERIFICACAO_PADRAO,
+        config: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Carrega e compila os workflows.
+
+        Args:
+            caminho_yaml (Optional[str]): Caminho do workflows.yaml. Se None e config
+                também for None, usa o arquivo da raiz do projeto
+            intervalo_verificacao (float): Segundos entre verificações do mtime
+            config (Optional[Dict[str, Any]]): Definições já carregadas; desabilita o recarregamento
+
+        Raises:
+            Exception: Se o arquivo não puder ser lido ou tiver formato inválido
+        """
+        self.caminho_yaml = None if config is not None else (caminho_yaml or _caminho_yaml_padrao())
+        self.intervalo_verificacao = intervalo_verificacao
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._proxima_verificacao = 0.0
+
+        if config is not None:
+            self._compilar(config)
+        else:
+            self._mtime = self._obter_mtime()
+            self._compilar(self._ler_yaml())
+            self._proxima_verificacao = time.monotonic() + self.intervalo_verificacao
+
+    @classmethod
+    def de_config(cls, config: Dict[str, Any]) -> 'WorkflowRegistry':
+        """Cria um registro a partir de definições em memória (sem arquivo nem recarregamento)."""
+        return cls(config=config)
+
+    def _obter_mtime(self) -> Optional[int]:
+        try:
+            return os.stat(self.caminho_yaml).st_mtime_ns
+        except OSError:
+            return None
+
+    def _ler_yaml(self) -> Dict[str, Any]:
+        print(f"Carregando workflows do arquivo: {self.caminho_yaml}")
+        with open(self.caminho_yaml, 'r', encoding='utf-8') as f:
+            return yaml.safe_load(f) or {}
+
+    def _compilar(self, config: Dict[str, Any]):
+        """Compila os filtros e publica o novo estado de uma só vez."""
+        workflows = {}
+        filtros_por_workflow = {}
+        filtros_por_tipo = {}
+        tipos_por_workflow = {}
+        for nome, dados in config.items():
+            workflows[nome] = dados
+            extensoes = dados.get('extensions', [])
+            if not extensoes and not dados.get('include'):
+                continue
+            filtro = FiltroDeArquivos(extensoes, dados.get('include'), LimitesDeLeitura.de_config(dados.get('limits')))
+
+            tipos = {nome.lower()}
+            for step in dados.get('steps', []):
+                tipo_analise_step = step.get('params', {}).get('tipo_analise')
+                if tipo_analise_step:
+                    tipos.add(tipo_analise_step.lower())
+            filtros_por_workflow[nome.lower()] = filtro
+            tipos_por_workflow[nome.lower()] = tipos
+            for tipo in tipos:
+                filtros_por_tipo[tipo] = filtro
+
+        self._workflows = workflows
+        self._filtros_por_workflow = filtros_por_workflow
+        self._tipos_por_workflow = tipos_por_workflow
+        self._filtros_por_tipo = filtros_por_tipo
+
+    def _recarregar_se_alterado(self):
+        """Recompila o registro se o mtime do arquivo mudou desde a última leitura."""
+        if self.caminho_yaml is None or time.monotonic() < self._proxima_verificacao:
+            return
+        with self._lock:
+            if time.monotonic() < self._proxima_verificacao:
+                return
+            self._proxima_verificacao = time.monotonic() + self.intervalo_verificacao
+            mtime = self._obter_mtime()
+            if mtime is None or mtime == self._mtime:
+                return
+            try:
+                self._compilar(self._ler_yaml())
+                self._mtime = mtime
+                print("Workflows recarregados após alteração do arquivo.")
+            except Exception as e:
+                print(f"ERRO ao recarregar workflows; mantendo a versão anterior. Erro: {e}")
+
+    def nomes(self) -> List[str]:
+        """Retorna os nomes dos workflows, na ordem do arquivo."""
+        self._recarregar_se_alterado()
+        return list(self._workflows.keys())
+
+    def obter_workflow(self, nome: str) -> Optional[Dict[str, Any]]:
+        """Retorna a definição bruta de um workflow, ou None se não existir."""
+        self._recarregar_se_alterado()
+        return self._workflows.get(nome)
+
+    def obter_filtro(self, tipo_analise: str, nome_workflow: Optional[str] = None) -> Optional[FiltroDeArquivos]:
+        """
+        Retorna o filtro de arquivos de um tipo de análise.
+
+        Args:
+            tipo_analise (str): Nome de um workflow ou tipo_analise de um step
+            nome_workflow (Optional[str]): Workflow em execução. Se o tipo_analise
+                pertencer a ele, o filtro desse workflow tem precedência
+
+        Returns:
+            Optional[FiltroDeArquivos]: Filtro compilado, ou None se o tipo de
+                análise não existir ou não tiver extensões definidas
+        """
+        self._recarregar_se_alterado()
+        tipo = tipo_analise.lower()
+        if nome_workflow:
+            workflow = nome_workflow.lower()
+            if tipo in self._tipos_por_workflow.get(workflow, ()):
+                return self._filtros_por_workflow[workflow]
+        return self._filtros_por_tipo.get(tipo)
+
+_registry_padrao: Optional[WorkflowRegistry] = None
+_lock_registry_padrao = threading.Lock()
+
+def obter_registry_padrao() -> WorkflowRegistry:
+    """
+    Retorna o registro de workflows compartilhado pelo processo, criando-o na primeira chamada.
+
+    O arquivo é o workflows.yaml da raiz do projeto, ou o indicado em WORKFLOWS_YAML_PATH.
+
+    Returns:
+        WorkflowRegistry: Instância única por processo
+    """
+    global _registry_padrao
+    with _lock_registry_padrao:
+        if _registry_padrao is None:
+            _registry_padrao = WorkflowRegistry()
+        return _registry_padrao